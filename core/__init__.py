@@ -1,13 +1,28 @@
 # core/__init__.py
+import csv
+import glob
 import os
 import re
+import shutil
 import subprocess
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-from jinja2 import Environment, Template
+from jinja2 import Environment, FileSystemLoader, Template
 
-from core.log import print_blue, print_green, print_red, print_yellow
+from core.job import FLOW_PROFILES
+from core.log import (
+    flush,
+    log,
+    print_blue,
+    print_green,
+    print_red,
+    print_yellow,
+)
+from core.metrics import FlowMetrics
+from core.scratch import Scratch
+from core.stages import Stage, StageGraph
 
 # Diretórios principais
 CORE_DIR: str = os.path.dirname(os.path.abspath(__file__))
@@ -18,6 +33,9 @@ CONSTRAINTS_DIR: str = os.path.normpath(
     os.path.join(CORE_DIR, '..', 'constraints')
 )
 
+# Caminhos críticos guardados por run (o Vivado reporta -max_paths 10)
+CRITICAL_PATHS: int = 10
+
 def ensure_env(var_name: str, default_value: str) -> str:
     """
     Garante que uma variável de ambiente esteja definida.
@@ -27,9 +45,17 @@ def ensure_env(var_name: str, default_value: str) -> str:
     """
     if var_name not in os.environ:
         os.environ[var_name] = default_value
-        print(f"[INFO] Variável de ambiente '{var_name}' não existia. Setada para: {default_value}")
+        log(
+            'info',
+            f"Variável de ambiente '{var_name}' não existia. "
+            f'Setada para: {default_value}',
+        )
     else:
-        print(f"[INFO] Variável de ambiente '{var_name}' já existe: {os.environ[var_name]}")
+        log(
+            'info',
+            f"Variável de ambiente '{var_name}' já existe: "
+            f'{os.environ[var_name]}',
+        )
     return os.environ[var_name]
 
 
@@ -63,6 +89,21 @@ def find_clock_signal(verilog_file: str) -> Optional[str]:
     return clk_signal
 
 
+@lru_cache(maxsize=None)
+def get_template_env() -> Environment:
+    """
+    Retorna o Environment Jinja2 compartilhado pelos flows.
+
+    O Environment guarda os templates já compilados, então processos de
+    longa duração (daemon, workers) só compilam cada template uma vez.
+    """
+    return Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+
+
 def write_template_to_file(
     env: Environment,
     template_name: str,
@@ -71,20 +112,72 @@ def write_template_to_file(
 ) -> str:
     template: Template = env.get_template(template_name)
     output: str = template.render(context)
+    # Conteúdo igual: mantém o mtime, que o make do ORFS compara
+    if os.path.exists(filename):
+        with open(filename, 'r') as f:
+            if f.read() == output:
+                return filename
     with open(filename, 'w') as f:
         f.write(output)
     return filename
 
 
-def run_cmd(command: List[str], cwd: Optional[str] = None) -> None:
-    print_yellow(f"Running command: {' '.join(command)}")
-    subprocess.run(command, cwd=cwd, check=False)
+class ToolError(RuntimeError):
+    """An EDA tool exited with an error."""
+
+
+def run_cmd(
+    command: List[str], cwd: Optional[str] = None, check: bool = True
+) -> None:
+    """Runs a tool with the output of the flow.
+
+    Raises:
+        ToolError: If ``check`` and the tool exits with a non-zero status.
+    """
+    # Amarelo, mas informativo: não é um aviso
+    log('info', f"Running command: {' '.join(command)}", color='yellow')
+    # A ferramenta escreve no mesmo fd: esvazia o buffer antes
+    flush()
+    result = subprocess.run(command, cwd=cwd, check=False)
+    if check and result.returncode != 0:
+        raise ToolError(
+            f'{os.path.basename(command[0])} exited with status '
+            f'{result.returncode}'
+        )
+
+
+def remove_paths(patterns: List[str], cwd: Optional[str] = None) -> None:
+    """Removes files and directories matching glob patterns.
+
+    Unlike ``run_cmd(['rm', ...])``, which runs without a shell, the
+    patterns are expanded here, so ``'*.log'`` actually matches.
+    """
+    base = cwd or os.getcwd()
+    log('info', f"Removing: {' '.join(patterns)}", color='yellow')
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(base, pattern)):
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
 
 
 # -------------------------
 # Classe base para flows
 # -------------------------
 class ImplementationFlow(ABC):
+    # Diretórios de intermediários que podem ir para tmpfs (core.scratch)
+    # e o espaço que uma execução típica ocupa neles
+    SCRATCH_DIRS: List[str] = []
+    SCRATCH_ESTIMATE: int = 1 << 30
+    # Se a análise de potência aceita atividade de simulação (SAIF/VCD)
+    SUPPORTS_ACTIVITY: bool = False
+    # Estágios independentes executados ao mesmo tempo (core.stages)
+    STAGE_JOBS: int = 2
+
     def __init__(
         self,
         technology: str,
@@ -93,6 +186,11 @@ class ImplementationFlow(ABC):
         top_module: str,
         include_dirs: List[str],
         env: Environment,
+        seed: Optional[int] = None,
+        profile: str = 'full',
+        activity: Optional[str] = None,
+        activity_scope: Optional[str] = None,
+        elaborated: bool = False,
     ) -> None:
         self.technology: str = technology
         self.project_files: List[str] = project_files
@@ -100,23 +198,180 @@ class ImplementationFlow(ABC):
         self.top_module: str = top_module
         self.env: Environment = env
         self.include_dirs: List[str] = include_dirs
+        # Semente de placement, para ferramentas que a suportam
+        self.seed: Optional[int] = seed
+        if profile not in FLOW_PROFILES:
+            raise ValueError(f"Unknown flow profile '{profile}'")
+        self.profile: str = profile
+        # Atividade de chaveamento (core.activity); None = vectorless
+        self.activity: Optional[str] = activity
+        self.activity_scope: Optional[str] = activity_scope
+        # project_files é o netlist Verilog-2005 de core.frontend
+        self.elaborated: bool = elaborated
+        if activity and not self.SUPPORTS_ACTIVITY:
+            print_yellow(
+                f'{type(self).__name__} has no activity-based power '
+                f'analysis; {activity} is ignored'
+            )
 
     @abstractmethod
     def generate_project(self) -> None:
         pass
 
     @abstractmethod
-    def run_tool(self) -> None:
-        pass
+    def stages(self) -> List[Stage]:
+        """Tool stages of the flow, run after ``generate``.
+
+        See :mod:`core.stages`. A stage named ``bitgen`` is not waited
+        for by ``report``, so packing the bitstream overlaps parsing.
+        """
+
+    def source_files(self) -> List[str]:
+        """Project files and the headers and memories they may read."""
+        # Importado aqui: core.staging carrega o executor
+        from core.staging import source_closure
+
+        try:
+            _, sources = source_closure(self.project_files, self.include_dirs)
+        except FileNotFoundError:
+            return list(self.project_files)
+        return sources
 
     @abstractmethod
     def clean(self) -> None:
         pass
 
     @abstractmethod
-    def report(self, report_path: str = 'reports') -> None:
-        pass
+    def collect_metrics(self) -> FlowMetrics:
+        """Parses the reports of the last run into a :class:`FlowMetrics`."""
+
+    def print_summary(self, metrics: FlowMetrics) -> None:
+        print_blue('=' * 60)
+        print_blue(f' Flow Summary for: {metrics.technology}')
+        print_blue('=' * 60)
+
+        print_green('Clock Frequency (Fmax):')
+        if not metrics.clocks:
+            print_yellow('  No clock info found.')
+        for clk, clock in metrics.clocks.items():
+            line = f'  {clk:<20} {clock.fmax_mhz:8.2f} MHz'
+            if clock.constraint_mhz is not None:
+                status = 'OK' if clock.met else 'VIOLATED'
+                line += (
+                    f' (constraint {clock.constraint_mhz:.2f} MHz) -> {status}'
+                )
+            log('info', line)
+
+        print_green('Resource Utilization:')
+        for res, resource in metrics.resources.items():
+            line = f'  {res:<30} {resource.used:8}'
+            if resource.available:
+                line += (
+                    f' / {resource.available:<8} '
+                    f'{(resource.utilization or 0) * 100:6.1f}%'
+                )
+            log('info', line)
+
+        print_blue('=' * 60)
+
+    def write_csv(self, metrics: FlowMetrics, report_path: str) -> str:
+        csv_path = os.path.join(report_path, f'{self.technology}_report.csv')
+        with open(csv_path, 'w', newline='') as csvf:
+            writer = csv.writer(csvf)
+            writer.writerow(['Type', 'Name', 'Value'])
+            for clk, clock in metrics.clocks.items():
+                writer.writerow(['FMAX (MHz)', clk, f'{clock.fmax_mhz:.2f}'])
+            for res, resource in metrics.resources.items():
+                writer.writerow(['Resource', res, str(resource.used)])
+        return csv_path
+
+    def report(
+        self,
+        report_path: str = 'reports',
+        print_summary: bool = True,
+        write_csv: bool = True,
+    ) -> FlowMetrics:
+        """Collects the metrics of the run and feeds the enabled sinks.
+
+        Args:
+            report_path (str): Directory of the CSV summary.
+            print_summary (bool): Print the summary tables.
+            write_csv (bool): Write the CSV summary.
+
+        Returns:
+            FlowMetrics: Parsed metrics, whether or not any sink is enabled.
+        """
+        metrics = self.collect_metrics()
+
+        if print_summary:
+            self.print_summary(metrics)
+
+        if write_csv:
+            os.makedirs(report_path, exist_ok=True)
+            csv_path = self.write_csv(metrics, report_path)
+            print_green(f'CSV summary saved to: {csv_path}')
+
+        return metrics
+
+    def stage_graph(
+        self,
+        get_reports: bool = False,
+        report_path: str = 'reports',
+        clean: bool = False,
+        metrics: Optional[List[FlowMetrics]] = None,
+    ) -> StageGraph:
+        """Stages of a whole run: generate, the flow's, report and clean.
+
+        The metrics parsed by ``report`` are appended to ``metrics``.
+        """
+        nodes: List[Stage] = [
+            Stage('generate', self.generate_project, cache=False, tool=False)
+        ]
+        nodes.extend(self.stages())
+        tool_stages = [node.name for node in nodes[1:]]
+
+        if get_reports:
+            collected = metrics if metrics is not None else []
+            nodes.append(
+                Stage(
+                    'report',
+                    lambda: collected.append(
+                        self.report(report_path=report_path)
+                    ),
+                    deps=[n for n in tool_stages if n != 'bitgen'],
+                    cache=False,
+                    tool=False,
+                )
+            )
+        if clean:
+            nodes.append(
+                Stage(
+                    'clean',
+                    self.clean,
+                    deps=[node.name for node in nodes],
+                    cache=False,
+                    tool=False,
+                )
+            )
+        return StageGraph(nodes)
+
+    def run(
+        self,
+        get_reports: bool = False,
+        report_path: str = 'reports',
+        clean: bool = False,
+    ) -> Optional[FlowMetrics]:
+        """Runs the flow, reusing still valid stages of a previous run.
+
+        See :mod:`core.stages`; previous runs are those done in the same
+        directory.
 
-    def run(self) -> None:
-        self.generate_project()
-        self.run_tool()
+        Returns:
+            Optional[FlowMetrics]: Metrics of the run with ``get_reports``.
+        """
+        metrics: List[FlowMetrics] = []
+        self.stage_graph(get_reports, report_path, clean, metrics).run(
+            jobs=self.STAGE_JOBS,
+            scratch=Scratch(self.SCRATCH_DIRS, self.SCRATCH_ESTIMATE),
+        )
+        return metrics[0] if metrics else None
@@ -0,0 +1,388 @@
+"""Switching activity for activity-based power analysis.
+
+Without activity, Vivado and OpenROAD estimate dynamic power from default
+toggle rates (vectorless), which says little about how a core behaves on
+real code. The activity of a representative workload is captured as a
+VCD by the Verilator models of :mod:`core.simulation` and summarized into
+a SAIF file: per net, the time spent at 0, 1 and X and the number of
+toggles. Both tools read SAIF (Vivado ``read_saif``, OpenROAD
+``read_saif``), and a SAIF is orders of magnitude smaller than the trace.
+
+:func:`vcd_to_saif` reads the VCD as a stream, keeping only the running
+totals of each net, so its memory does not grow with the workload length;
+:func:`core.simulation.run_model` feeds it through a named pipe and the
+trace never reaches the disk. Flows given a ``.vcd`` convert it with
+:func:`ensure_saif` before the power analysis.
+
+Verilator puts the top module under a ``TOP`` scope, so the default scope
+of the design in the activity file is ``TOP/<top_module>``.
+"""
+import datetime
+import os
+import re
+import subprocess
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jinja2 import Environment
+
+from core import ToolError, write_template_to_file
+from core.log import print_blue
+from core.pdk_defines import DEFINES_BY_PDK
+from core.sta import corner_liberty_files, openroad_executable
+
+VECTORLESS = 'vectorless'
+VERILATOR_SCOPE = 'TOP'
+
+_RANGE_RE = re.compile(r'^\[(\d+)(?::(\d+))?\]$')
+_NAME_RANGE_RE = re.compile(r'^(.*?)(\[\d+(?::\d+)?\])$')
+
+
+def default_scope(top_module: str) -> str:
+    """Scope of ``top_module`` in the activity of the Verilator models."""
+    return f'{VERILATOR_SCOPE}/{top_module}'
+
+
+def power_activity(activity: Optional[str]) -> str:
+    """What a power figure is based on, as stored in the run metrics."""
+    return os.path.basename(activity) if activity else VECTORLESS
+
+
+# -------------------------
+# VCD -> SAIF
+# -------------------------
+class ActivityCounter:
+    """Running SAIF totals of the bits of every VCD identifier.
+
+    Bits live in flat lists indexed by the position assigned to each bit
+    when its variable is declared; an identifier shared by several
+    variables (aliases) is counted once.
+    """
+
+    def __init__(self) -> None:
+        self.bits: Dict[str, Tuple[int, int]] = {}  # id -> (início, largura)
+        self.value: List[str] = []
+        self.since: List[int] = []
+        self.t0: List[int] = []
+        self.t1: List[int] = []
+        self.tx: List[int] = []
+        self.tc: List[int] = []
+
+    def declare(self, code: str, width: int) -> int:
+        if code not in self.bits:
+            self.bits[code] = (len(self.value), width)
+            for column in (self.since, self.t0, self.t1, self.tx, self.tc):
+                column.extend([0] * width)
+            self.value.extend(['x'] * width)
+        return self.bits[code][0]
+
+    def start(self, time: int) -> None:
+        self.since = [time] * len(self.value)
+
+    def change(self, code: str, bits: str, time: int) -> None:
+        entry = self.bits.get(code)
+        if entry is None:
+            return
+        first, width = entry
+        if len(bits) < width:
+            # Como no VCD: completa com 0, ou com x/z se for o bit à esquerda
+            fill = bits[0] if bits[0] in 'xz' else '0'
+            bits = fill * (width - len(bits)) + bits
+        elif len(bits) > width:
+            bits = bits[-width:]
+
+        value = self.value
+        for offset, new in enumerate(bits):
+            index = first + offset
+            old = value[index]
+            if new == old:
+                continue
+            self._account(index, time)
+            if old in '01' and new in '01':
+                self.tc[index] += 1
+            value[index] = new
+
+    def _account(self, index: int, time: int) -> None:
+        elapsed = time - self.since[index]
+        old = self.value[index]
+        if old == '0':
+            self.t0[index] += elapsed
+        elif old == '1':
+            self.t1[index] += elapsed
+        else:
+            self.tx[index] += elapsed
+        self.since[index] = time
+
+    def finish(self, time: int) -> None:
+        for index in range(len(self.value)):
+            self._account(index, time)
+
+
+def _header_tokens(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        yield from line.split()
+
+
+def _until_end(tokens: Iterator[str]) -> List[str]:
+    fields = []
+    for token in tokens:
+        if token == '$end':
+            break
+        fields.append(token)
+    return fields
+
+
+def vcd_to_saif(
+    vcd: IO[str], saif: IO[str], design: str = ''
+) -> Tuple[int, int]:
+    """Summarizes a VCD stream into a SAIF file.
+
+    Args:
+        vcd (IO[str]): VCD, read once from start to end.
+        saif (IO[str]): Where the SAIF is written.
+        design (str): Design name written in the SAIF header.
+
+    Returns:
+        Tuple[int, int]: Number of nets and duration, in timescale units.
+    """
+    counter = ActivityCounter()
+    # (escopo, nome do bit, índice); o escopo é uma tupla de instâncias
+    nets: List[Tuple[Tuple[str, ...], str, int]] = []
+    scope: List[str] = []
+    timescale = '1 ps'
+
+    # Cabeçalho: comandos $... terminados por $end
+    tokens = _header_tokens(vcd)
+    for token in tokens:
+        if not token.startswith('$'):
+            continue
+        fields = _until_end(tokens)
+        if token == '$enddefinitions':
+            break
+        if token == '$scope':
+            scope.append(fields[1])  # fields[0] é o tipo (module, ...)
+        elif token == '$upscope':
+            scope.pop()
+        elif token == '$timescale':
+            timescale = ' '.join(re.findall(r'\d+|[a-z]+', ''.join(fields)))
+        elif token == '$var':
+            _, size, code, name = fields[:4]
+            bit_range = fields[4] if len(fields) > 4 else ''
+            match = _NAME_RANGE_RE.match(name)
+            if not bit_range and match:
+                name, bit_range = match.groups()
+            width = int(size)
+            first = counter.declare(code, width)
+            indices = _bit_indices(bit_range, width)
+            for offset, bit in enumerate(indices):
+                bit_name = name if bit is None else f'{name}\\[{bit}\\]'
+                nets.append((tuple(scope), bit_name, first + offset))
+        # $date, $version e $comment são ignorados
+
+    # Mudanças de valor
+    start: Optional[int] = None
+    time = 0
+    for line in vcd:
+        line = line.strip()
+        if not line:
+            continue
+        head = line[0]
+        if head == '#':
+            time = int(line[1:])
+            if start is None:
+                start = time
+                counter.start(time)
+        elif head in '01xzXZ':
+            counter.change(line[1:], head.lower(), time)
+        elif head in 'bB':
+            value, code = line[1:].split()
+            counter.change(code, value.lower(), time)
+        # 'r' (reais) e comandos $dumpvars/$end não têm atividade
+    if start is None:
+        start = 0
+        counter.start(0)
+    counter.finish(time)
+
+    _write_saif(saif, counter, nets, design, timescale, time - start)
+    return len(nets), time - start
+
+
+def _bit_indices(bit_range: str, width: int) -> List[Optional[int]]:
+    """Bit numbers of a variable, MSB first (None for scalars)."""
+    match = _RANGE_RE.match(bit_range)
+    if match is None:
+        if width == 1:
+            return [None]
+        return list(range(width - 1, -1, -1))
+    msb = int(match.group(1))
+    lsb = int(match.group(2)) if match.group(2) is not None else msb
+    step = -1 if msb >= lsb else 1
+    return list(range(msb, lsb + step, step))[:width]
+
+
+def _write_saif(
+    saif: IO[str],
+    counter: ActivityCounter,
+    nets: List[Tuple[Tuple[str, ...], str, int]],
+    design: str,
+    timescale: str,
+    duration: int,
+) -> None:
+    tree: Dict[Tuple[str, ...], List[Tuple[str, int]]] = {}
+    children: Dict[Tuple[str, ...], List[Tuple[str, ...]]] = {}
+    for scope, name, index in nets:
+        for depth in range(1, len(scope) + 1):
+            if scope[:depth] not in tree:
+                tree[scope[:depth]] = []
+                children.setdefault(scope[: depth - 1], []).append(
+                    scope[:depth]
+                )
+        tree[scope].append((name, index))
+
+    saif.write(
+        '(SAIFILE\n'
+        '(SAIFVERSION "2.0")\n'
+        '(DIRECTION "backward")\n'
+        f'(DESIGN "{design}")\n'
+        f'(DATE "{datetime.datetime.now():%a %b %d %H:%M:%S %Y}")\n'
+        '(VENDOR "processor_ci_perf")\n'
+        '(PROGRAM_NAME "vcd_to_saif")\n'
+        '(VERSION "1.0")\n'
+        '(DIVIDER / )\n'
+        f'(TIMESCALE {timescale})\n'
+        f'(DURATION {duration})\n'
+    )
+
+    def write_instance(scope: Tuple[str, ...], depth: int) -> None:
+        indent = '  ' * depth
+        saif.write(f'{indent}(INSTANCE {scope[-1]}\n')
+        if tree[scope]:
+            saif.write(f'{indent}  (NET\n')
+            for name, i in tree[scope]:
+                saif.write(
+                    f'{indent}    ({name}\n'
+                    f'{indent}      (T0 {counter.t0[i]}) '
+                    f'(T1 {counter.t1[i]}) (TX {counter.tx[i]})\n'
+                    f'{indent}      (TC {counter.tc[i]}) (IG 0)\n'
+                    f'{indent}    )\n'
+                )
+            saif.write(f'{indent}  )\n')
+        for child in children.get(scope, []):
+            write_instance(child, depth + 1)
+        saif.write(f'{indent})\n')
+
+    for root in children.get((), []):
+        write_instance(root, 0)
+    saif.write(')\n')
+
+
+def convert_vcd(vcd_path: str, saif_path: str, design: str = '') -> None:
+    with open(vcd_path, 'r') as vcd, open(saif_path, 'w') as saif:
+        nets, duration = vcd_to_saif(vcd, saif, design)
+    print_blue(
+        f'Activity of {nets} nets over {duration} time units '
+        f'written to {saif_path}'
+    )
+
+
+def ensure_saif(activity: str, design: str = '') -> str:
+    """SAIF for ``activity``: the file itself, or a conversion of a VCD.
+
+    VCDs are converted into the current directory (the job's work
+    directory), next to the flow's other outputs.
+    """
+    if not activity.lower().endswith('.vcd'):
+        return activity
+    saif_path = os.path.abspath(
+        os.path.splitext(os.path.basename(activity))[0] + '.saif'
+    )
+    convert_vcd(activity, saif_path, design)
+    return saif_path
+
+
+# -------------------------
+# Potência no OpenROAD
+# -------------------------
+def power_liberty_files(technology: str, platform_dir: str) -> List[str]:
+    """Liberty files of the typical corner (the first one of the PDK)."""
+    corners = corner_liberty_files(technology, platform_dir)
+    names = list(DEFINES_BY_PDK[technology].get('sta_corners', {}))
+    for name in names:
+        if name in corners:
+            return corners[name]
+    return []
+
+
+def run_power(
+    env: Environment,
+    orfs_path: str,
+    technology: str,
+    results_dir: str,
+    report_dir: str,
+    activity: Optional[str] = None,
+    scope: str = '',
+) -> str:
+    """Runs ``report_power`` on the final design of an ORFS run.
+
+    The report is only written once the analysis succeeded.
+
+    Returns:
+        str: The power report.
+
+    Raises:
+        FileNotFoundError: If the final design or the liberty files are
+            missing.
+        ToolError: If OpenROAD fails; its output is left in
+            ``power.rpt.failed``.
+    """
+    odb_file = os.path.join(results_dir, '6_final.odb')
+    platform_dir = os.path.join(orfs_path, 'flow', 'platforms', technology)
+    liberty_files = power_liberty_files(technology, platform_dir)
+    if not os.path.exists(odb_file):
+        raise FileNotFoundError(f'{odb_file} not found; cannot report power')
+    if not liberty_files:
+        raise FileNotFoundError(
+            f'No liberty files for {technology} in {platform_dir}'
+        )
+
+    spef_file = os.path.join(results_dir, '6_final.spef')
+    os.makedirs(report_dir, exist_ok=True)
+    script = os.path.join(report_dir, 'power.tcl')
+    report = os.path.join(report_dir, 'power.rpt')
+    write_template_to_file(
+        env,
+        'openroad_power.j2',
+        {
+            'liberty_files': liberty_files,
+            'odb_file': odb_file,
+            'sdc_file': os.path.join(results_dir, '6_final.sdc'),
+            'spef_file': spef_file if os.path.exists(spef_file) else '',
+            'platform_dir': platform_dir,
+            'activity': activity,
+            'scope': scope,
+        },
+        script,
+    )
+
+    print_blue(
+        f"Running power analysis ({os.path.basename(activity)})"
+        if activity
+        else 'Running vectorless power analysis'
+    )
+    tmp_report = f'{report}.tmp'
+    with open(tmp_report, 'w') as out:
+        result = subprocess.run(
+            [openroad_executable(orfs_path), '-no_init', '-exit', script],
+            stdout=out,
+            stderr=subprocess.STDOUT,
+            check=False,
+        )
+    if result.returncode != 0:
+        os.replace(tmp_report, f'{report}.failed')
+        raise ToolError(
+            f'Power analysis failed (status {result.returncode}), '
+            f'see {report}.failed'
+        )
+    os.replace(tmp_report, report)
+    if os.path.exists(f'{report}.failed'):
+        os.remove(f'{report}.failed')
+    return report
@@ -0,0 +1,381 @@
+"""Retention of the files left in job work directories.
+
+Every file of a finished run is put in one artifact class by its path
+relative to the work directory, and each class has a retention policy:
+
+    metrics        CSV summaries; kept forever (also stored in the DB)
+    logs           tool logs and journals; gzip-compressed
+    reports        tool reports; gzip-compressed
+    checkpoints    bitstreams, .dcp/.odb/.gds; kept for the newest N runs
+                   of each core@target
+    intermediates  build trees and tool scratch; deleted
+    project        generated scripts and anything unclassified; kept
+
+Files declared as outputs of a completed flow stage (listed in the run's
+:data:`core.stages.STATE_FILE`) are never compressed nor deleted as
+intermediates, so the stage can still be reused when the job runs again;
+only the checkpoint retention and the quota remove them.
+
+On top of that, a disk quota over all work directories can be enforced by
+evicting the least recently used artifacts (one class of one run at a
+time) until usage fits. Metrics and project files are never evicted.
+"""
+import fnmatch
+import gzip
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from core.job import Job
+from core.results import ResultsDB
+from core.work_queue import FileQueue
+
+KEEP = 'keep'
+COMPRESS = 'compress'
+LATEST = 'latest'
+DELETE = 'delete'
+
+# Padrões avaliados em ordem; o primeiro que casar define a classe
+ARTIFACT_CLASSES: List[Tuple[str, List[str]]] = [
+    ('metrics', ['reports/*.csv']),
+    ('logs', ['*.log', '*.jou', 'logs/*', '*.str']),
+    (
+        'checkpoints',
+        [
+            '*.bit',
+            '*.fs',
+            '*.dcp',
+            '*.odb',
+            '*.gds',
+            'build/*.config',
+            'build/*.synth.json',
+            'results/*',
+        ],
+    ),
+    (
+        'reports',
+        ['reports/*', 'impl/pnr/*.rpt*', 'impl/pnr/*.tr', 'impl/pnr/*.html'],
+    ),
+    (
+        'intermediates',
+        ['build/*', '.Xil/*', 'slpp_all/*', 'objects/*', 'impl/*'],
+    ),
+]
+PROJECT = 'project'
+
+
+def classify(relpath: str) -> str:
+    """Artifact class of a path relative to a work directory."""
+    relpath = relpath.replace(os.sep, '/')
+    if relpath.endswith('.gz'):
+        relpath = relpath[: -len('.gz')]
+    for name, patterns in ARTIFACT_CLASSES:
+        if any(fnmatch.fnmatch(relpath, p) for p in patterns):
+            return name
+    return PROJECT
+
+
+@dataclass
+class ClassPolicy:
+    """What to do with one artifact class of a finished run.
+
+    Attributes:
+        action (str): ``keep``, ``compress``, ``latest`` (keep only for the
+            newest ``keep_runs`` runs of each core@target) or ``delete``.
+        keep_runs (int): Runs kept per core@target by ``latest``.
+        evictable (bool): Whether quota enforcement may delete the class.
+    """
+
+    action: str = KEEP
+    keep_runs: int = 0
+    evictable: bool = True
+
+
+def default_policies(keep_checkpoints: int = 3) -> Dict[str, ClassPolicy]:
+    return {
+        'metrics': ClassPolicy(KEEP, evictable=False),
+        'logs': ClassPolicy(COMPRESS),
+        'reports': ClassPolicy(COMPRESS),
+        'checkpoints': ClassPolicy(LATEST, keep_runs=keep_checkpoints),
+        'intermediates': ClassPolicy(DELETE),
+        PROJECT: ClassPolicy(KEEP, evictable=False),
+    }
+
+
+@dataclass
+class RunDir:
+    """Work directory of a finished run."""
+
+    path: str
+    group: str  # core@target
+    finished: float
+
+
+@dataclass
+class PruneSummary:
+    deleted_bytes: int = 0
+    compressed_bytes: int = 0  # economia da compressão
+    evicted_bytes: int = 0
+    usage_bytes: int = 0
+    actions: List[str] = field(default_factory=list)
+
+
+_SIZE_RE = re.compile(r'^\s*([0-9]*\.?[0-9]+)\s*([kmgt]?)i?b?\s*$', re.I)
+
+
+def parse_size(text: str) -> int:
+    """Bytes in a size such as ``'500M'``, ``'1.5G'`` or ``'2TiB'``."""
+    match = _SIZE_RE.match(text)
+    if match is None:
+        raise ValueError(f"Invalid size '{text}'")
+    power = 'kmgt'.find(match.group(2).lower()) + 1 if match.group(2) else 0
+    return int(float(match.group(1)) * 1024**power)
+
+
+def format_size(size: float) -> str:
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TiB'
+
+
+def _files(root: str) -> Iterator[str]:
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            yield os.path.join(dirpath, filename)
+
+
+def scan_run(path: str) -> Dict[str, List[str]]:
+    """Files of a work directory grouped by artifact class."""
+    classes: Dict[str, List[str]] = {}
+    for file_path in _files(path):
+        if os.path.islink(file_path):
+            continue
+        relpath = os.path.relpath(file_path, path)
+        classes.setdefault(classify(relpath), []).append(file_path)
+    return classes
+
+
+def _stage_outputs(path: str) -> Set[str]:
+    """Outputs of the completed flow stages of a work directory."""
+    # Import local: core.stages importa core.scratch, que importa este
+    from core.stages import STATE_FILE
+
+    try:
+        with open(os.path.join(path, STATE_FILE), 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if not isinstance(state, dict):
+        return set()
+    return {
+        os.path.normpath(os.path.join(path, output))
+        for entry in state.values()
+        if isinstance(entry, dict)
+        for output in entry.get('outputs', [])
+    }
+
+
+def _size(paths: List[str]) -> int:
+    total = 0
+    for path in paths:
+        try:
+            total += os.lstat(path).st_size
+        except OSError:
+            pass
+    return total
+
+
+def _last_used(paths: List[str]) -> float:
+    last = 0.0
+    for path in paths:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+        last = max(last, st.st_atime, st.st_mtime)
+    return last
+
+
+def _remove_empty_dirs(root: str) -> None:
+    for dirpath, _, _ in sorted(os.walk(root), reverse=True):
+        if dirpath != root:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass  # não está vazio
+
+
+def _gzip(path: str) -> int:
+    """Compresses ``path`` in place; returns the bytes saved."""
+    target = f'{path}.gz'
+    before = os.lstat(path).st_size
+    with open(path, 'rb') as src, gzip.open(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    shutil.copystat(path, target)
+    os.remove(path)
+    return before - os.lstat(target).st_size
+
+
+class ArtifactManager:
+    """Applies retention policies and a disk quota to run directories.
+
+    Args:
+        policies (Optional[Dict[str, ClassPolicy]]): Policy per artifact
+            class; see :func:`default_policies`.
+        quota_bytes (Optional[int]): Maximum total size of the runs.
+        dry_run (bool): Only report what would be done.
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, ClassPolicy]] = None,
+        quota_bytes: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> None:
+        self.policies = policies or default_policies()
+        self.quota_bytes = quota_bytes
+        self.dry_run = dry_run
+
+    def _delete(self, paths: List[str]) -> int:
+        size = _size(paths)
+        if not self.dry_run:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return size
+
+    def prune(self, runs: List[RunDir]) -> PruneSummary:
+        """Applies the policies, then the quota, to ``runs``."""
+        summary = PruneSummary()
+        runs = [r for r in runs if os.path.isdir(r.path)]
+
+        # Posição de cada run entre as mais novas do seu core@target
+        rank: Dict[str, int] = {}
+        by_group: Dict[str, List[RunDir]] = {}
+        for run in runs:
+            by_group.setdefault(run.group, []).append(run)
+        for group_runs in by_group.values():
+            group_runs.sort(key=lambda r: r.finished, reverse=True)
+            for i, run in enumerate(group_runs):
+                rank[run.path] = i
+
+        for run in runs:
+            stage_outputs = _stage_outputs(run.path)
+            for name, paths in scan_run(run.path).items():
+                policy = self.policies.get(name, ClassPolicy())
+                expired = (
+                    policy.action == LATEST
+                    and rank[run.path] >= policy.keep_runs
+                )
+                if policy.action == DELETE:
+                    paths = [
+                        p
+                        for p in paths
+                        if os.path.normpath(p) not in stage_outputs
+                    ]
+                    if not paths:
+                        continue
+                if policy.action == DELETE or expired:
+                    size = self._delete(paths)
+                    summary.deleted_bytes += size
+                    summary.actions.append(
+                        f'delete {name} of {run.path} ({format_size(size)})'
+                    )
+                elif policy.action == COMPRESS:
+                    pending = [
+                        p
+                        for p in paths
+                        if not p.endswith('.gz')
+                        and os.path.normpath(p) not in stage_outputs
+                    ]
+                    if not pending:
+                        continue
+                    summary.actions.append(
+                        f'compress {len(pending)} {name} file(s) '
+                        f'of {run.path}'
+                    )
+                    if not self.dry_run:
+                        summary.compressed_bytes += sum(
+                            _gzip(p) for p in pending
+                        )
+            if not self.dry_run:
+                _remove_empty_dirs(run.path)
+
+        if self.quota_bytes is not None:
+            self._enforce_quota(runs, summary)
+
+        summary.usage_bytes = sum(
+            _size(list(_files(run.path))) for run in runs
+        )
+        return summary
+
+    def _enforce_quota(
+        self, runs: List[RunDir], summary: PruneSummary
+    ) -> None:
+        units: List[Tuple[float, str, str, List[str]]] = []
+        usage = 0
+        for run in runs:
+            for name, paths in scan_run(run.path).items():
+                usage += _size(paths)
+                if self.policies.get(name, ClassPolicy()).evictable:
+                    units.append((_last_used(paths), run.path, name, paths))
+
+        # Menos recentemente usados primeiro
+        units.sort(key=lambda unit: unit[0])
+        for _, path, name, paths in units:
+            if usage <= self.quota_bytes:
+                break
+            size = self._delete(paths)
+            usage -= size
+            summary.evicted_bytes += size
+            summary.actions.append(
+                f'evict {name} of {path} ({format_size(size)})'
+            )
+            if not self.dry_run:
+                _remove_empty_dirs(path)
+
+    def usage(self, runs: List[RunDir]) -> Dict[str, int]:
+        """Bytes used per artifact class over ``runs``."""
+        usage: Dict[str, int] = {}
+        for run in runs:
+            if not os.path.isdir(run.path):
+                continue
+            for name, paths in scan_run(run.path).items():
+                usage[name] = usage.get(name, 0) + _size(paths)
+        return usage
+
+
+# -------------------------
+# Origem das runs
+# -------------------------
+def runs_from_results_db(
+    db: ResultsDB, limit: int = 1_000_000
+) -> List[RunDir]:
+    """Finished runs recorded in a results database, one per work dir."""
+    runs: Dict[str, RunDir] = {}
+    for record in db.recent(limit):
+        workdir = record['workdir']
+        if workdir and workdir not in runs:  # recent() vem do mais novo
+            finished = record['started'] + record['duration']
+            runs[workdir] = RunDir(workdir, record['name'], finished)
+    return list(runs.values())
+
+
+def runs_from_queue(queue: FileQueue) -> List[RunDir]:
+    """Finished runs of a work queue."""
+    return [
+        RunDir(
+            record['workdir'],
+            Job.from_dict(record['job']).name,
+            record['started'] + record['duration'],
+        )
+        for record in queue.results()
+        if record.get('workdir')
+    ]
@@ -1,20 +1,54 @@
 # core/asic.py
+import csv
+import glob
+import json
+import math
 import os
-import re
 from core import ensure_env
-from typing import Any, Dict
+from functools import partial
+from typing import Any, Dict, List, Optional
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment
 
 from core import (
     CONSTRAINTS_DIR,
-    TEMPLATES_DIR,
+    CRITICAL_PATHS,
     ImplementationFlow,
+    get_template_env,
+    remove_paths,
     run_cmd,
     write_template_to_file,
 )
-from core.log import print_blue, print_green, print_red, print_yellow
+from core.activity import (
+    default_scope,
+    ensure_saif,
+    power_activity,
+    run_power,
+)
+from core.log import (
+    log,
+    print_blue,
+    print_green,
+    print_red,
+    print_yellow,
+)
+from core.metrics import FlowMetrics
 from core.pdk_defines import DEFINES_BY_PDK, SUPPORTED_PDKS
+from core.reports import (
+    parse_openroad_power,
+    parse_orfs_finish,
+    parse_orfs_paths,
+    parse_orfs_synth_stat,
+    parse_yosys_stat,
+)
+from core.sta import (
+    corner_liberty_files,
+    openroad_executable,
+    parse_corner_reports,
+    run_corners,
+    worst_case_clocks,
+)
+from core.stages import Stage
 
 TOOLCHAINS_INSTALL_PATH = {
     'openroad': os.getenv(
@@ -22,11 +56,119 @@ TOOLCHAINS_INSTALL_PATH = {
     ),
 }
 
+# Valores fixos usados sem --auto-size
+DEFAULT_CORE_UTILIZATION = 5
+DEFAULT_PLACE_DENSITY = 0.10
+CORE_MARGIN_UM = 2
+# Dimensionamento de --auto-size, incluído por openroad.mk
+SIZING_FILE = 'die_sizing.mk'
+
+# Estágios do ORFS depois da síntese: alvo do make e checkpoint
+PHYSICAL_STAGES = [
+    ('floorplan', '2_floorplan.odb'),
+    ('place', '3_place.odb'),
+    ('cts', '4_cts.odb'),
+    ('route', '5_route.odb'),
+]
+
+
+# -------------------------
+# Dimensionamento do die
+# -------------------------
+def size_die(technology: str, cell_area_um2: float) -> Dict[str, Any]:
+    """Floorplan settings for a design of ``cell_area_um2`` on a PDK.
+
+    The target utilization and placement density of the PDK (see
+    :data:`core.pdk_defines.DEFINES_BY_PDK`) are used as is, unless the
+    resulting square core would be smaller than the PDK's minimum side,
+    which tiny designs hit: then an explicit die of that minimum size is
+    returned instead, so IO pins still fit along the edges.
+
+    Returns:
+        Dict[str, Any]: Template variables: ``core_utilization`` and
+        ``place_density``, plus ``die_area`` and ``core_area`` when the
+        die is given explicitly.
+    """
+    defines = DEFINES_BY_PDK[technology]
+    utilization = defines.get('target_utilization', DEFAULT_CORE_UTILIZATION)
+    density = defines.get('target_density', DEFAULT_PLACE_DENSITY)
+    min_side = defines.get('min_core_side_um', 0)
+
+    sizing: Dict[str, Any] = {
+        'core_utilization': utilization,
+        # A densidade precisa ficar acima da utilização ou o global
+        # placement não converge
+        'place_density': round(
+            min(0.95, max(density, utilization / 100 + 0.05)), 2
+        ),
+        'die_area': None,
+        'core_area': None,
+    }
+
+    side = math.sqrt(cell_area_um2 / (utilization / 100))
+    if side < min_side:
+        side = float(min_side)
+        die_side = side + 2 * CORE_MARGIN_UM
+        sizing['die_area'] = f'0 0 {die_side:.2f} {die_side:.2f}'
+        sizing['core_area'] = (
+            f'{CORE_MARGIN_UM} {CORE_MARGIN_UM} '
+            f'{die_side - CORE_MARGIN_UM:.2f} {die_side - CORE_MARGIN_UM:.2f}'
+        )
+        sizing['core_utilization'] = round(
+            100 * cell_area_um2 / (side * side), 2
+        )
+    return sizing
+
 
 # -------------------------
 # OpenRoad Flow
 # -------------------------
 class OpenRoadFlow(ImplementationFlow):
+    """ORFS flow.
+
+    Each ORFS step (synth, floorplan, place, cts, route, finish) is a
+    stage of its own (see :mod:`core.stages`). With ``auto_size`` a
+    ``size`` stage after synthesis sizes the die from the synthesized
+    cell area (see :func:`size_die`) for the rest of the flow, instead of
+    using a fixed, very low utilization.
+    With ``multi_corner`` the finished design is also timed at every STA
+    corner of the PDK (see :mod:`core.sta`), and the reported Fmax of each
+    clock is the worst over the corners. With ``activity`` the power of
+    the finished design is analysed again with that switching activity
+    (see :mod:`core.activity`) instead of the vectorless estimate of the
+    ORFS final report.
+    """
+
+    # Checkpoints em results/ voltam para o diretório de trabalho
+    SCRATCH_DIRS = ['objects', 'results']
+    SCRATCH_ESTIMATE = 4 << 30
+    SUPPORTS_ACTIVITY = True
+
+    def __init__(
+        self,
+        *args: Any,
+        auto_size: bool = False,
+        multi_corner: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.auto_size: bool = auto_size
+        self.multi_corner: bool = multi_corner
+        self.sizing: Dict[str, Any] = {
+            'core_utilization': DEFAULT_CORE_UTILIZATION,
+            'place_density': DEFAULT_PLACE_DENSITY,
+            'die_area': None,
+            'core_area': None,
+        }
+
+    @property
+    def base_report_dir(self) -> str:
+        return f'reports/{self.technology}/{self.top_module}/base'
+
+    @property
+    def base_results_dir(self) -> str:
+        return f'results/{self.technology}/{self.top_module}/base'
+
     def generate_project(self) -> None:
         print_blue(f"Running OpenRoad flow for PDK: '{self.technology}'")
 
@@ -42,9 +184,9 @@ class OpenRoadFlow(ImplementationFlow):
             'sdc_file': constraints,
             'design_nickname': self.top_module,
             'platform': self.technology,
-            'core_utilization': 5,
-            'place_density': 0.10,
-            'synth_hdl_frontend': 'slang',
+            **self.sizing,
+            # O netlist elaborado é Verilog-2005: basta o leitor do Yosys
+            'synth_hdl_frontend': '' if self.elaborated else 'slang',
             'synth_hierarchical': True,
             'synth_min_keep_size': 10,
             'additional_lefs': DEFINES_BY_PDK[self.technology].get('additional_lefs', False),
@@ -56,6 +198,7 @@ class OpenRoadFlow(ImplementationFlow):
                 'additional_lib_files', []
             ),
             'include_dirs': self.include_dirs,
+            'sizing_file': SIZING_FILE if self.auto_size else '',
         }
 
         write_template_to_file(self.env, 'openroad.j2', context, 'openroad.mk')
@@ -63,110 +206,307 @@ class OpenRoadFlow(ImplementationFlow):
             f"OpenRoad project files generated for '{self.technology}' PDK."
         )
 
-    def run_tool(self) -> None:
+    def stages(self) -> List[Stage]:
         ensure_env("CLK_PORT", "clk")
-        
+
         openroad_path = TOOLCHAINS_INSTALL_PATH.get('openroad', '')
         if not openroad_path or not os.path.exists(openroad_path):
             raise EnvironmentError(
                 'OpenRoad toolchain path is not set or does not exist.'
             )
 
-        openroad_makefile_path = os.path.join(openroad_path, 'flow/Makefile')
+        constraints: str = (
+            f'{CONSTRAINTS_DIR}/openroad.sdc'
+            if self.constraint_file == 'default'
+            else self.constraint_file
+        )
+        nodes: List[Stage] = [
+            self._make_stage(
+                'synth',
+                'synth',
+                '1',
+                deps=['generate'],
+                inputs=['openroad.mk', constraints, *self.source_files()],
+                outputs=[f'{self.base_report_dir}/synth_stat.txt'],
+            )
+        ]
+        if self.profile == 'synth':
+            return nodes
+
+        previous = 'synth'
+        if self.auto_size:
+            nodes.append(
+                Stage(
+                    'size',
+                    self._size_die,
+                    deps=['synth'],
+                    cache=False,
+                    tool=False,
+                )
+            )
+            previous = 'size'
+
+        for name, checkpoint in PHYSICAL_STAGES:
+            nodes.append(
+                self._make_stage(
+                    name,
+                    name,
+                    checkpoint.split('_')[0],
+                    deps=[previous],
+                    inputs=[SIZING_FILE]
+                    if self.auto_size and name == 'floorplan'
+                    else [],
+                    outputs=[f'{self.base_results_dir}/{checkpoint}'],
+                )
+            )
+            previous = name
+
+        # 'metrics' para no relatório final: sem GDS nem netlist final
+        nodes.append(
+            self._make_stage(
+                'finish',
+                'finish'
+                if self.profile == 'full'
+                else f'logs/{self.technology}/{self.top_module}/base/'
+                '6_report.log',
+                '6',
+                deps=[previous],
+                outputs=[f'{self.base_report_dir}/6_finish.rpt'],
+            )
+        )
 
-        run_cmd(
-            [
-                'make',
-                f'--file={openroad_makefile_path}',
-                'DESIGN_CONFIG=openroad.mk',
-            ]
+        platform_dir = os.path.join(
+            openroad_path, 'flow', 'platforms', self.technology
+        )
+        if self.multi_corner:
+            corners = corner_liberty_files(self.technology, platform_dir)
+            nodes.append(
+                Stage(
+                    'corners',
+                    partial(
+                        run_corners,
+                        self.env,
+                        openroad_executable(openroad_path),
+                        platform_dir,
+                        self.base_results_dir,
+                        self.base_report_dir,
+                        corners,
+                    ),
+                    deps=['finish'],
+                    outputs=[
+                        f'{self.base_report_dir}/sta_{corner}.rpt'
+                        for corner in corners
+                    ],
+                    key=json.dumps(corners, sort_keys=True),
+                )
+            )
+
+        if self.activity:
+            nodes.append(
+                Stage(
+                    'power',
+                    lambda: run_power(
+                        self.env,
+                        openroad_path,
+                        self.technology,
+                        self.base_results_dir,
+                        self.base_report_dir,
+                        ensure_saif(self.activity, self.top_module),
+                        self.activity_scope
+                        or default_scope(self.top_module),
+                    ),
+                    deps=['finish'],
+                    inputs=[self.activity],
+                    outputs=[f'{self.base_report_dir}/power.rpt'],
+                    key=self.activity_scope or '',
+                )
+            )
+        return nodes
+
+    def _make_stage(
+        self,
+        name: str,
+        goal: str,
+        step: str,
+        deps: List[str],
+        inputs: Optional[List[str]] = None,
+        outputs: Optional[List[str]] = None,
+    ) -> Stage:
+        """Stage running ORFS up to ``goal``.
+
+        ORFS's make only compares dates, so a stage that runs again over
+        old results of its ``step`` (``<step>_*`` in the results
+        directory) first removes them with ``clean_<name>``.
+        """
+        openroad_path = TOOLCHAINS_INSTALL_PATH.get('openroad', '')
+        make: List[str] = [
+            'make',
+            f"--file={os.path.join(openroad_path, 'flow/Makefile')}",
+            'DESIGN_CONFIG=openroad.mk',
+        ]
+
+        def action() -> None:
+            if glob.glob(os.path.join(self.base_results_dir, f'{step}_*')):
+                run_cmd(make + [f'clean_{name}'])
+            run_cmd(make + [goal])
+
+        return Stage(
+            name,
+            action,
+            deps=deps,
+            inputs=inputs or [],
+            outputs=outputs or [],
+            key=' '.join(make + [goal]),
+        )
+
+    def _size_die(self) -> None:
+        """Sizes the die from the synthesized area into the sizing file."""
+        _, area = parse_orfs_synth_stat(
+            f'{self.base_report_dir}/synth_stat.txt'
+        )
+        if not area.get('chip'):
+            print_yellow('No synthesized area found; keeping fixed die size')
+            if os.path.exists(SIZING_FILE):
+                os.remove(SIZING_FILE)
+            return
+
+        self.sizing = size_die(self.technology, area['chip'])
+        if self.sizing['die_area']:
+            print_blue(
+                f"Cell area {area['chip']:.1f} um2 -> "
+                f"die {self.sizing['die_area']}"
+            )
+        else:
+            print_blue(
+                f"Cell area {area['chip']:.1f} um2 -> utilization "
+                f"{self.sizing['core_utilization']}%, "
+                f"density {self.sizing['place_density']}"
+            )
+
+        # openroad.mk não muda: o make não refaz a síntese
+        write_template_to_file(
+            self.env,
+            'openroad_sizing.j2',
+            {**self.sizing, 'resized': True},
+            SIZING_FILE,
         )
 
     def clean(self) -> None:
-        run_cmd(['rm', '-rf', 'build', 'reports', '*.jou', '*.log', '*.bit'])
+        # ORFS escreve logs, objects, reports e results no diretório atual
+        remove_paths(
+            [
+                'build',
+                'logs',
+                'objects',
+                'reports',
+                'results',
+                '*.log',
+                SIZING_FILE,
+            ]
+        )
 
 
-    def report(self, report_path: str = 'reports') -> None:
+    def collect_metrics(self) -> FlowMetrics:
         print_blue(f"Generating report for PDK: '{self.technology}'")
 
-        os.makedirs(report_path, exist_ok=True)
+        base_dir: str = self.base_report_dir
+        cells, area, modules = parse_yosys_stat(f'{base_dir}/synth_stat.txt')
+        corner_names = DEFINES_BY_PDK[self.technology].get('sta_corners', {})
+        corners = (
+            parse_corner_reports(base_dir, list(corner_names))
+            if self.multi_corner
+            else {}
+        )
+        power = parse_openroad_power(
+            f'{base_dir}/power.rpt'
+            if self.activity
+            else f'{base_dir}/6_finish.rpt'
+        )
 
-        csv_path = os.path.join(report_path, f'{self.technology}_report.csv')
-        synth_stats_path: str = f'reports/{self.technology}/{self.top_module}/base/synth_stat.txt'
-        finish_timing: str = f'reports/{self.technology}/{self.top_module}/base/6_finish.rpt'
-
-        clock_info: Dict[str, float] = {}
-        if os.path.exists(finish_timing):
-            with open(finish_timing, 'r') as f:
-                content = f.read()
-
-                # Regex para pegar period_min e fmax
-                clock_matches = re.findall(
-                    r'^\s*(\S+)\s+period_min\s*=\s*([0-9]*\.?[0-9]+)\s+fmax\s*=\s*([0-9]*\.?[0-9]+)',
-                    content,
-                    re.MULTILINE
-                )
+        return FlowMetrics(
+            backend='openroad',
+            technology=self.technology,
+            top_module=self.top_module,
+            clocks=worst_case_clocks(corners)
+            if corners
+            else parse_orfs_finish(f'{base_dir}/6_finish.rpt'),
+            area_um2=area,
+            power_w=power,
+            power_activity=power_activity(self.activity) if power else None,
+            cells=cells,
+            corners=corners,
+            modules=modules,
+            paths=parse_orfs_paths(
+                f'{base_dir}/6_finish.rpt', CRITICAL_PATHS
+            ),
+        )
 
-                for clk_name, period_str, fmax_str in clock_matches:
-                    try:
-                        period_min = float(period_str)
-                        fmax = float(fmax_str)
-                        clock_info[clk_name] = {'period_min': period_min, 'fmax': fmax}
-                    except ValueError:
-                        continue
-
-        # --- PARSE SYNTHESIS STATISTICS ---
-        cell_usage: Dict[str, Dict[str, float]] = {}
-        chip_area = 0.0
-        seq_area = 0.0
-
-        if os.path.exists(synth_stats_path):
-            with open(synth_stats_path, 'r') as f:
-                lines = f.readlines()
-                for line in lines:
-                    # Captura linhas de células: quantidade, área, nome
-                    cell_match = re.match(r'^\s*(\d+)\s+([0-9]*\.?[0-9]+)\s+(\S+)', line)
-                    if cell_match:
-                        count = int(cell_match.group(1))
-                        area = float(cell_match.group(2))
-                        cell_name = cell_match.group(3)
-                        cell_usage[cell_name] = {'count': count, 'area': area}
-
-                    # Captura Chip area
-                    chip_match = re.match(r'^\s*Chip area for module.*:\s*([0-9]*\.?[0-9]+)', line)
-                    if chip_match:
-                        chip_area = float(chip_match.group(1))
-
-                    # Captura sequential elements area
-                    seq_match = re.match(r'^\s*of which used for sequential elements:\s*([0-9]*\.?[0-9]+)', line)
-                    if seq_match:
-                        seq_area = float(seq_match.group(1))
-
-        # --- PRINT RESULTS ---
+    def print_summary(self, metrics: FlowMetrics) -> None:
         print_green("\nClock Information:")
-        for clk, info in clock_info.items():
-            print(f"{clk}: period_min = {info['period_min']} ns, fmax = {info['fmax']} MHz")
+        for clk, clock in metrics.clocks.items():
+            log(
+                'info',
+                f"{clk}: period_min = {clock.period_ns} ns, "
+                f"fmax = {clock.fmax_mhz} MHz",
+            )
+        for corner, clocks in metrics.corners.items():
+            print_green(f"\nCorner {corner}:")
+            for clk, clock in clocks.items():
+                log('info', f"{clk}: fmax = {clock.fmax_mhz} MHz")
 
         print_green("\nCell Usage:")
-        for cell, stats in cell_usage.items():
-            print(f"{cell:<20} count={stats['count']:<5} area={stats['area']}")
+        for cell, stats in metrics.cells.items():
+            log(
+                'info',
+                f"{cell:<20} count={stats.count:<5} area={stats.area_um2}",
+            )
 
-        print_green(f"\nChip Area: {chip_area} (sequential: {seq_area})")
+        print_green(
+            f"\nChip Area: {metrics.area_um2.get('chip', 0.0)} "
+            f"(sequential: {metrics.area_um2.get('sequential', 0.0)})"
+        )
+
+        if metrics.power_w:
+            print_green(f'\nPower ({metrics.power_activity}):')
+            log(
+                'info',
+                f"Dynamic: {metrics.power_w.get('dynamic', 0.0):.3e} W, "
+                f"static: {metrics.power_w.get('static', 0.0):.3e} W",
+            )
 
-        # --- WRITE CSV ---
-        import csv
+    def write_csv(self, metrics: FlowMetrics, report_path: str) -> str:
+        csv_path = os.path.join(report_path, f'{self.technology}_report.csv')
         with open(csv_path, 'w', newline='') as csvf:
             writer = csv.writer(csvf)
             writer.writerow(['Type', 'Name', 'Count', 'Area'])
-            for cell, stats in cell_usage.items():
-                writer.writerow(['Cell', cell, stats['count'], stats['area']])
-            writer.writerow(['Chip', 'Total', '', chip_area])
-            writer.writerow(['Chip', 'Sequential', '', seq_area])
-            for clk, info in clock_info.items():
-                writer.writerow(['Clock', clk, info['period_min'], info['fmax']])
-        
-        print_green(f"\nCSV summary saved to: {csv_path}")
-
+            for cell, stats in metrics.cells.items():
+                writer.writerow(['Cell', cell, stats.count, stats.area_um2])
+            writer.writerow(
+                ['Chip', 'Total', '', metrics.area_um2.get('chip', 0.0)]
+            )
+            writer.writerow(
+                [
+                    'Chip',
+                    'Sequential',
+                    '',
+                    metrics.area_um2.get('sequential', 0.0),
+                ]
+            )
+            for clk, clock in metrics.clocks.items():
+                writer.writerow(
+                    ['Clock', clk, clock.period_ns, clock.fmax_mhz]
+                )
+            for corner, clocks in metrics.corners.items():
+                for clk, clock in clocks.items():
+                    writer.writerow(
+                        [
+                            'Corner Clock',
+                            f'{clk}@{corner}',
+                            clock.period_ns,
+                            clock.fmax_mhz,
+                        ]
+                    )
+        return csv_path
 
 
 def run_asic_flow(
@@ -178,18 +518,20 @@ def run_asic_flow(
     get_reports: bool = False,
     clean: bool = False,
     report_path: str = 'reports',
-) -> None:
+    auto_size: bool = False,
+    multi_corner: bool = False,
+    profile: str = 'full',
+    activity: Optional[str] = None,
+    activity_scope: Optional[str] = None,
+    elaborated: bool = False,
+) -> Optional[FlowMetrics]:
     pdk_name = pdk_name.lower()
     if pdk_name not in SUPPORTED_PDKS:
         raise ValueError(
             f"PDK '{pdk_name}' is not supported. Supported PDKs: {SUPPORTED_PDKS}"
         )
 
-    env: Environment = Environment(
-        loader=FileSystemLoader(TEMPLATES_DIR),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
+    env: Environment = get_template_env()
 
     flow = OpenRoadFlow(
         technology=pdk_name,
@@ -198,12 +540,14 @@ def run_asic_flow(
         top_module=top_module,
         env=env,
         include_dirs=include_dirs,
+        auto_size=auto_size,
+        multi_corner=multi_corner,
+        profile=profile,
+        activity=activity,
+        activity_scope=activity_scope,
+        elaborated=elaborated,
     )
 
-    flow.run()
-
-    if get_reports:
-        flow.report(report_path=report_path)
-
-    if clean:
-        flow.clean()
+    return flow.run(
+        get_reports=get_reports, report_path=report_path, clean=clean
+    )
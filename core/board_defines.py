@@ -93,6 +93,19 @@ DEFINES_BY_BOARD = {
 `define WORD_SIZE_BY 4
 `define RESET_CLK_CYCLES 20
 `define MEMORY_FILE ""
+""",
+    'tangnano_9k': """\
+`define CLOCK_FREQ 27_000_000
+`define MEMORY_SIZE 4096
+`define ID 32'h544E394B // TN9K
+`define BIT_RATE 115200
+`define PAYLOAD_BITS 8
+`define BUFFER_SIZE 8
+`define PULSE_CONTROL_BITS 32
+`define BUS_WIDTH 32
+`define WORD_SIZE_BY 4
+`define RESET_CLK_CYCLES 20
+`define MEMORY_FILE ""
 """,
 }
 
@@ -0,0 +1,88 @@
+"""Modules that keep limiting Fmax, from the critical paths of past runs.
+
+Every flow stores the worst setup paths of its timing report in
+:attr:`FlowMetrics.paths`. :func:`limiting_modules` goes over the runs of
+the results database and counts, per module, the runs in which its cells
+start or end a critical path, so modules that limit Fmax in many cores or
+keep doing so across revisions stand out.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from core.metrics import FlowMetrics, PathMetrics
+
+TOP_MODULE = '(top)'
+
+
+@dataclass
+class LimitingModule:
+    module: str
+    runs: int = 0  # runs com algum caminho crítico no módulo
+    worst: int = 0  # runs cujo pior caminho passa pelo módulo
+    paths: int = 0
+    worst_slack_ns: Optional[float] = None
+    names: Set[str] = field(default_factory=set)
+    last_seen: float = 0.0
+
+
+def module_of(instance: str) -> str:
+    """Hierarchical module of a cell instance or port.
+
+    Vivado and OpenSTA separate the hierarchy with ``/``; flattened Yosys
+    netlists (nextpnr) keep it in the cell name, separated by ``.``.
+    """
+    separator = '/' if '/' in instance else '.'
+    if separator not in instance:
+        return TOP_MODULE
+    return instance.rsplit(separator, 1)[0]
+
+
+def path_modules(path: PathMetrics) -> Set[str]:
+    """Modules where ``path`` starts and ends."""
+    return {module_of(path.startpoint), module_of(path.endpoint)}
+
+
+def run_paths(record: Dict[str, Any]) -> List[PathMetrics]:
+    """Critical paths stored with a run record of the results database."""
+    if not record.get('metrics'):
+        return []
+    return FlowMetrics.from_dict(record['metrics']).paths
+
+
+def limiting_modules(
+    records: List[Dict[str, Any]],
+) -> List[LimitingModule]:
+    """Modules on critical paths of ``records``, most frequent first.
+
+    Modules are ranked by the number of runs they limited, then by the
+    number of runs in which they held the worst path.
+    """
+    modules: Dict[str, LimitingModule] = {}
+    for record in records:
+        paths = run_paths(record)
+        if not paths:
+            continue
+
+        seen: Set[str] = set()
+        for path in paths:
+            for name in path_modules(path):
+                module = modules.setdefault(name, LimitingModule(name))
+                module.paths += 1
+                if path.slack_ns is not None and (
+                    module.worst_slack_ns is None
+                    or path.slack_ns < module.worst_slack_ns
+                ):
+                    module.worst_slack_ns = path.slack_ns
+                seen.add(name)
+
+        for name in seen:
+            module = modules[name]
+            module.runs += 1
+            module.names.add(record['name'])
+            module.last_seen = max(module.last_seen, record['started'])
+        for name in path_modules(paths[0]):
+            modules[name].worst += 1
+
+    return sorted(
+        modules.values(), key=lambda m: (-m.runs, -m.worst, m.module)
+    )
@@ -0,0 +1,267 @@
+"""Long-running flow server listening on a Unix domain socket.
+
+Starting a Python process per job means importing Jinja2 and the flow
+modules, compiling the templates and rereading the core configurations
+every time. The daemon does that once: it warms a pool of forked job
+processes, keeps the results database open and accepts jobs from
+:func:`send_request` clients.
+
+The protocol is one JSON object per line in each direction. Requests carry
+an ``op`` field (``ping``, ``submit``, ``status`` or ``shutdown``) and every
+response carries ``ok`` plus either the payload or an ``error`` message.
+
+A job process that dies (e.g. killed by the OOM killer) breaks the pool:
+the jobs running in it fail, and the next submission starts a new warm
+pool instead of failing too.
+"""
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from core import get_template_env
+from core.job import Job, build_job, execute_job
+from core.log import print_blue, print_green, print_red, print_yellow
+from core.results import ResultsDB
+
+DEFAULT_SOCKET_PATH = os.path.join(
+    os.getenv('XDG_RUNTIME_DIR', '/tmp'), 'processor_ci_perf.sock'
+)
+
+
+def _warm_up() -> None:
+    """Initializer of the job processes: pay the import costs up front."""
+    # pylint: disable=import-outside-toplevel,unused-import
+    import core.asic
+    import core.fpga
+
+    env = get_template_env()
+    for template_name in env.list_templates():
+        env.get_template(template_name)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: '_UnixServer'
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.daemon.dispatch(request)
+            except Exception as e:  # pylint: disable=broad-except
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: 'FlowDaemon') -> None:
+        self.daemon = daemon
+        super().__init__(socket_path, _RequestHandler)
+
+
+class FlowDaemon:
+    """Keeps warm flow processes and the results database around."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        workdir_root: str,
+        results_db: str,
+        jobs: int = 1,
+    ) -> None:
+        self.socket_path: str = socket_path
+        self.workdir_root: str = os.path.abspath(workdir_root)
+        self.jobs: int = max(1, jobs)
+        self.started: float = time.time()
+        self.db = ResultsDB(results_db)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.server: Optional[_UnixServer] = None
+        self._lock = threading.Lock()
+        self._running: Dict[str, Future] = {}
+        self._completed: int = 0
+
+    # -------------------------
+    # Requests
+    # -------------------------
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op')
+        if op == 'ping':
+            return {
+                'ok': True,
+                'pid': os.getpid(),
+                'uptime': time.time() - self.started,
+            }
+        if op == 'submit':
+            return self.submit(request)
+        if op == 'status':
+            return self.status()
+        if op == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown operation '{op}'"}
+
+    def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        # Sources are resolved here, not in the client, so the core
+        # configurations are served from the warm cache of this process.
+        job = build_job(**request['request']).absolutize(request.get('cwd'))
+        workdir = request.get('workdir') or os.path.join(
+            self.workdir_root, job.job_id
+        )
+
+        with self._lock:
+            future = self._running.get(job.job_id)
+            if future is None:
+                assert self.pool is not None
+                try:
+                    future = self.pool.submit(
+                        execute_job, job.to_dict(), workdir
+                    )
+                except BrokenProcessPool:
+                    print_yellow(
+                        'A job process died, restarting the process pool'
+                    )
+                    self.pool.shutdown(wait=False)
+                    self.pool = self._new_pool()
+                    future = self.pool.submit(
+                        execute_job, job.to_dict(), workdir
+                    )
+                self._running[job.job_id] = future
+                future.add_done_callback(
+                    lambda f, j=job: self._on_done(j, f)
+                )
+                print_blue(f'Accepted {job.name} ({job.job_id})')
+
+        if not request.get('wait'):
+            return {'ok': True, 'job_id': job.job_id, 'workdir': workdir}
+
+        return {'ok': True, 'record': future.result()}
+
+    def _on_done(self, job: Job, future: Future) -> None:
+        try:
+            record = future.result()
+        except Exception:  # pylint: disable=broad-except
+            # The job process itself died (e.g. killed by the OOM killer)
+            record = {
+                'status': 'failed',
+                'started': time.time(),
+                'duration': 0.0,
+                'workdir': None,
+                'error': traceback.format_exc(),
+            }
+
+        self.db.record_run(
+            job,
+            record['status'],
+            record['started'],
+            record['duration'],
+            workdir=record['workdir'],
+            error=record['error'],
+            metrics=record.get('metrics'),
+        )
+
+        with self._lock:
+            self._running.pop(job.job_id, None)
+            self._completed += 1
+
+        if record['status'] == 'done':
+            print_green(f"{job.name} done in {record['duration']:.1f}s")
+        else:
+            print_red(f'{job.name} failed:\n{record["error"]}')
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            running: List[str] = sorted(self._running)
+            completed = self._completed
+        return {
+            'ok': True,
+            'pid': os.getpid(),
+            'jobs': self.jobs,
+            'running': running,
+            'completed': completed,
+            'recent': [
+                {
+                    'name': r['name'],
+                    'status': r['status'],
+                    'duration': r['duration'],
+                }
+                for r in self.db.recent(10)
+            ],
+        }
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def _claim_socket(self) -> None:
+        if not os.path.exists(self.socket_path):
+            return
+        try:
+            send_request(self.socket_path, {'op': 'ping'})
+        except OSError:
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(self.socket_path)
+            return
+        raise RuntimeError(
+            f'A daemon is already listening on {self.socket_path}'
+        )
+
+    def serve_forever(self) -> None:
+        self._claim_socket()
+        os.makedirs(self.workdir_root, exist_ok=True)
+
+        _warm_up()
+        self.pool = self._new_pool()
+        self.server = _UnixServer(self.socket_path, self)
+
+        print_green(
+            f'Daemon listening on {self.socket_path} '
+            f'({self.jobs} job slot(s), results in {self.db.path})'
+        )
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.pool.shutdown(wait=True)
+            self.db.close()
+            print_yellow('Daemon stopped')
+
+    def shutdown(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Forked workers inherit the already imported and compiled state
+        return ProcessPoolExecutor(
+            max_workers=self.jobs,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_warm_up,
+        )
+
+
+def send_request(
+    socket_path: str, request: Dict[str, Any], timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """Sends one request to a daemon and returns its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as stream:
+            line = stream.readline()
+
+    if not line:
+        raise ConnectionError('Daemon closed the connection')
+    return json.loads(line)
@@ -0,0 +1,312 @@
+"""Local parallel execution of a graph of flow jobs."""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor
+from concurrent.futures import wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+)
+
+from core.job import Job, execute_job
+from core.log import (
+    JOB_LOG,
+    print_blue,
+    print_green,
+    print_red,
+    print_yellow,
+)
+from core.metrics import FlowMetrics
+from core.results import ResultsDB
+from core.telemetry import Telemetry
+
+
+class JobGraph:
+    """Deduplicated set of jobs with optional dependencies between them.
+
+    Jobs are keyed by :attr:`Job.job_id`, so adding the same job twice (for
+    instance from two overlapping sweeps) yields a single node.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: Dict[str, Job] = {}
+        self.deps: Dict[str, Set[str]] = {}
+
+    def add(self, job: Job, deps: Iterable[str] = ()) -> str:
+        job_id = job.job_id
+        if job_id not in self.jobs:
+            self.jobs[job_id] = job
+            self.deps[job_id] = set()
+        self.deps[job_id].update(deps)
+        return job_id
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __iter__(self) -> Iterator[Job]:
+        return iter(self.jobs.values())
+
+
+class Executor:
+    """Runs a :class:`JobGraph` on a local process pool.
+
+    Args:
+        runs_dir (str): Directory holding one work directory per job.
+        jobs (int): Number of jobs run concurrently.
+        limits (Optional[Dict[str, int]]): Maximum concurrent jobs per
+            toolchain, e.g. ``{'vivado': 2}`` to respect license counts.
+        results_db (Optional[ResultsDB]): Where finished runs are recorded.
+            Jobs that already have a successful run of sources with the
+            same content are not executed again.
+        force (bool): Ignore previous results and run every job.
+        runner (Optional[Callable]): Picklable replacement for
+            :func:`core.job.run_job`, e.g. a
+            :class:`core.qor_model.PredictingRunner`.
+        telemetry (Optional[Telemetry]): Receives the scheduling events
+            and is updated while jobs run (see :mod:`core.telemetry`).
+        job_logs (bool): Write the output of each job to ``job.log`` in
+            its work directory instead of the terminal, which then only
+            shows the scheduling messages.
+    """
+
+    def __init__(
+        self,
+        runs_dir: str,
+        jobs: int = 1,
+        limits: Optional[Dict[str, int]] = None,
+        results_db: Optional[ResultsDB] = None,
+        force: bool = False,
+        runner: Optional[Callable[[Job, str], Optional[FlowMetrics]]] = None,
+        telemetry: Optional[Telemetry] = None,
+        job_logs: bool = True,
+    ) -> None:
+        self.runs_dir: str = os.path.abspath(runs_dir)
+        self.jobs: int = max(1, jobs)
+        self.limits: Dict[str, int] = dict(limits or {})
+        self.results_db = results_db
+        self.force = force
+        self.runner = runner
+        self.telemetry = telemetry
+        self.job_logs = job_logs
+
+    def _can_start(self, job: Job, running: Dict[str, int]) -> bool:
+        limit = self.limits.get(job.toolchain)
+        return limit is None or running.get(job.toolchain, 0) < limit
+
+    def run(self, graph: JobGraph) -> Dict[str, Dict[str, Any]]:
+        """Executes every job of ``graph``. Returns records by job id."""
+        for job_id, deps in graph.deps.items():
+            unknown = deps - set(graph.jobs)
+            if unknown:
+                raise ValueError(
+                    f'Job {job_id} depends on unknown jobs: {sorted(unknown)}'
+                )
+
+        records: Dict[str, Dict[str, Any]] = {}
+        waiting: Set[str] = set(graph.jobs)
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.set_total(len(graph))
+
+        # Digest do conteúdo das fontes: o job_id só cobre os caminhos
+        sources: Dict[str, Optional[str]] = {}
+        if self.results_db is not None:
+            # Import local: core.staging importa este módulo
+            from core.staging import sources_digest
+
+            sources = {
+                job_id: sources_digest(job)
+                for job_id, job in graph.jobs.items()
+            }
+
+        if self.results_db is not None and not self.force:
+            for job_id in list(waiting):
+                previous = (
+                    self.results_db.latest(job_id, sources[job_id])
+                    if sources[job_id] is not None
+                    else None
+                )
+                if telemetry is not None:
+                    telemetry.cache_result('results', previous is not None)
+                if previous is not None:
+                    records[job_id] = dict(previous, status='cached')
+                    waiting.discard(job_id)
+                    if telemetry is not None:
+                        telemetry.job_skipped(
+                            graph.jobs[job_id].toolchain, records[job_id]
+                        )
+
+        if records:
+            print_blue(f'{len(records)} job(s) reused from previous runs')
+
+        os.makedirs(self.runs_dir, exist_ok=True)
+        running_per_toolchain: Dict[str, int] = {}
+        futures: Dict[Future, str] = {}
+        queued: Dict[str, float] = {}
+
+        pool = ProcessPoolExecutor(max_workers=self.jobs)
+        try:
+            while waiting or futures:
+                for job_id in sorted(waiting):
+                    if len(futures) >= self.jobs:
+                        break
+                    state = self._deps_state(graph, job_id, records)
+                    if state == 'failed':
+                        self._skip(graph, job_id, records, waiting)
+                        continue
+                    if state == 'pending':
+                        continue
+
+                    job = graph.jobs[job_id]
+                    if not self._can_start(job, running_per_toolchain):
+                        continue
+
+                    workdir = os.path.join(self.runs_dir, job_id)
+                    print_blue(f'Starting {job.name} ({job_id})')
+                    queued[job_id] = time.time()
+                    args = (job.to_dict(), workdir, self.runner, self.job_logs)
+                    try:
+                        future = pool.submit(execute_job, *args)
+                    except BrokenProcessPool:
+                        # Um job derrubou seu processo e, com ele, o pool
+                        pool = self._new_pool(pool)
+                        future = pool.submit(execute_job, *args)
+                    futures[future] = job_id
+                    waiting.discard(job_id)
+                    running_per_toolchain[job.toolchain] = (
+                        running_per_toolchain.get(job.toolchain, 0) + 1
+                    )
+                    if telemetry is not None:
+                        telemetry.job_started(job.toolchain)
+
+                if telemetry is not None:
+                    telemetry.set_queued(self._queued(graph, waiting))
+                    telemetry.update()
+
+                if not futures:
+                    # Nothing left can start: dependency cycles or zero limits
+                    for job_id in sorted(waiting):
+                        self._skip(graph, job_id, records, waiting)
+                    break
+
+                # Com telemetria, acorda periodicamente para exportar
+                done, _ = wait_futures(
+                    futures,
+                    timeout=telemetry.refresh_interval if telemetry else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    job_id = futures.pop(future)
+                    job = graph.jobs[job_id]
+                    running_per_toolchain[job.toolchain] -= 1
+                    records[job_id] = self._finish(
+                        job, future, sources.get(job_id)
+                    )
+                    records[job_id]['queued'] = queued[job_id]
+                    if telemetry is not None:
+                        telemetry.job_finished(job.toolchain, records[job_id])
+        finally:
+            pool.shutdown()
+
+        if telemetry is not None:
+            telemetry.set_queued({})
+            telemetry.close()
+        return records
+
+    @staticmethod
+    def _queued(graph: JobGraph, waiting: Set[str]) -> Dict[str, int]:
+        queued: Dict[str, int] = {}
+        for job_id in waiting:
+            toolchain = graph.jobs[job_id].toolchain
+            queued[toolchain] = queued.get(toolchain, 0) + 1
+        return queued
+
+    @staticmethod
+    def _deps_state(
+        graph: JobGraph, job_id: str, records: Dict[str, Dict[str, Any]]
+    ) -> str:
+        """'ready', 'pending' or 'failed' depending on the dependencies."""
+        statuses = [
+            records[d]['status'] if d in records else None
+            for d in graph.deps[job_id]
+        ]
+        if any(s not in (None, 'done', 'cached') for s in statuses):
+            return 'failed'
+        if None in statuses:
+            return 'pending'
+        return 'ready'
+
+    def _skip(
+        self,
+        graph: JobGraph,
+        job_id: str,
+        records: Dict[str, Dict[str, Any]],
+        waiting: Set[str],
+    ) -> None:
+        waiting.discard(job_id)
+        records[job_id] = {
+            'job_id': job_id,
+            'name': graph.jobs[job_id].name,
+            'status': 'skipped',
+            'error': 'a dependency did not complete',
+        }
+        print_yellow(f'Skipping {graph.jobs[job_id].name}: dependency failed')
+        if self.telemetry is not None:
+            self.telemetry.job_skipped(
+                graph.jobs[job_id].toolchain, records[job_id]
+            )
+
+    def _new_pool(self, pool: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Replaces a pool broken by a job process that died.
+
+        Every job running in the pool fails with it (see :meth:`_finish`);
+        the jobs still waiting run in the new pool.
+        """
+        print_yellow('A job process died, restarting the process pool')
+        pool.shutdown(wait=False)
+        return ProcessPoolExecutor(max_workers=self.jobs)
+
+    def _finish(
+        self, job: Job, future: Future, sources: Optional[str] = None
+    ) -> Dict[str, Any]:
+        try:
+            record = future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            record = {
+                'job_id': job.job_id,
+                'name': job.name,
+                'status': 'failed',
+                'started': time.time(),
+                'duration': 0.0,
+                'workdir': None,
+                'error': f'job process died: {e}',
+            }
+
+        if self.results_db is not None:
+            self.results_db.record_run(
+                job,
+                record['status'],
+                record['started'],
+                record['duration'],
+                workdir=record['workdir'],
+                error=record['error'],
+                metrics=record.get('metrics'),
+                sources=sources,
+            )
+
+        if record['status'] == 'done':
+            print_green(f"{job.name} done in {record['duration']:.1f}s")
+        elif self.job_logs and record['workdir']:
+            log_path = os.path.join(record['workdir'], JOB_LOG)
+            print_red(
+                f"{job.name} failed (log: {log_path}):\n{record['error']}"
+            )
+        else:
+            print_red(f"{job.name} failed:\n{record['error']}")
+        return record
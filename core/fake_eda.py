@@ -0,0 +1,456 @@
+"""Simulated EDA tools for exercising the harness without licenses.
+
+:func:`install_fake_tools` writes executables named like the real tools
+(``vivado``, ``synlig``, ``nextpnr-ecp5``, ``ecppack``, ``gw_sh``,
+``openroad``, ``verilator``) and an OpenROAD-flow-scripts tree whose
+``flow/Makefile`` calls a fake ORFS. Point ``VIVADO_INSTALL_PATH``,
+``YOSYS_INSTALL_PATH``, ``GOWIN_INSTALL_PATH``, ``OPENROAD_INSTALL_PATH``
+and ``VERILATOR_INSTALL_PATH`` at them (see :func:`fake_tool_env`) and the
+flows and simulations run unchanged.
+
+Each tool reads the project files the flows generate, simulates work and
+writes reports with the same layout as the real tool, using the generators
+of :mod:`core.parser_bench`. The work is configured per tool invocation by
+environment variables:
+
+    FAKE_EDA_SLEEP      seconds spent sleeping
+    FAKE_EDA_CPU        seconds of busy CPU
+    FAKE_EDA_MEMORY_MB  memory allocated and touched
+    FAKE_EDA_JITTER     relative random spread of sleep and CPU (0 to 1)
+    FAKE_EDA_UNITS      size of the reports, in :mod:`core.parser_bench`
+                        units (paths, rows, ...)
+    FAKE_EDA_FAIL_RATE  probability of exiting with an error
+
+Every invocation appends its name and wall time to ``.fake_eda_times`` in
+the working directory, so the time spent "in the tools" can be separated
+from the harness overhead.
+"""
+import os
+import random
+import re
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from core.parser_bench import (
+    generate_gowin_resources,
+    generate_gowin_timing,
+    generate_nextpnr_report,
+    generate_openroad_power,
+    generate_orfs_finish,
+    generate_orfs_synth_stat,
+    generate_vivado_power,
+    generate_vivado_timing,
+    generate_vivado_utilization,
+    generate_yosys_stat,
+)
+from core.pdk_defines import DEFINES_BY_PDK
+
+INSTALL_DIR: str = os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))
+)
+TIMES_FILE = '.fake_eda_times'
+
+
+@dataclass
+class FakeToolLoad:
+    """Work simulated by every fake tool invocation."""
+
+    sleep_s: float = 0.0
+    cpu_s: float = 0.0
+    memory_mb: int = 0
+    jitter: float = 0.0
+    units: int = 1
+    fail_rate: float = 0.0
+
+    _ENV = {
+        'sleep_s': 'FAKE_EDA_SLEEP',
+        'cpu_s': 'FAKE_EDA_CPU',
+        'memory_mb': 'FAKE_EDA_MEMORY_MB',
+        'jitter': 'FAKE_EDA_JITTER',
+        'units': 'FAKE_EDA_UNITS',
+        'fail_rate': 'FAKE_EDA_FAIL_RATE',
+    }
+
+    @classmethod
+    def from_env(cls) -> 'FakeToolLoad':
+        load = cls()
+        for attr, var in cls._ENV.items():
+            if var in os.environ:
+                kind = type(getattr(load, attr))
+                setattr(load, attr, kind(os.environ[var]))
+        return load
+
+    def to_env(self) -> Dict[str, str]:
+        return {
+            var: str(getattr(self, attr)) for attr, var in self._ENV.items()
+        }
+
+    def simulate(self, rng: random.Random) -> None:
+        def spread(seconds: float) -> float:
+            return max(0.0, seconds * (1 + self.jitter * rng.uniform(-1, 1)))
+
+        memory = bytearray(self.memory_mb * 1024 * 1024)
+        for i in range(0, len(memory), 4096):
+            memory[i] = 1  # força a alocação real das páginas
+
+        deadline = time.process_time() + spread(self.cpu_s)
+        while time.process_time() < deadline:
+            pass
+
+        time.sleep(spread(self.sleep_s))
+        del memory
+
+
+# -------------------------
+# Ferramentas
+# -------------------------
+def _options(args: List[str]) -> Dict[str, str]:
+    """``--name value`` pairs of a command line."""
+    return {
+        arg.lstrip('-'): value
+        for arg, value in zip(args, args[1:] + [''])
+        if arg.startswith('-')
+    }
+
+
+def _search(pattern: str, path: str) -> str:
+    with open(path, 'r') as f:
+        match = re.search(pattern, f.read())
+    if match is None:
+        raise ValueError(f"'{pattern}' not found in {path}")
+    return match.group(1)
+
+
+def _touch(path: str, content: str = '') -> None:
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+# Relatórios que o fake Vivado sabe gerar, pelo sufixo do arquivo
+_VIVADO_REPORTS = {
+    '_utilization.xml': generate_vivado_utilization,
+    '_timing.rpt': generate_vivado_timing,
+    '_power.rpt': generate_vivado_power,
+}
+
+
+def _vivado_lines(script: str) -> List[str]:
+    """Lines of a Tcl script, with the scripts it ``source``s inlined."""
+    lines: List[str] = []
+    with open(script, 'r') as f:
+        for line in f:
+            sourced = re.match(r'\s*source\s+(\S+)', line)
+            if sourced:
+                lines += _vivado_lines(sourced.group(1))
+            else:
+                lines.append(line)
+    return lines
+
+
+def _vivado(args: List[str], rng: random.Random, units: int) -> None:
+    # Executa em ordem: um estágio pode abrir o checkpoint do anterior
+    design_open = False
+    guarded = False
+    for line in _vivado_lines(_options(args)['source']):
+        if 'current_design -quiet' in line:
+            guarded = True
+            continue
+        checkpoint = re.search(r'open_checkpoint\s+(\S+)', line)
+        if checkpoint and not (guarded and design_open):
+            if not os.path.exists(checkpoint.group(1)):
+                raise FileNotFoundError(f'{checkpoint.group(1)} not found')
+        if checkpoint or 'synth_design' in line:
+            design_open = True
+            guarded = False
+        report = re.search(r'-file\s+(reports/\S+)', line)
+        for suffix, generate in _VIVADO_REPORTS.items():
+            if report and report.group(1).endswith(suffix):
+                os.makedirs('reports', exist_ok=True)
+                generate(report.group(1), units, rng)
+        for pattern in (
+            r'write_checkpoint\s+(?:-\S+\s+)*(\S+)',
+            r'write_bitstream\s+(?:-\S+\s+)*"?([^"\s]+)',
+        ):
+            output = re.search(pattern, line)
+            if output:
+                _touch(output.group(1))
+
+
+def _synlig(args: List[str], rng: random.Random, units: int) -> None:
+    if '-V' in args:
+        print('Yosys 0.38 (fake synlig)')
+        return
+    script = _options(args)['c']
+    with open(script, 'r') as f:
+        content = f.read()
+    netlist = re.search(r'write_verilog\s+(?:-\S+\s+)*(\S+)', content)
+    if netlist:
+        # Front-end comum (core.frontend): só o netlist elaborado
+        top = _search(r'-top\s+(\S+)', script)
+        _touch(netlist.group(1), f'module {top}();\nendmodule\n')
+        return
+    output = _search(r'-json\s+(\S+)', script)
+    _touch(output, '{"creator": "fake synlig", "modules": {}}\n')
+    stat = re.search(r'-o\s+(\S+)\s+stat', content)
+    if stat:
+        _touch(stat.group(1))
+        generate_yosys_stat(stat.group(1), units, rng)
+
+
+def _nextpnr(args: List[str], rng: random.Random, units: int) -> None:
+    options = _options(args)
+    if 'report' in options:
+        _touch(options['report'])
+        generate_nextpnr_report(options['report'], units, rng)
+    if 'textcfg' in options:
+        _touch(options['textcfg'], '.device LFE5U-45F\n')
+
+
+def _ecppack(args: List[str], rng: random.Random, units: int) -> None:
+    _touch(_options(args)['bit'])
+
+
+def _gw_sh(args: List[str], rng: random.Random, units: int) -> None:
+    prefix = _search(r'-output_base_name\s+(\S+)', args[0])
+    pnr_dir = os.path.join('impl', 'pnr')
+    os.makedirs(pnr_dir, exist_ok=True)
+    generate_gowin_timing(os.path.join(pnr_dir, f'{prefix}.tr'), units, rng)
+    generate_gowin_resources(
+        os.path.join(pnr_dir, f'{prefix}.rpt.txt'), units, rng
+    )
+    with open(args[0], 'r') as f:
+        script = f.read()
+    if 'run all' in script and not re.search(
+        r'-gen_bitstream\s+0', script
+    ):
+        _touch(os.path.join(pnr_dir, f'{prefix}.fs'))
+
+
+def _orfs(args: List[str], rng: random.Random, units: int) -> None:
+    platform, design, target = args[0], args[1], args[2]
+    base_dir = os.path.join('reports', platform, design, 'base')
+    os.makedirs(base_dir, exist_ok=True)
+    synth_stat = os.path.join(base_dir, 'synth_stat.txt')
+    # Como no ORFS, 'finish' reaproveita uma síntese já feita
+    if target == 'synth' or not os.path.exists(synth_stat):
+        generate_orfs_synth_stat(synth_stat, units, rng)
+    checkpoints = {
+        'floorplan': '2_floorplan.odb',
+        'place': '3_place.odb',
+        'cts': '4_cts.odb',
+        'route': '5_route.odb',
+    }
+    if target in checkpoints:
+        _touch(
+            os.path.join(
+                'results', platform, design, 'base', checkpoints[target]
+            )
+        )
+    if target == 'finish':
+        generate_orfs_finish(
+            os.path.join(base_dir, '6_finish.rpt'), units, rng
+        )
+        results_dir = os.path.join('results', platform, design, 'base')
+        _touch(os.path.join(results_dir, '6_final.odb'))
+        _touch(os.path.join(results_dir, '6_final.sdc'))
+
+
+def _openroad(args: List[str], rng: random.Random, units: int) -> None:
+    # Um relatório diferente por corner (script)
+    rng = random.Random(f'{os.getcwd()}:{args[-1]}')
+    with open(args[-1], 'r') as f:
+        generate = (
+            generate_openroad_power
+            if 'report_power' in f.read()
+            else generate_orfs_finish
+        )
+    with tempfile.NamedTemporaryFile('r', suffix='.rpt') as report:
+        generate(report.name, units, rng)
+        shutil.copyfileobj(report, sys.stdout)
+
+
+_FAKE_MODEL = """#!/bin/sh
+# Modelo falso: ciclos proporcionais ao tamanho do programa
+size=$(wc -c < {program})
+cycles=$((size * {cycles_per_byte} + {base_cycles}))
+if [ -n "$2" ]; then
+    # Atividade: um clock alternando durante todos os ciclos
+    {{
+        echo '$timescale 1ps $end'
+        echo '$scope module TOP $end'
+        echo '$var wire 1 ! clk $end'
+        echo '$upscope $end'
+        echo '$enddefinitions $end'
+        echo '#0'
+        echo '0!'
+        echo '#5000'
+        echo '1!'
+        echo "#$((cycles * 10000))"
+    }} > "$2"
+fi
+echo "cycles $cycles finished 1"
+"""
+
+
+def _verilator(args: List[str], rng: random.Random, units: int) -> None:
+    from core.simulation import PROGRAM_FILE
+
+    if '--version' in args:
+        print('Verilator 5.020 (fake)')
+        return
+    options = _options(args)
+    os.makedirs(options['Mdir'], exist_ok=True)
+    _write_executable(
+        os.path.join(options['Mdir'], options['o']),
+        _FAKE_MODEL.format(
+            program=PROGRAM_FILE,
+            cycles_per_byte=rng.randint(50, 200),
+            base_cycles=rng.randint(1000, 10000) * units,
+        ),
+    )
+
+
+TOOLS: Dict[str, Callable[[List[str], random.Random, int], None]] = {
+    'vivado': _vivado,
+    'synlig': _synlig,
+    'nextpnr-ecp5': _nextpnr,
+    'ecppack': _ecppack,
+    'gw_sh': _gw_sh,
+    'fake_orfs': _orfs,
+    'openroad': _openroad,
+    'verilator': _verilator,
+}
+
+
+def main(
+    tool: str, args: List[str], started: Optional[float] = None
+) -> int:
+    """Entry point of the fake executables.
+
+    ``started`` is taken by the executable before importing this package,
+    so the import time counts as tool time like a real tool's startup.
+    """
+    started = time.perf_counter() if started is None else started
+    load = FakeToolLoad.from_env()
+    # Same job, same reports; seeds change them like in the real tools
+    seed = _options(args).get('seed')
+    rng = random.Random(f'{os.getcwd()}:{tool}:{seed}')
+
+    status = 0
+    load.simulate(rng)
+    if rng.random() < load.fail_rate:
+        print(f'{tool}: simulated failure', file=sys.stderr)
+        status = 1
+    else:
+        TOOLS[tool](args, rng, load.units)
+
+    with open(TIMES_FILE, 'a') as f:
+        f.write(f'{tool} {time.perf_counter() - started:.6f}\n')
+    return status
+
+
+def read_tool_times(workdir: str) -> float:
+    """Seconds spent in fake tools by the job that ran in ``workdir``."""
+    try:
+        with open(os.path.join(workdir, TIMES_FILE), 'r') as f:
+            return sum(float(line.split()[1]) for line in f if line.strip())
+    except OSError:
+        return 0.0
+
+
+# -------------------------
+# Instalação
+# -------------------------
+_SHIM = """#!{python}
+import sys
+import time
+
+started = time.perf_counter()
+sys.path.insert(0, {install_dir!r})
+from core.fake_eda import main
+
+sys.exit(main({tool!r}, sys.argv[1:], started))
+"""
+
+_ORFS_MAKEFILE = """include $(DESIGN_CONFIG)
+
+.DEFAULT_GOAL := finish
+
+synth floorplan place cts route finish:
+\t@{fake_orfs} $(PLATFORM) $(DESIGN_NICKNAME) $@
+
+clean_%:
+\t@true
+
+logs/$(PLATFORM)/$(DESIGN_NICKNAME)/base/6_report.log:
+\t@{fake_orfs} $(PLATFORM) $(DESIGN_NICKNAME) finish
+"""
+
+
+def _write_executable(path: str, content: str) -> None:
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP)
+
+
+def install_fake_tools(root: str) -> Dict[str, str]:
+    """Writes the fake tools under ``root``.
+
+    Returns:
+        Dict[str, str]: Environment variables selecting the fake tools.
+    """
+    bin_dir = os.path.join(os.path.abspath(root), 'bin')
+    orfs_dir = os.path.join(os.path.abspath(root), 'OpenROAD-flow-scripts')
+    os.makedirs(bin_dir, exist_ok=True)
+    os.makedirs(os.path.join(orfs_dir, 'flow'), exist_ok=True)
+
+    for tool in TOOLS:
+        _write_executable(
+            os.path.join(bin_dir, tool),
+            _SHIM.format(
+                python=sys.executable, install_dir=INSTALL_DIR, tool=tool
+            ),
+        )
+
+    with open(os.path.join(orfs_dir, 'flow', 'Makefile'), 'w') as f:
+        f.write(
+            _ORFS_MAKEFILE.format(
+                fake_orfs=os.path.join(bin_dir, 'fake_orfs')
+            )
+        )
+
+    # Binário do OpenROAD e libs dos corners de STA, onde o ORFS os instala
+    openroad_dir = os.path.join(orfs_dir, 'tools', 'install', 'OpenROAD')
+    os.makedirs(os.path.join(openroad_dir, 'bin'), exist_ok=True)
+    shutil.copy2(
+        os.path.join(bin_dir, 'openroad'),
+        os.path.join(openroad_dir, 'bin', 'openroad'),
+    )
+    for pdk, defines in DEFINES_BY_PDK.items():
+        platform_dir = os.path.join(orfs_dir, 'flow', 'platforms', pdk)
+        _touch(os.path.join(platform_dir, 'setRC.tcl'))
+        for patterns in defines.get('sta_corners', {}).values():
+            for pattern in patterns:
+                _touch(os.path.join(platform_dir, pattern.replace('*', 'x')))
+
+    return fake_tool_env(root)
+
+
+def fake_tool_env(root: str) -> Dict[str, str]:
+    bin_dir = os.path.join(os.path.abspath(root), 'bin')
+    return {
+        'VIVADO_INSTALL_PATH': bin_dir,
+        'YOSYS_INSTALL_PATH': bin_dir,
+        'GOWIN_INSTALL_PATH': bin_dir,
+        'VERILATOR_INSTALL_PATH': bin_dir,
+        'OPENROAD_INSTALL_PATH': os.path.join(
+            os.path.abspath(root), 'OpenROAD-flow-scripts'
+        ),
+    }
@@ -1,22 +1,23 @@
 # core/fpga.py
 import csv
-import json
 import os
-import re
-import xml.etree.ElementTree as ET
-from typing import Any, Dict, List
+from functools import partial
+from typing import Any, Dict, List, Optional
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment
 
 CURRENT_DIR: str = os.getcwd()
 
 from core import (
     CONSTRAINTS_DIR,
-    TEMPLATES_DIR,
+    CRITICAL_PATHS,
     ImplementationFlow,
+    get_template_env,
+    remove_paths,
     run_cmd,
     write_template_to_file,
 )
+from core.activity import default_scope, ensure_saif, power_activity
 from core.board_defines import (
     DEFINES_BY_BOARD,
     GOWIN_BOARDS,
@@ -24,7 +25,25 @@ from core.board_defines import (
     VIVADO_BOARDS,
     YOSYS_BOARDS,
 )
-from core.log import print_blue, print_green, print_red, print_yellow
+from core.log import (
+    log,
+    print_blue,
+    print_green,
+    print_red,
+    print_yellow,
+)
+from core.metrics import FlowMetrics
+from core.reports import (
+    parse_gowin_resources,
+    parse_gowin_timing,
+    parse_nextpnr_timing,
+    parse_vivado_paths,
+    parse_vivado_power,
+    parse_vivado_timing_summary,
+    parse_vivado_utilization_hierarchy,
+    parse_yosys_stat,
+)
+from core.stages import Stage
 
 TOOLCHAINS_INSTALL_PATH = {
     'vivado': os.getenv('VIVADO_INSTALL_PATH', ''),
@@ -52,232 +71,260 @@ def write_defines(
 # Vivado Flow
 # -------------------------
 class VivadoFlow(ImplementationFlow):
-    def generate_project(self) -> None:
-        print_blue(f"Running Vivado flow for board: '{self.technology}'")
+    SCRATCH_DIRS = ['build', '.Xil']
+    SCRATCH_ESTIMATE = 2 << 30
+    SUPPORTS_ACTIVITY = True
 
-        constraints: str = (
+    @property
+    def constraints(self) -> str:
+        return (
             f'{CONSTRAINTS_DIR}/{self.technology}.xdc'
             if self.constraint_file == 'default'
             else os.path.abspath(self.constraint_file)
         )
 
+    @property
+    def stage_names(self) -> List[str]:
+        """Vivado runs of the profile, each resuming from a checkpoint."""
+        names = ['synth']
+        if self.profile != 'synth':
+            names += ['place', 'route']
+        if self.profile == 'full':
+            names.append('bitgen')
+        return names
+
+    def generate_project(self) -> None:
+        print_blue(f"Running Vivado flow for board: '{self.technology}'")
+
         context: Dict[str, Any] = {
             'files': self.project_files,
-            'constraints': constraints,
+            'constraints': self.constraints,
             'top_module': self.top_module,
             'fpga_part': VIVADO_BOARDS[self.technology]['part'],
             'prefix': VIVADO_BOARDS[self.technology]['prefix'],
             'include_dirs': self.include_dirs,
+            'profile': self.profile,
+            'activity': ensure_saif(self.activity, self.top_module)
+            if self.activity
+            else None,
+            'activity_scope': self.activity_scope
+            or default_scope(self.top_module),
+            'checkpoints': {
+                name: f'build/{name}.dcp'
+                for name in ('synth', 'place', 'route')
+            },
         }
 
-        write_template_to_file(
-            self.env, 'vivado.j2', context, 'vivado_project.tcl'
-        )
+        for name in self.stage_names:
+            write_template_to_file(
+                self.env,
+                'vivado.j2',
+                {**context, 'stage': name},
+                f'vivado_{name}.tcl',
+            )
+        os.makedirs('build', exist_ok=True)
         os.makedirs('reports', exist_ok=True)
         print_green(f"Vivado project files generated for '{self.technology}'")
 
-    def run_tool(self) -> None:
+    def stages(self) -> List[Stage]:
+        prefix: str = VIVADO_BOARDS[self.technology]['prefix']
+
+        outputs: Dict[str, List[str]] = {
+            'synth': [
+                'build/synth.dcp',
+                f'reports/{prefix}_synth_utilization.xml',
+                f'reports/{prefix}_synth_timing.rpt',
+            ],
+            'place': [
+                'build/place.dcp',
+                f'reports/{prefix}_utilization.xml',
+            ],
+            'route': [
+                'build/route.dcp',
+                f'reports/{prefix}_timing.rpt',
+                f'reports/{prefix}_power.rpt',
+            ],
+            'bitgen': [f'{prefix}.bit'],
+        }
+
+        nodes: List[Stage] = []
+        previous = 'generate'
+        for name in self.stage_names:
+            script = f'vivado_{name}.tcl'
+            inputs = [script]
+            if name == 'synth':
+                inputs += [self.constraints, *self.source_files()]
+            if name == 'route' and self.activity:
+                inputs.append(self.activity)
+            nodes.append(
+                Stage(
+                    name,
+                    partial(self._run_vivado, [name]),
+                    deps=[previous],
+                    inputs=inputs,
+                    outputs=outputs[name],
+                    key=' '.join(self._vivado_command(script)),
+                    batch=self._run_vivado,
+                )
+            )
+            previous = name
+        return nodes
+
+    @staticmethod
+    def _vivado_command(script: str) -> List[str]:
         vivado_path = TOOLCHAINS_INSTALL_PATH.get('vivado', '')
         vivado_bin = os.path.join(vivado_path, 'vivado') or 'vivado'
+        return [
+            vivado_bin,
+            '-mode',
+            'batch',
+            '-nolog',
+            '-nojournal',
+            '-source',
+            script,
+        ]
 
-        run_cmd(
-            [
-                vivado_bin,
-                '-mode',
-                'batch',
-                '-nolog',
-                '-nojournal',
-                '-source',
-                'vivado_project.tcl',
-            ]
-        )
+    def _run_vivado(self, names: List[str]) -> None:
+        """Runs the scripts of ``names`` in order in one Vivado process.
+
+        Each script still writes its checkpoint, so a later run resumes
+        from it, but only opens the previous one when no design is loaded.
+        """
+        script = 'vivado_run.tcl'
+        with open(script, 'w') as f:
+            for name in names:
+                f.write(f'source vivado_{name}.tcl\n')
+            f.write('exit\n')
+        run_cmd(self._vivado_command(script))
 
     def clean(self) -> None:
-        run_cmd(
-            [
-                'rm',
-                '-rf',
-                'build',
-                'reports',
-                '*.jou',
-                '*.log',
-                '.Xil',
-                '*.bit',
-            ]
+        remove_paths(
+            ['build', 'reports', '*.jou', '*.log', '.Xil', '*.bit']
         )
 
-    def report(self, report_path: str = 'reports') -> None:
+    def collect_metrics(self) -> FlowMetrics:
+        # Só síntese: as estimativas de vivado_synth.tcl
+        step = '_synth' if self.profile == 'synth' else ''
         timing_file = os.path.join(
-            "reports", f'{self.technology}_timing.rpt'
-        )
-        power_file = os.path.join(
-            "reports", f'{self.technology}_power.rpt'
+            'reports', f'{self.technology}{step}_timing.rpt'
         )
+        power_file = os.path.join('reports', f'{self.technology}_power.rpt')
         util_file_xml = os.path.join(
-            "reports", f'{self.technology}_utilization.xml'
+            'reports', f'{self.technology}{step}_utilization.xml'
         )
-        csv_file = os.path.join(report_path, f'{self.technology}_report.csv')
 
-        # --- PARSE DESIGN TIMING SUMMARY for WNS ---
-        wns_ns = 0.0
-        if os.path.exists(timing_file):
-            with open(timing_file, 'r') as f:
-                content = f.read()
-                # WNS é o primeiro número da tabela de Design Timing Summary
-                wns_match = re.search(
-                    r'^\s*([-+]?[0-9]*\.?[0-9]+)\s+[-+]?[0-9]*\.?[0-9]+',
-                    content,
-                    re.MULTILINE,
-                )
-                if wns_match:
-                    try:
-                        wns_ns = float(wns_match.group(1))
-                    except ValueError:
-                        wns_ns = 0.0
-
-        # --- PARSE CLOCK SUMMARY and calculate FMAX using WNS ---
-        fmax: Dict[str, float] = {}
-        if os.path.exists(timing_file):
-            with open(timing_file, 'r') as f:
-                content = f.read()
-                # Regex para pegar Clock e Period(ns)
-                clock_matches = re.findall(
-                    r'^\s*(\S+)\s+\{[^\}]*\}\s+([0-9]*\.?[0-9]+)\s+[0-9]*\.?[0-9]+\s*$',
-                    content,
-                    re.MULTILINE,
-                )
-                for clk, period_str in clock_matches:
-                    try:
-                        period_ns = float(period_str)
-                        effective_period = period_ns - wns_ns
-                        if effective_period > 0:
-                            fmax[clk] = 1000.0 / effective_period  # MHz
-                    except ValueError:
-                        continue
-
-        # --- PARSE POWER SUMMARY for Dynamic and Device Static ---
-        dynamic_w = 0.0
-        device_static_w = 0.0
-        if os.path.exists(power_file):
-            with open(power_file, 'r') as f:
-                content = f.read()
-                dynamic_match = re.search(r'Dynamic \(W\)\s*\|\s*([0-9]*\.?[0-9]+)', content)
-                if dynamic_match:
-                    dynamic_w = float(dynamic_match.group(1))
-                device_static_match = re.search(r'Device Static \(W\)\s*\|\s*([0-9]*\.?[0-9]+)', content)
-                if device_static_match:
-                    device_static_w = float(device_static_match.group(1))
-
-        # --- PARSE RESOURCE UTILIZATION XML ---
-        resources: Dict[str, int] = {}
-        if os.path.exists(util_file_xml):
-            tree = ET.parse(util_file_xml)
-            root = tree.getroot()
-
-            for section in root.findall('.//section'):
-                for table in section.findall('.//table'):
-                    for row in table.findall('tablerow'):
-                        cells = row.findall('tablecell')
-                        if not cells:
-                            continue
-                        instance_name = cells[0].attrib.get('contents', '')
-                        if instance_name != 'top':
-                            continue  # pegar apenas o total do design
-                        # mapeia colunas para recursos
-                        res_map = {
-                            'Total LUTs': int(
-                                cells[2].attrib.get('contents', '0')
-                            ),
-                            'Logic LUTs': int(
-                                cells[3].attrib.get('contents', '0')
-                            ),
-                            'LUTRAMs': int(
-                                cells[4].attrib.get('contents', '0')
-                            ),
-                            'SRLs': int(cells[5].attrib.get('contents', '0')),
-                            'FFs': int(cells[6].attrib.get('contents', '0')),
-                            'RAMB36': int(
-                                cells[7].attrib.get('contents', '0')
-                            ),
-                            'RAMB18': int(
-                                cells[8].attrib.get('contents', '0')
-                            ),
-                            'DSP Blocks': int(
-                                cells[9].attrib.get('contents', '0')
-                            ),
-                        }
-                        resources.update(res_map)
-                        break  # achou "top", não precisa mais
-
-        # --- PRINT FLOW SUMMARY ---
+        resources, modules = parse_vivado_utilization_hierarchy(
+            util_file_xml
+        )
+        clocks, slack = parse_vivado_timing_summary(timing_file)
+        power = parse_vivado_power(power_file)
+
+        return FlowMetrics(
+            backend='vivado',
+            technology=self.technology,
+            top_module=self.top_module,
+            clocks=clocks,
+            resources=resources,
+            power_w=power,
+            power_activity=power_activity(self.activity) if power else None,
+            modules=modules,
+            slack=slack,
+            paths=parse_vivado_paths(timing_file, CRITICAL_PATHS),
+        )
+
+    def print_summary(self, metrics: FlowMetrics) -> None:
         print_blue('=' * 60)
         print_blue(f' Vivado Flow Summary for board: {self.technology}')
         print_blue('=' * 60)
 
         # FMAX
         print_green('\nClock Frequency (Fmax):')
-        if fmax:
-            for clk, freq in fmax.items():
-                print(f'  {clk:<20} {freq:8.2f} MHz')
+        if metrics.clocks:
+            for clk, clock in metrics.clocks.items():
+                log('info', f'  {clk:<20} {clock.fmax_mhz:8.2f} MHz')
         else:
             print_yellow('  No clock info found.')
 
         # RESOURCE USAGE
         print_green('\nResource Utilization (top-level):')
-        print(f"{'Resource':<15} {'Used':>8}")
-        print('-' * 30)
-        for res, used in resources.items():
-            print(f'{res:<15} {used:8}')
+        log('info', f"{'Resource':<15} {'Used':>8}")
+        log('info', '-' * 30)
+        for res, resource in metrics.resources.items():
+            log('info', f'{res:<15} {resource.used:8}')
 
         # --- PRINT POWER SUMMARY ---
-        print('-' * 30)
-        print_green('Power Summary:')
-        print(f'Dynamic Power (W)      : {dynamic_w}')
-        print(f'Device Static Power (W): {device_static_w}')
+        log('info', '-' * 30)
+        print_green(f'Power Summary ({metrics.power_activity}):')
+        dynamic_w = metrics.power_w.get('dynamic', 0.0)
+        device_static_w = metrics.power_w.get('static', 0.0)
+        log('info', f'Dynamic Power (W)      : {dynamic_w}')
+        log('info', f'Device Static Power (W): {device_static_w}')
 
         print_blue('=' * 60)
         print_green('Flow summary generated successfully')
 
-        # --- WRITE CSV ---
+    def write_csv(self, metrics: FlowMetrics, report_path: str) -> str:
+        csv_file = os.path.join(report_path, f'{self.technology}_report.csv')
+
         with open(csv_file, 'w', newline='') as csvf:
             writer = csv.writer(csvf)
             writer.writerow(['Type', 'Name', 'Value'])
             # FMAX
-            for clk, freq in fmax.items():
-                writer.writerow(['FMAX (MHz)', clk, f'{freq:.2f}'])
+            for clk, clock in metrics.clocks.items():
+                writer.writerow(['FMAX (MHz)', clk, f'{clock.fmax_mhz:.2f}'])
             # Resources
-            for res, used in resources.items():
-                writer.writerow(['Resource', res, str(used)])
-
-        # --- WRITE CSV --- (adicionar ao final da escrita)
-        with open(csv_file, 'a', newline='') as csvf:  # 'a' para adicionar
-            writer = csv.writer(csvf)
-            writer.writerow(['Power', 'Dynamic (W)', f'{dynamic_w:.3f}'])
-            writer.writerow(['Power', 'Device Static (W)', f'{device_static_w:.3f}'])
+            for res, resource in metrics.resources.items():
+                writer.writerow(['Resource', res, str(resource.used)])
+            # Power
+            writer.writerow(
+                [
+                    'Power',
+                    'Dynamic (W)',
+                    f"{metrics.power_w.get('dynamic', 0.0):.3f}",
+                ]
+            )
+            writer.writerow(
+                [
+                    'Power',
+                    'Device Static (W)',
+                    f"{metrics.power_w.get('static', 0.0):.3f}",
+                ]
+            )
 
-        print_green(f'CSV summary saved to: {csv_file}')
+        return csv_file
 
 
 # -------------------------
 # Yosys Flow
 # -------------------------
 class YosysFlow(ImplementationFlow):
+    SCRATCH_DIRS = ['build', 'slpp_all']
+    SCRATCH_ESTIMATE = 512 << 20
+
+    @property
+    def module_stat_file(self) -> str:
+        prefix: str = YOSYS_BOARDS[self.technology]['prefix']
+        return f'reports/{prefix}_module_stat.txt'
+
+    @property
+    def synth_json(self) -> str:
+        return f"build/{YOSYS_BOARDS[self.technology]['prefix']}.synth.json"
+
     def generate_project(self) -> None:
         print_blue(f"Running Yosys flow for board: '{self.technology}'")
 
-        output_json: str = (
-            f"build/{YOSYS_BOARDS[self.technology]['prefix']}.synth.json"
+        # os.path.join keeps absolute include dirs (e.g. queued jobs) as is
+        include_dirs_str = ' '.join(
+            f'-I{os.path.join(CURRENT_DIR, d)}' for d in self.include_dirs
         )
 
-        include_dirs_str = ' '.join(
-        f'-I{CURRENT_DIR}/{d}' for d in self.include_dirs
-    )
-        
         context: Dict[str, Any] = {
             'files': self.project_files,
             'top_module': self.top_module,
-            'output_json': output_json,
-            'include_dirs': include_dirs_str,
+            'output_json': self.synth_json,
+            'include_dirs_str': include_dirs_str,
+            'module_stat': self.module_stat_file,
+            'elaborated': self.elaborated,
         }
 
         write_template_to_file(
@@ -287,7 +334,7 @@ class YosysFlow(ImplementationFlow):
         os.makedirs('reports', exist_ok=True)
         print_green(f"Yosys project files generated for '{self.technology}'")
 
-    def run_tool(self) -> None:
+    def stages(self) -> List[Stage]:
         prefix: str = YOSYS_BOARDS[self.technology]['prefix']
         lpf_file: str = (
             f'{CONSTRAINTS_DIR}/{self.technology}.lpf'
@@ -303,24 +350,29 @@ class YosysFlow(ImplementationFlow):
         )
         ecppack_bin = os.path.join(yosys_path, 'ecppack') or 'ecppack'
 
-        run_cmd(
-            [
-                yosys_bin,
-                '-c',
-                'yosys_project.tcl',
-            ]
-        )
+        synth = [yosys_bin, '-c', 'yosys_project.tcl']
+        nodes: List[Stage] = [
+            Stage(
+                'synth',
+                partial(run_cmd, synth),
+                deps=['generate'],
+                inputs=['yosys_project.tcl', *self.source_files()],
+                outputs=[self.synth_json, self.module_stat_file],
+                key=' '.join(synth),
+            )
+        ]
+        if self.profile == 'synth':
+            return nodes
 
-        run_cmd(
+        # nextpnr posiciona e roteia numa só execução
+        route = (
             [
                 nextpnr_bin,
                 '--json',
-                f'build/{prefix}.synth.json',
+                self.synth_json,
                 '--lpf',
                 lpf_file,
                 YOSYS_BOARDS[self.technology]['option'],
-                '--textcfg',
-                f'build/{prefix}.config',
                 '--package',
                 YOSYS_BOARDS[self.technology]['package'],
                 '--speed',
@@ -329,38 +381,115 @@ class YosysFlow(ImplementationFlow):
                 '--report',
                 f'reports/{prefix}_place_route.json',
             ]
+            + (['--seed', str(self.seed)] if self.seed is not None else [])
+            # O config só serve para o ecppack
+            + (
+                ['--textcfg', f'build/{prefix}.config']
+                if self.profile == 'full'
+                else []
+            )
         )
-
-        run_cmd(
-            [
-                ecppack_bin,
-                '--compress',
-                '--input',
-                f'build/{prefix}.config',
-                '--bit',
-                f'{prefix}.bit',
-            ]
+        nodes.append(
+            Stage(
+                'route',
+                partial(run_cmd, route),
+                deps=['synth'],
+                inputs=[lpf_file],
+                outputs=[f'reports/{prefix}_place_route.json']
+                + (
+                    [f'build/{prefix}.config']
+                    if self.profile == 'full'
+                    else []
+                ),
+                key=' '.join(route),
+            )
         )
+        if self.profile != 'full':
+            return nodes
+
+        bitgen = [
+            ecppack_bin,
+            '--compress',
+            '--input',
+            f'build/{prefix}.config',
+            '--bit',
+            f'{prefix}.bit',
+        ]
+        nodes.append(
+            Stage(
+                'bitgen',
+                partial(run_cmd, bitgen),
+                deps=['route'],
+                outputs=[f'{prefix}.bit'],
+                key=' '.join(bitgen),
+            )
+        )
+        return nodes
 
     def clean(self) -> None:
-        run_cmd(['rm', '-rf', 'build', '*.bit', '*.json', '*.rpt', 'slpp_all'])
-
-    def report(self, report_path: str = 'reports') -> None:
+        remove_paths(['build', '*.bit', '*.json', '*.rpt', 'slpp_all'])
 
+    def collect_metrics(self) -> FlowMetrics:
         print_blue(f"Generating report for board: '{self.technology}'")
-        
+
         prefix: str = YOSYS_BOARDS[self.technology]['prefix']
-        json_report_path: str = f'reports/{prefix}_place_route.json'
-        csv_path: str = f'{report_path}/{prefix}_report.csv'
+        clocks, resources, paths = parse_nextpnr_timing(
+            f'reports/{prefix}_place_route.json', CRITICAL_PATHS
+        )
+        cells, _, modules = parse_yosys_stat(self.module_stat_file)
+
+        return FlowMetrics(
+            backend='yosys',
+            technology=self.technology,
+            top_module=self.top_module,
+            clocks=clocks,
+            resources=resources,
+            cells=cells,
+            modules=modules,
+            paths=paths,
+        )
 
-        # --- Lê o JSON ---
-        with open(json_report_path, 'r') as f:
-            data: Dict[str, Any] = json.load(f)
+    def print_summary(self, metrics: FlowMetrics) -> None:
+        print_blue('=' * 60)
+        print_blue(f' FPGA Flow Summary for board: {self.technology}')
+        print_blue('=' * 60)
+
+        # --- FMAX ---
+        print_green('Clock Frequency (Fmax):')
+        for clk, clock in metrics.clocks.items():
+            line = f'  {clk:<35} {clock.fmax_mhz:8.2f} MHz'
+            if clock.constraint_mhz is not None:
+                status: str = 'OK' if clock.met else 'VIOLATED'
+                line += (
+                    f' (constraint {clock.constraint_mhz:.2f} MHz) -> {status}'
+                )
+            log('info', line)
+        log('info', '')
+
+        # --- UTILIZATION ---
+        print_green('Resource Utilization:')
+        header = f"{'Resource':<20} {'Used':>8} {'Avail':>8} {'Util %':>8}"
+        log('info', header)
+        log('info', '-' * len(header))
+
+        for res, resource in metrics.resources.items():
+            if resource.available is None:
+                # Sem total conhecido (ex.: células genéricas)
+                log('info', f"{res:<20} {resource.used:8} {'-':>8} {'-':>8}")
+                continue
+            percent: int = int(round((resource.utilization or 0) * 100))
+            log(
+                'info',
+                f'{res:<20} {resource.used:8} {resource.available:8} '
+                f'{percent:7}%',
+            )
 
-        fmax_info: Dict[str, Any] = data.get('fmax', {})
-        util_info: Dict[str, Any] = data.get('utilization', {})
+        print_blue('=' * 60)
+        print_green('Flow summary generated successfully ')
 
-        os.makedirs(report_path, exist_ok=True)
+    def write_csv(self, metrics: FlowMetrics, report_path: str) -> str:
+        prefix: str = YOSYS_BOARDS[self.technology]['prefix']
+        csv_path: str = f'{report_path}/{prefix}_report.csv'
 
         with open(csv_path, 'w', newline='') as csvfile:
             writer = csv.writer(csvfile)
@@ -368,90 +497,61 @@ class YosysFlow(ImplementationFlow):
             writer.writerow(['Resource', 'Used', 'Available', 'Utilization %'])
 
             # --- FMAX ---
-            for clk, values in fmax_info.items():
-                achieved: float = values.get('achieved', 0.0)
-                constraint: float = values.get('constraint', 0.0)
+            for clock in metrics.clocks.values():
+                constraint: float = clock.constraint_mhz or 0.0
+                ratio: float = (
+                    constraint / clock.fmax_mhz * 100 if clock.fmax_mhz else 0
+                )
                 writer.writerow(
                     [
                         'FMAX',
                         f'{constraint:.2f}',
-                        f'{achieved:.2f}',
-                        f'{constraint / achieved * 100:.2f}%',
+                        f'{clock.fmax_mhz:.2f}',
+                        f'{ratio:.2f}%',
                     ]
                 )
 
             # --- UTILIZATION ---
-
-            for res, values in util_info.items():
-                used: int = values.get('used', 0)
-                available: int = values.get('available', 0)
-                percent: int = (
-                    int(round((used / available) * 100))
-                    if available > 0
-                    else 0
+            for res, resource in metrics.resources.items():
+                percent: int = int(round((resource.utilization or 0) * 100))
+                writer.writerow(
+                    [res, resource.used, resource.available, f'{percent}%']
                 )
-                writer.writerow([res, used, available, f'{percent}%'])
-
-        print_green(f'Report CSV generated at: {csv_path}')
-
-        print_blue('=' * 60)
-        print_blue(f' FPGA Flow Summary for board: {self.technology}')
-        print_blue('=' * 60)
-
-        # --- FMAX ---
-        print_green('Clock Frequency (Fmax):')
-        for clk, values in fmax_info.items():
-            achieved: float = values.get('achieved', 0.0)
-            constraint: float = values.get('constraint', 0.0)
-            status: str = 'OK' if achieved >= constraint else 'VIOLATED'
-            print(
-                f'  {clk:<35} {achieved:8.2f} MHz '
-                f'(constraint {constraint:.2f} MHz) -> {status}'
-            )
-        print('')
-
-        # --- UTILIZATION ---
-        print_green('Resource Utilization:')
-        header = f"{'Resource':<20} {'Used':>8} {'Avail':>8} {'Util %':>8}"
-        print(header)
-        print('-' * len(header))
-
-        for res, values in util_info.items():
-            used: int = values.get('used', 0)
-            available: int = values.get('available', 0)
-            percent: int = (
-                int(round((used / available) * 100)) if available > 0 else 0
-            )
-            print(f'{res:<20} {used:8} {available:8} {percent:7}%')
 
-        print_blue('=' * 60)
-        print_green('Flow summary generated successfully ')
+        return csv_path
 
 
 # -------------------------
 # Gowin Flow
 # -------------------------
 class GowinFlow(ImplementationFlow):
-    def generate_project(self) -> None:
-        print_blue(f"Running Gowin flow for board: '{self.technology}'")
-
-        constraints: List[str] = [
-            f'{CONSTRAINTS_DIR}/{self.technology}.sdc'
+    # Os relatórios em impl/pnr voltam para o diretório de trabalho
+    SCRATCH_DIRS = ['impl']
+    SCRATCH_ESTIMATE = 512 << 20
+
+    @property
+    def constraints(self) -> List[str]:
+        return [
+            f'{CONSTRAINTS_DIR}/gowin_{self.technology}.sdc'
             if self.constraint_file == 'default'
             else os.path.abspath(self.constraint_file),
-            f'{CONSTRAINTS_DIR}/{self.technology}.cst'
+            f'{CONSTRAINTS_DIR}/gowin_{self.technology}.cst'
             if self.constraint_file == 'default'
             else os.path.abspath(self.constraint_file),
         ]
 
+    def generate_project(self) -> None:
+        print_blue(f"Running Gowin flow for board: '{self.technology}'")
+
         context: Dict[str, Any] = {
             'files': self.project_files,
-            'constraints': constraints,
+            'constraints': self.constraints,
             'top_module': self.top_module,
             'device_name': GOWIN_BOARDS[self.technology]['device_name'],
             'device_package': GOWIN_BOARDS[self.technology]['device_package'],
             'prefix': GOWIN_BOARDS[self.technology]['prefix'],
             'options': {},
+            'profile': self.profile,
         }
 
         write_template_to_file(
@@ -459,17 +559,56 @@ class GowinFlow(ImplementationFlow):
         )
         print_green(f"Gowin project files generated for '{self.technology}'")
 
-    def run_tool(self) -> None:
+    def stages(self) -> List[Stage]:
         gowin_path = TOOLCHAINS_INSTALL_PATH.get('gowin', '')
         gowin_bin = os.path.join(gowin_path, 'gw_sh') or 'gw_sh'
-
-        run_cmd([gowin_bin, 'gowin_project.tcl'])
+        prefix: str = GOWIN_BOARDS[self.technology]['prefix']
+        command = [gowin_bin, 'gowin_project.tcl']
+
+        # gw_sh não retoma de um checkpoint: síntese, place & route e
+        # bitstream numa só execução
+        synth_only = self.profile == 'synth'
+        return [
+            Stage(
+                'synth' if synth_only else 'route',
+                partial(run_cmd, command),
+                deps=['generate'],
+                inputs=[
+                    'gowin_project.tcl',
+                    *self.constraints,
+                    *self.source_files(),
+                ],
+                outputs=[]
+                if synth_only
+                else [
+                    os.path.join('impl', 'pnr', f'{prefix}.tr'),
+                    os.path.join('impl', 'pnr', f'{prefix}.rpt.txt'),
+                ],
+                key=' '.join(command),
+            )
+        ]
 
     def clean(self) -> None:
-        run_cmd(['rm', '-rf', 'build', 'reports', '*.jou', '*.log', '*.bit'])
+        remove_paths(
+            ['build', 'reports', 'impl', '*.jou', '*.log', '*.bit']
+        )
+
+    def collect_metrics(self) -> FlowMetrics:
+        print_blue(f"Generating report for board: '{self.technology}'")
 
-    def report(self, report_path: str = 'reports') -> None:
-        pass
+        # gw_sh escreve os relatórios de place & route em impl/pnr
+        prefix: str = GOWIN_BOARDS[self.technology]['prefix']
+        pnr_dir: str = os.path.join('impl', 'pnr')
+
+        return FlowMetrics(
+            backend='gowin',
+            technology=self.technology,
+            top_module=self.top_module,
+            clocks=parse_gowin_timing(os.path.join(pnr_dir, f'{prefix}.tr')),
+            resources=parse_gowin_resources(
+                os.path.join(pnr_dir, f'{prefix}.rpt.txt')
+            ),
+        )
 
 
 # -------------------------
@@ -482,22 +621,35 @@ def get_flow(
     top_module: str,
     include_dirs: List[str],
     env: Environment,
+    seed: Optional[int] = None,
+    profile: str = 'full',
+    activity: Optional[str] = None,
+    activity_scope: Optional[str] = None,
+    elaborated: bool = False,
 ) -> ImplementationFlow:
     if board_name in VIVADO_BOARDS:
-        return VivadoFlow(
-            technology=board_name, project_files=project_files, constraint_file=constraint_file, top_module=top_module, env=env, include_dirs=include_dirs
-        )
+        flow_class = VivadoFlow
     elif board_name in YOSYS_BOARDS:
-        return YosysFlow(
-            technology=board_name, project_files=project_files, constraint_file=constraint_file, top_module=top_module, env=env, include_dirs=include_dirs
-        )
+        flow_class = YosysFlow
     elif board_name in GOWIN_BOARDS:
-        return GowinFlow(
-            technology=board_name, project_files=project_files, constraint_file=constraint_file, top_module=top_module, env=env, include_dirs=include_dirs
-        )
+        flow_class = GowinFlow
     else:
         raise ValueError(f"Board '{board_name}' not supported.")
 
+    return flow_class(
+        technology=board_name,
+        project_files=project_files,
+        constraint_file=constraint_file,
+        top_module=top_module,
+        env=env,
+        include_dirs=include_dirs,
+        seed=seed,
+        profile=profile,
+        activity=activity,
+        activity_scope=activity_scope,
+        elaborated=elaborated,
+    )
+
 
 # -------------------------
 # Função principal
@@ -511,7 +663,12 @@ def run_fpga_flow(
     get_reports: bool = False,
     clean: bool = False,
     report_path: str = 'reports',
-) -> None:
+    seed: Optional[int] = None,
+    profile: str = 'full',
+    activity: Optional[str] = None,
+    activity_scope: Optional[str] = None,
+    elaborated: bool = False,
+) -> Optional[FlowMetrics]:
     board_name = board_name.lower()
 
     if board_name not in SUPPORTED_BOARDS:
@@ -519,11 +676,7 @@ def run_fpga_flow(
 
     write_defines(board_name)
 
-    env: Environment = Environment(
-        loader=FileSystemLoader(TEMPLATES_DIR),
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
+    env: Environment = get_template_env()
 
     flow: ImplementationFlow = get_flow(
         board_name=board_name,
@@ -532,11 +685,12 @@ def run_fpga_flow(
         top_module=top_module,
         include_dirs=include_dirs,
         env=env,
+        seed=seed,
+        profile=profile,
+        activity=activity,
+        activity_scope=activity_scope,
+        elaborated=elaborated,
+    )
+    return flow.run(
+        get_reports=get_reports, report_path=report_path, clean=clean
     )
-    flow.run()
-
-    if get_reports:
-        flow.report(report_path=report_path)
-
-    if clean:
-        flow.clean()
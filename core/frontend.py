@@ -0,0 +1,283 @@
+"""Shared front end: elaborate a core once for every backend.
+
+Without it, every target parses and elaborates the same RTL again with its
+own front end (Surelog in synlig, Vivado's ``read_verilog -sv``, Gowin,
+slang in ORFS). With ``elaborate`` set on a job, :func:`elaborate_job`
+runs synlig once per distinct input, resolving parameters, generate
+blocks, includes and defines, and writes a plain Verilog-2005 netlist
+(``write_verilog``) that the flows then read with their cheapest reader.
+Front-end errors surface there once, with one log, instead of once per
+target; an elaboration rejected by synlig (a non-zero exit status) is
+cached too, so the other jobs of a sweep fail right away with the same
+error. Failures that may not happen again (synlig killed by a signal, e.g.
+out of memory, or a netlist that could not be written) are not cached,
+and cached failures expire after ``$PROCESSOR_CI_FRONTEND_FAILED_TTL``
+seconds (default one hour; ``0`` retries them every time, as
+``main.py batch --force`` does).
+
+The module hierarchy is kept (``hierarchy; proc; memory -nomap``, no
+``flatten``): the per-module utilization and the critical path ranking
+need it, and the backends flatten anyway when they want to.
+
+Entries are keyed by the content of the sources, the top module, the
+define set and the synlig version. The define set is the board's
+``processor_ci_defines.vh`` for FPGA jobs and empty for ASIC jobs, so all
+PDKs, and boards with identical defines, share one elaboration. Keys do
+not depend on paths, so staged copies of the same sources hit the cache.
+
+Layout of the cache (``$PROCESSOR_CI_FRONTEND_DIR``)::
+
+    <key>/netlist.v       elaborated design
+    <key>/frontend.log    synlig output (kept for failed entries)
+    .<key>.lock           held while an entry is being elaborated
+    .<key>.log            synlig output of the last failure not cached
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+import uuid
+from dataclasses import replace
+from functools import lru_cache
+from typing import List, Optional
+
+from core import get_template_env, write_template_to_file
+from core.board_defines import DEFINES_BY_BOARD
+from core.job import Job
+from core.log import print_blue, print_yellow
+from core.staging import source_closure
+from core.telemetry import cache_event
+
+FRONTEND_DIR_ENV = 'PROCESSOR_CI_FRONTEND_DIR'
+FAILED_TTL_ENV = 'PROCESSOR_CI_FRONTEND_FAILED_TTL'
+DEFAULT_FAILED_TTL = 3600.0
+DEFAULT_FRONTEND_DIR = os.path.join(
+    os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'processor_ci_perf',
+    'frontend',
+)
+NETLIST_FILE = 'netlist.v'
+LOG_FILE = 'frontend.log'
+DEFINES_FILE = 'processor_ci_defines.vh'
+
+# Fontes que o synlig não lê; esses jobs usam o front-end de cada backend
+_UNSUPPORTED_EXTENSIONS = ('.vhd', '.vhdl')
+
+
+class ElaborationError(RuntimeError):
+    """The front end rejected the design (cached, see the log)."""
+
+
+def frontend_dir() -> str:
+    return os.getenv(FRONTEND_DIR_ENV) or DEFAULT_FRONTEND_DIR
+
+
+def failed_ttl() -> float:
+    """Seconds a cached elaboration failure is trusted."""
+    try:
+        return float(os.getenv(FAILED_TTL_ENV, DEFAULT_FAILED_TTL))
+    except ValueError:
+        return DEFAULT_FAILED_TTL
+
+
+def synlig_bin() -> str:
+    # Importado aqui: comandos leves não carregam os módulos dos flows
+    from core.fpga import TOOLCHAINS_INSTALL_PATH
+
+    return os.path.join(TOOLCHAINS_INSTALL_PATH.get('yosys', ''), 'synlig')
+
+
+@lru_cache(maxsize=None)
+def synlig_version(binary: str) -> str:
+    try:
+        result = subprocess.run(
+            [binary, '-V'], capture_output=True, text=True, check=False
+        )
+    except OSError:
+        return 'unknown'
+    return result.stdout.strip() or 'unknown'
+
+
+def define_set(job: Job) -> str:
+    """Defines visible to the RTL of ``job`` (processor_ci_defines.vh)."""
+    if job.flow == 'fpga':
+        return DEFINES_BY_BOARD.get(job.technology, '')
+    return ''
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frontend_key(
+    files: List[str], include_dirs: List[str], top_module: str, defines: str
+) -> str:
+    """Hash of what the elaborated netlist depends on, paths aside."""
+    files, sources = source_closure(files, include_dirs)
+    payload = {
+        # A ordem dos arquivos importa (defines e pacotes)
+        'files': [_digest(f) for f in files],
+        'sources': sorted(
+            f'{os.path.basename(s)} {_digest(s)}' for s in set(sources)
+        ),
+        'top_module': top_module,
+        'defines': defines,
+        'synlig': synlig_version(synlig_bin()),
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True).encode('utf-8')
+    ).hexdigest()[:16]
+
+
+class FrontendCache:
+    """Elaborated netlists under ``root``, one directory per key."""
+
+    def __init__(self, root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def elaborate(
+        self,
+        files: List[str],
+        include_dirs: List[str],
+        top_module: str,
+        defines: str = '',
+        force: bool = False,
+    ) -> str:
+        """Path of the elaborated netlist, elaborating it if not cached.
+
+        Concurrent callers with the same key wait for the first one
+        instead of elaborating the design again. With ``force``, a cached
+        failure is discarded and the design elaborated again.
+
+        Raises:
+            ElaborationError: If synlig fails, now or in a cached attempt.
+        """
+        key = frontend_key(files, include_dirs, top_module, defines)
+        entry = os.path.join(self.root, key)
+        ttl = 0.0 if force else failed_ttl()
+
+        netlist = self._lookup(entry, ttl)
+        if netlist:
+            cache_event('frontend', hit=True)
+            return netlist
+        with open(os.path.join(self.root, f'.{key}.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            netlist = self._lookup(entry, ttl)
+            if netlist:
+                # Elaborado por outro job enquanto este esperava
+                cache_event('frontend', hit=True)
+                return netlist
+            cache_event('frontend', hit=False)
+            print_blue(f'Elaborating {top_module} ({key})')
+            # Falha expirada ou descartada: elabora de novo
+            shutil.rmtree(entry, ignore_errors=True)
+            build_dir = os.path.join(self.root, f'.tmp-{uuid.uuid4().hex}')
+            os.makedirs(build_dir)
+            try:
+                if not self._run(
+                    files, include_dirs, top_module, defines, build_dir
+                ):
+                    log_path = os.path.join(self.root, f'.{key}.log')
+                    os.replace(os.path.join(build_dir, LOG_FILE), log_path)
+                    raise ElaborationError(
+                        f'Elaboration interrupted, see {log_path}'
+                    )
+                os.rename(build_dir, entry)
+            finally:
+                shutil.rmtree(build_dir, ignore_errors=True)
+        return self._lookup(entry, ttl) or ''
+
+    @staticmethod
+    def _lookup(entry: str, ttl: float) -> Optional[str]:
+        """Cached netlist of ``entry``, or None if it must be elaborated.
+
+        Raises:
+            ElaborationError: If the entry is a failure younger than
+                ``ttl`` seconds.
+        """
+        netlist = os.path.join(entry, NETLIST_FILE)
+        if os.path.exists(netlist):
+            return netlist
+        try:
+            age = time.time() - os.stat(entry).st_mtime
+        except FileNotFoundError:
+            return None
+        if age >= ttl:
+            return None
+        raise ElaborationError(
+            f'Elaboration failed, see {os.path.join(entry, LOG_FILE)}'
+        )
+
+    @staticmethod
+    def _run(
+        files: List[str],
+        include_dirs: List[str],
+        top_module: str,
+        defines: str,
+        build_dir: str,
+    ) -> bool:
+        """Runs synlig in ``build_dir``.
+
+        Returns:
+            bool: Whether the result can be cached: a netlist, or a
+            failure reported by synlig itself.
+        """
+        with open(os.path.join(build_dir, DEFINES_FILE), 'w') as f:
+            f.write(defines)
+        include_dirs_str = ' '.join(
+            f'-I{os.path.abspath(d)}' for d in [build_dir, *include_dirs]
+        )
+        script = write_template_to_file(
+            get_template_env(),
+            'yosys_frontend.j2',
+            {
+                'files': [os.path.abspath(f) for f in files],
+                'include_dirs_str': include_dirs_str,
+                'top_module': top_module,
+                'netlist': NETLIST_FILE,
+            },
+            os.path.join(build_dir, 'frontend.tcl'),
+        )
+
+        with open(os.path.join(build_dir, LOG_FILE), 'w') as log:
+            result = subprocess.run(
+                [synlig_bin(), '-c', script],
+                cwd=build_dir,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                check=False,
+            )
+        netlist = os.path.join(build_dir, NETLIST_FILE)
+        if result.returncode > 0:
+            # Erro do synlig: publica só o log, os outros jobs falham
+            # sem refazer
+            if os.path.exists(netlist):
+                os.remove(netlist)
+            return True
+        # Morto por sinal (< 0), ou netlist não escrito
+        return result.returncode == 0 and os.path.exists(netlist)
+
+
+def elaborate_job(job: Job, cache: FrontendCache) -> Optional[Job]:
+    """Copy of ``job`` that reads the shared elaborated netlist.
+
+    Returns None for jobs with sources synlig cannot read (VHDL), which
+    keep their backend's own front end.
+    """
+    if any(f.lower().endswith(_UNSUPPORTED_EXTENSIONS) for f in job.files):
+        print_yellow(
+            f'{job.name}: VHDL sources, elaborating with the backend instead'
+        )
+        return None
+    netlist = cache.elaborate(
+        job.files, job.include_dirs, job.top_module, define_set(job)
+    )
+    return replace(job, files=[netlist], include_dirs=[])
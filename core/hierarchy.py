@@ -0,0 +1,90 @@
+"""Per-module comparison of two runs.
+
+Flows store the usage of each instance (Vivado) or module (Yosys, ORFS) in
+:attr:`FlowMetrics.modules`. :func:`diff_modules` lines up two runs and
+ranks the modules by how much they grew, which tells whether a change in
+the totals came from the core itself or from the Processor CI wrapper.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.results import ResultsDB
+
+# Métrica usada por padrão no ranking de cada backend
+PRIMARY_METRIC: Dict[str, str] = {
+    'vivado': 'Total LUTs',
+    'yosys': 'cells',
+    'openroad': 'area_um2',
+}
+
+
+@dataclass
+class ModuleDelta:
+    module: str
+    metric: str
+    old: float
+    new: float
+
+    @property
+    def delta(self) -> float:
+        return self.new - self.old
+
+    @property
+    def relative(self) -> Optional[float]:
+        """Growth as a fraction of the old value; None for new modules."""
+        return self.delta / self.old if self.old else None
+
+
+def diff_modules(
+    old: Dict[str, Dict[str, float]],
+    new: Dict[str, Dict[str, float]],
+    metric: str,
+) -> List[ModuleDelta]:
+    """Changes of ``metric`` per module, largest growth first.
+
+    Modules present in only one run count as zero in the other; modules
+    whose value did not change are left out.
+    """
+    deltas = [
+        ModuleDelta(
+            module,
+            metric,
+            old.get(module, {}).get(metric, 0.0),
+            new.get(module, {}).get(metric, 0.0),
+        )
+        for module in set(old) | set(new)
+    ]
+    return sorted(
+        (d for d in deltas if d.delta),
+        key=lambda d: (-d.delta, d.module),
+    )
+
+
+def resolve_runs(
+    db: ResultsDB, refs: List[str]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Old and new run records from run ids or ``core@target`` names.
+
+    Two references select those runs (a name meaning its latest successful
+    run); a single name compares its two latest successful runs.
+
+    Raises:
+        ValueError: If a reference matches no run.
+    """
+
+    def lookup(ref: str, skip: int = 0) -> Dict[str, Any]:
+        if ref.isdigit():
+            record = db.run(int(ref))
+            if record is None:
+                raise ValueError(f'Run {ref} not found')
+            return record
+        history = db.history(name=ref, limit=skip + 1)
+        if len(history) <= skip:
+            raise ValueError(f"Not enough successful runs of '{ref}'")
+        return history[skip]
+
+    if len(refs) == 1:
+        if refs[0].isdigit():
+            raise ValueError('A single reference must be a core@target name')
+        return lookup(refs[0], skip=1), lookup(refs[0])
+    return lookup(refs[0]), lookup(refs[1])
@@ -0,0 +1,381 @@
+"""Job specification shared by the CLI, the work queue and batch runners."""
+import hashlib
+import json
+import os
+import time
+import traceback
+from dataclasses import MISSING, asdict, dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.board_defines import GOWIN_BOARDS, VIVADO_BOARDS, YOSYS_BOARDS
+from core.log import job_output, log_context
+from core.metrics import FlowMetrics
+from core.pdk_defines import SUPPORTED_PDKS
+from core.processor_ci_internals import (
+    CONTROLLER_FILES,
+    PROCESSOR_INTERNAL_FILES,
+)
+from core.telemetry import collect_probe, reset_probe, stage
+
+FLOWS = ('fpga', 'asic')
+# 'full' gera bitstream/GDS e todos os relatórios; 'metrics' só o que os
+# parsers usam (Fmax, utilização, potência); 'synth' para após a síntese,
+# com as estimativas usadas pelo preditor de QoR
+FLOW_PROFILES = ('full', 'metrics', 'synth')
+
+# path -> (mtime, parsed config); keeps long-running processes from
+# rereading unchanged core configurations for every job
+_CONFIG_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+@dataclass
+class Job:
+    """A single flow execution: one core on one board or PDK."""
+
+    flow: str
+    technology: str
+    files: List[str]
+    top_module: str = 'processorci_top'
+    include_dirs: List[str] = field(default_factory=list)
+    constraint: str = 'default'
+    core_id: Optional[str] = None
+    get_reports: bool = False
+    clean: bool = False
+    report_path: str = 'reports'
+    seed: Optional[int] = None
+    auto_size: bool = False
+    multi_corner: bool = False
+    profile: str = 'full'
+    # SAIF/VCD de uma simulação para a análise de potência (core.activity)
+    activity: Optional[str] = None
+    activity_scope: Optional[str] = None
+    # Lê o netlist elaborado uma vez pelo front-end comum (core.frontend)
+    elaborate: bool = False
+
+    @property
+    def job_id(self) -> str:
+        """Stable identifier derived from the job contents.
+
+        Two submissions of the same job always get the same id, which is
+        what lets queues and batch runners skip work that is already done.
+        Fields left at their default are not hashed, so adding a new option
+        does not change the id of existing jobs.
+        """
+        defaults = {
+            f.name: f.default_factory()
+            if f.default_factory is not MISSING
+            else f.default
+            for f in fields(self)
+        }
+        payload = json.dumps(
+            {k: v for k, v in self.to_dict().items() if v != defaults[k]},
+            sort_keys=True,
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def toolchain(self) -> str:
+        """EDA toolchain the job runs on: vivado, yosys, gowin or openroad."""
+        if self.technology in VIVADO_BOARDS:
+            return 'vivado'
+        if self.technology in YOSYS_BOARDS:
+            return 'yosys'
+        if self.technology in GOWIN_BOARDS:
+            return 'gowin'
+        if self.technology in SUPPORTED_PDKS:
+            return 'openroad'
+        return 'unknown'
+
+    @property
+    def name(self) -> str:
+        """Human readable label, e.g. ``darkriscv@colorlight_i9``."""
+        return f'{self.core_id or self.top_module}@{self.technology}'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Job':
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def absolutize(self, base_dir: Optional[str] = None) -> 'Job':
+        """Returns a copy with every source path made absolute.
+
+        Jobs that are executed away from the submitting shell (queue
+        workers, batch executors) run inside their own work directory, so
+        relative paths must be resolved against the submitter's cwd.
+        """
+        base_dir = base_dir or os.getcwd()
+
+        def _abs(path: str) -> str:
+            return os.path.normpath(os.path.join(base_dir, path))
+
+        data = self.to_dict()
+        data['files'] = [_abs(f) for f in self.files]
+        data['include_dirs'] = [_abs(d) for d in self.include_dirs]
+        if self.constraint != 'default':
+            data['constraint'] = _abs(self.constraint)
+        if self.activity:
+            data['activity'] = _abs(self.activity)
+        return Job.from_dict(data)
+
+
+def load_core_config(config_path: str) -> Dict[str, Any]:
+    """Loads a core configuration, reusing the cached copy if unchanged."""
+    config_path = os.path.abspath(config_path)
+    mtime = os.stat(config_path).st_mtime
+
+    cached = _CONFIG_CACHE.get(config_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(config_path, 'r', encoding='utf-8') as file:
+        config_data = json.load(file)
+
+    _CONFIG_CACHE[config_path] = (mtime, config_data)
+    return config_data
+
+
+def list_cores(config_dir: str) -> List[str]:
+    """Returns the ids of every core configured in ``config_dir``."""
+    return sorted(
+        name[: -len('.json')]
+        for name in os.listdir(config_dir)
+        if name.endswith('.json')
+    )
+
+
+def resolve_sources(
+    files: List[str],
+    include_dirs: List[str],
+    top_module: str,
+    config_path: str,
+    use_config: bool = False,
+    use_pci_wrapper: bool = False,
+    processor_ci_path: str = '',
+    core_id: Optional[str] = None,
+) -> Tuple[List[str], List[str], str]:
+    """Resolves the file list, include dirs and top module of a job.
+
+    Mirrors the command line semantics: ``use_config`` replaces the given
+    files with the ones listed in the core configuration and
+    ``use_pci_wrapper`` appends the Processor CI controller and wrapper RTL.
+
+    Args:
+        files (List[str]): Project files given on the command line.
+        include_dirs (List[str]): Include directories given on the command
+            line.
+        top_module (str): Top module given on the command line.
+        config_path (str): Configuration file, or the configuration
+            directory when ``core_id`` selects ``<core_id>.json`` inside it.
+        use_config (bool): Read files from the configuration.
+        use_pci_wrapper (bool): Wrap the core with the Processor CI RTL.
+        processor_ci_path (str): Path to the Processor CI checkout.
+        core_id (Optional[str]): Identifier of the core.
+
+    Raises:
+        ValueError: When the Processor CI wrapper is requested without a
+            core id.
+
+    Returns:
+        Tuple[List[str], List[str], str]: Files, include dirs and top.
+    """
+    files = list(files)
+    include_dirs = list(include_dirs)
+
+    if use_config:
+        if os.path.isdir(config_path) and core_id:
+            config_path = os.path.join(config_path, f'{core_id}.json')
+
+        config_data = load_core_config(config_path)
+
+        files = list(config_data.get('files', []))
+        include_dirs = list(config_data.get('include_dirs', []))
+        top_module = config_data.get('top_module', top_module)
+
+    if use_pci_wrapper:
+        if not core_id:
+            raise ValueError(
+                'Core ID is required when using Processor CI wrapper.'
+            )
+
+        top_module = 'fpga_top'
+
+        controller_path = processor_ci_path.replace(
+            'processor_ci', 'processor-ci-controller/'
+        )
+
+        for i in CONTROLLER_FILES:
+            files.append(os.path.join(controller_path, i))
+
+        for i in PROCESSOR_INTERNAL_FILES:
+            files.append(os.path.join(processor_ci_path, i))
+
+        files.append(os.path.join(processor_ci_path, f'rtl/{core_id}.sv'))
+
+    return files, include_dirs, top_module
+
+
+def build_job(
+    flow: str,
+    technology: str,
+    files: Optional[List[str]] = None,
+    include_dirs: Optional[List[str]] = None,
+    top_module: str = 'processorci_top',
+    constraint: str = 'default',
+    config_path: str = '',
+    use_config: bool = False,
+    use_pci_wrapper: bool = False,
+    processor_ci_path: str = '',
+    core_id: Optional[str] = None,
+    get_reports: bool = False,
+    clean: bool = False,
+    report_path: str = 'reports',
+    seed: Optional[int] = None,
+    auto_size: bool = False,
+    multi_corner: bool = False,
+    profile: str = 'full',
+    activity: Optional[str] = None,
+    activity_scope: Optional[str] = None,
+    elaborate: bool = False,
+) -> Job:
+    """Builds a :class:`Job` from command line style options."""
+    if profile not in FLOW_PROFILES:
+        raise ValueError(f"Unknown flow profile '{profile}'")
+
+    files, include_dirs, top_module = resolve_sources(
+        files or [],
+        include_dirs or [],
+        top_module or 'processorci_top',
+        config_path=config_path,
+        use_config=use_config,
+        use_pci_wrapper=use_pci_wrapper,
+        processor_ci_path=processor_ci_path,
+        core_id=core_id,
+    )
+
+    return Job(
+        flow=flow,
+        technology=technology,
+        files=files,
+        top_module=top_module,
+        include_dirs=include_dirs,
+        constraint=constraint,
+        core_id=core_id,
+        get_reports=get_reports,
+        clean=clean,
+        report_path=report_path,
+        seed=seed,
+        auto_size=auto_size,
+        multi_corner=multi_corner,
+        profile=profile,
+        activity=activity,
+        activity_scope=activity_scope,
+        elaborate=elaborate,
+    )
+
+
+def run_job(
+    job: Job, workdir: Optional[str] = None
+) -> Optional[FlowMetrics]:
+    """Runs a job, optionally inside its own work directory.
+
+    The flows write their scripts, build products and reports relative to
+    the current directory, so ``workdir`` is entered for the duration of
+    the run and the previous directory restored afterwards. Jobs with
+    ``elaborate`` first get the shared netlist of :mod:`core.frontend`.
+
+    Returns:
+        Optional[FlowMetrics]: Metrics of the run when reports are enabled.
+    """
+    # Imported here so that lightweight commands (queue status, submit)
+    # do not pay for loading the flow modules.
+    from core.asic import run_asic_flow
+    from core.fpga import run_fpga_flow
+
+    if job.flow not in FLOWS:
+        raise ValueError(f"Flow '{job.flow}' is not supported.")
+
+    elaborated: Optional[Job] = None
+    if job.elaborate:
+        from core.frontend import FrontendCache, elaborate_job, frontend_dir
+
+        with stage('elaborate'):
+            elaborated = elaborate_job(job, FrontendCache(frontend_dir()))
+        job = elaborated or job
+
+    previous_dir = os.getcwd()
+    if workdir:
+        os.makedirs(workdir, exist_ok=True)
+        os.chdir(workdir)
+
+    try:
+        kwargs: Dict[str, Any] = {
+            'constraint_file': job.constraint,
+            'top_module': job.top_module,
+            'get_reports': job.get_reports,
+            'clean': job.clean,
+            'report_path': job.report_path,
+            'include_dirs': list(job.include_dirs),
+            'profile': job.profile,
+            'activity': job.activity,
+            'activity_scope': job.activity_scope,
+            'elaborated': elaborated is not None,
+        }
+        if job.flow == 'fpga':
+            return run_fpga_flow(
+                job.technology, list(job.files), seed=job.seed, **kwargs
+            )
+        return run_asic_flow(
+            job.technology,
+            list(job.files),
+            auto_size=job.auto_size,
+            multi_corner=job.multi_corner,
+            **kwargs,
+        )
+    finally:
+        os.chdir(previous_dir)
+
+
+def execute_job(
+    job_data: Dict[str, Any],
+    workdir: str,
+    runner: Optional[Callable[[Job, str], Optional[FlowMetrics]]] = None,
+    job_log: bool = False,
+) -> Dict[str, Any]:
+    """Runs a job and returns a result record instead of raising.
+
+    Meant as the target of process pools: takes and returns plain data
+    (``runner``, which defaults to :func:`run_job`, must be picklable).
+    The record also carries the stage times and cache events of the job
+    (see :mod:`core.telemetry`). With ``job_log``, the output of the job
+    goes to ``job.log`` in ``workdir`` (see :func:`core.log.job_output`).
+    """
+    job = Job.from_dict(job_data)
+    reset_probe()
+    started = time.time()
+    error: Optional[str] = None
+    metrics: Optional[FlowMetrics] = None
+    output = (
+        job_output(workdir, job=job.name, job_id=job.job_id)
+        if job_log
+        else log_context(job=job.name, job_id=job.job_id)
+    )
+    with output:
+        try:
+            metrics = (runner or run_job)(job, workdir)
+        except Exception:  # pylint: disable=broad-except
+            error = traceback.format_exc()
+
+    return {
+        'job_id': job.job_id,
+        'name': job.name,
+        'status': 'failed' if error else 'done',
+        'started': started,
+        'duration': time.time() - started,
+        'workdir': workdir,
+        'error': error,
+        'metrics': metrics.to_dict() if metrics is not None else None,
+        **collect_probe(),
+    }
@@ -0,0 +1,289 @@
+"""Load test of the orchestration layer using the fake EDA tools.
+
+Pushes many small jobs through the real flows, with :mod:`core.fake_eda`
+standing in for the vendor tools, and measures what the harness itself
+costs: overhead per job (job time not spent inside a tool), scheduler
+latency and throughput. Two schedulers can be measured:
+
+    executor    local process pool of :class:`core.executor.Executor`
+    queue       :class:`core.work_queue.FileQueue` drained by local workers
+
+For the executor, scheduler latency is the time from handing a job to the
+pool until it starts. For the queue, it is the idle gap a worker spends
+between finishing one job and starting the next (claiming and polling).
+
+Failures injected with ``fail_rate`` must show up as failed jobs: every
+job runs at least one tool, so a rate of 1 fails them all, and a run
+where failures were all but certain but none was counted means the
+harness swallowed them.
+"""
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.executor import Executor, JobGraph
+from core.fake_eda import FakeToolLoad, install_fake_tools, read_tool_times
+from core.job import Job
+from core.pdk_defines import SUPPORTED_PDKS
+from core.results import ResultsDB
+from core.work_queue import FileQueue, run_workers
+
+# One target per backend
+DEFAULT_TARGETS: List[str] = [
+    'digilent_arty_a7_100t',
+    'colorlight_i9',
+    'tangnano_9k',
+    'sky130hd',
+]
+MODES = ('executor', 'queue')
+
+_TOP_MODULE = 'loadtest_top'
+_SOURCE = f"""module {_TOP_MODULE} (
+    input  wire       clk,
+    input  wire       rst,
+    output reg  [7:0] count
+);
+    always @(posedge clk)
+        if (rst) count <= 8'd0;
+        else     count <= count + 8'd1;
+endmodule
+"""
+
+
+@contextlib.contextmanager
+def _redirect_output(path: str) -> Iterator[None]:
+    """Sends stdout/stderr, including child processes, to ``path``."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    log_fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.dup2(log_fd, 1)
+        os.dup2(log_fd, 2)
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in saved + [log_fd]:
+            os.close(fd)
+
+
+def _use_fake_tools(env: Dict[str, str]) -> None:
+    os.environ.update(env)
+    # Os caminhos das ferramentas são lidos na importação dos flows
+    from core import asic, fpga, simulation
+
+    fpga.TOOLCHAINS_INSTALL_PATH.update(
+        vivado=env['VIVADO_INSTALL_PATH'],
+        yosys=env['YOSYS_INSTALL_PATH'],
+        gowin=env['GOWIN_INSTALL_PATH'],
+    )
+    asic.TOOLCHAINS_INSTALL_PATH['openroad'] = env['OPENROAD_INSTALL_PATH']
+    simulation.TOOLCHAINS_INSTALL_PATH['verilator'] = env[
+        'VERILATOR_INSTALL_PATH'
+    ]
+
+
+def make_jobs(
+    count: int, targets: List[str], source: str, get_reports: bool = True
+) -> List[Job]:
+    """``count`` distinct jobs spread over ``targets`` (one seed each)."""
+    return [
+        Job(
+            flow='asic' if target in SUPPORTED_PDKS else 'fpga',
+            technology=target,
+            files=[source],
+            top_module=_TOP_MODULE,
+            get_reports=get_reports,
+            seed=i,
+        )
+        for i, target in (
+            (i, targets[i % len(targets)]) for i in range(count)
+        )
+    ]
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        'mean': statistics.fmean(ordered),
+        'p50': at(0.50),
+        'p95': at(0.95),
+        'p99': at(0.99),
+        'max': ordered[-1],
+    }
+
+
+def _queue_gaps(records: List[Dict[str, Any]]) -> List[float]:
+    """Idle time of each worker between consecutive jobs."""
+    by_worker: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_worker.setdefault(record['worker'], []).append(record)
+
+    gaps: List[float] = []
+    for runs in by_worker.values():
+        runs.sort(key=lambda r: r['started'])
+        for previous, current in zip(runs, runs[1:]):
+            finished = previous['started'] + previous['duration']
+            gaps.append(max(0.0, current['started'] - finished))
+    return gaps
+
+
+def summarize(
+    records: List[Dict[str, Any]], mode: str, workers: int, wall_s: float
+) -> Dict[str, Any]:
+    tool_s = [read_tool_times(r['workdir']) for r in records]
+    overhead = [
+        r['duration'] - tool for r, tool in zip(records, tool_s)
+    ]
+    if mode == 'executor':
+        latency = [r['started'] - r['queued'] for r in records]
+    else:
+        latency = _queue_gaps(records)
+
+    failed = sum(r['status'] != 'done' for r in records)
+    return {
+        'mode': mode,
+        'workers': workers,
+        'jobs': len(records),
+        'failed': failed,
+        'wall_s': wall_s,
+        'throughput_jobs_per_s': len(records) / wall_s if wall_s else 0.0,
+        # Fração do tempo dos workers gasta dentro das ferramentas
+        'tool_utilization': sum(tool_s) / (wall_s * workers)
+        if wall_s
+        else 0.0,
+        'job_s': _percentiles([r['duration'] for r in records]),
+        'tool_s': _percentiles(tool_s),
+        'overhead_s': _percentiles(overhead),
+        'scheduler_latency_s': _percentiles(latency),
+    }
+
+
+def _run_executor(
+    jobs: List[Job], workers: int, workdir: str
+) -> List[Dict[str, Any]]:
+    graph = JobGraph()
+    for job in jobs:
+        graph.add(job)
+
+    results_db = ResultsDB(os.path.join(workdir, 'results.db'))
+    try:
+        records = Executor(
+            os.path.join(workdir, 'runs'),
+            jobs=workers,
+            results_db=results_db,
+            force=True,
+        ).run(graph)
+    finally:
+        results_db.close()
+    return list(records.values())
+
+
+def _run_queue(
+    jobs: List[Job], workers: int, workdir: str, poll_interval: float
+) -> List[Dict[str, Any]]:
+    queue_root = os.path.join(workdir, 'queue')
+    queue = FileQueue(queue_root)
+    for job in jobs:
+        queue.submit(job)
+
+    run_workers(queue_root, workers, poll_interval=poll_interval)
+    return list(queue.results())
+
+
+def run_load_test(
+    count: int,
+    workers: int,
+    mode: str = 'executor',
+    targets: Optional[List[str]] = None,
+    load: Optional[FakeToolLoad] = None,
+    workdir: Optional[str] = None,
+    get_reports: bool = True,
+    poll_interval: float = 0.1,
+) -> Dict[str, Any]:
+    """Runs ``count`` jobs with fake tools and returns the measurements.
+
+    Args:
+        count (int): Number of jobs.
+        workers (int): Jobs run concurrently.
+        mode (str): ``'executor'`` or ``'queue'``.
+        targets (Optional[List[str]]): Boards and PDKs the jobs cycle
+            through; defaults to one target per backend.
+        load (Optional[FakeToolLoad]): Work simulated by each tool call.
+        workdir (Optional[str]): Where tools, runs and the log are kept.
+            A temporary directory is used (and removed) if None.
+        get_reports (bool): Parse the reports of every job, as real runs do.
+        poll_interval (float): Queue worker polling interval.
+
+    Returns:
+        Dict[str, Any]: Summary of the run, see :func:`summarize`.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown load test mode '{mode}'")
+    if workdir is None:
+        with tempfile.TemporaryDirectory(prefix='loadtest_') as tmp:
+            return run_load_test(
+                count,
+                workers,
+                mode,
+                targets,
+                load,
+                tmp,
+                get_reports,
+                poll_interval,
+            )
+
+    workdir = os.path.abspath(workdir)
+    os.makedirs(workdir, exist_ok=True)
+    _use_fake_tools(install_fake_tools(os.path.join(workdir, 'tools')))
+    os.environ.update((load or FakeToolLoad()).to_env())
+
+    source = os.path.join(workdir, f'{_TOP_MODULE}.v')
+    with open(source, 'w') as f:
+        f.write(_SOURCE)
+    jobs = make_jobs(count, targets or DEFAULT_TARGETS, source, get_reports)
+
+    log_path = os.path.join(workdir, 'loadtest.log')
+    started = time.time()
+    with _redirect_output(log_path):
+        if mode == 'executor':
+            records = _run_executor(jobs, workers, workdir)
+        else:
+            records = _run_queue(jobs, workers, workdir, poll_interval)
+    wall_s = time.time() - started
+
+    summary = summarize(records, mode, workers, wall_s)
+    summary['log'] = log_path
+    _check_failures(summary, (load or FakeToolLoad()).fail_rate)
+    return summary
+
+
+def _check_failures(summary: Dict[str, Any], fail_rate: float) -> None:
+    """Raises if the injected tool failures are missing from ``summary``."""
+    jobs, failed = summary['jobs'], summary['failed']
+    if fail_rate >= 1.0:
+        expected_ok = failed == jobs
+    elif (1.0 - fail_rate) ** jobs < 1e-3:
+        # Ao menos uma falha era praticamente certa
+        expected_ok = failed > 0
+    else:
+        return
+    if not expected_ok:
+        raise RuntimeError(
+            f'{failed} of {jobs} job(s) failed with fail rate '
+            f'{fail_rate}: tool failures are not reaching the job '
+            f"status (see {summary['log']})"
+        )
@@ -1,4 +1,192 @@
-"""Módulo com funções para impressão de mensagens coloridas no terminal."""
+"""Módulo com funções para impressão de mensagens coloridas no terminal.
+
+The ``print_*`` helpers are the logging API of the flows and tools:
+``print_blue`` and ``print_green`` log at ``info``, ``print_yellow`` at
+``warning`` and ``print_red`` at ``error``; :func:`log` takes any level
+and extra fields. Messages below the configured level are dropped, and
+the rest are written either as text, colored only when the output is an
+interactive terminal, or as JSON lines carrying the level, a timestamp
+and the context set with :func:`log_context` (e.g. the job).
+
+Level and format are set with :func:`configure` (``main.py --log-level``
+and ``--log-format``) or with ``PROCESSOR_CI_LOG_LEVEL`` and
+``PROCESSOR_CI_LOG_FORMAT``; :func:`configure` exports them, so job
+processes inherit the settings.
+
+:func:`job_output` sends everything a job writes (its messages, the
+summary tables and the output of the EDA tools it runs) to ``job.log`` in
+its work directory through a buffered writer, with the JSON records in
+``job.jsonl`` when that format is selected. Batch executors use it so
+that parallel jobs do not interleave on the terminal.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, Optional
+
+LOG_LEVEL_ENV = 'PROCESSOR_CI_LOG_LEVEL'
+LOG_FORMAT_ENV = 'PROCESSOR_CI_LOG_FORMAT'
+LOG_LEVELS: Dict[str, int] = {
+    'debug': 10,
+    'info': 20,
+    'warning': 30,
+    'error': 40,
+}
+LOG_FORMATS = ('text', 'json')
+JOB_LOG = 'job.log'
+JOB_RECORDS = 'job.jsonl'
+# Buffer da saída dos jobs: poucas chamadas de write por job
+JOB_BUFFER_SIZE = 1 << 16
+
+_COLORS = {'green': '32', 'yellow': '33', 'red': '31', 'blue': '34'}
+
+_STATE: Dict[str, Any] = {
+    'level': LOG_LEVELS.get(os.getenv(LOG_LEVEL_ENV, 'info'), 20),
+    'format': os.getenv(LOG_FORMAT_ENV, 'text'),
+    'stream': None,  # None: sys.stdout do momento
+    'context': {},
+    'prefix': True,  # prefixa o job nas linhas de texto
+}
+_TTY: Dict[int, bool] = {}
+
+
+def configure(
+    level: Optional[str] = None, log_format: Optional[str] = None
+) -> None:
+    """Sets the level and format, for this process and its children."""
+    if level is not None:
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level '{level}'")
+        _STATE['level'] = LOG_LEVELS[level]
+        os.environ[LOG_LEVEL_ENV] = level
+    if log_format is not None:
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format '{log_format}'")
+        _STATE['format'] = log_format
+        os.environ[LOG_FORMAT_ENV] = log_format
+
+
+def _is_tty(stream: IO[str]) -> bool:
+    key = id(stream)
+    if key not in _TTY:
+        try:
+            _TTY[key] = stream.isatty()
+        except (AttributeError, ValueError):
+            _TTY[key] = False
+    return _TTY[key]
+
+
+def log(
+    level: str, text: str, color: Optional[str] = None, **fields: Any
+) -> None:
+    """Writes a message if ``level`` is enabled.
+
+    Args:
+        level (str): One of :data:`LOG_LEVELS`.
+        text (str): Message to be written.
+        color (Optional[str]): Color of the text on terminals.
+        **fields: Extra fields of the JSON record.
+    """
+    if LOG_LEVELS[level] < _STATE['level']:
+        return
+    stream = _STATE['stream'] or sys.stdout
+    context = _STATE['context']
+
+    if _STATE['format'] == 'json':
+        line = json.dumps(
+            {
+                'ts': round(time.time(), 3),
+                'level': level,
+                **context,
+                **fields,
+                'msg': text,
+            },
+            default=str,
+        )
+    else:
+        line = text
+        if _STATE['prefix'] and 'job' in context:
+            line = f"[{context['job']}] {line}"
+        if color and _is_tty(stream):
+            line = f'\033[{_COLORS[color]}m{line}\033[0m'
+
+    stream.write(line + '\n')
+    if LOG_LEVELS[level] >= LOG_LEVELS['error']:
+        stream.flush()
+
+
+def flush() -> None:
+    """Flushes buffered output, e.g. before a tool writes to the same fd."""
+    if _STATE['stream'] is not None:
+        _STATE['stream'].flush()
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Adds ``fields`` to every record written inside the block."""
+    previous = _STATE['context']
+    _STATE['context'] = {**previous, **fields}
+    try:
+        yield
+    finally:
+        _STATE['context'] = previous
+
+
+@contextmanager
+def job_output(workdir: str, **context: Any) -> Iterator[str]:
+    """Redirects the output of the current process into ``workdir``.
+
+    File descriptors 1 and 2 point at ``job.log`` inside the block, so
+    the EDA tools started by the job write there too; Python output goes
+    through a buffer of :data:`JOB_BUFFER_SIZE` bytes, flushed by
+    :func:`flush` before every tool runs.
+
+    Yields:
+        str: Path of the job log.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    log_path = os.path.join(workdir, JOB_LOG)
+    flush()
+
+    saved_fds = (os.dup(1), os.dup(2))
+    fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+
+    saved_streams = (sys.stdout, sys.stderr)
+    sys.stdout = open(1, 'w', buffering=JOB_BUFFER_SIZE, closefd=False)
+    sys.stderr = sys.stdout
+    records: Optional[IO[str]] = None
+    if _STATE['format'] == 'json':
+        records = open(
+            os.path.join(workdir, JOB_RECORDS),
+            'a',
+            buffering=JOB_BUFFER_SIZE,
+            encoding='utf-8',
+        )
+    saved_state = (_STATE['stream'], _STATE['prefix'])
+    _STATE['stream'] = records
+    _STATE['prefix'] = False
+
+    try:
+        with log_context(**context):
+            yield log_path
+    finally:
+        flush()
+        if records is not None:
+            records.close()
+        sys.stdout.close()
+        sys.stdout, sys.stderr = saved_streams
+        _STATE['stream'], _STATE['prefix'] = saved_state
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for saved_fd in saved_fds:
+            os.close(saved_fd)
 
 
 def print_green(text: str) -> None:
@@ -7,7 +195,7 @@ def print_green(text: str) -> None:
     Args:
         text (str): Message to be printed.
     """
-    print(f'\033[32m{text}\033[0m')  # Verde
+    log('info', text, color='green')  # Verde
 
 
 def print_yellow(text: str) -> None:
@@ -16,7 +204,7 @@ def print_yellow(text: str) -> None:
     Args:
         text (str): Message to be printed.
     """
-    print(f'\033[33m{text}\033[0m')  # Amarelo
+    log('warning', text, color='yellow')  # Amarelo
 
 
 def print_red(text: str) -> None:
@@ -25,7 +213,7 @@ def print_red(text: str) -> None:
     Args:
         text (str): Message to be printed.
     """
-    print(f'\033[31m{text}\033[0m')  # Vermelho
+    log('error', text, color='red')  # Vermelho
 
 
 def print_blue(text: str) -> None:
@@ -34,7 +222,7 @@ def print_blue(text: str) -> None:
     Args:
         text (str): Message to be printed.
     """
-    print(f'\033[34m{text}\033[0m')  # Azul
+    log('info', text, color='blue')  # Azul
 
 
 # Exemplos de uso:
@@ -0,0 +1,180 @@
+"""YAML batch manifests describing core x target sweeps.
+
+Example::
+
+    config_dir: /eda/processor_ci/config   # default: DEFAULT_CONFIG_PATH
+    cores: ['*']                           # ids or globs over config_dir
+    targets: [colorlight_i9, '@vivado', asap7]
+    options:                               # applied to every job
+      use_pci_wrapper: true
+      get_reports: true
+    sweep:                                 # cartesian product of values
+      constraint: [default, constraints/relaxed.xdc]
+    jobs: 4                                # parallel jobs
+    limits:                                # concurrent jobs per toolchain
+      vivado: 2
+
+Target aliases: ``@boards``, ``@pdks``, ``@vivado``, ``@yosys``, ``@gowin``.
+Relative paths are resolved against the manifest directory.
+"""
+import fnmatch
+import inspect
+import itertools
+import os
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from core.board_defines import (
+    GOWIN_BOARDS,
+    SUPPORTED_BOARDS,
+    VIVADO_BOARDS,
+    YOSYS_BOARDS,
+)
+from core.executor import JobGraph
+from core.job import build_job, list_cores
+from core.pdk_defines import SUPPORTED_PDKS
+
+TARGET_ALIASES: Dict[str, List[str]] = {
+    '@boards': list(SUPPORTED_BOARDS),
+    '@pdks': list(SUPPORTED_PDKS),
+    '@vivado': list(VIVADO_BOARDS),
+    '@yosys': list(YOSYS_BOARDS),
+    '@gowin': list(GOWIN_BOARDS),
+}
+
+# Options a manifest may set or sweep; flow, target and core come from the
+# cores/targets lists.
+JOB_OPTIONS = [
+    name
+    for name in inspect.signature(build_job).parameters
+    if name not in ('flow', 'technology', 'core_id')
+]
+
+_MANIFEST_KEYS = {
+    'config_dir',
+    'processor_ci_path',
+    'cores',
+    'targets',
+    'options',
+    'sweep',
+    'jobs',
+    'limits',
+}
+
+
+class Manifest:
+    """Parsed manifest: the job graph plus execution settings."""
+
+    def __init__(
+        self, graph: JobGraph, jobs: int, limits: Dict[str, int]
+    ) -> None:
+        self.graph = graph
+        self.jobs = jobs
+        self.limits = limits
+
+
+def expand_targets(targets: List[str]) -> List[str]:
+    expanded: List[str] = []
+    for target in targets:
+        target = str(target).lower()
+        if target in TARGET_ALIASES:
+            names = TARGET_ALIASES[target]
+        elif target in SUPPORTED_BOARDS or target in SUPPORTED_PDKS:
+            names = [target]
+        else:
+            raise ValueError(f"Unknown target '{target}' in manifest")
+        expanded.extend(n for n in names if n not in expanded)
+    return expanded
+
+
+def expand_cores(patterns: List[str], config_dir: str) -> List[str]:
+    available = list_cores(config_dir)
+    cores: List[str] = []
+    for pattern in patterns:
+        matches = fnmatch.filter(available, str(pattern))
+        if not matches:
+            raise ValueError(
+                f"No core configuration in '{config_dir}' matches '{pattern}'"
+            )
+        cores.extend(c for c in matches if c not in cores)
+    return cores
+
+
+def _check_options(options: Dict[str, Any], section: str) -> None:
+    unknown = set(options) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(
+            f'Unknown option(s) {sorted(unknown)} in manifest {section}; '
+            f'valid options: {JOB_OPTIONS}'
+        )
+
+
+def load_manifest(
+    path: str,
+    default_config_dir: str,
+    default_processor_ci_path: str,
+    jobs: Optional[int] = None,
+) -> Manifest:
+    """Reads a manifest and expands it into a deduplicated job graph."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Manifest '{path}' must be a mapping")
+    unknown = set(data) - _MANIFEST_KEYS
+    if unknown:
+        raise ValueError(f'Unknown manifest key(s): {sorted(unknown)}')
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    config_dir = os.path.join(
+        base_dir, data.get('config_dir', default_config_dir)
+    )
+    processor_ci_path = data.get(
+        'processor_ci_path', default_processor_ci_path
+    )
+
+    options: Dict[str, Any] = dict(data.get('options') or {})
+    sweep: Dict[str, List[Any]] = {
+        k: v if isinstance(v, list) else [v]
+        for k, v in (data.get('sweep') or {}).items()
+    }
+    _check_options(options, 'options')
+    _check_options(sweep, 'sweep')
+
+    targets = expand_targets(data.get('targets') or [])
+    if not targets:
+        raise ValueError('Manifest lists no targets')
+
+    core_patterns = data.get('cores')
+    cores: List[Optional[str]] = (
+        list(expand_cores(core_patterns, config_dir))
+        if core_patterns
+        else [None]
+    )
+    if core_patterns:
+        options.setdefault('use_config', True)
+
+    graph = JobGraph()
+    axes = list(sweep)
+    for core_id, technology, values in itertools.product(
+        cores, targets, itertools.product(*(sweep[k] for k in axes))
+    ):
+        kwargs = dict(options)
+        kwargs.update(zip(axes, values))
+        kwargs.setdefault('config_path', config_dir)
+        kwargs.setdefault('processor_ci_path', processor_ci_path)
+
+        job = build_job(
+            flow='asic' if technology in SUPPORTED_PDKS else 'fpga',
+            technology=technology,
+            core_id=core_id,
+            **kwargs,
+        )
+        graph.add(job.absolutize(base_dir))
+
+    return Manifest(
+        graph,
+        jobs=jobs or int(data.get('jobs', os.cpu_count() or 1)),
+        limits={k: int(v) for k, v in (data.get('limits') or {}).items()},
+    )
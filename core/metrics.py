@@ -0,0 +1,143 @@
+"""Typed results of the report stage, shared by every backend."""
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(slots=True)
+class ClockMetrics:
+    """Achieved frequency of one clock domain."""
+
+    fmax_mhz: float
+    period_ns: Optional[float] = None
+    constraint_mhz: Optional[float] = None
+
+    @property
+    def met(self) -> Optional[bool]:
+        if self.constraint_mhz is None:
+            return None
+        return self.fmax_mhz >= self.constraint_mhz
+
+
+@dataclass(slots=True)
+class SlackMetrics:
+    """Worst and total setup/hold slack of a clock or clock pair (ns)."""
+
+    wns_ns: Optional[float] = None
+    tns_ns: Optional[float] = None
+    whs_ns: Optional[float] = None
+    ths_ns: Optional[float] = None
+
+
+@dataclass(slots=True)
+class PathMetrics:
+    """One critical setup path of the timing report.
+
+    Start and end points are cell instances (or ports); the data path
+    delay is split into cell (logic) and net (routing) delay.
+    """
+
+    startpoint: str
+    endpoint: str
+    group: str = ''
+    slack_ns: Optional[float] = None
+    requirement_ns: Optional[float] = None
+    data_path_ns: Optional[float] = None
+    cell_delay_ns: Optional[float] = None
+    net_delay_ns: Optional[float] = None
+    logic_levels: Optional[int] = None
+
+
+@dataclass(slots=True)
+class ResourceMetrics:
+    """Usage of one resource type (LUTs, FFs, BRAMs, cells, ...)."""
+
+    used: float
+    available: Optional[float] = None
+
+    @property
+    def utilization(self) -> Optional[float]:
+        """Used fraction of the available resources, from 0 to 1."""
+        if not self.available:
+            return None
+        return self.used / self.available
+
+
+@dataclass(slots=True)
+class CellMetrics:
+    """Instance count and area of one standard cell type."""
+
+    count: int
+    area_um2: float
+
+
+@dataclass(slots=True)
+class FlowMetrics:
+    """Metrics of one flow run, with the same schema for all backends.
+
+    Fields that do not apply to a backend are left empty, e.g. FPGA runs
+    have no ``area_um2`` and ASIC runs have no ``resources``.
+    """
+
+    backend: str
+    technology: str
+    top_module: str
+    clocks: Dict[str, ClockMetrics] = field(default_factory=dict)
+    resources: Dict[str, ResourceMetrics] = field(default_factory=dict)
+    power_w: Dict[str, float] = field(default_factory=dict)
+    area_um2: Dict[str, float] = field(default_factory=dict)
+    cells: Dict[str, CellMetrics] = field(default_factory=dict)
+    # Clocks por corner de STA; ``clocks`` traz então o pior corner
+    corners: Dict[str, Dict[str, ClockMetrics]] = field(default_factory=dict)
+    # Uso por instância/módulo (sem zeros), ex. {'top/core': {'FFs': 812}}
+    modules: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    # Slack por clock ('clk') e por par de clocks ('clk_a->clk_b')
+    slack: Dict[str, SlackMetrics] = field(default_factory=dict)
+    # Caminhos críticos de setup, do pior para o melhor
+    paths: List[PathMetrics] = field(default_factory=list)
+    # Place & route estimado pelo preditor de QoR, não executado
+    predicted: bool = False
+    # Base de power_w: 'vectorless' ou o arquivo de atividade (SAIF/VCD)
+    power_activity: Optional[str] = None
+
+    @property
+    def fmax_mhz(self) -> Optional[float]:
+        """Fmax of the slowest clock domain, or None without clock info."""
+        if not self.clocks:
+            return None
+        return min(clock.fmax_mhz for clock in self.clocks.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FlowMetrics':
+        return cls(
+            backend=data['backend'],
+            technology=data['technology'],
+            top_module=data['top_module'],
+            clocks={
+                k: ClockMetrics(**v) for k, v in data.get('clocks', {}).items()
+            },
+            resources={
+                k: ResourceMetrics(**v)
+                for k, v in data.get('resources', {}).items()
+            },
+            power_w=dict(data.get('power_w', {})),
+            area_um2=dict(data.get('area_um2', {})),
+            cells={
+                k: CellMetrics(**v) for k, v in data.get('cells', {}).items()
+            },
+            corners={
+                corner: {k: ClockMetrics(**v) for k, v in clocks.items()}
+                for corner, clocks in data.get('corners', {}).items()
+            },
+            modules={
+                k: dict(v) for k, v in data.get('modules', {}).items()
+            },
+            slack={
+                k: SlackMetrics(**v) for k, v in data.get('slack', {}).items()
+            },
+            paths=[PathMetrics(**v) for v in data.get('paths', [])],
+            predicted=data.get('predicted', False),
+            power_activity=data.get('power_activity'),
+        )
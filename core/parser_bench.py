@@ -0,0 +1,1134 @@
+"""Benchmarks of the report parsers over synthetic reports.
+
+Each case writes a report shaped like the one the EDA tool produces, scaled
+by a number of units (detailed timing paths, hierarchy rows, net timings or
+cell types), together with the values a correct parser must return. The
+parser is then timed, its peak memory measured with ``tracemalloc`` and its
+output compared against the expected values.
+
+Results can be saved as a baseline and later runs compared against it, so a
+parser change that becomes slower, hungrier or wrong is rejected. Times are
+scaled by a small calibration workload to make baselines portable between
+machines of different speed.
+"""
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.metrics import (
+    CellMetrics,
+    ClockMetrics,
+    PathMetrics,
+    ResourceMetrics,
+)
+from core.reports import (
+    VIVADO_UTILIZATION_COLUMNS,
+    parse_gowin_resources,
+    parse_gowin_timing,
+    parse_nextpnr_report,
+    parse_nextpnr_timing,
+    parse_openroad_power,
+    parse_orfs_finish,
+    parse_orfs_paths,
+    parse_orfs_synth_stat,
+    parse_vivado_paths,
+    parse_vivado_power,
+    parse_vivado_timing,
+    parse_vivado_utilization,
+    parse_vivado_utilization_hierarchy,
+    parse_yosys_stat,
+    worst_paths,
+)
+
+# Units per size: from a trivial design up to a large SoC with very
+# verbose reports
+SIZES: Dict[str, int] = {
+    'tiny': 1,
+    'small': 100,
+    'medium': 2_000,
+    'large': 20_000,
+    'huge': 100_000,
+}
+DEFAULT_SIZES: List[str] = ['tiny', 'small', 'medium', 'large']
+
+DEFAULT_MAX_SLOWDOWN = 1.5
+DEFAULT_MAX_MEMORY_GROWTH = 1.5
+# Time differences below this are noise, whatever the ratio
+MIN_TIME_DELTA_S = 0.002
+
+
+def _f(value: float, digits: int = 3) -> float:
+    """Rounds like the text report does, so expectations match exactly."""
+    return float(f'{value:.{digits}f}')
+
+
+def _clock_names(units: int) -> List[str]:
+    return ['clk'] + [f'clk_out{i}' for i in range(1, min(units, 16))]
+
+
+# -------------------------
+# Vivado
+# -------------------------
+_VIVADO_INTRA_HEADERS = [
+    'WNS(ns)',
+    'TNS(ns)',
+    'TNS Failing Endpoints',
+    'TNS Total Endpoints',
+    'WHS(ns)',
+    'THS(ns)',
+    'THS Failing Endpoints',
+    'THS Total Endpoints',
+    'WPWS(ns)',
+    'TPWS(ns)',
+    'TPWS Failing Endpoints',
+    'TPWS Total Endpoints',
+]
+
+
+def _vivado_table(
+    names: List[str], widths: List[int], rows: List[List[str]]
+) -> str:
+    """Fixed-width table: clock names left-aligned, numbers right-aligned."""
+    numbers = _VIVADO_INTRA_HEADERS[: len(rows[0]) - len(names)]
+    lines = [
+        ''.join(n.ljust(w) for n, w in zip(names, widths))
+        + ''.join(h.rjust(len(h) + 4) for h in numbers),
+        ''.join(('-' * len(n)).ljust(w) for n, w in zip(names, widths))
+        + ''.join(('-' * len(h)).rjust(len(h) + 4) for h in numbers),
+    ]
+    for row in rows:
+        lines.append(
+            ''.join(c.ljust(w) for c, w in zip(row, widths))
+            + ''.join(
+                c.rjust(len(h) + 4)
+                for c, h in zip(row[len(names):], numbers)
+            )
+        )
+    return '\n'.join(lines) + '\n\n\n'
+
+
+def _write_vivado_timing(
+    path: str, units: int, rng: random.Random
+) -> Tuple[Dict[str, ClockMetrics], List[PathMetrics]]:
+    clocks = {name: _f(rng.uniform(4.0, 40.0)) for name in _clock_names(units)}
+    names = list(clocks)
+    # O último clock de 3+ só tem pulse width (sem caminhos de setup)
+    timed = names[:-1] if len(names) > 2 else names
+    intra = {clk: _f(rng.uniform(-2.0, 3.0)) for clk in timed}
+    inter = {
+        (src, dst): _f(rng.uniform(-1.0, 3.0))
+        for src, dst in zip(timed, timed[1:])
+    }
+    wns = min(list(intra.values()) + list(inter.values()))
+    setup_wns = dict(intra)
+    for (_, dst), slack in inter.items():
+        setup_wns[dst] = min(setup_wns[dst], slack)
+    width = max(len(n) for n in names) + 6
+
+    paths: List[PathMetrics] = []
+    rule = '-' * 96
+    with open(path, 'w') as f:
+        f.write(
+            'Copyright 1986-2022 Xilinx, Inc. All Rights Reserved.\n'
+            f'{rule}\n'
+            '| Tool Version : Vivado v.2023.1 (lin64) Build 3865809\n'
+            '| Design       : processorci_top\n'
+            '| Device       : 7a100t-csg324\n'
+            f'{rule}\n\n'
+            'Timing Report\n\n'
+            'check_timing report\n\n'
+            'Table of Contents\n-----------------\n'
+            '1. checking no_clock (0)\n'
+            '2. checking constant_clock (0)\n\n\n'
+            f'{rule}\n'
+            '| Design Timing Summary\n| ---------------------\n'
+            f'{rule}\n\n'
+            '    WNS(ns)      TNS(ns)  TNS Failing Endpoints  '
+            'TNS Total Endpoints      WHS(ns)      THS(ns)\n'
+            '    -------      -------  ---------------------  '
+            '-------------------      -------      -------\n'
+            f'    {wns:7.3f}      {min(wns, 0.0) * 12:7.3f}  '
+            f'{(wns < 0) * 12:21d}  {units * 37:19d}        0.052        '
+            '0.000\n\n\n'
+            f'{rule}\n'
+            '| Clock Summary\n| -------------\n'
+            f'{rule}\n\n'
+            'Clock        Waveform(ns)         Period(ns)      '
+            'Frequency(MHz)\n'
+            '-----        ------------         ----------      '
+            '--------------\n'
+        )
+        for name, period in clocks.items():
+            indent = '' if name == 'clk' else '  '
+            f.write(
+                f'{indent}{name:<12} {{0.000 {period / 2:.3f}}}'
+                f'{period:>18.3f}{1000.0 / period:>18.3f}\n'
+            )
+        f.write('\n\n')
+
+        pulse_width = ['4.500', '0.000', '0', str(units * 3)]
+        f.write(f'{rule}\n| Intra Clock Table\n| -----------------\n')
+        f.write(f'{rule}\n\n')
+        f.write(
+            _vivado_table(
+                ['Clock'],
+                [width],
+                [
+                    [clk]
+                    + (
+                        [f'{intra[clk]:.3f}', f'{min(intra[clk], 0) * 3:.3f}']
+                        + ['0', str(units * 9), '0.052', '0.000', '0']
+                        + [str(units * 9)]
+                        if clk in intra
+                        else [''] * 8
+                    )
+                    + pulse_width
+                    for clk in names
+                ],
+            )
+        )
+        f.write(f'{rule}\n| Inter Clock Table\n| -----------------\n')
+        f.write(f'{rule}\n\n')
+        if inter:
+            f.write(
+                _vivado_table(
+                    ['From Clock', 'To Clock'],
+                    [width, width],
+                    [
+                        [src, dst, f'{slack:.3f}', '0.000', '0', '12']
+                        + ['0.100', '0.000', '0', '12']
+                        for (src, dst), slack in inter.items()
+                    ],
+                )
+            )
+        f.write(f'{rule}\n| Timing Details\n| --------------\n')
+        f.write(f'{rule}\n\n')
+
+        for i in range(units + len(names)):
+            clk = names[i % len(names)]
+            period = clocks[clk]
+            # Depois dos caminhos de setup, um de hold por clock
+            hold = i >= units
+            slack = _f(0.05 + i * 0.001 if hold else wns + i * 0.001)
+            logic = _f(rng.uniform(0.5, 3.0))
+            route = _f(rng.uniform(0.5, 6.0))
+            data_path = _f(logic + route)
+            path_type = (
+                'Hold (Min at Fast Process Corner)'
+                if hold
+                else 'Setup (Max at Slow Process Corner)'
+            )
+            f.write(
+                f'Slack (MET) :             {slack:.3f}ns  '
+                '(required time - arrival time)\n'
+                f'  Source:                 core/regs_reg[{i}][3]/C\n'
+                '                            (rising edge-triggered cell '
+                f'FDRE clocked by {clk}  {{rise@0.000ns fall@'
+                f'{period / 2:.3f}ns period={period:.3f}ns}})\n'
+                f'  Destination:            core/alu_out_reg[{i % 32}]/D\n'
+                f'  Path Group:             {clk}\n'
+                f'  Path Type:              {path_type}\n'
+                f'  Requirement:            {period:.3f}ns  '
+                f'({clk} rise@{period:.3f}ns - {clk} rise@0.000ns)\n'
+                f'  Data Path Delay:        {data_path:.3f}ns  '
+                f'(logic {logic:.3f}ns ({100 * logic / data_path:.3f}%)  '
+                f'route {route:.3f}ns ({100 * route / data_path:.3f}%))\n'
+                '  Logic Levels:           12  (CARRY4=3 LUT3=2 LUT6=7)\n\n'
+                '    Location             Delay type                '
+                'Incr(ns)  Path(ns)    Netlist Resource(s)\n'
+                '  ' + '-' * 67 + '    -------------------\n'
+                f'                         (clock {clk} rise edge)'
+                '        0.000     0.000 r\n'
+                '    E3                                                '
+                '0.000     0.000 r  clk (IN)\n'
+            )
+            for stage in range(8):
+                f.write(
+                    f'    SLICE_X{stage}Y{i % 150:<10} LUT6 (Prop_lut6_I0_O)'
+                    f'     0.124     {stage * 0.9:.3f} r  '
+                    f'core/alu/res[{stage}]_i_{i}/O\n'
+                )
+            f.write('  ' + '-' * 67 + '    -------------------\n\n')
+            if not hold:
+                paths.append(
+                    PathMetrics(
+                        startpoint=f'core/regs_reg[{i}][3]',
+                        endpoint=f'core/alu_out_reg[{i % 32}]',
+                        group=clk,
+                        slack_ns=slack,
+                        requirement_ns=period,
+                        data_path_ns=data_path,
+                        cell_delay_ns=logic,
+                        net_delay_ns=route,
+                        logic_levels=12,
+                    )
+                )
+
+    clock_metrics = {
+        clk: ClockMetrics(
+            fmax_mhz=1000.0 / (period - setup_wns[clk]),
+            period_ns=period,
+            constraint_mhz=1000.0 / period,
+        )
+        for clk, period in clocks.items()
+        if clk in setup_wns and period - setup_wns[clk] > 0
+    }
+    return clock_metrics, worst_paths(paths)
+
+
+def generate_vivado_timing(path: str, units: int, rng: random.Random) -> Any:
+    return _write_vivado_timing(path, units, rng)[0]
+
+
+def generate_vivado_paths(path: str, units: int, rng: random.Random) -> Any:
+    return _write_vivado_timing(path, units, rng)[1]
+
+
+def generate_vivado_power(path: str, units: int, rng: random.Random) -> Any:
+    dynamic = _f(rng.uniform(0.01, 2.0))
+    static = _f(rng.uniform(0.05, 0.2))
+
+    with open(path, 'w') as f:
+        f.write(
+            'Copyright 1986-2022 Xilinx, Inc. All Rights Reserved.\n\n'
+            'Power Report\n\n'
+            '1. Summary\n----------\n\n'
+            '+--------------------------+--------------+\n'
+            f'| Total On-Chip Power (W)  | {dynamic + static:<12.3f} |\n'
+            '| Design Power Budget (W)  | Unspecified* |\n'
+            f'| Dynamic (W)              | {dynamic:<12.3f} |\n'
+            f'| Device Static (W)        | {static:<12.3f} |\n'
+            '| Effective TJA (C/W)      | 4.6          |\n'
+            '+--------------------------+--------------+\n\n'
+            '3. Detailed Reports\n-------------------\n\n'
+            '3.1 By Hierarchy\n----------------\n\n'
+            '+-------------------------------+-----------+\n'
+            '| Name                          | Power (W) |\n'
+            '+-------------------------------+-----------+\n'
+        )
+        for i in range(units):
+            f.write(
+                f'|   core/unit_{i:<19} |    '
+                f'{rng.uniform(0.0, 0.01):.3f} |\n'
+            )
+        f.write('+-------------------------------+-----------+\n')
+
+    return {'dynamic': dynamic, 'static': static}
+
+
+def generate_vivado_hierarchy(
+    path: str, units: int, rng: random.Random
+) -> Any:
+    columns = list(VIVADO_UTILIZATION_COLUMNS)
+    top = {name: rng.randint(0, 60_000) for name in columns}
+    core = {name: rng.randint(0, 30_000) for name in columns}
+    modules: Dict[str, Dict[str, float]] = {
+        'processorci_top': {c: v for c, v in top.items() if v},
+        'processorci_top/core': {c: v for c, v in core.items() if v},
+    }
+
+    def row(instance: str, module: str, values: Dict[str, int]) -> str:
+        cells = [instance, module] + [str(values[c]) for c in columns]
+        return (
+            '<tablerow>'
+            + ''.join(f'<tablecell contents="{c}"/>' for c in cells)
+            + '</tablerow>\n'
+        )
+
+    with open(path, 'w') as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<RptDoc>\n<section title="Utilization Design Information">\n'
+            '<table>\n<tablerow>'
+            + ''.join(
+                f'<tableheader contents="{h}"/>'
+                for h in ['Instance', 'Module'] + columns
+            )
+            + '</tablerow>\n'
+        )
+        f.write(row('processorci_top', '(top)', top))
+        f.write(row('  core', 'core', core))
+        for i in range(units):
+            values = {c: rng.randint(0, 500) for c in columns}
+            f.write(row(f'    unit_{i}', f'unit_{i % 97}', values))
+            modules[f'processorci_top/core/unit_{i}'] = {
+                c: v for c, v in values.items() if v
+            }
+        f.write('</table>\n</section>\n</RptDoc>\n')
+
+    resources = {
+        name: ResourceMetrics(used=used) for name, used in top.items()
+    }
+    return resources, modules
+
+
+def generate_vivado_utilization(
+    path: str, units: int, rng: random.Random
+) -> Any:
+    return generate_vivado_hierarchy(path, units, rng)[0]
+
+
+# -------------------------
+# nextpnr
+# -------------------------
+def _write_nextpnr_report(
+    path: str, units: int, rng: random.Random
+) -> Tuple[
+    Dict[str, ClockMetrics], Dict[str, ResourceMetrics], List[PathMetrics]
+]:
+    fmax = {
+        clk: {
+            'achieved': rng.uniform(20.0, 150.0),
+            'constraint': 25.0,
+        }
+        for clk in (f'$glbnet$clk{i}' for i in range(min(units, 8)))
+    }
+    utilization = {
+        res: {'used': rng.randint(0, 20_000), 'available': 24_288}
+        for res in ('TRELLIS_SLICE', 'TRELLIS_FF', 'TRELLIS_IO', 'DP16KD')
+    }
+
+    critical_paths = []
+    paths: List[PathMetrics] = []
+    names = list(fmax)
+    for i in range(max(1, units // 10)):
+        clk = names[i % len(names)]
+        segments = [
+            {
+                'type': 'clk-to-q',
+                'from': {'cell': f'core.regs_{i}_DFF', 'port': 'CLK'},
+                'to': {'cell': f'core.regs_{i}_DFF', 'port': 'Q'},
+                'delay': rng.uniform(0.3, 0.6),
+            }
+        ]
+        driver = f'core.regs_{i}_DFF'
+        for hop in range(5):
+            cell = f'core.alu.lut_{i}_{hop}'
+            segments.append(
+                {
+                    'type': 'routing',
+                    'net': f'core.n{i}_{hop}',
+                    'from': {'cell': driver, 'port': 'Q'},
+                    'to': {'cell': cell, 'port': 'A'},
+                    'delay': rng.uniform(0.1, 1.5),
+                }
+            )
+            segments.append(
+                {
+                    'type': 'logic',
+                    'from': {'cell': cell, 'port': 'A'},
+                    'to': {'cell': cell, 'port': 'Z'},
+                    'delay': rng.uniform(0.2, 0.5),
+                }
+            )
+            driver = cell
+        segments.append(
+            {
+                'type': 'setup',
+                'from': {'cell': driver, 'port': 'Z'},
+                'to': {'cell': f'core.alu_out_{i % 32}_DFF', 'port': 'DI'},
+                'delay': rng.uniform(0.0, 0.2),
+            }
+        )
+        critical_paths.append({'from': clk, 'to': clk, 'path': segments})
+
+        cell_ns = net_ns = 0.0
+        for segment in segments:
+            if segment['type'] == 'routing':
+                net_ns += segment['delay']
+            else:
+                cell_ns += segment['delay']
+        requirement = 1000.0 / fmax[clk]['constraint']
+        paths.append(
+            PathMetrics(
+                startpoint=f'core.regs_{i}_DFF',
+                endpoint=f'core.alu_out_{i % 32}_DFF',
+                group=clk,
+                slack_ns=requirement - (cell_ns + net_ns),
+                requirement_ns=requirement,
+                data_path_ns=cell_ns + net_ns,
+                cell_delay_ns=cell_ns,
+                net_delay_ns=net_ns,
+                logic_levels=5,
+            )
+        )
+
+    data = {
+        'fmax': fmax,
+        'utilization': utilization,
+        'critical_paths': critical_paths,
+        'detailed_net_timings': [
+            {
+                'net': f'core.net_{i}',
+                'driver': f'core.cell_{i}',
+                'port': 'Q',
+                'event': 'rising',
+                'endpoints': [
+                    {
+                        'cell': f'core.cell_{i + j}',
+                        'port': 'A',
+                        'event': 'setup',
+                        'delay': rng.uniform(0.1, 2.0),
+                        'budget': rng.uniform(1.0, 10.0),
+                    }
+                    for j in range(3)
+                ],
+            }
+            for i in range(units)
+        ],
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+
+    clocks = {
+        clk: ClockMetrics(
+            fmax_mhz=values['achieved'], constraint_mhz=values['constraint']
+        )
+        for clk, values in fmax.items()
+    }
+    resources = {
+        res: ResourceMetrics(used=v['used'], available=v['available'])
+        for res, v in utilization.items()
+    }
+    return clocks, resources, worst_paths(paths)
+
+
+def generate_nextpnr_report(
+    path: str, units: int, rng: random.Random
+) -> Any:
+    return _write_nextpnr_report(path, units, rng)[:2]
+
+
+def generate_nextpnr_paths(
+    path: str, units: int, rng: random.Random
+) -> Any:
+    return _write_nextpnr_report(path, units, rng)[2]
+
+
+# -------------------------
+# Gowin
+# -------------------------
+def generate_gowin_timing(path: str, units: int, rng: random.Random) -> Any:
+    clocks = {
+        clk: (27.0, _f(rng.uniform(20.0, 200.0)))
+        for clk in _clock_names(units)
+    }
+    with open(path, 'w') as f:
+        f.write(
+            'Timing Messages\n\nReport Title: Gowin Timing Analysis Report\n'
+            'Design File: processorci_top.vg\n\n'
+            '2. Timing Summaries\n2.1 STA Tool Run Summary:\n\n'
+            '2.3 Max Frequency Summary:\n'
+            '  NO.   Clock Name   Constraint    Actual Fmax   '
+            'Logic Level   Entity\n'
+            ' ===== ============ ============= ============= '
+            '============= ========\n'
+        )
+        for i, (clk, (constraint, actual)) in enumerate(clocks.items()):
+            f.write(
+                f'  {i + 1:<5} {clk:<12} {constraint:.3f}(MHz)   '
+                f'{actual:.3f}(MHz)   6             TOP\n'
+            )
+        f.write('\n2.4 Total Negative Slack Summary:\n\n')
+        for i in range(units):
+            f.write(
+                '3.3.{0} Path{0}\nPath Summary:\n'
+                'Slack           : {1:.3f}\n'
+                'Data Arrival Time : {2:.3f}\n'
+                'From            : core/regs_{0}_s0\n'
+                'To              : core/alu_out_{0}_s0\n'
+                '   AT     DELAY   TYPE   RF   FANOUT   LOC   NODE\n'
+                '  0.000   0.000                              '
+                'active clock edge time\n'.format(
+                    i + 1, rng.uniform(-1.0, 5.0), rng.uniform(5.0, 30.0)
+                )
+            )
+            for hop in range(8):
+                f.write(
+                    f'  {hop * 0.7:.3f}   0.700   tC2Q   RF   {hop + 1}'
+                    f'        R{hop}C{i % 40}   core/n{i}_{hop}\n'
+                )
+            f.write('\n')
+
+    return {
+        clk: ClockMetrics(fmax_mhz=actual, constraint_mhz=constraint)
+        for clk, (constraint, actual) in clocks.items()
+    }
+
+
+def generate_gowin_resources(
+    path: str, units: int, rng: random.Random
+) -> Any:
+    rows = [
+        ('Logic', rng.randint(0, 8640), 8640),
+        ('--LUT,ALU,ROM16', rng.randint(0, 8640), None),
+        ('--SSRAM(RAM16)', 0, None),
+        ('Register', rng.randint(0, 6693), 6693),
+        ('--Logic Register as Latch', 0, 6480),
+        ('--Logic Register as FF', rng.randint(0, 6480), 6480),
+        ('CLS', rng.randint(0, 4320), 4320),
+        ('I/O Port', rng.randint(0, 71), 71),
+        ('I/O Buf', rng.randint(0, 71), None),
+        ('BSRAM', rng.randint(0, 26), 26),
+    ]
+    with open(path, 'w') as f:
+        f.write(
+            '1. PnR Messages\n\n  <Report Title>: PnR Report\n'
+            '  <Design File>: processorci_top.vg\n\n'
+            '2. PnR Details\n\n  Running placement:\n'
+            '    Placement Phase 0: CPU time = 0h 0m 0.1s\n\n'
+            '3. Resource Usage Summary\n\n'
+            '  ' + '-' * 58 + '\n'
+            '  Resources                   | Usage           '
+            '| Utilization\n'
+            '  ' + '-' * 58 + '\n'
+        )
+        for name, used, available in rows:
+            usage = f'{used}/{available}' if available else str(used)
+            percent = (
+                f'{100 * used // available}%' if available else '-'
+            )
+            indent = '    ' if name.startswith('--') else '  '
+            f.write(
+                f'{indent}{name:<{28 - len(indent) + 2}}| {usage:<16}'
+                f'| {percent}\n'
+            )
+        f.write(
+            '  ' + '-' * 58 + '\n\n'
+            '4. I/O Bank Usage Summary\n\n'
+        )
+        for i in range(units):
+            f.write(
+                f'  core/io_{i:<20} | IOB{i % 40}[A]  | LVCMOS33 | '
+                f'{rng.randint(4, 24)}\n'
+            )
+
+    return {
+        name.lstrip('-'): ResourceMetrics(used=used, available=available)
+        for name, used, available in rows
+    }
+
+
+# -------------------------
+# OpenROAD flow scripts
+# -------------------------
+def _write_orfs_finish(
+    path: str, units: int, rng: random.Random
+) -> Tuple[Dict[str, ClockMetrics], List[PathMetrics]]:
+    names = ['core_clock'] + [f'clk_{i}' for i in range(1, min(units, 8))]
+    clocks = {clk: _f(rng.uniform(1.0, 20.0), 2) for clk in names}
+    period = clocks['core_clock']
+    paths: List[PathMetrics] = []
+
+    def pin(delay: float, time: float, edge: str, name: str) -> str:
+        return (
+            f'                  0.05 {delay:7.2f} {time:7.2f} {edge} '
+            f'{name} (sky130_fd_sc_hd__nand2_1)\n'
+        )
+
+    with open(path, 'w') as f:
+        f.write(
+            '=' * 72 + '\nfinish report_checks -path_delay max\n'
+            + '-' * 72 + '\n'
+        )
+        for i in range(units):
+            start = f'core/regs[{i}]$_DFF_P_'
+            end = f'core/alu_out[{i % 32}]$_DFF_P_'
+            f.write(
+                f'Startpoint: {start} '
+                '(rising edge-triggered flip-flop clocked by core_clock)\n'
+                f'Endpoint: {end} '
+                '(rising edge-triggered flip-flop clocked by core_clock)\n'
+                'Path Group: core_clock\nPath Type: max\n\n'
+                'Fanout     Cap    Slew   Delay    Time   Description\n'
+                + '-' * 72 + '\n'
+                '                          0.00    0.00   clock core_clock '
+                '(rise edge)\n'
+                '                          0.00    0.00   clock network '
+                'delay (ideal)\n'
+            )
+            f.write(pin(0.0, 0.0, '^', f'{start}/CLK'))
+            cell_ns = _f(rng.uniform(0.2, 0.5), 2)
+            net_ns = 0.0
+            time = cell_ns
+            f.write(pin(cell_ns, time, '^', f'{start}/Q'))
+            for hop in range(8):
+                wire = _f(rng.uniform(0.0, 0.05), 2)
+                arc = _f(rng.uniform(0.01, 0.3), 2)
+                net_ns += wire
+                cell_ns += arc
+                f.write(
+                    f'     {hop + 1}    0.01                           '
+                    f'core/n{i}_{hop} (net)\n'
+                )
+                time = _f(time + wire, 2)
+                f.write(pin(wire, time, '^', f'core/_{i}_{hop}_/A'))
+                time = _f(time + arc, 2)
+                f.write(pin(arc, time, 'v', f'core/_{i}_{hop}_/X'))
+            wire = _f(rng.uniform(0.0, 0.05), 2)
+            net_ns += wire
+            time = _f(time + wire, 2)
+            required = _f(period - 0.12, 2)
+            slack = _f(required - time, 2)
+            f.write(
+                pin(wire, time, 'v', f'{end}/D')
+                + f'                                 {time:6.2f}   '
+                'data arrival time\n\n'
+                f'                 {period:7.2f} {period:7.2f}   '
+                'clock core_clock (rise edge)\n'
+                f'                          0.00 {period:7.2f}   '
+                'clock network delay (ideal)\n'
+                f'                                 {period:6.2f} ^ '
+                f'{end}/CLK (sky130_fd_sc_hd__dfxtp_1)\n'
+                f'                         -0.12 {required:7.2f}   '
+                'library setup time\n'
+                f'                                 {required:6.2f}   '
+                'data required time\n'
+                + '-' * 72 + '\n'
+                f'                                 {required:6.2f}   '
+                'data required time\n'
+                f'                                 {-time:6.2f}   '
+                'data arrival time\n'
+                + '-' * 72 + '\n'
+                f'                                 {slack:6.2f}   '
+                f"slack ({'MET' if slack >= 0 else 'VIOLATED'})\n\n\n"
+            )
+            paths.append(
+                PathMetrics(
+                    startpoint=start,
+                    endpoint=end,
+                    group='core_clock',
+                    slack_ns=slack,
+                    requirement_ns=period - 0.0,
+                    data_path_ns=cell_ns + net_ns,
+                    cell_delay_ns=cell_ns,
+                    net_delay_ns=net_ns,
+                    logic_levels=8,
+                )
+            )
+        f.write('=' * 72 + '\nfinish report_clock_min_period\n'
+                + '-' * 72 + '\n')
+        for clk, period in clocks.items():
+            f.write(
+                f'{clk} period_min = {period:.2f} '
+                f'fmax = {1000.0 / period:.2f}\n'
+            )
+
+    clock_metrics = {
+        clk: ClockMetrics(fmax_mhz=_f(1000.0 / period, 2), period_ns=period)
+        for clk, period in clocks.items()
+    }
+    return clock_metrics, worst_paths(paths)
+
+
+def generate_orfs_finish(path: str, units: int, rng: random.Random) -> Any:
+    return _write_orfs_finish(path, units, rng)[0]
+
+
+def generate_orfs_paths(path: str, units: int, rng: random.Random) -> Any:
+    return _write_orfs_finish(path, units, rng)[1]
+
+
+def generate_openroad_power(
+    path: str, units: int, rng: random.Random
+) -> Any:
+    def e(value: float) -> float:
+        return float(f'{value:.2e}')
+
+    rule = '-' * 64 + '\n'
+    header = (
+        'Group                  Internal  Switching    Leakage      Total\n'
+        '                          Power      Power      Power      Power '
+        '(Watts)\n' + rule
+    )
+    groups = {
+        group: [e(rng.uniform(1e-5, 1e-2)) for _ in range(3)]
+        for group in ('Sequential', 'Combinational', 'Clock')
+    }
+    groups['Macro'] = [0.0, 0.0, 0.0]
+    groups['Pad'] = [0.0, 0.0, 0.0]
+    internal, switching, leakage = (
+        e(sum(values[i] for values in groups.values())) for i in range(3)
+    )
+    total = e(internal + switching + leakage)
+
+    with open(path, 'w') as f:
+        # report_power -instances antes do resumo
+        f.write(
+            '   Internal  Switching    Leakage      Total\n'
+            '      Power      Power      Power      Power (Watts)\n'
+            + rule
+        )
+        for i in range(units):
+            values = [rng.uniform(1e-8, 1e-5) for _ in range(3)]
+            f.write(
+                ''.join(f'{v:11.2e}' for v in values)
+                + f'{sum(values):11.2e} core/_{i}_\n'
+            )
+        f.write('\n' + header)
+        for group, values in groups.items():
+            share = sum(values) / total * 100 if total else 0.0
+            f.write(
+                f'{group:<20}'
+                + ''.join(f'{v:11.2e}' for v in values)
+                + f'{sum(values):11.2e} {share:5.1f}%\n'
+            )
+        f.write(
+            rule + f'{"Total":<20}{internal:11.2e}{switching:11.2e}'
+            f'{leakage:11.2e}{total:11.2e} 100.0%\n'
+        )
+
+    return {
+        'dynamic': internal + switching,
+        'static': leakage,
+        'internal': internal,
+        'switching': switching,
+        'total': total,
+    }
+
+
+def generate_orfs_synth_stat(
+    path: str, units: int, rng: random.Random
+) -> Any:
+    cells = {
+        f'sky130_fd_sc_hd__cell{i}_1': CellMetrics(
+            count=rng.randint(1, 5_000), area_um2=_f(rng.uniform(1.0, 50.0))
+        )
+        for i in range(units)
+    }
+    chip = _f(sum(c.count * c.area_um2 for c in cells.values()), 6)
+    sequential = _f(chip * rng.uniform(0.1, 0.4), 6)
+
+    with open(path, 'w') as f:
+        f.write(
+            '\n=== processorci_top ===\n\n'
+            f'       {units * 7} wires\n'
+            f'       {units * 19} wire bits\n'
+            f'       {units * 3} public wires\n'
+            '           0 memories\n'
+            '           0 processes\n'
+        )
+        for name, cell in cells.items():
+            f.write(f'  {cell.count:>10} {cell.area_um2:>10.3f}   {name}\n')
+        f.write(
+            "\n   Chip area for module '\\processorci_top': "
+            f'{chip:.6f}\n'
+            '     of which used for sequential elements: '
+            f'{sequential:.6f} ({100 * sequential / chip:.2f}%)\n'
+        )
+
+    return cells, {'chip': chip, 'sequential': sequential}
+
+
+def generate_yosys_stat(path: str, units: int, rng: random.Random) -> Any:
+    """Hierarchical ``stat -liberty`` output, in the Yosys >= 0.40 layout."""
+    cells: Dict[str, CellMetrics] = {}
+    modules: Dict[str, Dict[str, float]] = {}
+    with open(path, 'w') as f:
+        for i in range(units):
+            module = f'unit_{i}'
+            count = rng.randint(1, 2_000)
+            area = _f(rng.uniform(10.0, 50_000.0), 6)
+            modules[module] = {'cells': float(count), 'area_um2': area}
+            f.write(
+                f'\n=== {module} ===\n\n'
+                '        +----------Local Count, excluding submodules.\n'
+                '        |        +-Local Area, excluding submodules.\n'
+                '        |        |\n'
+                f'       {count * 3}        - wires\n'
+                f'       {count} {area:>12.3f} cells\n'
+                f'       {count} {area:>12.3f}   sky130_fd_sc_hd__nand2_1\n'
+                f"\n   Chip area for module '\\{module}': {area:.6f}\n"
+            )
+            cells['sky130_fd_sc_hd__nand2_1'] = CellMetrics(
+                count=count, area_um2=_f(area)
+            )
+        chip = _f(sum(m['area_um2'] for m in modules.values()), 6)
+        f.write(
+            '\n=== design hierarchy ===\n\n'
+            f'       {units} {chip:>12.3f} cells\n'
+            f"\n   Chip area for top module '\\processorci_top': "
+            f'{chip:.6f}\n'
+        )
+    return cells, {'chip': chip}, modules
+
+
+@dataclass
+class BenchCase:
+    """A parser together with the generator of its synthetic input."""
+
+    name: str
+    filename: str
+    generate: Callable[[str, int, random.Random], Any]
+    parse: Callable[[str], Any]
+
+
+CASES: Dict[str, BenchCase] = {
+    case.name: case
+    for case in [
+        BenchCase(
+            'vivado_timing',
+            'processorci_top_timing.rpt',
+            generate_vivado_timing,
+            parse_vivado_timing,
+        ),
+        BenchCase(
+            'vivado_paths',
+            'processorci_top_timing.rpt',
+            generate_vivado_paths,
+            parse_vivado_paths,
+        ),
+        BenchCase(
+            'vivado_power',
+            'processorci_top_power.rpt',
+            generate_vivado_power,
+            parse_vivado_power,
+        ),
+        BenchCase(
+            'vivado_utilization',
+            'processorci_top_utilization.xml',
+            generate_vivado_utilization,
+            parse_vivado_utilization,
+        ),
+        BenchCase(
+            'vivado_hierarchy',
+            'processorci_top_utilization.xml',
+            generate_vivado_hierarchy,
+            parse_vivado_utilization_hierarchy,
+        ),
+        BenchCase(
+            'nextpnr_report',
+            'processorci_top_place_route.json',
+            generate_nextpnr_report,
+            parse_nextpnr_report,
+        ),
+        BenchCase(
+            'nextpnr_paths',
+            'processorci_top_place_route.json',
+            generate_nextpnr_paths,
+            lambda path: parse_nextpnr_timing(path)[2],
+        ),
+        BenchCase(
+            'gowin_timing',
+            'processorci_top.tr',
+            generate_gowin_timing,
+            parse_gowin_timing,
+        ),
+        BenchCase(
+            'gowin_resources',
+            'processorci_top.rpt.txt',
+            generate_gowin_resources,
+            parse_gowin_resources,
+        ),
+        BenchCase(
+            'orfs_finish',
+            '6_finish.rpt',
+            generate_orfs_finish,
+            parse_orfs_finish,
+        ),
+        BenchCase(
+            'orfs_paths',
+            '6_finish.rpt',
+            generate_orfs_paths,
+            parse_orfs_paths,
+        ),
+        BenchCase(
+            'openroad_power',
+            'power.rpt',
+            generate_openroad_power,
+            parse_openroad_power,
+        ),
+        BenchCase(
+            'orfs_synth_stat',
+            'synth_stat.txt',
+            generate_orfs_synth_stat,
+            parse_orfs_synth_stat,
+        ),
+        BenchCase(
+            'yosys_stat',
+            'synth_stat.txt',
+            generate_yosys_stat,
+            parse_yosys_stat,
+        ),
+    ]
+}
+
+
+# -------------------------
+# Execução e comparação
+# -------------------------
+def _normalize(value: Any) -> Any:
+    """Plain, float-rounded view of parser output for comparisons."""
+    if is_dataclass(value):
+        return {
+            f.name: _normalize(getattr(value, f.name)) for f in fields(value)
+        }
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+def _first_difference(got: Any, expected: Any, where: str = '') -> str:
+    if isinstance(got, dict) and isinstance(expected, dict):
+        for key in sorted(set(got) | set(expected), key=str):
+            if key not in got:
+                return f'{where}/{key}: missing'
+            if key not in expected:
+                return f'{where}/{key}: unexpected'
+            diff = _first_difference(got[key], expected[key], f'{where}/{key}')
+            if diff:
+                return diff
+        return ''
+    if isinstance(got, list) and isinstance(expected, list):
+        if len(got) != len(expected):
+            return f'{where}: {len(got)} items, expected {len(expected)}'
+        for i, (g, e) in enumerate(zip(got, expected)):
+            diff = _first_difference(g, e, f'{where}[{i}]')
+            if diff:
+                return diff
+        return ''
+    if got != expected:
+        return f'{where or "/"}: got {got!r}, expected {expected!r}'
+    return ''
+
+
+def calibrate(rounds: int = 3) -> float:
+    """Seconds taken by a fixed regex workload similar to report parsing."""
+    pattern = re.compile(r'^\s*(\S+)\s+([0-9]*\.?[0-9]+)\s+([0-9]*\.?[0-9]+)')
+    lines = [f'  net_{i}  {i * 0.37:.3f}  {i * 1.1:.3f}' for i in range(5000)]
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(20):
+            for line in lines:
+                match = pattern.match(line)
+                if match:
+                    float(match.group(2))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_case(
+    case: BenchCase, size: str, workdir: str, repeat: int = 3, seed: int = 0
+) -> Dict[str, Any]:
+    """Generates one report, then checks and times its parser."""
+    path = os.path.join(workdir, f'{size}_{case.filename}')
+    rng = random.Random(f'{case.name}:{size}:{seed}')
+    expected = case.generate(path, SIZES[size], rng)
+
+    tracemalloc.start()
+    try:
+        got = case.parse(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = float('inf')
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        case.parse(path)
+        best = min(best, time.perf_counter() - start)
+
+    size_bytes = os.path.getsize(path)
+    difference = _first_difference(_normalize(got), _normalize(expected))
+    return {
+        'case': case.name,
+        'size': size,
+        'bytes': size_bytes,
+        'seconds': best,
+        'mb_per_s': size_bytes / 1e6 / best if best > 0 else 0.0,
+        'peak_kib': peak / 1024,
+        'correct': not difference,
+        'error': difference or None,
+    }
+
+
+def run_benchmarks(
+    cases: Optional[List[str]] = None,
+    sizes: Optional[List[str]] = None,
+    repeat: int = 3,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Runs every case at every size.
+
+    Args:
+        cases (Optional[List[str]]): Names from :data:`CASES`; all if None.
+        sizes (Optional[List[str]]): Names from :data:`SIZES`; defaults to
+            :data:`DEFAULT_SIZES`.
+        repeat (int): Timed parses per case; the fastest one is kept.
+        workdir (Optional[str]): Where the reports are written and kept.
+            A temporary directory is used (and removed) if None.
+
+    Returns:
+        Dict[str, Any]: ``calibration_s`` and the list of ``results``.
+    """
+    selected = [CASES[name] for name in cases or CASES]
+    sizes = sizes or DEFAULT_SIZES
+
+    def run_all(directory: str) -> List[Dict[str, Any]]:
+        return [
+            run_case(case, size, directory, repeat)
+            for case in selected
+            for size in sizes
+        ]
+
+    if workdir is not None:
+        os.makedirs(workdir, exist_ok=True)
+        results = run_all(workdir)
+    else:
+        with tempfile.TemporaryDirectory(prefix='parser_bench_') as tmp:
+            results = run_all(tmp)
+
+    return {'calibration_s': calibrate(), 'results': results}
+
+
+def compare_to_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_slowdown: float = DEFAULT_MAX_SLOWDOWN,
+    max_memory_growth: float = DEFAULT_MAX_MEMORY_GROWTH,
+) -> List[str]:
+    """Problems of ``current`` relative to ``baseline``; empty if none.
+
+    Incorrect results are always reported. Times are compared after
+    scaling the baseline by the ratio of the calibration workloads.
+    """
+    problems = [
+        f"{r['case']}/{r['size']}: wrong result ({r['error']})"
+        for r in current['results']
+        if not r['correct']
+    ]
+
+    scale = current['calibration_s'] / baseline['calibration_s']
+    reference = {(r['case'], r['size']): r for r in baseline['results']}
+    for result in current['results']:
+        ref = reference.get((result['case'], result['size']))
+        if ref is None:
+            continue
+        key = f"{result['case']}/{result['size']}"
+
+        expected_s = ref['seconds'] * scale
+        if (
+            result['seconds'] > expected_s * max_slowdown
+            and result['seconds'] - expected_s > MIN_TIME_DELTA_S
+        ):
+            problems.append(
+                f'{key}: {result["seconds"] * 1e3:.2f} ms, baseline '
+                f'{expected_s * 1e3:.2f} ms (x{max_slowdown} allowed)'
+            )
+        if result['peak_kib'] > max(ref['peak_kib'], 64) * max_memory_growth:
+            problems.append(
+                f'{key}: peak {result["peak_kib"]:.0f} KiB, baseline '
+                f'{ref["peak_kib"]:.0f} KiB (x{max_memory_growth} allowed)'
+            )
+    return problems
@@ -8,8 +8,20 @@ SUPPORTED_PDKS = [
 ]
 
 
+# target_utilization (%), target_density e min_core_side_um (um) guiam o
+# dimensionamento automático do die (core.asic.size_die, --auto-size).
+# sta_corners mapeia cada corner aos globs de liberty, relativos ao
+# diretório da plataforma no ORFS (core.sta, --multi-corner)
 DEFINES_BY_PDK = {
     'gf180': {
+        'target_utilization': 40,
+        'target_density': 0.55,
+        'min_core_side_um': 200,
+        'sta_corners': {
+            'tt': ['lib/gf180mcu_fd_sc_mcu9t5v0__tt_025C_5v00.lib*'],
+            'ff': ['lib/gf180mcu_fd_sc_mcu9t5v0__ff_n40C_5v50.lib*'],
+            'ss': ['lib/gf180mcu_fd_sc_mcu9t5v0__ss_125C_4v50.lib*'],
+        },
         'additional_lefs': False,
         'additional_libfiles': [],
         'additional_libs': False,
@@ -65,6 +77,14 @@ DEFINES_BY_PDK = {
         ],
     },
     'ihp-sg13g2': {
+        'target_utilization': 40,
+        'target_density': 0.55,
+        'min_core_side_um': 200,
+        'sta_corners': {
+            'typ': ['lib/sg13g2_stdcell_typ_1p20V_25C.lib'],
+            'fast': ['lib/sg13g2_stdcell_fast_1p32V_m40C.lib'],
+            'slow': ['lib/sg13g2_stdcell_slow_1p08V_125C.lib'],
+        },
         'additional_lefs': False,
         'additional_lef_files': [
             "lef/bondpad_70x70.lef",
@@ -130,6 +150,14 @@ DEFINES_BY_PDK = {
         ],
     },
     'sky130hs': {
+        'target_utilization': 40,
+        'target_density': 0.55,
+        'min_core_side_um': 150,
+        'sta_corners': {
+            'tt': ['lib/sky130_fd_sc_hs__tt_025C_1v80.lib'],
+            'ff': ['lib/sky130_fd_sc_hs__ff_n40C_1v95.lib'],
+            'ss': ['lib/sky130_fd_sc_hs__ss_100C_1v60.lib'],
+        },
         'additional_lefs': False,
         'additional_lef_files': [
             '/path/to/sky130hs/lef/sky130_fd_sc_hd.lef',
@@ -140,6 +168,14 @@ DEFINES_BY_PDK = {
         ],
     },
     'sky130hd': {
+        'target_utilization': 45,
+        'target_density': 0.60,
+        'min_core_side_um': 150,
+        'sta_corners': {
+            'tt': ['lib/sky130_fd_sc_hd__tt_025C_1v80.lib'],
+            'ff': ['lib/sky130_fd_sc_hd__ff_n40C_1v95.lib'],
+            'ss': ['lib/sky130_fd_sc_hd__ss_100C_1v60.lib'],
+        },
         'additional_lefs': False,
         'additional_lef_files': [
             "lef/sky130_fd_sc_hd_merged.lef",
@@ -152,6 +188,12 @@ DEFINES_BY_PDK = {
         ],
     },
     'nangate45': {
+        'target_utilization': 50,
+        'target_density': 0.65,
+        'min_core_side_um': 60,
+        'sta_corners': {
+            'typical': ['lib/NangateOpenCellLibrary_typical.lib'],
+        },
         'additional_lefs': False,
         'additional_lef_files': [
             "lef/fakeram45_1024x32.lef",
@@ -209,6 +251,14 @@ DEFINES_BY_PDK = {
         ],
     },
     'asap7': {
+        'target_utilization': 45,
+        'target_density': 0.60,
+        'min_core_side_um': 10,
+        'sta_corners': {
+            'tt': ['lib/NLDM/*_RVT_TT_nldm_*.lib*'],
+            'ff': ['lib/NLDM/*_RVT_FF_nldm_*.lib*'],
+            'ss': ['lib/NLDM/*_RVT_SS_nldm_*.lib*'],
+        },
         'additional_lefs': False,
         'additional_lef_files': [
             "lef/asap7sc7p5t_28_L_1x_220121a.lef",
@@ -0,0 +1,484 @@
+"""Prediction of post-route QoR from post-synthesis metrics.
+
+A :class:`QoRModel` is trained offline on the successful runs of the
+results database. For every backend it fits one ridge regression per
+target (Fmax and the usage of each resource) on what is known right after
+synthesis: cell and flip-flop counts, BRAM/DSP usage, logic depth of the
+critical paths (Vivado only), cell area and the target part.
+
+Each prediction comes with a standard error built from the leave-one-out
+residuals of the training runs and the leverage of the new design, and a
+confidence: the probability, under normal errors, that the real value is
+within ``tolerance`` (relative) of the prediction. Designs that use a part
+or a feature the model never saw get zero confidence.
+
+:class:`PredictingRunner` uses the model in batch runs: it synthesizes the
+job first and only runs place and route when a prediction is uncertain or
+too close to a threshold (by default, the clock constraint).
+"""
+import json
+import math
+import os
+import re
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.job import Job, run_job
+from core.log import print_green, print_yellow
+from core.metrics import ClockMetrics, FlowMetrics, ResourceMetrics
+
+DEFAULT_ALPHAS: Tuple[float, ...] = (0.01, 0.1, 1.0, 10.0, 100.0)
+MIN_TRAINING_RUNS = 5
+DEFAULT_TOLERANCE = 0.05
+DEFAULT_MIN_CONFIDENCE = 0.9
+# Distância mínima, em erros padrão, entre a previsão e um limiar
+THRESHOLD_SIGMAS = 2.0
+
+FMAX_TARGET = 'fmax_mhz'
+_RESOURCE_PREFIX = 'resource:'
+
+# Flip-flops e latches da síntese genérica do Yosys e das libs do ORFS
+_FF_CELL_RE = re.compile(r'dff|__df|dlx|latch', re.IGNORECASE)
+# A utilização do Vivado já vem da síntese
+_VIVADO_FEATURES = {
+    'Total LUTs': 'cells',
+    'FFs': 'ffs',
+    'RAMB36': 'brams',
+    'RAMB18': 'brams',
+    'DSP Blocks': 'dsps',
+}
+
+
+# -------------------------
+# Features e alvos
+# -------------------------
+def synthesis_features(metrics: FlowMetrics) -> Dict[str, float]:
+    """Features of a run that are known right after synthesis.
+
+    For training, the same values are read from full runs: the Yosys and
+    ORFS cell statistics come from synthesis anyway, and the Vivado
+    utilization barely changes after placement.
+    """
+    features: Dict[str, float] = {f'part:{metrics.technology}': 1.0}
+    if metrics.backend == 'vivado':
+        for resource, name in _VIVADO_FEATURES.items():
+            if resource in metrics.resources:
+                features[name] = (
+                    features.get(name, 0.0)
+                    + metrics.resources[resource].used
+                )
+    else:
+        cells = sum(c.count for c in metrics.cells.values())
+        if not cells:
+            cells = sum(m.get('cells', 0) for m in metrics.modules.values())
+        features['cells'] = float(cells)
+        features['ffs'] = float(
+            sum(
+                c.count
+                for name, c in metrics.cells.items()
+                if _FF_CELL_RE.search(name)
+            )
+        )
+    if metrics.area_um2.get('chip'):
+        features['area_um2'] = metrics.area_um2['chip']
+
+    # Só o Vivado tem timing (estimado) já na síntese
+    levels = [p.logic_levels for p in metrics.paths if p.logic_levels]
+    if metrics.backend == 'vivado' and levels:
+        features['logic_depth'] = float(max(levels))
+    return features
+
+
+def qor_targets(metrics: FlowMetrics) -> Dict[str, float]:
+    """Post-route values the model learns: Fmax and resource usage."""
+    targets = {
+        f'{_RESOURCE_PREFIX}{name}': resource.used
+        for name, resource in metrics.resources.items()
+    }
+    if metrics.fmax_mhz is not None:
+        targets[FMAX_TARGET] = metrics.fmax_mhz
+    return targets
+
+
+# -------------------------
+# Regressão ridge
+# -------------------------
+def _invert(matrix: List[List[float]]) -> List[List[float]]:
+    """Inverse of a square matrix by Gauss-Jordan elimination."""
+    n = len(matrix)
+    rows = [
+        list(row) + [1.0 if i == j else 0.0 for j in range(n)]
+        for i, row in enumerate(matrix)
+    ]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            raise ValueError('Singular matrix')
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        factor = rows[col][col]
+        rows[col] = [v / factor for v in rows[col]]
+        for r in range(n):
+            if r != col and rows[r][col]:
+                k = rows[r][col]
+                rows[r] = [a - k * b for a, b in zip(rows[r], rows[col])]
+    return [row[n:] for row in rows]
+
+
+def _quadratic(inverse: List[List[float]], z: List[float]) -> float:
+    """``z' A z`` for a symmetric matrix ``A``."""
+    return sum(
+        zi * sum(a * zj for a, zj in zip(row, z))
+        for zi, row in zip(z, inverse)
+    )
+
+
+@dataclass
+class Prediction:
+    value: float
+    stderr: float
+    confidence: float
+
+
+@dataclass
+class RidgeModel:
+    """Ridge regression on standardized features.
+
+    Attributes:
+        inverse (List[List[float]]): ``(Z'Z + alpha I)^-1`` of the
+            standardized training features, for the leverage of new points.
+        loo_rmse (float): Root mean square leave-one-out residual.
+    """
+
+    features: List[str]
+    mean: List[float]
+    scale: List[float]
+    intercept: float
+    weights: List[float]
+    inverse: List[List[float]]
+    alpha: float
+    loo_rmse: float
+    samples: int
+
+    def _standardize(self, x: Dict[str, float]) -> List[float]:
+        return [
+            (x.get(name, 0.0) - mean) / scale
+            for name, mean, scale in zip(self.features, self.mean, self.scale)
+        ]
+
+    def predict(
+        self, x: Dict[str, float], tolerance: float = DEFAULT_TOLERANCE
+    ) -> Prediction:
+        z = self._standardize(x)
+        value = self.intercept + sum(w * v for w, v in zip(self.weights, z))
+        leverage = _quadratic(self.inverse, z) + 1.0 / self.samples
+        stderr = self.loo_rmse * math.sqrt(1.0 + leverage)
+
+        known = set(self.features)
+        if any(v and name not in known for name, v in x.items()):
+            confidence = 0.0  # parte ou feature nunca vista no treino
+        elif stderr == 0:
+            confidence = 1.0
+        else:
+            confidence = math.erf(
+                tolerance * abs(value) / (stderr * math.sqrt(2))
+            )
+        return Prediction(value, stderr, confidence)
+
+
+def fit_ridge(
+    rows: List[Dict[str, float]],
+    y: List[float],
+    alphas: Tuple[float, ...] = DEFAULT_ALPHAS,
+) -> RidgeModel:
+    """Fits a ridge regression, picking the alpha with least LOO error.
+
+    The leave-one-out residuals come from the hat matrix, so every alpha
+    costs a single fit.
+    """
+    n = len(rows)
+    features = sorted({name for row in rows for name in row})
+    columns = [[row.get(name, 0.0) for row in rows] for name in features]
+    mean = [sum(c) / n for c in columns]
+    scale = [
+        math.sqrt(sum((v - m) ** 2 for v in c) / n) or 1.0
+        for c, m in zip(columns, mean)
+    ]
+    z_rows = [
+        [
+            (row.get(name, 0.0) - m) / s
+            for name, m, s in zip(features, mean, scale)
+        ]
+        for row in rows
+    ]
+    y_mean = sum(y) / n
+    yc = [v - y_mean for v in y]
+
+    p = len(features)
+    gram = [
+        [sum(z[i] * z[j] for z in z_rows) for j in range(p)] for i in range(p)
+    ]
+    zty = [sum(z[i] * v for z, v in zip(z_rows, yc)) for i in range(p)]
+
+    best: Optional[RidgeModel] = None
+    for alpha in alphas:
+        inverse = _invert(
+            [
+                [g + (alpha if i == j else 0.0) for j, g in enumerate(row)]
+                for i, row in enumerate(gram)
+            ]
+        )
+        weights = [sum(a * b for a, b in zip(row, zty)) for row in inverse]
+        squared = 0.0
+        for z, v in zip(z_rows, yc):
+            residual = v - sum(w * zi for w, zi in zip(weights, z))
+            leverage = _quadratic(inverse, z) + 1.0 / n
+            squared += (residual / max(1.0 - leverage, 1e-6)) ** 2
+        model = RidgeModel(
+            features=features,
+            mean=mean,
+            scale=scale,
+            intercept=y_mean,
+            weights=weights,
+            inverse=inverse,
+            alpha=alpha,
+            loo_rmse=math.sqrt(squared / n),
+            samples=n,
+        )
+        if best is None or model.loo_rmse < best.loo_rmse:
+            best = model
+    return best
+
+
+# -------------------------
+# Modelo por backend
+# -------------------------
+class QoRModel:
+    """Ridge models per backend and target, plus the clock to report.
+
+    Args:
+        models (Dict[str, Dict[str, RidgeModel]]): Models by backend
+            (``vivado``, ``yosys``, ``openroad``, ...) and target.
+        clocks (Dict[str, str]): Name of the limiting clock per technology,
+            used for the clock of predicted runs.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, Dict[str, RidgeModel]],
+        clocks: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.models = models
+        self.clocks = dict(clocks or {})
+
+    @classmethod
+    def train(
+        cls,
+        records: List[Dict[str, Any]],
+        min_runs: int = MIN_TRAINING_RUNS,
+        alphas: Tuple[float, ...] = DEFAULT_ALPHAS,
+    ) -> 'QoRModel':
+        """Trains on results database records of full implementation runs.
+
+        Synthesis-only and predicted runs are ignored; targets with fewer
+        than ``min_runs`` runs get no model.
+        """
+        samples: Dict[str, Dict[str, Tuple[List, List]]] = {}
+        clocks: Dict[str, str] = {}
+        # Do mais antigo ao mais novo: o clock mais recente prevalece
+        for record in sorted(records, key=lambda r: r.get('started', 0)):
+            if not record.get('metrics'):
+                continue
+            if record['job'].get('profile', 'full') == 'synth':
+                continue
+            metrics = FlowMetrics.from_dict(record['metrics'])
+            if metrics.predicted:
+                continue
+
+            features = synthesis_features(metrics)
+            for target, value in qor_targets(metrics).items():
+                rows, y = samples.setdefault(metrics.backend, {}).setdefault(
+                    target, ([], [])
+                )
+                rows.append(features)
+                y.append(value)
+            if metrics.clocks:
+                clocks[metrics.technology] = min(
+                    metrics.clocks, key=lambda c: metrics.clocks[c].fmax_mhz
+                )
+
+        models = {
+            backend: {
+                target: fit_ridge(rows, y, alphas)
+                for target, (rows, y) in targets.items()
+                if len(y) >= min_runs
+            }
+            for backend, targets in samples.items()
+        }
+        return cls({b: m for b, m in models.items() if m}, clocks)
+
+    def predict(
+        self, metrics: FlowMetrics, tolerance: float = DEFAULT_TOLERANCE
+    ) -> Dict[str, Prediction]:
+        """Post-route predictions from the metrics of a synthesis run."""
+        features = synthesis_features(metrics)
+        return {
+            target: model.predict(features, tolerance)
+            for target, model in self.models.get(metrics.backend, {}).items()
+        }
+
+    def predicted_metrics(
+        self, synth: FlowMetrics, predictions: Dict[str, Prediction]
+    ) -> FlowMetrics:
+        """Metrics of a run whose place and route was predicted.
+
+        Synthesis results (cells, modules, area) are kept as measured.
+        """
+        clocks: Dict[str, ClockMetrics] = {}
+        if FMAX_TARGET in predictions:
+            clock = self.clocks.get(synth.technology) or next(
+                iter(synth.clocks), 'clk'
+            )
+            constraint = (
+                synth.clocks[clock].constraint_mhz
+                if clock in synth.clocks
+                else None
+            )
+            clocks[clock] = ClockMetrics(
+                fmax_mhz=predictions[FMAX_TARGET].value,
+                constraint_mhz=constraint,
+            )
+        return replace(
+            synth,
+            clocks=clocks,
+            resources={
+                target[len(_RESOURCE_PREFIX):]: ResourceMetrics(
+                    used=max(0.0, prediction.value)
+                )
+                for target, prediction in predictions.items()
+                if target.startswith(_RESOURCE_PREFIX)
+            },
+            slack={},
+            paths=[],
+            predicted=True,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'models': {
+                backend: {t: asdict(m) for t, m in targets.items()}
+                for backend, targets in self.models.items()
+            },
+            'clocks': self.clocks,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QoRModel':
+        return cls(
+            {
+                backend: {t: RidgeModel(**m) for t, m in targets.items()}
+                for backend, targets in data.get('models', {}).items()
+            },
+            data.get('clocks', {}),
+        )
+
+    def save(self, path: str) -> None:
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'QoRModel':
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+def full_run_reason(
+    synth: FlowMetrics,
+    predictions: Dict[str, Prediction],
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    thresholds: Optional[Dict[str, float]] = None,
+) -> Optional[str]:
+    """Why the predictions cannot replace place and route, or None.
+
+    Besides the given ``thresholds`` (by target), predicted Fmax is checked
+    against the tightest clock constraint of the synthesis run.
+    """
+    if FMAX_TARGET not in predictions:
+        return 'no Fmax model for this backend'
+    for target, prediction in predictions.items():
+        if prediction.confidence < min_confidence:
+            return (
+                f'{target} uncertain '
+                f'(confidence {prediction.confidence:.2f})'
+            )
+
+    limits = dict(thresholds or {})
+    constraints = [
+        c.constraint_mhz for c in synth.clocks.values() if c.constraint_mhz
+    ]
+    if constraints and FMAX_TARGET not in limits:
+        limits[FMAX_TARGET] = max(constraints)
+    for target, threshold in limits.items():
+        prediction = predictions.get(target)
+        if prediction is not None and abs(
+            prediction.value - threshold
+        ) < THRESHOLD_SIGMAS * prediction.stderr:
+            return f'{target} {prediction.value:.4g} near {threshold:.4g}'
+    return None
+
+
+class PredictingRunner:
+    """Job runner that predicts place and route when it is safe to.
+
+    Full jobs are synthesized first; when every prediction of the model is
+    confident and away from the thresholds, the predicted metrics are
+    returned instead of running the rest of the flow. Picklable, so it can
+    be handed to process pools.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+        tolerance: float = DEFAULT_TOLERANCE,
+        thresholds: Optional[Dict[str, float]] = None,
+        runner: Callable[[Job, Optional[str]], Optional[FlowMetrics]] = (
+            run_job
+        ),
+    ) -> None:
+        self.model_path = model_path
+        self.min_confidence = min_confidence
+        self.tolerance = tolerance
+        self.thresholds = dict(thresholds or {})
+        self.runner = runner
+
+    def __call__(
+        self, job: Job, workdir: Optional[str] = None
+    ) -> Optional[FlowMetrics]:
+        model = QoRModel.load(self.model_path)
+        if (
+            job.profile == 'synth'
+            or not job.get_reports
+            or job.toolchain not in model.models
+        ):
+            return self.runner(job, workdir)
+
+        synth = self.runner(replace(job, profile='synth'), workdir)
+        if synth is None:
+            return self.runner(job, workdir)
+
+        predictions = model.predict(synth, self.tolerance)
+        reason = full_run_reason(
+            synth, predictions, self.min_confidence, self.thresholds
+        )
+        if reason is not None:
+            print_yellow(f'{job.name}: running place and route ({reason})')
+            return self.runner(job, workdir)
+
+        print_green(
+            f'{job.name}: place and route predicted, Fmax '
+            f'{predictions[FMAX_TARGET].value:.2f} MHz '
+            f'(+/- {predictions[FMAX_TARGET].stderr:.2f})'
+        )
+        return model.predicted_metrics(synth, predictions)
@@ -0,0 +1,295 @@
+"""Noise-aware QoR regression detection against stored baselines.
+
+A baseline holds, for every ``core@target``, the reference value of each
+metric (median of the baseline window) and its run-to-run noise (standard
+deviation of the same window). Recording the baseline right after a seed
+sweep of the reference revision (``sweep: {seed: [1, 2, 3, 4, 5]}`` in a
+manifest) makes the noise reflect placement variance.
+
+A new result is compared metric by metric. Degradations within
+``warn_sigmas`` standard deviations pass, up to ``fail_sigmas`` warn and
+beyond that fail. A relative floor keeps noise-free metrics (e.g. LUT
+counts of a deterministic flow) from failing on tiny changes, and a
+baselined metric missing from the new result fails.
+
+Only measured runs of the full flow count, as baselines and as results:
+synthesis-only runs and runs whose place and route was predicted (see
+:mod:`core.qor_model`) are ignored.
+
+A baselined target without a new result is reported as missing and
+warns, or fails with ``require_all``, so a job that stopped producing
+results does not pass the gate unnoticed.
+"""
+import json
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from core.metrics import FlowMetrics
+from core.results import ResultsDB
+
+PASS = 'pass'
+WARN = 'warn'
+FAIL = 'fail'
+_SEVERITY = {PASS: 0, WARN: 1, FAIL: 2}
+
+# Minimum relative tolerance per metric class, applied when the learned
+# noise is smaller (e.g. a single baseline sample)
+DEFAULT_RELATIVE_FLOOR: Dict[str, float] = {
+    'fmax_mhz': 0.02,
+    'resource': 0.01,
+    'power_w': 0.05,
+    'area_um2': 0.01,
+}
+
+
+def flatten_metrics(metrics: FlowMetrics) -> Dict[str, float]:
+    """Scalar view of the metrics, keyed by ``<class>`` or ``<class>:<name>``.
+
+    Fmax is higher-is-better; every other class is lower-is-better.
+    """
+    values: Dict[str, float] = {}
+    if metrics.fmax_mhz is not None:
+        values['fmax_mhz'] = metrics.fmax_mhz
+    for clk, clock in metrics.clocks.items():
+        values[f'fmax_mhz:{clk}'] = clock.fmax_mhz
+    for corner, clocks in metrics.corners.items():
+        for clk, clock in clocks.items():
+            values[f'fmax_mhz:{clk}@{corner}'] = clock.fmax_mhz
+    for res, resource in metrics.resources.items():
+        values[f'resource:{res}'] = float(resource.used)
+    for name, watts in metrics.power_w.items():
+        values[f'power_w:{name}'] = watts
+    for name, area in metrics.area_um2.items():
+        values[f'area_um2:{name}'] = area
+    return values
+
+
+def _metric_class(metric: str) -> str:
+    return metric.split(':', 1)[0]
+
+
+def _higher_is_better(metric: str) -> bool:
+    return _metric_class(metric) == 'fmax_mhz'
+
+
+@dataclass
+class RegressionPolicy:
+    warn_sigmas: float = 2.0
+    fail_sigmas: float = 4.0
+    relative_floor: Optional[Dict[str, float]] = None
+
+    def bands(self, metric: str, reference: float, sigma: float) -> tuple:
+        floors = self.relative_floor or DEFAULT_RELATIVE_FLOOR
+        floor = abs(reference) * floors.get(_metric_class(metric), 0.01)
+        warn = max(self.warn_sigmas * sigma, floor)
+        fail = max(self.fail_sigmas * sigma, 2 * floor)
+        return warn, fail
+
+
+@dataclass
+class Comparison:
+    target: str
+    metric: str
+    baseline: float
+    current: Optional[float]  # None: métrica ausente do resultado
+    degradation: Optional[float]
+    warn_band: float
+    fail_band: float
+    verdict: str
+
+
+class BaselineStore:
+    """Baselines per ``core@target`` kept in a JSON file.
+
+    JSON keeps the baselines reviewable and easy to commit next to the CI
+    configuration that gates on them.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+
+    def save(self) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'version': 1, 'entries': self.entries},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def update(self, target: str, runs: List[Dict[str, Any]]) -> bool:
+        """Learns the baseline of ``target`` from a window of runs."""
+        samples: Dict[str, List[float]] = {}
+        for run in runs:
+            for metric, value in flatten_metrics(
+                FlowMetrics.from_dict(run['metrics'])
+            ).items():
+                samples.setdefault(metric, []).append(value)
+
+        if not samples:
+            return False
+
+        self.entries[target] = {
+            'updated': time.time(),
+            'run_ids': [run['id'] for run in runs],
+            'metrics': {
+                metric: {
+                    'reference': statistics.median(values),
+                    'sigma': statistics.stdev(values)
+                    if len(values) > 1
+                    else 0.0,
+                    'samples': len(values),
+                }
+                for metric, values in samples.items()
+            },
+        }
+        return True
+
+
+def _runs_with_metrics(
+    db: ResultsDB, target: str, limit: int
+) -> List[Dict[str, Any]]:
+    # LIMIT -1: sem limite, pois o filtro descarta execuções
+    runs = [
+        run
+        for run in db.history(name=target, limit=-1)
+        if run['metrics'] is not None
+        and run['job'].get('profile', 'full') == 'full'
+        and not run['metrics'].get('predicted')
+    ]
+    return runs[:limit]
+
+
+def update_baselines(
+    db: ResultsDB,
+    store: BaselineStore,
+    targets: Optional[List[str]] = None,
+    window: int = 5,
+) -> List[str]:
+    """Rebuilds baselines from the newest ``window`` runs of each target."""
+    updated: List[str] = []
+    for target in targets or db.names():
+        runs = _runs_with_metrics(db, target, window)
+        if runs and store.update(target, runs):
+            updated.append(target)
+    return updated
+
+
+def compare(
+    target: str,
+    baseline: Dict[str, Any],
+    current: FlowMetrics,
+    policy: RegressionPolicy,
+) -> List[Comparison]:
+    comparisons: List[Comparison] = []
+    values = flatten_metrics(current)
+
+    for metric, ref in baseline['metrics'].items():
+        reference = ref['reference']
+        warn, fail = policy.bands(metric, reference, ref['sigma'])
+        if metric not in values:
+            comparisons.append(
+                Comparison(
+                    target=target,
+                    metric=metric,
+                    baseline=reference,
+                    current=None,
+                    degradation=None,
+                    warn_band=warn,
+                    fail_band=fail,
+                    verdict=FAIL,
+                )
+            )
+            continue
+        value = values[metric]
+        if _higher_is_better(metric):
+            degradation = reference - value
+        else:
+            degradation = value - reference
+
+        if degradation > fail:
+            verdict = FAIL
+        elif degradation > warn:
+            verdict = WARN
+        else:
+            verdict = PASS
+
+        comparisons.append(
+            Comparison(
+                target=target,
+                metric=metric,
+                baseline=reference,
+                current=value,
+                degradation=degradation,
+                warn_band=warn,
+                fail_band=fail,
+                verdict=verdict,
+            )
+        )
+    return comparisons
+
+
+def check_regressions(
+    db: ResultsDB,
+    store: BaselineStore,
+    policy: RegressionPolicy,
+    targets: Optional[List[str]] = None,
+    require_all: bool = False,
+) -> Dict[str, Any]:
+    """Compares the newest run of each baselined target to its baseline.
+
+    Args:
+        require_all (bool): Fail, instead of warn, on baselined targets
+            without a run newer than their baseline.
+
+    Returns:
+        Dict[str, Any]: Machine readable report with the overall
+        ``verdict``, a ``summary`` of verdict counts per target, the
+        ``missing`` targets and every metric ``comparison``.
+    """
+    comparisons: List[Comparison] = []
+    per_target: Dict[str, str] = {}
+    missing: List[str] = []
+
+    for target in targets or sorted(store.entries):
+        baseline = store.entries.get(target)
+        if baseline is None:
+            continue
+        runs = _runs_with_metrics(db, target, 1)
+        if not runs or runs[0]['id'] in baseline['run_ids']:
+            # Sem resultado novo: o job pode ter parado de produzir
+            missing.append(target)
+            per_target[target] = FAIL if require_all else WARN
+            continue
+
+        current = FlowMetrics.from_dict(runs[0]['metrics'])
+        target_comparisons = compare(target, baseline, current, policy)
+        comparisons.extend(target_comparisons)
+        per_target[target] = max(
+            (c.verdict for c in target_comparisons),
+            key=_SEVERITY.__getitem__,
+            default=PASS,
+        )
+
+    summary = {PASS: 0, WARN: 0, FAIL: 0}
+    for verdict in per_target.values():
+        summary[verdict] += 1
+
+    return {
+        'verdict': max(
+            per_target.values(), key=_SEVERITY.__getitem__, default=PASS
+        ),
+        'summary': summary,
+        'targets': per_target,
+        'missing': missing,
+        'comparisons': [asdict(c) for c in comparisons],
+    }
@@ -0,0 +1,817 @@
+"""Parsers for the reports written by each EDA backend.
+
+Every parser takes a path, streams the file (line by line for text reports,
+``iterparse`` for XML) and returns plain values, so they can be used and
+benchmarked without running a flow. Missing files yield empty results.
+Reports compressed by artifact pruning (``<path>.gz``, see
+:mod:`core.artifacts`) are read in their place.
+"""
+import gzip
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from core.metrics import (
+    CellMetrics,
+    ClockMetrics,
+    PathMetrics,
+    ResourceMetrics,
+    SlackMetrics,
+)
+
+_NUMBER = r'[-+]?[0-9]*\.?[0-9]+'
+_LEADING_NUMBER_RE = re.compile(rf'^\s*({_NUMBER})')
+
+# -------------------------
+# Vivado
+# -------------------------
+# WNS é o primeiro número da tabela de Design Timing Summary
+_VIVADO_WNS_RE = re.compile(rf'^\s*({_NUMBER})\s+{_NUMBER}')
+# Clock Summary: nome, waveform, período (ns) e frequência (MHz)
+_VIVADO_CLOCK_RE = re.compile(
+    r'^\s*(\S+)\s+\{[^\}]*\}\s+([0-9]*\.?[0-9]+)\s+[0-9]*\.?[0-9]+\s*$'
+)
+# Tabelas de slack por clock do report_timing_summary
+_VIVADO_TABLES = {
+    '| Intra Clock Table': 'intra',
+    '| Inter Clock Table': 'inter',
+    '| Other Path Groups Table': 'other',
+    '| Timing Details': None,
+}
+_VIVADO_HEADER_RE = re.compile(r'\S+(?: \S+)*')
+_VIVADO_SLACK_COLUMNS = {
+    'WNS(ns)': 'wns_ns',
+    'TNS(ns)': 'tns_ns',
+    'WHS(ns)': 'whs_ns',
+    'THS(ns)': 'ths_ns',
+}
+# Caminhos detalhados (``-max_paths``): slack e campos do cabeçalho
+_VIVADO_PATH_SLACK_RE = re.compile(r'^Slack(?:\s+\(\w+\))?\s*:\s*(\S+)')
+_VIVADO_PATH_FIELD_RE = re.compile(
+    r'^\s+(Source|Destination|Path Group|Path Type|Requirement'
+    r'|Data Path Delay|Logic Levels):\s+(\S.*)$'
+)
+# "8.123ns  (logic 2.345ns (28.9%)  route 5.778ns (71.1%))"
+_VIVADO_DATA_PATH_RE = re.compile(
+    rf'^({_NUMBER})ns\s+\(logic\s+({_NUMBER})ns.*route\s+({_NUMBER})ns'
+)
+_VIVADO_DYNAMIC_RE = re.compile(r'Dynamic \(W\)\s*\|\s*([0-9]*\.?[0-9]+)')
+_VIVADO_STATIC_RE = re.compile(
+    r'Device Static \(W\)\s*\|\s*([0-9]*\.?[0-9]+)'
+)
+
+# Columns of the hierarchical utilization table
+VIVADO_UTILIZATION_COLUMNS = {
+    'Total LUTs': 2,
+    'Logic LUTs': 3,
+    'LUTRAMs': 4,
+    'SRLs': 5,
+    'FFs': 6,
+    'RAMB36': 7,
+    'RAMB18': 8,
+    'DSP Blocks': 9,
+}
+
+
+def _report_exists(path: str) -> bool:
+    return os.path.exists(path) or os.path.exists(f'{path}.gz')
+
+
+def _open_report(
+    path: str, mode: str = 'r', errors: Optional[str] = None
+) -> IO[Any]:
+    """Opens a report, or the copy of it compressed by artifact pruning."""
+    if not os.path.exists(path) and os.path.exists(f'{path}.gz'):
+        if 'b' in mode:
+            return gzip.open(f'{path}.gz', mode)
+        return gzip.open(f'{path}.gz', f'{mode}t', errors=errors)
+    return open(path, mode, errors=errors)
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(float(value))
+    except ValueError:
+        return 0
+
+
+def _leading_number(text: str) -> Optional[float]:
+    match = _LEADING_NUMBER_RE.match(text)
+    return float(match.group(1)) if match else None
+
+
+def _instance(pin: str) -> str:
+    """Cell instance of a hierarchical pin name (ports are kept as is)."""
+    return pin.rsplit('/', 1)[0]
+
+
+def worst_paths(
+    paths: List[PathMetrics], limit: Optional[int] = None
+) -> List[PathMetrics]:
+    """``paths`` from the least slack up, at most ``limit`` of them.
+
+    Paths without slack come last, longest data path first.
+    """
+    ordered = sorted(
+        paths,
+        key=lambda p: (
+            p.slack_ns is None,
+            p.slack_ns if p.slack_ns is not None else -(p.data_path_ns or 0),
+        ),
+    )
+    return ordered if limit is None else ordered[:limit]
+
+
+def _table_row(
+    line: str, columns: List[Tuple[str, int, int]]
+) -> Dict[str, str]:
+    """Cells of a fixed-width table row, given its header columns.
+
+    Clock names are left-aligned under their header and numbers are
+    right-aligned, so each number ends where its header ends and may be
+    blank (e.g. WNS of a clock without setup paths).
+    """
+    row: Dict[str, str] = {}
+    for i, (name, start, end) in enumerate(columns):
+        if 'Clock' in name:
+            stop = columns[i + 1][1] if i + 1 < len(columns) else len(line)
+            row[name] = line[start:stop].strip()
+        else:
+            begin = columns[i - 1][2] if i else 0
+            # Só o último token: nomes longos invadem a coluna seguinte
+            tokens = line[begin:end].split()
+            row[name] = tokens[-1] if tokens else ''
+    return row
+
+
+def _slack(row: Dict[str, str]) -> SlackMetrics:
+    slack = SlackMetrics()
+    for column, attr in _VIVADO_SLACK_COLUMNS.items():
+        try:
+            setattr(slack, attr, float(row.get(column, '')))
+        except ValueError:
+            pass
+    return slack
+
+
+def parse_vivado_timing_summary(
+    path: str,
+) -> Tuple[Dict[str, ClockMetrics], Dict[str, SlackMetrics]]:
+    """Fmax and slack breakdown per clock from ``report_timing_summary``.
+
+    Setup WNS is taken per clock from the Intra Clock Table, and from the
+    Inter Clock Table for paths ending in the clock, whose requirement is
+    approximated by the destination period. Fmax of a clock is then
+    ``1000 / (period - WNS)``. Reports without these tables fall back to
+    the design-wide WNS for every clock.
+
+    Returns:
+        Tuple: Clock metrics by clock, and slack by clock (``clk``) and by
+        clock pair (``from->to``).
+    """
+    clocks: Dict[str, ClockMetrics] = {}
+    slack: Dict[str, SlackMetrics] = {}
+    if not _report_exists(path):
+        return clocks, slack
+
+    design_wns = None
+    periods: Dict[str, float] = {}
+    table: Optional[str] = None
+    columns: List[Tuple[str, int, int]] = []
+    with _open_report(path) as f:
+        for line in f:
+            stripped = line.rstrip('\n')
+            if stripped.startswith('| '):
+                section = stripped.rstrip()
+                if section in _VIVADO_TABLES:
+                    table = _VIVADO_TABLES[section]
+                    columns = []
+                    if table is None:
+                        break  # caminhos detalhados: nada mais a ler
+                elif table is not None and not section.startswith('| -'):
+                    table = 'other'  # outras tabelas depois das de clock
+                continue
+
+            if design_wns is None:
+                wns_match = _VIVADO_WNS_RE.match(line)
+                if wns_match:
+                    design_wns = float(wns_match.group(1))
+            if table is None:
+                clock_match = _VIVADO_CLOCK_RE.match(line)
+                if clock_match:
+                    periods[clock_match.group(1)] = float(
+                        clock_match.group(2)
+                    )
+                continue
+            if table == 'other':
+                continue
+
+            if not columns:
+                if 'WNS(ns)' in stripped:
+                    columns = [
+                        (m.group(0), m.start(), m.end())
+                        for m in _VIVADO_HEADER_RE.finditer(stripped)
+                    ]
+                continue
+            if not stripped.strip() or stripped.lstrip().startswith('-'):
+                continue
+
+            row = _table_row(stripped, columns)
+            if table == 'intra' and row.get('Clock'):
+                slack[row['Clock']] = _slack(row)
+            elif table == 'inter' and row.get('To Clock'):
+                slack[f"{row['From Clock']}->{row['To Clock']}"] = _slack(
+                    row
+                )
+
+    # WNS de setup que limita cada clock (caminhos que terminam nele)
+    setup_wns: Dict[str, float] = {}
+    for key, values in slack.items():
+        if values.wns_ns is None:
+            continue
+        clk = key.split('->')[-1]
+        setup_wns[clk] = min(setup_wns.get(clk, values.wns_ns), values.wns_ns)
+
+    for clk, period_ns in periods.items():
+        wns_ns = setup_wns.get(clk) if slack else (design_wns or 0.0)
+        if wns_ns is None:
+            continue  # sem caminhos de setup neste clock
+        effective_period = period_ns - wns_ns
+        if effective_period > 0:
+            clocks[clk] = ClockMetrics(
+                fmax_mhz=1000.0 / effective_period,
+                period_ns=period_ns,
+                constraint_mhz=1000.0 / period_ns,
+            )
+    return clocks, slack
+
+
+def parse_vivado_timing(path: str) -> Dict[str, ClockMetrics]:
+    """Fmax per clock from a ``report_timing_summary`` file."""
+    return parse_vivado_timing_summary(path)[0]
+
+
+def parse_vivado_paths(
+    path: str, limit: Optional[int] = None
+) -> List[PathMetrics]:
+    """Critical setup paths from ``report_timing_summary -max_paths``.
+
+    Reads the Timing Details section; hold paths are skipped. Start and
+    end points are the source and destination cells, without the pin.
+    """
+    records: List[Tuple[Optional[float], Dict[str, str]]] = []
+    if not _report_exists(path):
+        return []
+
+    in_details = False
+    with _open_report(path) as f:
+        for line in f:
+            if not in_details:
+                in_details = line.startswith('| Timing Details')
+                continue
+            slack_match = _VIVADO_PATH_SLACK_RE.match(line)
+            if slack_match:
+                # "inf" em caminhos sem restrição
+                records.append((_leading_number(slack_match.group(1)), {}))
+                continue
+            field_match = _VIVADO_PATH_FIELD_RE.match(line)
+            if field_match and records:
+                records[-1][1].setdefault(
+                    field_match.group(1), field_match.group(2).strip()
+                )
+
+    paths: List[PathMetrics] = []
+    for slack_ns, values in records:
+        if 'Source' not in values or not values.get(
+            'Path Type', 'Setup'
+        ).startswith('Setup'):
+            continue
+        record = PathMetrics(
+            startpoint=_instance(values['Source']),
+            endpoint=_instance(values.get('Destination', '')),
+            group=values.get('Path Group', ''),
+            slack_ns=slack_ns,
+            requirement_ns=_leading_number(values.get('Requirement', '')),
+        )
+        delay_match = _VIVADO_DATA_PATH_RE.match(
+            values.get('Data Path Delay', '')
+        )
+        if delay_match:
+            record.data_path_ns = float(delay_match.group(1))
+            record.cell_delay_ns = float(delay_match.group(2))
+            record.net_delay_ns = float(delay_match.group(3))
+        levels = _leading_number(values.get('Logic Levels', ''))
+        if levels is not None:
+            record.logic_levels = int(levels)
+        paths.append(record)
+    return worst_paths(paths, limit)
+
+
+def parse_vivado_power(path: str) -> Dict[str, float]:
+    """Dynamic and device static power (W) from a ``report_power`` file."""
+    power: Dict[str, float] = {}
+    if not _report_exists(path):
+        return power
+
+    with _open_report(path) as f:
+        for line in f:
+            if 'dynamic' not in power:
+                match = _VIVADO_DYNAMIC_RE.search(line)
+                if match:
+                    power['dynamic'] = float(match.group(1))
+            if 'static' not in power:
+                match = _VIVADO_STATIC_RE.search(line)
+                if match:
+                    power['static'] = float(match.group(1))
+            if len(power) == 2:
+                break
+    return power
+
+
+def parse_vivado_utilization(path: str) -> Dict[str, ResourceMetrics]:
+    """Top-level resources from a hierarchical utilization XML report."""
+    resources: Dict[str, ResourceMetrics] = {}
+    if not _report_exists(path):
+        return resources
+
+    with _open_report(path, 'rb') as f:
+        for _, element in ET.iterparse(f, events=('end',)):
+            if element.tag != 'tablerow':
+                continue
+            cells = element.findall('tablecell')
+            # A linha do topo tem o módulo "(top)"; a instância leva o nome
+            # do módulo topo
+            if len(cells) > 1 and (
+                cells[0].attrib.get('contents', '') == 'top'
+                or cells[1].attrib.get('contents', '') == '(top)'
+            ):
+                for name, column in VIVADO_UTILIZATION_COLUMNS.items():
+                    contents = (
+                        cells[column].attrib.get('contents', '0')
+                        if column < len(cells)
+                        else '0'
+                    )
+                    resources[name] = ResourceMetrics(used=_to_int(contents))
+                break  # achou "top", não precisa mais
+            element.clear()
+    return resources
+
+
+def parse_vivado_utilization_hierarchy(
+    path: str,
+) -> Tuple[Dict[str, ResourceMetrics], Dict[str, Dict[str, float]]]:
+    """Top-level resources and per-instance usage, in a single pass.
+
+    The instance column is indented two spaces per hierarchy level; the
+    breakdown is keyed by the full instance path (``top/core/alu``) and
+    leaves out zero counts to keep the stored metrics small.
+    """
+    resources: Dict[str, ResourceMetrics] = {}
+    modules: Dict[str, Dict[str, float]] = {}
+    if not _report_exists(path):
+        return resources, modules
+
+    stack: List[str] = []
+    with _open_report(path, 'rb') as f:
+        for _, element in ET.iterparse(f, events=('end',)):
+            if element.tag != 'tablerow':
+                continue
+            cells = element.findall('tablecell')
+            if len(cells) < 2:
+                element.clear()
+                continue  # cabeçalho
+
+            instance = cells[0].attrib.get('contents', '')
+            name = instance.strip()
+            values = {
+                metric: _to_int(
+                    cells[column].attrib.get('contents', '0')
+                    if column < len(cells)
+                    else '0'
+                )
+                for metric, column in VIVADO_UTILIZATION_COLUMNS.items()
+            }
+            element.clear()
+
+            if not resources and (
+                name == 'top' or cells[1].attrib.get('contents', '') == '(top)'
+            ):
+                resources = {
+                    metric: ResourceMetrics(used=used)
+                    for metric, used in values.items()
+                }
+            if not name or name.startswith('('):
+                continue  # lógica própria do pai, já contada nele
+
+            depth = (len(instance) - len(instance.lstrip(' '))) // 2
+            del stack[depth:]
+            stack.append(name)
+            modules['/'.join(stack)] = {
+                metric: used for metric, used in values.items() if used
+            }
+    return resources, modules
+
+
+# -------------------------
+# nextpnr
+# -------------------------
+def _nextpnr_path(
+    entry: Dict[str, Any], clocks: Dict[str, ClockMetrics]
+) -> Optional[PathMetrics]:
+    segments = entry.get('path', [])
+    if not segments:
+        return None
+
+    src, dst = entry.get('from', ''), entry.get('to', '')
+    cell_ns, net_ns, levels = 0.0, 0.0, 0
+    for segment in segments:
+        delay = float(segment.get('delay', 0.0))
+        if segment.get('type') == 'routing':
+            net_ns += delay
+        else:  # clk-to-q, source, logic, setup
+            cell_ns += delay
+            levels += segment.get('type') == 'logic'
+
+    record = PathMetrics(
+        startpoint=segments[0].get('from', {}).get('cell', ''),
+        endpoint=segments[-1].get('to', {}).get('cell', ''),
+        group=src if src == dst else f'{src}->{dst}',
+        data_path_ns=cell_ns + net_ns,
+        cell_delay_ns=cell_ns,
+        net_delay_ns=net_ns,
+        logic_levels=levels,
+    )
+    constraint = clocks.get(dst)
+    if constraint is not None and constraint.constraint_mhz:
+        record.requirement_ns = 1000.0 / constraint.constraint_mhz
+        record.slack_ns = record.requirement_ns - record.data_path_ns
+    return record
+
+
+def parse_nextpnr_timing(
+    path: str, limit: Optional[int] = None
+) -> Tuple[
+    Dict[str, ClockMetrics], Dict[str, ResourceMetrics], List[PathMetrics]
+]:
+    """Fmax, utilization and critical paths of a nextpnr ``--report``.
+
+    Logic, clock-to-q and setup segments of ``critical_paths`` count as
+    cell delay, routing segments as net delay. The requirement is the
+    period constrained on the destination clock, so the slack of paths
+    between clocks is approximate.
+    """
+    if not _report_exists(path):
+        return {}, {}, []
+
+    with _open_report(path) as f:
+        data: Dict[str, Any] = json.load(f)
+
+    clocks = {
+        clk: ClockMetrics(
+            fmax_mhz=float(values.get('achieved', 0.0)),
+            constraint_mhz=float(values.get('constraint', 0.0)),
+        )
+        for clk, values in data.get('fmax', {}).items()
+    }
+    resources = {
+        res: ResourceMetrics(
+            used=values.get('used', 0), available=values.get('available', 0)
+        )
+        for res, values in data.get('utilization', {}).items()
+    }
+    paths = [
+        record
+        for record in (
+            _nextpnr_path(entry, clocks)
+            for entry in data.get('critical_paths', [])
+        )
+        if record is not None
+    ]
+    return clocks, resources, worst_paths(paths, limit)
+
+
+def parse_nextpnr_report(
+    path: str,
+) -> Tuple[Dict[str, ClockMetrics], Dict[str, ResourceMetrics]]:
+    """Fmax and utilization from a nextpnr ``--report`` JSON file."""
+    clocks, resources, _ = parse_nextpnr_timing(path)
+    return clocks, resources
+
+
+# -------------------------
+# Gowin
+# -------------------------
+# Max Frequency Summary: NO., clock, constraint (MHz), actual Fmax (MHz)
+_GOWIN_FMAX_RE = re.compile(
+    r'^\s*\d+\s+(\S+)\s+([0-9]*\.?[0-9]+)\s*\(MHz\)'
+    r'\s+([0-9]*\.?[0-9]+)\s*\(MHz\)'
+)
+_GOWIN_SECTION_RE = re.compile(r'^\s*\d+(\.\d+)*\.?\s+\S')
+_GOWIN_USAGE_RE = re.compile(r'^\s*(\d+)\s*(?:/\s*(\d+))?')
+
+
+def parse_gowin_timing(path: str) -> Dict[str, ClockMetrics]:
+    """Fmax per clock from a Gowin text timing report (``*.tr``)."""
+    clocks: Dict[str, ClockMetrics] = {}
+    if not _report_exists(path):
+        return clocks
+
+    in_summary = False
+    with _open_report(path, errors='replace') as f:
+        for line in f:
+            if 'Max Frequency Summary' in line:
+                in_summary = True
+                continue
+            if not in_summary:
+                continue
+            match = _GOWIN_FMAX_RE.match(line)
+            if match:
+                clocks[match.group(1)] = ClockMetrics(
+                    fmax_mhz=float(match.group(3)),
+                    constraint_mhz=float(match.group(2)),
+                )
+            elif clocks and not line.strip():
+                break  # fim da tabela
+    return clocks
+
+
+def parse_gowin_resources(path: str) -> Dict[str, ResourceMetrics]:
+    """Resource usage from the Gowin place & route report (``*.rpt.txt``).
+
+    Reads the "Resource Usage Summary" table, whose rows look like
+    ``Register | 1095/6693 | 17%`` (used/available) or ``I/O Buf | 9 | -``.
+    Sub-rows prefixed with ``--`` are kept under their own names.
+    """
+    resources: Dict[str, ResourceMetrics] = {}
+    if not _report_exists(path):
+        return resources
+
+    in_summary = False
+    with _open_report(path, errors='replace') as f:
+        for line in f:
+            if 'Resource Usage Summary' in line:
+                in_summary = True
+                continue
+            if not in_summary:
+                continue
+            if resources and _GOWIN_SECTION_RE.match(line):
+                break  # próxima seção do relatório
+
+            columns = [c.strip() for c in line.split('|')]
+            if len(columns) < 2 or not columns[0]:
+                continue
+            name = columns[0].lstrip('-').strip()
+            match = _GOWIN_USAGE_RE.match(columns[1])
+            if not name or name == 'Resources' or not match:
+                continue
+            resources[name] = ResourceMetrics(
+                used=int(match.group(1)),
+                available=int(match.group(2)) if match.group(2) else None,
+            )
+    return resources
+
+
+# -------------------------
+# OpenROAD flow scripts
+# -------------------------
+_ORFS_CLOCK_RE = re.compile(
+    r'^\s*(\S+)\s+period_min\s*=\s*([0-9]*\.?[0-9]+)\s+fmax\s*=\s*([0-9]*\.?[0-9]+)'
+)
+# Linhas de células: quantidade, área, nome
+_ORFS_CELL_RE = re.compile(r'^\s*(\d+)\s+([0-9]*\.?[0-9]+)\s+(\S+)')
+_ORFS_CHIP_AREA_RE = re.compile(
+    r'^\s*Chip area for module.*:\s*([0-9]*\.?[0-9]+)'
+)
+# Com síntese hierárquica, a área total vem no fim, para o módulo topo
+_ORFS_TOP_AREA_RE = re.compile(
+    r'^\s*Chip area for top module.*:\s*([0-9]*\.?[0-9]+)'
+)
+# Seções do ``stat`` do Yosys, uma por módulo
+_YOSYS_MODULE_RE = re.compile(r'^===\s+(.+?)\s+===\s*$')
+# "Number of cells: N" (Yosys antigo) ou "N [área] cells" (Yosys >= 0.40)
+_YOSYS_CELLS_RE = re.compile(
+    r'^\s*(?:Number of cells:\s*(\d+)|(\d+)(?:\s+[0-9.]+)?\s+cells)\s*$'
+)
+# Cabeçalho de cada caminho do report_checks do OpenSTA
+_ORFS_PATH_FIELD_RE = re.compile(
+    r'^(Startpoint|Endpoint|Path Group|Path Type):\s+(\S+)'
+)
+_ORFS_SEQ_AREA_RE = re.compile(
+    r'^\s*of which used for sequential elements:\s*([0-9]*\.?[0-9]+)'
+)
+# Linha 'Total' do report_power do OpenSTA: interna, chaveamento, leakage
+# e total (W), seguida da porcentagem
+_OPENSTA_POWER_TOTAL_RE = re.compile(
+    r'^Total\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+[0-9.]+%'
+)
+
+
+def parse_orfs_finish(path: str) -> Dict[str, ClockMetrics]:
+    """Fmax per clock from the ORFS ``6_finish.rpt`` report."""
+    clocks: Dict[str, ClockMetrics] = {}
+    if not _report_exists(path):
+        return clocks
+
+    with _open_report(path) as f:
+        for line in f:
+            match = _ORFS_CLOCK_RE.match(line)
+            if match:
+                clocks[match.group(1)] = ClockMetrics(
+                    fmax_mhz=float(match.group(3)),
+                    period_ns=float(match.group(2)),
+                )
+    return clocks
+
+
+def parse_openroad_power(path: str) -> Dict[str, float]:
+    """Dynamic and static power (W) from an OpenSTA ``report_power``.
+
+    Works on the output of :func:`core.activity.run_power` and on the ORFS
+    final report, which ends with a vectorless ``report_power``.
+    """
+    power: Dict[str, float] = {}
+    if not _report_exists(path):
+        return power
+
+    with _open_report(path) as f:
+        for line in f:
+            match = _OPENSTA_POWER_TOTAL_RE.match(line)
+            if match:
+                internal, switching, leakage, total = (
+                    float(value) for value in match.groups()
+                )
+                power = {
+                    'dynamic': internal + switching,
+                    'static': leakage,
+                    'internal': internal,
+                    'switching': switching,
+                    'total': total,
+                }
+    return power
+
+
+def _orfs_row(line: str) -> Tuple[List[float], List[str]]:
+    """Numeric columns and description of a ``report_checks`` row."""
+    tokens = line.split()
+    numbers: List[float] = []
+    for i, token in enumerate(tokens):
+        try:
+            numbers.append(float(token))
+        except ValueError:
+            return numbers, tokens[i:]
+    return numbers, []
+
+
+def parse_orfs_paths(
+    path: str, limit: Optional[int] = None
+) -> List[PathMetrics]:
+    """Critical setup paths from the OpenSTA ``report_checks`` output.
+
+    Only ``max`` paths are read. Along the data path, a pin of the same
+    instance as the previous pin closes a cell arc (cell delay, and a
+    logic level unless it is the launching cell); any other pin is
+    reached through a net (net delay).
+    """
+    paths: List[PathMetrics] = []
+    if not _report_exists(path):
+        return paths
+
+    header: Dict[str, str] = {}
+    stage = ''  # 'data', 'required' ou '' fora de um caminho
+    launch = capture = None
+    first = previous = None
+    cell_ns = net_ns = 0.0
+    levels = 0
+    with _open_report(path) as f:
+        for line in f:
+            field_match = _ORFS_PATH_FIELD_RE.match(line)
+            if field_match:
+                if field_match.group(1) == 'Startpoint':
+                    header, stage = {}, 'data'
+                    launch = capture = first = previous = None
+                    cell_ns = net_ns = 0.0
+                    levels = 0
+                header[field_match.group(1)] = field_match.group(2)
+                continue
+            if not stage:
+                continue
+
+            numbers, description = _orfs_row(line)
+            if not numbers or not description:
+                continue
+            text = ' '.join(description)
+            if description[0] == 'clock' and text.endswith('edge)'):
+                if stage == 'data' and launch is None:
+                    launch = numbers[-1]
+                elif stage == 'required' and capture is None:
+                    capture = numbers[-1]
+            elif text == 'data arrival time':
+                stage = 'required'
+            elif stage == 'data' and description[0] in ('^', 'v'):
+                if len(description) < 2 or len(numbers) < 2:
+                    continue
+                instance = _instance(description[1])
+                if first is None:
+                    first = instance
+                elif instance == previous:
+                    cell_ns += numbers[-2]
+                    levels += instance != first
+                else:
+                    net_ns += numbers[-2]
+                previous = instance
+            elif description[0] == 'slack':
+                stage = ''
+                if header.get('Path Type', 'max') != 'max':
+                    continue
+                paths.append(
+                    PathMetrics(
+                        startpoint=header['Startpoint'],
+                        endpoint=header.get('Endpoint', ''),
+                        group=header.get('Path Group', ''),
+                        slack_ns=numbers[-1],
+                        requirement_ns=capture - launch
+                        if capture is not None and launch is not None
+                        else None,
+                        data_path_ns=cell_ns + net_ns,
+                        cell_delay_ns=cell_ns,
+                        net_delay_ns=net_ns,
+                        logic_levels=levels,
+                    )
+                )
+    return worst_paths(paths, limit)
+
+
+def parse_yosys_stat(
+    path: str,
+) -> Tuple[
+    Dict[str, CellMetrics], Dict[str, float], Dict[str, Dict[str, float]]
+]:
+    """Cell usage, area and per-module breakdown of a Yosys ``stat``.
+
+    Reads the output of ``stat`` (with or without ``-liberty``) in one
+    pass. The breakdown maps each module to its own ``cells`` count and,
+    when a liberty was given, ``area_um2``; submodules are not included.
+    """
+    cells: Dict[str, CellMetrics] = {}
+    area: Dict[str, float] = {}
+    modules: Dict[str, Dict[str, float]] = {}
+    if not _report_exists(path):
+        return cells, area, modules
+
+    module: Dict[str, float] = {}
+    has_top_area = False
+    with _open_report(path) as f:
+        for line in f:
+            module_match = _YOSYS_MODULE_RE.match(line)
+            if module_match:
+                name = module_match.group(1).lstrip('\\')
+                # O resumo da hierarquia soma os módulos; não é um módulo
+                module = (
+                    {}
+                    if name == 'design hierarchy'
+                    else modules.setdefault(name, {})
+                )
+                continue
+
+            count_match = _YOSYS_CELLS_RE.match(line)
+            if count_match:
+                module['cells'] = float(
+                    count_match.group(1) or count_match.group(2)
+                )
+                continue
+
+            cell_match = _ORFS_CELL_RE.match(line)
+            if cell_match:
+                cells[cell_match.group(3)] = CellMetrics(
+                    count=int(cell_match.group(1)),
+                    area_um2=float(cell_match.group(2)),
+                )
+                continue
+
+            top_match = _ORFS_TOP_AREA_RE.match(line)
+            if top_match:
+                area['chip'] = float(top_match.group(1))
+                has_top_area = True
+                continue
+
+            chip_match = _ORFS_CHIP_AREA_RE.match(line)
+            if chip_match:
+                module['area_um2'] = float(chip_match.group(1))
+                if not has_top_area:
+                    area['chip'] = float(chip_match.group(1))
+                continue
+
+            seq_match = _ORFS_SEQ_AREA_RE.match(line)
+            if seq_match:
+                area['sequential'] = float(seq_match.group(1))
+    return cells, area, modules
+
+
+def parse_orfs_synth_stat(
+    path: str,
+) -> Tuple[Dict[str, CellMetrics], Dict[str, float]]:
+    """Cell usage and chip/sequential area from ORFS ``synth_stat.txt``."""
+    cells, area, _ = parse_yosys_stat(path)
+    return cells, area
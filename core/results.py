@@ -0,0 +1,187 @@
+"""SQLite store of flow runs and their results.
+
+Successful runs are stored as ``done``, except those whose place and route
+was predicted (see :mod:`core.qor_model`), stored as ``predicted``: they
+are listed by :meth:`ResultsDB.recent` but never reused by
+:meth:`ResultsDB.latest` nor returned as measured history.
+"""
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from core.job import Job
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id      TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    flow        TEXT NOT NULL,
+    technology  TEXT NOT NULL,
+    core_id     TEXT,
+    status      TEXT NOT NULL,
+    started     REAL NOT NULL,
+    duration    REAL NOT NULL,
+    workdir     TEXT,
+    error       TEXT,
+    job         TEXT NOT NULL,
+    metrics     TEXT,
+    sources     TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_job_id ON runs (job_id);
+CREATE INDEX IF NOT EXISTS runs_target ON runs (core_id, technology);
+"""
+
+PREDICTED = 'predicted'
+
+
+def has_results(metrics: Optional[Dict[str, Any]]) -> bool:
+    """Whether stored metrics hold any clock or resource result."""
+    return bool(
+        metrics and (metrics.get('clocks') or metrics.get('resources'))
+    )
+
+
+class ResultsDB:
+    """Thin wrapper around the ``runs`` table.
+
+    A single connection is shared by every thread of the process, guarded by
+    a lock, so long-running processes can keep the database open.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+            columns = {
+                row['name']
+                for row in self._conn.execute('PRAGMA table_info(runs)')
+            }
+            if 'sources' not in columns:
+                # Bancos anteriores ao digest das fontes
+                self._conn.execute('ALTER TABLE runs ADD COLUMN sources TEXT')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def record_run(
+        self,
+        job: Job,
+        status: str,
+        started: float,
+        duration: float,
+        workdir: Optional[str] = None,
+        error: Optional[str] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        sources: Optional[str] = None,
+    ) -> int:
+        """Stores a finished run.
+
+        ``sources`` is the digest of the content of the job's sources (see
+        :func:`core.staging.sources_digest`); only runs recorded with one
+        can be reused by :meth:`latest`.
+        """
+        if status == 'done' and metrics and metrics.get('predicted'):
+            status = PREDICTED
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO runs (job_id, name, flow, technology, core_id, '
+                'status, started, duration, workdir, error, job, metrics, '
+                'sources) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    job.job_id,
+                    job.name,
+                    job.flow,
+                    job.technology,
+                    job.core_id,
+                    status,
+                    started,
+                    duration,
+                    workdir,
+                    error,
+                    json.dumps(job.to_dict(), sort_keys=True),
+                    json.dumps(metrics) if metrics is not None else None,
+                    sources,
+                ),
+            )
+            return int(cursor.lastrowid)
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record['job'] = json.loads(record['job'])
+        if record['metrics'] is not None:
+            record['metrics'] = json.loads(record['metrics'])
+        return record
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def latest(
+        self, job_id: str, sources: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Most recent successful run of a job with results, if any.
+
+        Predicted runs and runs whose metrics have neither clocks nor
+        resources (reports that were never written) are not reused. With
+        ``sources``, only runs of sources with that content digest count.
+        """
+        sql = "SELECT * FROM runs WHERE job_id = ? AND status = 'done'"
+        params: List[Any] = [job_id]
+        if sources is not None:
+            sql += ' AND sources = ?'
+            params.append(sources)
+        rows = self._query(f'{sql} ORDER BY started DESC', tuple(params))
+        for row in rows:
+            if has_results(row['metrics']):
+                return row
+        return None
+
+    def run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._query('SELECT * FROM runs WHERE id = ?', (run_id,))
+        return rows[0] if rows else None
+
+    def history(
+        self,
+        core_id: Optional[str] = None,
+        technology: Optional[str] = None,
+        limit: int = 100,
+        name: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Successful runs, newest first, filtered by core and target."""
+        sql = "SELECT * FROM runs WHERE status = 'done'"
+        params: List[Any] = []
+        if name is not None:
+            sql += ' AND name = ?'
+            params.append(name)
+        if core_id is not None:
+            sql += ' AND core_id = ?'
+            params.append(core_id)
+        if technology is not None:
+            sql += ' AND technology = ?'
+            params.append(technology)
+        sql += ' ORDER BY started DESC LIMIT ?'
+        params.append(limit)
+        return self._query(sql, tuple(params))
+
+    def names(self) -> List[str]:
+        """Every ``core@target`` with at least one successful run."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT name FROM runs WHERE status = 'done' "
+                'ORDER BY name'
+            ).fetchall()
+        return [row['name'] for row in rows]
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return self._query(
+            'SELECT * FROM runs ORDER BY started DESC LIMIT ?', (limit,)
+        )
@@ -0,0 +1,198 @@
+"""Placement of flow scratch directories on fast local storage.
+
+Vivado, nextpnr and ORFS write many small intermediate files. When the
+work directory is on NFS, that I/O can dominate short jobs. With scratch
+enabled, the scratch directories of a flow (``build/``, ``.Xil``, ORFS
+``objects/`` and ``results/``, ...) are created on a local tmpfs or disk
+and symlinked into the work directory for the duration of the tool run,
+taking along what a previous run left there. When the tools end, files
+worth keeping (everything but intermediates, see
+:func:`core.artifacts.classify`) are moved back and the scratch is
+removed.
+
+Configured through the environment of the process running the flows:
+
+    PROCESSOR_CI_SCRATCH          ``auto`` (``/dev/shm``, then the local
+                                  temporary directory), a directory, or
+                                  unset / ``off`` to disable
+    PROCESSOR_CI_SCRATCH_RESERVE  space (and, on tmpfs, RAM) that must
+                                  remain free besides the flow's estimate;
+                                  default ``4G``
+
+A location that cannot fit the estimate plus the reserve is skipped, so a
+busy machine falls back to disk, or to the work directory itself.
+"""
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+from core.artifacts import classify, parse_size
+from core.log import print_blue, print_yellow
+
+SCRATCH_ENV = 'PROCESSOR_CI_SCRATCH'
+RESERVE_ENV = 'PROCESSOR_CI_SCRATCH_RESERVE'
+DEFAULT_RESERVE = '4G'
+_PREFIX = 'processor_ci_scratch_'
+
+
+def _mem_available() -> Optional[int]:
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _is_tmpfs(path: str) -> bool:
+    """Whether ``path`` lives on a RAM-backed filesystem."""
+    path = os.path.realpath(path)
+    best, fstype = '', ''
+    try:
+        with open('/proc/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                mount_point = fields[1]
+                if (
+                    path == mount_point
+                    or path.startswith(mount_point.rstrip('/') + '/')
+                ) and len(mount_point) > len(best):
+                    best, fstype = mount_point, fields[2]
+    except OSError:
+        return False
+    return fstype in ('tmpfs', 'ramfs')
+
+
+def _fits(root: str, estimate: int, reserve: int) -> bool:
+    try:
+        st = os.statvfs(root)
+    except OSError:
+        return False
+    if st.f_bavail * st.f_frsize < estimate + reserve:
+        return False
+    if _is_tmpfs(root):
+        available = _mem_available()
+        if available is not None and available < estimate + reserve:
+            return False
+    return True
+
+
+def choose_scratch_root(workdir: str, estimate: int) -> Optional[str]:
+    """Scratch location for a flow run in ``workdir``, if any fits."""
+    setting = os.getenv(SCRATCH_ENV, '').strip()
+    if not setting or setting.lower() == 'off':
+        return None
+
+    candidates = (
+        ['/dev/shm', tempfile.gettempdir()]
+        if setting.lower() == 'auto'
+        else [setting]
+    )
+    reserve = parse_size(os.getenv(RESERVE_ENV, DEFAULT_RESERVE))
+    workdir_dev = os.stat(workdir).st_dev
+
+    for root in candidates:
+        if not os.path.isdir(root) or not os.access(root, os.W_OK):
+            continue
+        if os.stat(root).st_dev == workdir_dev:
+            continue  # mesmo sistema de arquivos: não ganha nada
+        if _fits(root, estimate, reserve):
+            return root
+    return None
+
+
+def reap_stale_scratch(root: str) -> None:
+    """Removes scratch left behind by processes that no longer exist."""
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith(_PREFIX):
+            continue
+        try:
+            pid = int(name[len(_PREFIX):].split('_', 1)[0])
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        except (ValueError, PermissionError):
+            pass
+
+
+class Scratch:
+    """Context manager placing ``dirs`` of the work directory on scratch.
+
+    Does nothing when scratch is disabled or no location fits.
+
+    Args:
+        dirs (List[str]): Directory names, relative to the work directory.
+        estimate (int): Expected scratch usage of the run, in bytes.
+        workdir (str): Work directory of the flow; defaults to the cwd.
+    """
+
+    def __init__(
+        self, dirs: List[str], estimate: int, workdir: str = '.'
+    ) -> None:
+        self.dirs = dirs
+        self.estimate = estimate
+        self.workdir = os.path.abspath(workdir)
+        self.path: Optional[str] = None
+
+    def __enter__(self) -> 'Scratch':
+        if not self.dirs:
+            return self
+        root = choose_scratch_root(self.workdir, self.estimate)
+        if root is None:
+            if os.getenv(SCRATCH_ENV):
+                print_yellow('No scratch space fits this run; using disk')
+            return self
+
+        reap_stale_scratch(root)
+        self.path = tempfile.mkdtemp(
+            prefix=f'{_PREFIX}{os.getpid()}_', dir=root
+        )
+        print_blue(f"Scratch: {', '.join(self.dirs)} -> {self.path}")
+
+        for name in self.dirs:
+            link = os.path.join(self.workdir, name)
+            target = os.path.join(self.path, name)
+            if os.path.islink(link) or os.path.isfile(link):
+                os.remove(link)
+            if os.path.isdir(link):
+                # Resultados de uma execução anterior: os estágios já
+                # feitos (core.stages) continuam a partir deles
+                shutil.move(link, target)
+            else:
+                os.makedirs(target)
+            os.symlink(target, link)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self.path is None:
+            return
+        try:
+            for name in self.dirs:
+                self._sync_back(name)
+        finally:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+
+    def _sync_back(self, name: str) -> None:
+        """Replaces the symlink by a directory with the kept artifacts."""
+        link = os.path.join(self.workdir, name)
+        if os.path.islink(link):
+            os.remove(link)
+
+        source = os.path.join(self.path, name)
+        for dirpath, _, filenames in os.walk(source):
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                relpath = os.path.relpath(file_path, self.path)
+                if classify(relpath) == 'intermediates':
+                    continue
+                destination = os.path.join(self.workdir, relpath)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.move(file_path, destination)
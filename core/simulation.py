@@ -0,0 +1,697 @@
+"""Cycle-accurate benchmarks of the cores with Verilator.
+
+Fmax and area tell how fast a core can be clocked, not how much work it
+does per cycle. This module builds a Verilator model of each core from the
+same file list and include directories a flow would use (see
+:func:`core.job.resolve_sources`, including the Processor CI wrapper),
+runs a set of benchmark programs on it and counts the cycles each one
+takes. Combined with the Fmax stored for each target in the results
+database, the cycle counts give the execution time of the benchmark on
+that target and a performance-per-MHz figure (CoreMark/MHz, DMIPS/MHz).
+
+Models are cached under the hash of everything that goes into them, so a
+core is only recompiled when its sources, the harness or Verilator
+change. The program is not part of the model: the harness defines
+``MEMORY_FILE`` as ``program.hex`` in the working directory of the run,
+and each benchmark links its program there.
+
+A benchmark set is a YAML file::
+
+    benchmarks:
+      - name: coremark
+        program: programs/{core_id}/coremark.hex
+        iterations: 10          # CoreMark iterations done by the program
+      - name: dhrystone
+        program: programs/{core_id}/dhrystone.hex
+        iterations: 2000
+        scale: 1757             # DMIPS: Dhrystones/s of the VAX 11/780
+        max_cycles: 100000000
+
+A benchmark ends when the design calls ``$finish`` or raises the
+optional done port; reaching ``max_cycles`` counts as a failure.
+
+With an activity directory, models are built with tracing and each run
+streams its VCD through a named pipe into :func:`core.activity.vcd_to_saif`,
+leaving ``<core>_<benchmark>.saif`` for the power analysis of the flows
+(``--activity``). The harness clock then runs at the board's clock (or
+``clock_mhz``), since the toggle rates in the SAIF are absolute.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from core import TEMPLATES_DIR, find_clock_signal, get_template_env
+from core.activity import vcd_to_saif
+from core.board_defines import DEFINES_BY_BOARD
+from core.job import list_cores, resolve_sources
+from core.log import print_blue, print_green, print_red
+from core.metrics import FlowMetrics
+from core.results import ResultsDB
+from core.staging import source_closure
+
+TOOLCHAINS_INSTALL_PATH = {
+    'verilator': os.getenv('VERILATOR_INSTALL_PATH', ''),
+}
+
+DEFAULT_BOARD = 'colorlight_i9'
+DEFAULT_MAX_CYCLES = 500_000_000
+DEFAULT_RESET_CYCLES = 20
+PROGRAM_FILE = 'program.hex'
+MODEL_BINARY = 'sim'
+HARNESS_TEMPLATE = 'verilator_main.cpp.j2'
+
+_MEMORY_FILE_RE = re.compile(r'^`define\s+MEMORY_FILE\b.*$', re.MULTILINE)
+_RESET_RE = re.compile(
+    r'^\s*input\s+(?:wire|logic)?\s*(\w*(?:rst|reset)\w*)\s*[,;)]?',
+    re.IGNORECASE | re.MULTILINE,
+)
+_ACTIVE_LOW_RE = re.compile(r'_?ni?$', re.IGNORECASE)
+_CYCLES_RE = re.compile(r'^cycles (\d+) finished ([01])$', re.MULTILINE)
+_CLOCK_FREQ_RE = re.compile(
+    r'^`define\s+CLOCK_FREQ\s+([\d_]+)', re.MULTILINE
+)
+
+
+# -------------------------
+# Cores e benchmarks
+# -------------------------
+@dataclass
+class SimCore:
+    """RTL of one core, resolved like the sources of a flow job."""
+
+    core_id: str
+    files: List[str]
+    include_dirs: List[str]
+    top_module: str
+
+
+def resolve_core(
+    core_id: str,
+    config_path: str,
+    processor_ci_path: str = '',
+    use_pci_wrapper: bool = False,
+) -> SimCore:
+    """Files of ``core_id`` from its configuration in ``config_path``."""
+    files, include_dirs, top_module = resolve_sources(
+        [],
+        [],
+        'processorci_top',
+        config_path=config_path,
+        use_config=True,
+        use_pci_wrapper=use_pci_wrapper,
+        processor_ci_path=processor_ci_path,
+        core_id=core_id,
+    )
+    return SimCore(
+        core_id,
+        [os.path.abspath(f) for f in files],
+        [os.path.abspath(d) for d in include_dirs],
+        top_module,
+    )
+
+
+@dataclass
+class Benchmark:
+    name: str
+    program: str  # pode conter {core_id}
+    iterations: int = 1
+    scale: float = 1.0
+    max_cycles: int = DEFAULT_MAX_CYCLES
+
+    def program_for(self, core_id: str) -> str:
+        return self.program.format(core_id=core_id)
+
+
+def load_benchmarks(path: str) -> List[Benchmark]:
+    """Reads a benchmark set; programs are relative to the file.
+
+    Raises:
+        ValueError: If the file does not describe a list of benchmarks.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+
+    entries = data.get('benchmarks') if isinstance(data, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path}: expected a non-empty 'benchmarks' list")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    benchmarks = []
+    for entry in entries:
+        try:
+            benchmark = Benchmark(**entry)
+        except TypeError as e:
+            raise ValueError(f'{path}: invalid benchmark {entry}: {e}')
+        benchmarks.append(
+            replace(
+                benchmark,
+                program=os.path.join(base_dir, benchmark.program),
+            )
+        )
+    return benchmarks
+
+
+# -------------------------
+# Modelos
+# -------------------------
+@dataclass
+class HarnessOptions:
+    """How the generated C++ harness drives the top module.
+
+    Ports left as None are found in the top module's source: the first
+    clock-like input and the first reset-like input, active low when its
+    name ends in ``n`` (``rst_n``, ``resetn``, ``rst_ni``).
+    """
+
+    board: str = DEFAULT_BOARD  # defines de processor_ci_defines.vh
+    clock_port: Optional[str] = None
+    reset_port: Optional[str] = None
+    reset_active_low: Optional[bool] = None
+    done_port: Optional[str] = None
+    reset_cycles: int = DEFAULT_RESET_CYCLES
+    verilator_args: List[str] = field(default_factory=list)
+    # Gera VCD (para SAIF); o clock simulado vale então clock_mhz
+    trace: bool = False
+    clock_mhz: Optional[float] = None  # None: CLOCK_FREQ da placa
+
+
+def _top_file(core: SimCore) -> Optional[str]:
+    module_re = re.compile(rf'\bmodule\s+{re.escape(core.top_module)}\b')
+    # O top costuma ser o último arquivo (wrapper do Processor CI)
+    for path in reversed(core.files):
+        try:
+            with open(path, 'r', errors='replace') as f:
+                if module_re.search(f.read()):
+                    return path
+        except OSError:
+            continue
+    return None
+
+
+def resolve_ports(core: SimCore, options: HarnessOptions) -> HarnessOptions:
+    """``options`` with the clock and reset ports filled in.
+
+    Raises:
+        ValueError: If a port is not given and cannot be found.
+    """
+    if (
+        options.clock_port
+        and options.reset_port
+        and options.reset_active_low is not None
+    ):
+        return options
+
+    top_file = _top_file(core)
+    clock_port = options.clock_port
+    reset_port = options.reset_port
+    if top_file is not None:
+        clock_port = clock_port or find_clock_signal(top_file)
+        if reset_port is None:
+            with open(top_file, 'r', errors='replace') as f:
+                match = _RESET_RE.search(f.read())
+            reset_port = match.group(1) if match else None
+    if not clock_port or not reset_port:
+        raise ValueError(
+            f"Clock or reset port of '{core.top_module}' not found; "
+            'give them with --clock-port and --reset-port'
+        )
+
+    active_low = options.reset_active_low
+    if active_low is None:
+        active_low = bool(_ACTIVE_LOW_RE.search(reset_port))
+    return replace(
+        options,
+        clock_port=clock_port,
+        reset_port=reset_port,
+        reset_active_low=active_low,
+    )
+
+
+def verilator_bin() -> str:
+    path = TOOLCHAINS_INSTALL_PATH.get('verilator', '')
+    return os.path.join(path, 'verilator') if path else 'verilator'
+
+
+@lru_cache(maxsize=None)
+def verilator_version(binary: str) -> str:
+    result = subprocess.run(
+        [binary, '--version'], capture_output=True, text=True, check=False
+    )
+    return result.stdout.strip()
+
+
+def simulation_defines(board: str) -> str:
+    """Board defines with ``MEMORY_FILE`` pointing at the run's program."""
+    if board not in DEFINES_BY_BOARD:
+        raise ValueError(f"Board '{board}' not found.")
+    define = f'`define MEMORY_FILE "{PROGRAM_FILE}"'
+    defines = DEFINES_BY_BOARD[board]
+    if _MEMORY_FILE_RE.search(defines):
+        return _MEMORY_FILE_RE.sub(define, defines)
+    return f'{defines}{define}\n'
+
+
+def board_clock_mhz(board: str) -> float:
+    match = _CLOCK_FREQ_RE.search(simulation_defines(board))
+    if match is None:
+        raise ValueError(f"Board '{board}' has no CLOCK_FREQ")
+    return int(match.group(1).replace('_', '')) / 1e6
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_key(core: SimCore, options: HarnessOptions) -> str:
+    """Hash of the sources, harness options and Verilator version."""
+    files, sources = source_closure(core.files, core.include_dirs)
+    digest = hashlib.sha256(
+        json.dumps(
+            {
+                'files': files,
+                'include_dirs': core.include_dirs,
+                'top_module': core.top_module,
+                'options': asdict(options),
+                'defines': simulation_defines(options.board),
+                'verilator': verilator_version(verilator_bin()),
+                'harness': _file_digest(
+                    os.path.join(TEMPLATES_DIR, HARNESS_TEMPLATE)
+                ),
+            },
+            sort_keys=True,
+        ).encode('utf-8')
+    )
+    for source in sorted(set(sources)):
+        digest.update(f'{source} {_file_digest(source)}\n'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class ModelCache:
+    """Compiled Verilator models under ``root``, one directory per key."""
+
+    def __init__(self, root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def build(
+        self, core: SimCore, options: HarnessOptions, build_jobs: int = 0
+    ) -> str:
+        """Path of the model of ``core``, compiling it if not cached.
+
+        Raises:
+            ValueError: If the harness ports cannot be resolved.
+            RuntimeError: If Verilator fails.
+        """
+        options = resolve_ports(core, options)
+        model_dir = os.path.join(self.root, model_key(core, options))
+        binary = os.path.join(model_dir, MODEL_BINARY)
+        if os.path.exists(binary):
+            return binary
+
+        build_dir = os.path.join(self.root, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(build_dir)
+        try:
+            self._compile(core, options, build_dir, build_jobs)
+            try:
+                os.rename(build_dir, model_dir)
+            except OSError:
+                pass  # outro processo publicou o mesmo modelo primeiro
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        return binary
+
+    def _compile(
+        self,
+        core: SimCore,
+        options: HarnessOptions,
+        build_dir: str,
+        build_jobs: int,
+    ) -> None:
+        defines_path = os.path.join(build_dir, 'processor_ci_defines.vh')
+        with open(defines_path, 'w') as f:
+            f.write(simulation_defines(options.board))
+        clock_mhz = options.clock_mhz or board_clock_mhz(options.board)
+        template = get_template_env().get_template(HARNESS_TEMPLATE)
+        with open(os.path.join(build_dir, 'sim_main.cpp'), 'w') as f:
+            f.write(
+                template.render(
+                    top_module=core.top_module,
+                    half_period_ps=max(1, round(1e6 / clock_mhz / 2)),
+                    **asdict(options),
+                )
+            )
+
+        command = [
+            verilator_bin(),
+            '--cc',
+            '--exe',
+            '--build',
+            '-j',
+            str(build_jobs),
+            '-O3',
+            '--x-assign',
+            'fast',
+            '--x-initial',
+            'fast',
+            '--noassert',
+            '-Wno-fatal',
+            '-Wno-lint',
+            '-Wno-style',
+            '--top-module',
+            core.top_module,
+            '-Mdir',
+            'obj_dir',
+            '-o',
+            MODEL_BINARY,
+            f'-I{build_dir}',
+            *[f'-I{d}' for d in core.include_dirs],
+            *(['--trace'] if options.trace else []),
+            *options.verilator_args,
+            *core.files,
+            'sim_main.cpp',
+        ]
+        log_path = os.path.join(build_dir, 'build.log')
+        with open(log_path, 'w') as log:
+            result = subprocess.run(
+                command,
+                cwd=build_dir,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                check=False,
+            )
+        built = os.path.join(build_dir, 'obj_dir', MODEL_BINARY)
+        if result.returncode != 0 or not os.path.exists(built):
+            with open(log_path, 'r', errors='replace') as log:
+                tail = ''.join(log.readlines()[-20:])
+            raise RuntimeError(
+                f'Verilator failed for {core.core_id} '
+                f'(exit {result.returncode}):\n{tail}'
+            )
+
+        # Só o executável e o log ficam no cache; os objetos são grandes
+        os.replace(built, os.path.join(build_dir, MODEL_BINARY))
+        shutil.rmtree(os.path.join(build_dir, 'obj_dir'))
+
+
+def build_model(
+    cache_root: str,
+    core: SimCore,
+    options: HarnessOptions,
+    build_jobs: int = 0,
+) -> str:
+    """Process pool target: :meth:`ModelCache.build`."""
+    return ModelCache(cache_root).build(core, options, build_jobs)
+
+
+# -------------------------
+# Execução
+# -------------------------
+@dataclass
+class SimResult:
+    core_id: str
+    benchmark: str
+    iterations: int = 1
+    scale: float = 1.0
+    cycles: Optional[int] = None
+    wall_s: float = 0.0
+    error: Optional[str] = None
+    activity: Optional[str] = None  # SAIF da run
+
+    @property
+    def perf_per_mhz(self) -> Optional[float]:
+        """Iterations per second per MHz, divided by the benchmark scale."""
+        if not self.cycles:
+            return None
+        return self.iterations * 1e6 / self.cycles / self.scale
+
+    def execution_time_s(self, fmax_mhz: float) -> Optional[float]:
+        if not self.cycles or fmax_mhz <= 0:
+            return None
+        return self.cycles / (fmax_mhz * 1e6)
+
+    def score(self, fmax_mhz: float) -> Optional[float]:
+        """Benchmark score (e.g. CoreMark, DMIPS) at ``fmax_mhz``."""
+        perf = self.perf_per_mhz
+        return perf * fmax_mhz if perf is not None else None
+
+
+class _ActivityStream:
+    """Converts the VCD a model writes into ``fifo`` to a SAIF, as it runs."""
+
+    def __init__(self, fifo: str, saif_path: str, design: str) -> None:
+        self.fifo = fifo
+        self.saif_path = saif_path
+        self.tmp_path = f'{saif_path}.{uuid.uuid4().hex}.tmp'
+        self.design = design
+        self.error: Optional[str] = None
+        os.mkfifo(fifo)
+        self.thread = threading.Thread(target=self._convert, daemon=True)
+        self.thread.start()
+
+    def _convert(self) -> None:
+        try:
+            with open(self.fifo, 'r') as vcd, open(self.tmp_path, 'w') as f:
+                vcd_to_saif(vcd, f, self.design)
+        except (OSError, ValueError, IndexError) as e:
+            self.error = f'activity: {e}'
+
+    def close(self, keep: bool) -> Optional[str]:
+        """Waits for the conversion; returns the SAIF path if kept."""
+        try:
+            # Libera o leitor se o modelo terminou sem abrir o VCD
+            os.close(os.open(self.fifo, os.O_WRONLY | os.O_NONBLOCK))
+        except OSError:
+            pass
+        self.thread.join()
+        if keep and self.error is None and os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.saif_path)
+            return self.saif_path
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        return None
+
+
+def run_model(
+    binary: str,
+    core_id: str,
+    benchmark: Benchmark,
+    activity: Optional[str] = None,
+    design: str = '',
+) -> SimResult:
+    """Runs ``benchmark`` on a model; never raises (pool target).
+
+    With ``activity``, the model (built with ``trace``) writes its VCD to
+    a named pipe, summarized on the fly into the SAIF file ``activity``.
+    """
+    result = SimResult(
+        core_id, benchmark.name, benchmark.iterations, benchmark.scale
+    )
+    program = os.path.abspath(benchmark.program_for(core_id))
+    if not os.path.isfile(program):
+        result.error = f'Program not found: {program}'
+        return result
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='processor_ci_sim_') as rundir:
+        os.symlink(program, os.path.join(rundir, PROGRAM_FILE))
+        command = [binary, str(benchmark.max_cycles)]
+        stream: Optional[_ActivityStream] = None
+        if activity:
+            fifo = os.path.join(rundir, 'activity.vcd')
+            stream = _ActivityStream(fifo, activity, design)
+            command.append(fifo)
+        try:
+            process = subprocess.run(
+                command,
+                cwd=rundir,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except OSError as e:
+            result.error = str(e)
+            if stream is not None:
+                stream.close(keep=False)
+            return result
+
+        matches = _CYCLES_RE.findall(process.stdout)
+        if not matches:
+            result.error = (
+                f'Model exited with {process.returncode}: '
+                f'{process.stderr.strip()[-500:]}'
+            )
+        elif matches[-1][1] != '1':
+            result.error = f'Did not finish in {benchmark.max_cycles} cycles'
+        else:
+            result.cycles = int(matches[-1][0])
+        if stream is not None:
+            result.activity = stream.close(keep=result.error is None)
+            if result.error is None and stream.error:
+                result.error = stream.error
+    result.wall_s = time.perf_counter() - started
+    return result
+
+
+def run_suite(
+    cores: List[SimCore],
+    benchmarks: List[Benchmark],
+    cache_root: str,
+    options: HarnessOptions,
+    workers: int = 1,
+    activity_dir: Optional[str] = None,
+) -> List[SimResult]:
+    """Builds the model of every core and runs every benchmark on it.
+
+    Builds and runs share one process pool; the benchmarks of a core start
+    as soon as its model is ready. With ``activity_dir``, the models are
+    traced and each run leaves ``<core>_<benchmark>.saif`` there.
+    """
+    workers = max(1, workers)
+    if activity_dir:
+        options = replace(options, trace=True)
+        os.makedirs(activity_dir, exist_ok=True)
+    build_jobs = max(1, (os.cpu_count() or 1) // workers)
+    results: List[SimResult] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        builds = {
+            pool.submit(
+                build_model, cache_root, core, options, build_jobs
+            ): core
+            for core in cores
+        }
+        runs = []
+        for future in as_completed(builds):
+            core = builds[future]
+            try:
+                binary = future.result()
+            except (OSError, RuntimeError, ValueError) as e:
+                print_red(f'Model of {core.core_id} failed: {e}')
+                results.extend(
+                    SimResult(
+                        core.core_id,
+                        b.name,
+                        b.iterations,
+                        b.scale,
+                        error=f'build failed: {e}',
+                    )
+                    for b in benchmarks
+                )
+                continue
+            print_blue(f'Model of {core.core_id} ready: {binary}')
+            runs.extend(
+                pool.submit(
+                    run_model,
+                    binary,
+                    core.core_id,
+                    benchmark,
+                    _activity_path(activity_dir, core.core_id, benchmark),
+                    core.top_module,
+                )
+                for benchmark in benchmarks
+            )
+
+        for future in as_completed(runs):
+            result = future.result()
+            if result.error:
+                print_red(
+                    f'{result.core_id}/{result.benchmark}: {result.error}'
+                )
+            else:
+                print_green(
+                    f'{result.core_id}/{result.benchmark}: '
+                    f'{result.cycles} cycles in {result.wall_s:.1f}s'
+                )
+            results.append(result)
+
+    return sorted(results, key=lambda r: (r.core_id, r.benchmark))
+
+
+def _activity_path(
+    activity_dir: Optional[str], core_id: str, benchmark: Benchmark
+) -> Optional[str]:
+    if not activity_dir:
+        return None
+    return os.path.abspath(
+        os.path.join(activity_dir, f'{core_id}_{benchmark.name}.saif')
+    )
+
+
+# -------------------------
+# Fmax dos alvos
+# -------------------------
+def stored_fmax(
+    db: ResultsDB, core_id: str, technologies: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """Latest implemented Fmax of ``core_id`` per target.
+
+    Synthesis-only and predicted runs are skipped: their Fmax is an
+    estimate, not what the core reaches after place and route.
+    """
+    fmax: Dict[str, float] = {}
+    if technologies:
+        records = [
+            r for t in technologies for r in db.history(core_id, t)
+        ]
+    else:
+        records = db.history(core_id, limit=1000)
+
+    for record in records:
+        technology = record['job'].get('technology')
+        if technology in fmax or not record.get('metrics'):
+            continue
+        if record['job'].get('profile') == 'synth':
+            continue
+        metrics = FlowMetrics.from_dict(record['metrics'])
+        if metrics.predicted or metrics.fmax_mhz is None:
+            continue
+        fmax[technology] = metrics.fmax_mhz
+    return fmax
+
+
+def summarize(
+    results: List[SimResult], fmax: Dict[str, Dict[str, float]]
+) -> List[Dict[str, Any]]:
+    """One row per result and target, ready to print or dump as JSON."""
+    rows = []
+    for result in results:
+        row: Dict[str, Any] = {
+            'core_id': result.core_id,
+            'benchmark': result.benchmark,
+            'cycles': result.cycles,
+            'perf_per_mhz': result.perf_per_mhz,
+            'error': result.error,
+            'activity': result.activity,
+            'targets': {},
+        }
+        for target, mhz in fmax.get(result.core_id, {}).items():
+            row['targets'][target] = {
+                'fmax_mhz': mhz,
+                'execution_time_s': result.execution_time_s(mhz),
+                'score': result.score(mhz),
+            }
+        rows.append(row)
+    return rows
+
+
+def core_ids(config_path: str, selected: List[str]) -> List[str]:
+    """The selected cores, or every core configured in ``config_path``."""
+    if selected:
+        return list(dict.fromkeys(selected))
+    return list_cores(config_path)
@@ -0,0 +1,179 @@
+"""Multi-corner static timing analysis of finished ORFS runs.
+
+ORFS signs off timing at the platform's default corner only. The corners
+listed under ``sta_corners`` in :data:`core.pdk_defines.DEFINES_BY_PDK`
+map a corner name to liberty globs inside the ORFS platform directory;
+:func:`run_corners` runs one OpenROAD STA per corner, in parallel, on the
+final database of the run (no placement or routing is redone) and writes
+one ``report_clock_min_period`` report per corner. The worst corner of
+each clock is what :func:`worst_case_clocks` reports as its Fmax.
+
+A report only appears once its STA succeeded; a corner that fails makes
+:func:`run_corners` raise, so the slow corner never silently drops out
+of the worst case.
+"""
+import glob
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from jinja2 import Environment
+
+from core import ToolError, write_template_to_file
+from core.log import print_blue, print_red, print_yellow
+from core.metrics import ClockMetrics
+from core.pdk_defines import DEFINES_BY_PDK
+from core.reports import parse_orfs_finish
+
+
+def openroad_executable(orfs_path: str) -> str:
+    """OpenROAD binary of an ORFS install; ``OPENROAD_EXE`` overrides it."""
+    return os.getenv(
+        'OPENROAD_EXE',
+        os.path.join(orfs_path, 'tools/install/OpenROAD/bin/openroad'),
+    )
+
+
+def corner_liberty_files(
+    technology: str, platform_dir: str
+) -> Dict[str, List[str]]:
+    """Liberty files of each STA corner of a PDK.
+
+    Corners whose libraries are not installed are left out with a warning,
+    so partially installed platforms still get the corners they have.
+    """
+    defines = DEFINES_BY_PDK[technology]
+    extra_libs = (
+        [
+            os.path.join(platform_dir, lib)
+            for lib in defines.get('additional_lib_files', [])
+        ]
+        if defines.get('additional_libs')
+        else []
+    )
+
+    corners: Dict[str, List[str]] = {}
+    for corner, patterns in defines.get('sta_corners', {}).items():
+        libs = sorted(
+            path
+            for pattern in patterns
+            for path in glob.glob(os.path.join(platform_dir, pattern))
+        )
+        if libs:
+            corners[corner] = libs + extra_libs
+        else:
+            print_yellow(f"No liberty files for corner '{corner}'; skipped")
+    return corners
+
+
+def run_corners(
+    env: Environment,
+    openroad: str,
+    platform_dir: str,
+    results_dir: str,
+    report_dir: str,
+    corners: Dict[str, List[str]],
+    jobs: Optional[int] = None,
+) -> Dict[str, str]:
+    """Runs STA for every corner in parallel.
+
+    Args:
+        env (Environment): Template environment.
+        openroad (str): OpenROAD executable.
+        platform_dir (str): ORFS platform directory (for ``setRC.tcl``).
+        results_dir (str): ORFS results of the run (``6_final.odb``, ...).
+        report_dir (str): Where ``sta_<corner>.rpt`` reports are written.
+        corners (Dict[str, List[str]]): Liberty files per corner.
+        jobs (Optional[int]): Concurrent STA runs; defaults to one per
+            corner, bounded by the CPU count.
+
+    Returns:
+        Dict[str, str]: Report path of each corner.
+
+    Raises:
+        FileNotFoundError: If the run has no final database.
+        ToolError: If the STA of any corner fails; its output is left in
+            ``sta_<corner>.rpt.failed``.
+    """
+    odb_file = os.path.join(results_dir, '6_final.odb')
+    if not os.path.exists(odb_file):
+        raise FileNotFoundError(
+            f'{odb_file} not found; cannot run multi-corner STA'
+        )
+
+    spef_file = os.path.join(results_dir, '6_final.spef')
+    os.makedirs(report_dir, exist_ok=True)
+
+    def run(corner: str) -> Optional[str]:
+        script = os.path.join(report_dir, f'sta_{corner}.tcl')
+        report = os.path.join(report_dir, f'sta_{corner}.rpt')
+        write_template_to_file(
+            env,
+            'openroad_sta.j2',
+            {
+                'corner': corner,
+                'liberty_files': corners[corner],
+                'odb_file': odb_file,
+                'sdc_file': os.path.join(results_dir, '6_final.sdc'),
+                'spef_file': spef_file if os.path.exists(spef_file) else '',
+                'platform_dir': platform_dir,
+            },
+            script,
+        )
+        # Só vira relatório se o STA terminar bem
+        tmp_report = f'{report}.tmp'
+        with open(tmp_report, 'w') as out:
+            result = subprocess.run(
+                [openroad, '-no_init', '-exit', script],
+                stdout=out,
+                stderr=subprocess.STDOUT,
+                check=False,
+            )
+        if result.returncode != 0:
+            os.replace(tmp_report, f'{report}.failed')
+            print_red(
+                f"STA of corner '{corner}' failed, see {report}.failed"
+            )
+            return None
+        os.replace(tmp_report, report)
+        if os.path.exists(f'{report}.failed'):
+            os.remove(f'{report}.failed')
+        return report
+
+    if not corners:
+        return {}
+    print_blue(f"Running STA for corners: {', '.join(corners)}")
+    workers = jobs or min(len(corners), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        reports = dict(zip(corners, pool.map(run, corners)))
+    failed = [corner for corner, path in reports.items() if path is None]
+    if failed:
+        raise ToolError(f"STA failed for corners: {', '.join(failed)}")
+    return {corner: path for corner, path in reports.items() if path}
+
+
+def parse_corner_reports(
+    report_dir: str, corners: List[str]
+) -> Dict[str, Dict[str, ClockMetrics]]:
+    """Clock metrics of each corner with a report in ``report_dir``."""
+    results: Dict[str, Dict[str, ClockMetrics]] = {}
+    for corner in corners:
+        clocks = parse_orfs_finish(
+            os.path.join(report_dir, f'sta_{corner}.rpt')
+        )
+        if clocks:
+            results[corner] = clocks
+    return results
+
+
+def worst_case_clocks(
+    corners: Dict[str, Dict[str, ClockMetrics]]
+) -> Dict[str, ClockMetrics]:
+    """Lowest Fmax of each clock over all corners."""
+    worst: Dict[str, ClockMetrics] = {}
+    for clocks in corners.values():
+        for clk, clock in clocks.items():
+            if clk not in worst or clock.fmax_mhz < worst[clk].fmax_mhz:
+                worst[clk] = clock
+    return worst
@@ -0,0 +1,339 @@
+"""Stages of an implementation flow, run as a DAG with cached results.
+
+Each flow declares its stages (see
+:meth:`core.ImplementationFlow.stages`) with the files they read and
+write, using the names ``generate``, ``synth``, ``place``, ``route``,
+``bitgen``, ``report`` and ``clean`` where they apply (a tool that cannot
+be stopped in between covers several of them, e.g. nextpnr's ``route``
+also places). :class:`StageGraph` then runs them in dependency order, the
+independent ones concurrently, so report parsing overlaps bitstream
+packing and ORFS's corner STA overlaps its power analysis.
+
+A stage is skipped when its fingerprint (its command, the content of its
+inputs and the fingerprints of its dependencies) matches the one recorded
+in :data:`STATE_FILE` by a previous run and its outputs still exist. A
+job run again in the same work directory therefore resumes after the
+last stage that completed, and only redoes what an edit invalidated.
+
+A stage that runs starts by deleting its declared outputs, so results
+of an older run never pass for its own, and its fingerprint is only
+recorded once it succeeded (tool stages raise
+:class:`core.ToolError` when the tool fails) and produced all of them.
+A stage that returns without producing them fails with
+:class:`StageError`, so the stages depending on it never run.
+
+Stages that share a ``batch`` callable and form a chain (each depending
+only on the one before) are run by a single call of it when several of
+them need to run, so a tool that resumes from checkpoints is still only
+started once for everything an edit invalidated.
+"""
+import hashlib
+import json
+import os
+import time
+from contextlib import ExitStack
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from core.log import print_blue, print_red
+from core.scratch import Scratch
+from core.telemetry import cache_event
+from core.telemetry import stage as time_stage
+
+STATE_FILE = '.flow_stages.json'
+
+
+class StageError(RuntimeError):
+    """A stage completed without producing its declared outputs."""
+
+
+@dataclass
+class Stage:
+    """One step of a flow.
+
+    Attributes:
+        name (str): Unique name within the flow.
+        action (Callable[[], None]): Runs the step in the work directory.
+        deps (List[str]): Stages that must complete first.
+        inputs (List[str]): Files read besides the outputs of ``deps``
+            (scripts, sources, constraints).
+        outputs (List[str]): Files the step produces; a stage is only
+            reused when all of them exist.
+        key (str): Anything else the result depends on, e.g. the command.
+        cache (bool): Whether the result can be reused at all; cheap
+            steps, or steps whose result is not in their outputs, are
+            always run.
+        tool (bool): Runs an EDA tool, so it needs the flow's scratch
+            directories (see :mod:`core.scratch`).
+        batch (Optional[Callable[[List[str]], None]]): Runs a chain of
+            stages with the same ``batch`` at once, given their names in
+            order; used instead of ``action`` when more than one of them
+            has to run.
+    """
+
+    name: str
+    action: Callable[[], None]
+    deps: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    key: str = ''
+    cache: bool = True
+    tool: bool = True
+    batch: Optional[Callable[[List[str]], None]] = None
+
+
+def _digest(path: str) -> str:
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return 'missing'
+    return digest.hexdigest()
+
+
+class StageGraph:
+    """Stages of one flow run, checked for unknown deps and cycles."""
+
+    def __init__(self, stages: List[Stage]) -> None:
+        self.stages: Dict[str, Stage] = {}
+        for node in stages:
+            if node.name in self.stages:
+                raise ValueError(f"Duplicate stage '{node.name}'")
+            self.stages[node.name] = node
+        for node in stages:
+            unknown = set(node.deps) - set(self.stages)
+            if unknown:
+                raise ValueError(
+                    f"Stage '{node.name}' depends on unknown stages: "
+                    f'{sorted(unknown)}'
+                )
+        self.order: List[str] = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Stage cycle through '{name}'")
+            state[name] = 'visiting'
+            for dep in self.stages[name].deps:
+                visit(dep)
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def fingerprint(self, node: Stage, fingerprints: Dict[str, str]) -> str:
+        payload = {
+            'name': node.name,
+            'key': node.key,
+            'inputs': sorted(
+                f'{path} {_digest(path)}' for path in set(node.inputs)
+            ),
+            'deps': sorted(fingerprints[dep] for dep in node.deps),
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+
+    def run(
+        self,
+        jobs: int = 1,
+        scratch: Optional[Scratch] = None,
+        state_file: str = STATE_FILE,
+    ) -> Dict[str, str]:
+        """Runs every stage not reusable from a previous run.
+
+        ``scratch`` is entered before the first tool stage starts and
+        left as soon as no tool stage remains, so the stages after the
+        tools see their results back in the work directory.
+
+        Returns:
+            Dict[str, str]: ``done`` or ``cached`` per stage.
+
+        Raises:
+            Exception: The first error raised by a stage, once the stages
+                already running have finished.
+        """
+        jobs = max(1, jobs)
+        state = _load_state(state_file)
+        fingerprints: Dict[str, str] = {}
+        status: Dict[str, str] = {}
+        pending: List[str] = list(self.order)
+        running: Dict[Future, List[str]] = {}
+        error: Optional[BaseException] = None
+        scope = ExitStack()
+        in_scratch = False
+
+        def needs_scratch() -> bool:
+            names = pending + [
+                name for chain in running.values() for name in chain
+            ]
+            return any(self.stages[name].tool for name in names)
+
+        with scope, ThreadPoolExecutor(max_workers=jobs) as pool:
+            while (pending and error is None) or running:
+                if in_scratch and not needs_scratch():
+                    scope.close()
+                    in_scratch = False
+
+                for name in list(pending):
+                    if error is not None or len(running) >= jobs:
+                        break
+                    node = self.stages[name]
+                    if any(dep not in status for dep in node.deps):
+                        continue
+                    pending.remove(name)
+                    fingerprints[name] = self.fingerprint(
+                        node, fingerprints
+                    )
+                    if self._reusable(node, fingerprints[name], state):
+                        cache_event('stage', hit=True)
+                        print_blue(f'Stage {name}: reused')
+                        status[name] = 'cached'
+                        continue
+                    if node.cache:
+                        cache_event('stage', hit=False)
+                    chain = [name]
+                    if node.batch is not None:
+                        chain += self._batched(
+                            node, fingerprints, state, pending
+                        )
+                        pending[:] = [n for n in pending if n not in chain]
+                    if node.tool and scratch is not None and not in_scratch:
+                        scope.enter_context(scratch)
+                        in_scratch = True
+                    stale = [n for n in chain if state.pop(n, None)]
+                    if stale:
+                        # Se for interrompido, o resultado antigo não vale
+                        _save_state(state_file, state)
+                    nodes = [self.stages[n] for n in chain]
+                    running[pool.submit(self._run_stage, nodes)] = chain
+
+                if not running:
+                    # Estágios em cache liberaram outros: reavalia
+                    continue
+
+                done, _ = wait_futures(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chain = running.pop(future)
+                    try:
+                        duration = future.result()
+                    except Exception as e:  # pylint: disable=broad-except
+                        print_red(f"Stage {'+'.join(chain)} failed: {e}")
+                        error = error or e
+                        continue
+                    for name in chain:
+                        node = self.stages[name]
+                        missing = [
+                            path
+                            for path in node.outputs
+                            if not os.path.exists(path)
+                        ]
+                        if missing:
+                            message = (
+                                f'Stage {name} did not produce '
+                                f"{', '.join(missing)}"
+                            )
+                            print_red(message)
+                            error = error or StageError(message)
+                            break
+                        status[name] = 'done'
+                        if node.cache and node.outputs:
+                            state[name] = {
+                                'fingerprint': fingerprints[name],
+                                'duration': round(duration, 3),
+                                'outputs': node.outputs,
+                            }
+                            _save_state(state_file, state)
+
+        if error is not None:
+            raise error
+        return status
+
+    @staticmethod
+    def _reusable(
+        node: Stage, fingerprint: str, state: Dict[str, Dict[str, Any]]
+    ) -> bool:
+        if not (node.cache and node.outputs):
+            return False
+        previous = state.get(node.name)
+        return (
+            previous is not None
+            and previous.get('fingerprint') == fingerprint
+            and all(os.path.exists(path) for path in node.outputs)
+        )
+
+    def _batched(
+        self,
+        node: Stage,
+        fingerprints: Dict[str, str],
+        state: Dict[str, Dict[str, Any]],
+        pending: List[str],
+    ) -> List[str]:
+        """Pending stages after ``node`` that its batch can run with it.
+
+        The chain follows the only stage of the batch that depends on the
+        last one taken and on nothing else, while it is not reusable.
+        """
+        chain: List[str] = []
+        last = node.name
+        while True:
+            followers = [
+                self.stages[name]
+                for name in pending
+                if self.stages[name].deps == [last]
+                and self.stages[name].batch == node.batch
+            ]
+            if len(followers) != 1:
+                return chain
+            follower = followers[0]
+            fingerprints[follower.name] = self.fingerprint(
+                follower, fingerprints
+            )
+            if self._reusable(follower, fingerprints[follower.name], state):
+                return chain
+            if follower.cache:
+                cache_event('stage', hit=False)
+            chain.append(follower.name)
+            last = follower.name
+
+    @staticmethod
+    def _run_stage(nodes: List[Stage]) -> float:
+        started = time.perf_counter()
+        for node in nodes:
+            for path in node.outputs:
+                if os.path.isfile(path) or os.path.islink(path):
+                    os.remove(path)
+        names = [node.name for node in nodes]
+        with time_stage('+'.join(names)):
+            if len(nodes) == 1:
+                nodes[0].action()
+            else:
+                nodes[0].batch(names)
+        return time.perf_counter() - started
+
+
+def _load_state(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _save_state(path: str, state: Dict[str, Dict[str, Any]]) -> None:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
@@ -0,0 +1,266 @@
+"""Content-addressed local staging of a job's RTL sources.
+
+A :class:`SourceStore` keeps every staged file once, under the SHA-256 of
+its content, and builds snapshots: read-only directory trees that mirror
+the absolute paths of a job's files and include directories, made of
+hardlinks to the stored objects. Jobs staged with :func:`stage_job` read
+their sources from the snapshot instead of the shared checkout, so
+
+* each distinct file is read over the network once per store, not once
+  per job (unchanged files are recognized by their stat information);
+* two jobs with the same sources share one snapshot, and snapshots that
+  differ in a few files share the rest through hardlinks;
+* a job keeps seeing the same sources even if the checkout changes while
+  a batch is running, and its :attr:`Job.job_id` changes with the content.
+
+Layout of the store::
+
+    objects/ab/abcdef...   file content, read-only
+    stat/<sha1 of path>    "size mtime_ns inode digest" of a source file
+    snapshots/<id>/...     mirrored tree of hardlinks into objects/
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from core.executor import JobGraph
+from core.job import Job, run_job
+from core.metrics import FlowMetrics
+
+STAGE_DIR_ENV = 'PROCESSOR_CI_STAGE_DIR'
+
+# Arquivos copiados das pastas de include (e headers vizinhos das fontes)
+HEADER_EXTENSIONS = ('.vh', '.svh', '.h', '.inc', '.v', '.sv')
+MEMORY_EXTENSIONS = ('.hex', '.mem', '.bin', '.dat')
+
+
+@dataclass
+class Snapshot:
+    snapshot_id: str
+    root: str
+
+    def path(self, source: str) -> str:
+        """Location of an absolute source path inside the snapshot."""
+        return os.path.join(self.root, source.lstrip(os.sep))
+
+
+class SourceStore:
+    """Deduplicated store of source files and snapshots under ``root``."""
+
+    def __init__(self, root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        for subdir in ('objects', 'stat', 'snapshots'):
+            os.makedirs(os.path.join(self.root, subdir), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def _stat_path(self, source: str) -> str:
+        key = hashlib.sha1(source.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, 'stat', key)
+
+    def ingest(self, source: str) -> str:
+        """Stores ``source`` if needed and returns its content digest."""
+        st = os.stat(source)
+        signature = f'{st.st_size} {st.st_mtime_ns} {st.st_ino}'
+        stat_path = self._stat_path(source)
+        try:
+            with open(stat_path, 'r') as f:
+                cached = f.read().rsplit(' ', 1)
+            if cached[0] == signature and os.path.exists(
+                self._object_path(cached[1])
+            ):
+                return cached[1]
+        except (OSError, IndexError):
+            pass
+
+        # Lê a fonte uma única vez: calcula o hash enquanto copia
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.ingest-')
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(source, 'rb') as src:
+                for chunk in iter(lambda: src.read(1 << 20), b''):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            object_path = self._object_path(digest.hexdigest())
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            if not os.path.exists(object_path):
+                os.chmod(tmp_path, 0o444)
+                os.replace(tmp_path, object_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        stat_tmp = f'{stat_path}.{uuid.uuid4().hex}'
+        with open(stat_tmp, 'w') as f:
+            f.write(f'{signature} {digest.hexdigest()}')
+        os.replace(stat_tmp, stat_path)
+        return digest.hexdigest()
+
+    def snapshot(self, sources: List[str]) -> Snapshot:
+        """Snapshot holding ``sources`` (absolute paths) at their content."""
+        contents: Dict[str, str] = {
+            source: self.ingest(source) for source in sorted(set(sources))
+        }
+        snapshot_id = hashlib.sha256(
+            json.dumps(contents, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        snapshot = Snapshot(
+            snapshot_id, os.path.join(self.root, 'snapshots', snapshot_id)
+        )
+        if os.path.isdir(snapshot.root):
+            return snapshot
+
+        tmp_root = os.path.join(
+            self.root, 'snapshots', f'.tmp-{uuid.uuid4().hex}'
+        )
+        building = Snapshot(snapshot_id, tmp_root)
+        for source, digest in contents.items():
+            target = building.path(source)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.link(self._object_path(digest), target)
+            except OSError:
+                shutil.copy2(self._object_path(digest), target)
+
+        try:
+            os.rename(tmp_root, snapshot.root)
+        except OSError:
+            # Outro processo publicou o mesmo snapshot primeiro
+            shutil.rmtree(tmp_root, ignore_errors=True)
+        return snapshot
+
+
+def _dir_sources(directory: str, recursive: bool) -> List[str]:
+    extensions = HEADER_EXTENSIONS + MEMORY_EXTENSIONS
+    sources: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        if not recursive:
+            dirnames.clear()
+        sources.extend(
+            os.path.join(dirpath, name)
+            for name in filenames
+            if name.lower().endswith(extensions)
+        )
+    return sources
+
+
+def job_sources(job: Job) -> Tuple[List[str], List[str]]:
+    """Absolute files and include dirs of a job, plus what they pull in.
+
+    Besides the listed files, the headers and memory images next to them
+    and everything under the include directories are staged, since
+    ```include`` and ``$readmemh`` may refer to them by relative path.
+    """
+    return source_closure(job.files, job.include_dirs)
+
+
+def source_closure(
+    files: List[str], include_dirs: List[str]
+) -> Tuple[List[str], List[str]]:
+    """Absolute ``files`` and every source they may pull in.
+
+    See :func:`job_sources`; used directly by code that resolves sources
+    without a :class:`Job`, such as simulation models.
+    """
+    files = [os.path.abspath(f) for f in files]
+    include_dirs = [os.path.abspath(d) for d in include_dirs]
+
+    missing = [f for f in files if not os.path.isfile(f)]
+    if missing:
+        raise FileNotFoundError(f'Source files not found: {missing}')
+
+    sources = list(files)
+    for directory in sorted({os.path.dirname(f) for f in files}):
+        sources.extend(
+            path
+            for path in _dir_sources(directory, recursive=False)
+            if not path.lower().endswith(('.v', '.sv'))
+        )
+    for directory in include_dirs:
+        if os.path.isdir(directory):
+            sources.extend(_dir_sources(directory, recursive=True))
+    return files, sources
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sources_digest(job: Job) -> Optional[str]:
+    """Hash of the content of everything a job reads, or None.
+
+    Covers the sources with what they pull in (see :func:`job_sources`),
+    a custom constraint file and the activity file. :attr:`Job.job_id`
+    only hashes paths, so this is what tells an edited core from the
+    results of its previous run. None if a source cannot be read.
+    """
+    try:
+        _, sources = job_sources(job)
+        extra = [
+            path
+            for path in (
+                job.constraint if job.constraint != 'default' else None,
+                job.activity,
+            )
+            if path
+        ]
+        digests = sorted(
+            f'{path} {_file_digest(path)}'
+            for path in set(sources) | set(extra)
+        )
+    except OSError:
+        return None
+    payload = '\n'.join(digests).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def stage_job(job: Job, store: SourceStore) -> Job:
+    """Copy of ``job`` whose sources point into a snapshot of ``store``."""
+    files, sources = job_sources(job)
+    activity = os.path.abspath(job.activity) if job.activity else None
+    snapshot = store.snapshot(sources + ([activity] if activity else []))
+    return replace(
+        job,
+        files=[snapshot.path(f) for f in files],
+        include_dirs=[
+            snapshot.path(os.path.abspath(d)) for d in job.include_dirs
+        ],
+        activity=snapshot.path(activity) if activity else None,
+    )
+
+
+def stage_graph(graph: JobGraph, store: SourceStore) -> JobGraph:
+    """Stages every job of ``graph``, keeping the dependencies."""
+    staged = JobGraph()
+    new_ids = {
+        job_id: staged.add(stage_job(job, store))
+        for job_id, job in graph.jobs.items()
+    }
+    for job_id, deps in graph.deps.items():
+        staged.deps[new_ids[job_id]].update(new_ids[d] for d in deps)
+    return staged
+
+
+class StagedRunner:
+    """Job runner that stages the sources into a local store first.
+
+    Picklable, so it can be handed to worker processes.
+    """
+
+    def __init__(self, store_root: str) -> None:
+        self.store_root = store_root
+
+    def __call__(
+        self, job: Job, workdir: Optional[str] = None
+    ) -> Optional[FlowMetrics]:
+        return run_job(stage_job(job, SourceStore(self.store_root)), workdir)
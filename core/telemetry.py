@@ -0,0 +1,401 @@
+"""Live metrics of job execution: OpenMetrics export and progress lines.
+
+A :class:`Telemetry` is fed by the :class:`core.executor.Executor` (or a
+queue :class:`core.work_queue.Worker`) as jobs are queued, started and
+finished, and publishes
+
+* queue depth, running and completed jobs per toolchain;
+* slot utilization: busy slots now and busy slot-seconds so far;
+* time spent per stage of the flows, per toolchain;
+* hits and misses of the caches (previous results, front end).
+
+as OpenMetrics text, written atomically to a file (e.g. for the
+node_exporter textfile collector) and/or served on a local HTTP port, and
+prints a compact progress line every few seconds.
+
+Stage times and cache events happen inside the job processes. There,
+:func:`stage` and :func:`cache_event` accumulate them into a per-process
+probe; :func:`core.job.execute_job` resets the probe before each job and
+returns it in the job record (``stages`` and ``cache``), from which the
+scheduler side takes them.
+"""
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.log import print_blue
+
+DEFAULT_PROGRESS_INTERVAL = 10.0
+METRIC_PREFIX = 'processor_ci'
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Sondagem do processo do job: tempos por etapa e eventos de cache
+_PROBE: Dict[str, Dict[str, Any]] = {'stages': {}, 'cache': {}}
+
+
+# -------------------------
+# Lado do job
+# -------------------------
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Adds the time spent in the block to stage ``name`` of the job."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages = _PROBE['stages']
+        stages[name] = stages.get(name, 0.0) + (
+            time.perf_counter() - started
+        )
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    """Records a hit or miss of ``cache`` in the current job."""
+    hits, misses = _PROBE['cache'].get(cache, (0, 0))
+    _PROBE['cache'][cache] = (hits + 1, misses) if hit else (hits, misses + 1)
+
+
+def reset_probe() -> None:
+    _PROBE['stages'] = {}
+    _PROBE['cache'] = {}
+
+
+def collect_probe() -> Dict[str, Any]:
+    """Stage times and cache events since the last :func:`reset_probe`."""
+    return {
+        'stages': dict(_PROBE['stages']),
+        'cache': {k: list(v) for k, v in _PROBE['cache'].items()},
+    }
+
+
+# -------------------------
+# Lado do escalonador
+# -------------------------
+def _labels(**labels: str) -> str:
+    if not labels:
+        return ''
+    body = ','.join(
+        f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())
+    )
+    return f'{{{body}}}'
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
+
+
+class Telemetry:
+    """Scheduler-side metrics of a batch of jobs.
+
+    Args:
+        slots (int): Jobs that can run at the same time.
+        metrics_file (Optional[str]): OpenMetrics file rewritten on every
+            update.
+        port (Optional[int]): Serve the metrics on
+            ``http://127.0.0.1:<port>/metrics``.
+        progress_interval (float): Seconds between progress lines; 0
+            disables them.
+        labels (Optional[Dict[str, str]]): Labels added to every sample,
+            e.g. the worker name.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        metrics_file: Optional[str] = None,
+        port: Optional[int] = None,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.slots: int = max(1, slots)
+        self.metrics_file = metrics_file
+        self.progress_interval = progress_interval
+        self.labels: Dict[str, str] = dict(labels or {})
+        self.started: float = time.time()
+
+        self.total: int = 0
+        self.queued: Dict[str, int] = {}
+        self.running: Dict[str, int] = {}
+        self.completed: Dict[Tuple[str, str], int] = {}
+        self.stage_seconds: Dict[Tuple[str, str], float] = {}
+        self.stage_count: Dict[Tuple[str, str], int] = {}
+        self.cache: Dict[str, List[int]] = {}
+        self.busy_seconds: float = 0.0
+
+        self._lock = threading.Lock()
+        self._last_change: float = self.started
+        self._last_progress: float = 0.0
+        self._last_line: str = ''
+        self._server: Any = None
+        if port is not None:
+            self._serve(port)
+
+    @property
+    def refresh_interval(self) -> float:
+        """Seconds between updates while the scheduler waits for jobs."""
+        return self.progress_interval or DEFAULT_PROGRESS_INTERVAL
+
+    # --- eventos ---
+    def _advance(self, now: float) -> None:
+        """Integrates the busy slots up to ``now`` (lock held)."""
+        self.busy_seconds += sum(self.running.values()) * (
+            now - self._last_change
+        )
+        self._last_change = now
+
+    def set_total(self, total: int) -> None:
+        with self._lock:
+            self.total = total
+
+    def set_queued(self, queued: Dict[str, int]) -> None:
+        """Jobs waiting for a slot (or a dependency), per toolchain."""
+        with self._lock:
+            self.queued = dict(queued)
+
+    def job_started(self, toolchain: str) -> None:
+        with self._lock:
+            self._advance(time.time())
+            self.running[toolchain] = self.running.get(toolchain, 0) + 1
+
+    def job_finished(self, toolchain: str, record: Dict[str, Any]) -> None:
+        """A job left its slot; ``record`` is its execute_job record."""
+        with self._lock:
+            self._advance(time.time())
+            if self.running.get(toolchain):
+                self.running[toolchain] -= 1
+            self._count(toolchain, record)
+
+    def job_skipped(self, toolchain: str, record: Dict[str, Any]) -> None:
+        """A job finished without a slot (reused result or skipped)."""
+        with self._lock:
+            self._count(toolchain, record)
+
+    def _count(self, toolchain: str, record: Dict[str, Any]) -> None:
+        key = (toolchain, record.get('status', 'failed'))
+        self.completed[key] = self.completed.get(key, 0) + 1
+        for name, seconds in (record.get('stages') or {}).items():
+            self.stage_seconds[(toolchain, name)] = (
+                self.stage_seconds.get((toolchain, name), 0.0) + seconds
+            )
+            self.stage_count[(toolchain, name)] = (
+                self.stage_count.get((toolchain, name), 0) + 1
+            )
+        for name, (hits, misses) in (record.get('cache') or {}).items():
+            self._cache(name, hits, misses)
+
+    def cache_result(self, cache: str, hit: bool) -> None:
+        """Scheduler-side cache lookup, e.g. a reused previous run."""
+        with self._lock:
+            self._cache(cache, int(hit), int(not hit))
+
+    def _cache(self, cache: str, hits: int, misses: int) -> None:
+        counts = self.cache.setdefault(cache, [0, 0])
+        counts[0] += hits
+        counts[1] += misses
+
+    # --- exportação ---
+    def render(self) -> str:
+        """Current metrics in the OpenMetrics text format."""
+        with self._lock:
+            self._advance(time.time())
+            lines: List[str] = []
+
+            def family(
+                name: str, kind: str, help_text: str, unit: str = ''
+            ) -> None:
+                lines.append(f'# TYPE {METRIC_PREFIX}_{name} {kind}')
+                if unit:
+                    lines.append(f'# UNIT {METRIC_PREFIX}_{name} {unit}')
+                lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+
+            def sample(name: str, value: float, **labels: str) -> None:
+                lines.append(
+                    f'{METRIC_PREFIX}_{name}'
+                    f'{_labels(**self.labels, **labels)} {value:g}'
+                )
+
+            family('jobs', 'gauge', 'Jobs in the batch.')
+            sample('jobs', self.total)
+            family('jobs_queued', 'gauge', 'Jobs waiting to start.')
+            for toolchain, count in sorted(self.queued.items()):
+                sample('jobs_queued', count, toolchain=toolchain)
+            family('jobs_running', 'gauge', 'Jobs running now.')
+            for toolchain, count in sorted(self.running.items()):
+                sample('jobs_running', count, toolchain=toolchain)
+            family('jobs_completed', 'counter', 'Jobs finished, by status.')
+            for (toolchain, status), count in sorted(self.completed.items()):
+                sample(
+                    'jobs_completed_total',
+                    count,
+                    toolchain=toolchain,
+                    status=status,
+                )
+
+            family('slots', 'gauge', 'Jobs that can run at the same time.')
+            sample('slots', self.slots)
+            family(
+                'slot_busy_seconds',
+                'counter',
+                'Slot-seconds spent running jobs.',
+                'seconds',
+            )
+            sample('slot_busy_seconds_total', self.busy_seconds)
+            family(
+                'uptime_seconds',
+                'gauge',
+                'Seconds since the batch started.',
+                'seconds',
+            )
+            sample('uptime_seconds', time.time() - self.started)
+
+            family(
+                'stage_seconds',
+                'summary',
+                'Time spent in each stage of the flows.',
+                'seconds',
+            )
+            for (toolchain, name), seconds in sorted(
+                self.stage_seconds.items()
+            ):
+                sample(
+                    'stage_seconds_sum',
+                    seconds,
+                    toolchain=toolchain,
+                    stage=name,
+                )
+                sample(
+                    'stage_seconds_count',
+                    self.stage_count[(toolchain, name)],
+                    toolchain=toolchain,
+                    stage=name,
+                )
+
+            family('cache_requests', 'counter', 'Cache lookups by result.')
+            for name, (hits, misses) in sorted(self.cache.items()):
+                sample('cache_requests_total', hits, cache=name, result='hit')
+                sample(
+                    'cache_requests_total', misses, cache=name, result='miss'
+                )
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def _write_file(self) -> None:
+        if not self.metrics_file:
+            return
+        directory = os.path.dirname(os.path.abspath(self.metrics_file))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.metrics_file}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.metrics_file)
+
+    def _serve(self, port: int) -> None:
+        # Importado aqui: só quem exporta por HTTP paga pelo http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        ).start()
+        print_blue(
+            f'Metrics at http://127.0.0.1:{self._server.server_port}/metrics'
+        )
+
+    # --- progresso ---
+    def progress_line(self) -> str:
+        with self._lock:
+            self._advance(time.time())
+            elapsed = max(time.time() - self.started, 1e-9)
+            statuses: Dict[str, int] = {}
+            for (_, status), count in self.completed.items():
+                statuses[status] = statuses.get(status, 0) + count
+            finished = sum(statuses.values())
+            running = sum(self.running.values())
+            executed = finished - statuses.get('cached', 0)
+
+            parts: List[str] = []
+            busy = ', '.join(
+                f'{toolchain} {count}'
+                for toolchain, count in sorted(self.running.items())
+                if count
+            )
+            parts.append(
+                f"running {running}/{self.slots}"
+                + (f' ({busy})' if busy else '')
+            )
+            parts.append(f'queued {sum(self.queued.values())}')
+            parts.append(
+                ' '.join(
+                    f'{status} {count}'
+                    for status, count in sorted(statuses.items())
+                )
+                or 'none finished'
+            )
+            throughput = executed / elapsed * 60
+            parts.append(f'{throughput:.1f} jobs/min')
+            remaining = self.total - finished
+            if executed and remaining:
+                parts.append(
+                    f'ETA {_duration(remaining / (executed / elapsed))}'
+                )
+            parts.append(
+                f'slots {self.busy_seconds / (self.slots * elapsed):.0%}'
+            )
+            hits = sum(counts[0] for counts in self.cache.values())
+            lookups = sum(sum(counts) for counts in self.cache.values())
+            if lookups:
+                parts.append(f'cache {hits / lookups:.0%}')
+        return f'[{finished}/{self.total}] ' + ' | '.join(parts)
+
+    def update(self, force: bool = False) -> None:
+        """Exports the metrics and prints progress when it is due."""
+        self._write_file()
+        now = time.time()
+        if not self.progress_interval:
+            return
+        if not force and now - self._last_progress < self.progress_interval:
+            return
+        line = self.progress_line()
+        if force or line != self._last_line:
+            print_blue(line)
+        self._last_progress = now
+        self._last_line = line
+
+    def close(self) -> None:
+        """Final export and progress line; stops the HTTP server."""
+        self.update(force=True)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
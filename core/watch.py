@@ -0,0 +1,459 @@
+"""Rerunning jobs when their RTL changes.
+
+:class:`JobWatcher` watches the sources of a set of jobs (their files, the
+headers and memory images next to them and their include directories, as
+resolved by :func:`core.staging.job_sources`) and reruns only the jobs
+that depend on the files that changed, printing the new Fmax and size next
+to the previous ones.
+
+Changes are detected with inotify (through ctypes, Linux only) or, where
+it is unavailable, by polling modification times. Bursts of events, such
+as an editor saving several files or a ``git checkout``, are merged until
+no change is seen for the debounce interval.
+
+Every run happens in a process of its own process group, so a run made
+stale by a new edit is cancelled together with the EDA tools it started.
+"""
+import ctypes
+import ctypes.util
+import multiprocessing
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from dataclasses import dataclass, field, replace
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.job import Job, execute_job
+from core.log import print_blue, print_green, print_red, print_yellow
+from core.metrics import FlowMetrics
+from core.results import ResultsDB
+from core.staging import HEADER_EXTENSIONS, MEMORY_EXTENSIONS, job_sources
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 1.0
+# Tempo para um run cancelado sair antes do SIGKILL
+CANCEL_GRACE = 5.0
+
+# Recurso que resume o tamanho do design em cada backend
+_SIZE_RESOURCE = {
+    'vivado': 'Total LUTs',
+    'yosys': 'TRELLIS_SLICE',
+    'gowin': 'Logic',
+}
+
+
+# -------------------------
+# Detecção de mudanças
+# -------------------------
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_IGNORED = 0x00008000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+# struct inotify_event: wd, mask, cookie, len, seguido do nome
+_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Change notifications for directories through Linux inotify.
+
+    Raises:
+        OSError: If inotify is not available.
+    """
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(
+            ctypes.util.find_library('c') or 'libc.so.6', use_errno=True
+        )
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self.fd: int = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs: Dict[int, str] = {}
+
+    def watch(self, directories: Iterable[str]) -> None:
+        watched = set(self._dirs.values())
+        for directory in directories:
+            if directory in watched or not os.path.isdir(directory):
+                continue
+            wd = self._add_watch(
+                self.fd, os.fsencode(directory), _WATCH_MASK
+            )
+            if wd >= 0:
+                self._dirs[wd] = directory
+
+    def wait(self, timeout: float) -> Set[str]:
+        """Paths changed within ``timeout`` seconds (empty if none)."""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            start = offset + _EVENT.size
+            name = os.fsdecode(data[start:start + length].rstrip(b'\0'))
+            offset = start + length
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)  # diretório removido
+            elif wd in self._dirs:
+                changed.add(os.path.join(self._dirs[wd], name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher comparing the stat of the files in directories."""
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.interval = interval
+        self._dirs: Set[str] = set()
+        self._state: Dict[str, Tuple[int, int]] = {}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        state: Dict[str, Tuple[int, int]] = {}
+        for directory in self._dirs:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                state[entry.path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def watch(self, directories: Iterable[str]) -> None:
+        new = set(directories) - self._dirs
+        if new:
+            self._dirs |= new
+            self._state = self._scan()
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(max(0.0, min(self.interval, timeout)))
+        state = self._scan()
+        changed = {
+            path
+            for path in set(state) | set(self._state)
+            if state.get(path) != self._state.get(path)
+        }
+        self._state = state
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(poll: bool = False) -> Any:
+    """inotify watcher, or a polling one if requested or unavailable."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            print_yellow(f'inotify unavailable ({e}); polling for changes')
+    return PollingWatcher()
+
+
+# -------------------------
+# Jobs observados
+# -------------------------
+_DEPENDENCY_EXTENSIONS = HEADER_EXTENSIONS + MEMORY_EXTENSIONS
+
+
+@dataclass
+class WatchedJob:
+    """A job together with the files and directories it depends on."""
+
+    job: Job
+    sources: Set[str] = field(default_factory=set)
+    include_dirs: List[str] = field(default_factory=list)
+    source_dirs: Set[str] = field(default_factory=set)
+
+    def refresh(self) -> None:
+        """Resolves the sources again (files may have been added)."""
+        _, sources = job_sources(self.job)
+        self.sources = set(sources)
+        self.include_dirs = [
+            os.path.abspath(d) for d in self.job.include_dirs
+        ]
+        self.source_dirs = {
+            os.path.dirname(os.path.abspath(f)) for f in self.job.files
+        }
+
+    @property
+    def directories(self) -> Set[str]:
+        directories = set(self.source_dirs)
+        for include_dir in self.include_dirs:
+            for dirpath, _, _ in os.walk(include_dir):
+                directories.add(dirpath)
+        return directories
+
+    def depends_on(self, path: str) -> bool:
+        if path in self.sources:
+            return True
+        # Arquivos novos que um `include ou $readmemh pode usar; como em
+        # job_sources, outros .v/.sv ao lado dos fontes não entram
+        name = path.lower()
+        if not name.endswith(_DEPENDENCY_EXTENSIONS):
+            return False
+        if os.path.dirname(path) in self.source_dirs:
+            return not name.endswith(('.v', '.sv'))
+        return any(
+            path.startswith(d.rstrip(os.sep) + os.sep)
+            for d in self.include_dirs
+        )
+
+
+def _run_in_group(
+    job_data: Dict[str, Any], workdir: str, conn: Connection
+) -> None:
+    """Runs a job as leader of a new process group, sending the record."""
+    os.setpgid(0, 0)
+    # SIGTERM vira SystemExit: os finally (scratch, cwd) ainda rodam
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    conn.send(execute_job(job_data, workdir))
+    conn.close()
+
+
+@dataclass
+class _Run:
+    process: multiprocessing.Process
+    conn: Connection
+    started: float
+
+
+def _describe(metrics: FlowMetrics) -> Dict[str, Optional[float]]:
+    size: Optional[float] = metrics.area_um2.get('chip')
+    resource = _SIZE_RESOURCE.get(metrics.backend)
+    if size is None and resource in metrics.resources:
+        size = metrics.resources[resource].used
+    return {'Fmax (MHz)': metrics.fmax_mhz, 'size': size}
+
+
+class JobWatcher:
+    """Reruns the jobs whose sources change until interrupted.
+
+    Args:
+        jobs (List[Job]): Jobs to watch; reports are always enabled.
+        runs_dir (str): Directory holding one work directory per job.
+        parallel (int): Jobs run at the same time.
+        debounce (float): Quiet seconds that end a burst of changes.
+        poll (bool): Poll modification times instead of using inotify.
+        results_db (Optional[ResultsDB]): Where finished runs are recorded.
+    """
+
+    def __init__(
+        self,
+        jobs: List[Job],
+        runs_dir: str,
+        parallel: int = 1,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll: bool = False,
+        results_db: Optional[ResultsDB] = None,
+    ) -> None:
+        self.jobs: Dict[str, WatchedJob] = {}
+        for job in jobs:
+            job = replace(job.absolutize(), get_reports=True)
+            self.jobs[job.job_id] = WatchedJob(job)
+        self.runs_dir = os.path.abspath(runs_dir)
+        self.parallel = max(1, parallel)
+        self.debounce = debounce
+        self.results_db = results_db
+        self.watcher = make_watcher(poll)
+        self.pending: List[str] = []
+        self.running: Dict[str, _Run] = {}
+        self.previous: Dict[str, FlowMetrics] = {}
+
+    def _refresh(self, job_ids: Iterable[str]) -> None:
+        for job_id in job_ids:
+            watched = self.jobs[job_id]
+            try:
+                watched.refresh()
+            except OSError as e:
+                print_red(f'{watched.job.name}: {e}')
+                continue
+            self.watcher.watch(watched.directories)
+
+    def _schedule(self, job_ids: Iterable[str]) -> None:
+        for job_id in job_ids:
+            if job_id in self.running:
+                self._cancel(job_id)
+            if job_id not in self.pending:
+                self.pending.append(job_id)
+
+    def _cancel(self, job_id: str) -> None:
+        run = self.running.pop(job_id)
+        print_yellow(f'Cancelling stale run of {self.jobs[job_id].job.name}')
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(run.process.pid, sig)
+            except OSError:
+                # Ainda não virou líder do grupo (ou já terminou)
+                if run.process.is_alive():
+                    os.kill(run.process.pid, sig)
+            run.process.join(CANCEL_GRACE)
+            if not run.process.is_alive():
+                break
+        run.conn.close()
+
+    def _start_pending(self) -> None:
+        while self.pending and len(self.running) < self.parallel:
+            job_id = self.pending.pop(0)
+            job = self.jobs[job_id].job
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_run_in_group,
+                args=(
+                    job.to_dict(),
+                    os.path.join(self.runs_dir, job_id),
+                    sender,
+                ),
+            )
+            print_blue(f'Running {job.name}')
+            process.start()
+            sender.close()
+            self.running[job_id] = _Run(process, receiver, time.time())
+
+    def _collect_finished(self) -> None:
+        for job_id, run in list(self.running.items()):
+            if run.conn.poll():
+                try:
+                    record = run.conn.recv()
+                except EOFError:
+                    record = None
+            elif not run.process.is_alive():
+                record = None
+            else:
+                continue
+            run.process.join()
+            run.conn.close()
+            del self.running[job_id]
+            self._report(job_id, record, run.started)
+
+    def _report(
+        self, job_id: str, record: Optional[Dict[str, Any]], started: float
+    ) -> None:
+        job = self.jobs[job_id].job
+        duration = time.time() - started
+        if record is None or record['status'] != 'done':
+            error = record['error'] if record else 'job process died'
+            print_red(f'{job.name} failed after {duration:.1f}s:\n{error}')
+            return
+        if self.results_db is not None:
+            self.results_db.record_run(
+                job,
+                record['status'],
+                record['started'],
+                record['duration'],
+                workdir=record['workdir'],
+                metrics=record['metrics'],
+            )
+        if not record['metrics']:
+            print_green(f'{job.name} done in {duration:.1f}s')
+            return
+
+        metrics = FlowMetrics.from_dict(record['metrics'])
+        values = _describe(metrics)
+        old = (
+            _describe(self.previous[job_id])
+            if job_id in self.previous
+            else {}
+        )
+        parts = []
+        for name, value in values.items():
+            if value is None:
+                continue
+            text = f'{name} {value:.6g}'
+            if old.get(name) is not None:
+                text += f' ({value - old[name]:+.6g})'
+            parts.append(text)
+        self.previous[job_id] = metrics
+        print_green(
+            f"{job.name} done in {duration:.1f}s: {', '.join(parts)}"
+        )
+
+    def _changes(self) -> Set[str]:
+        """Waits for a burst of changes and returns every changed path."""
+        changed = self.watcher.wait(0.2)
+        if not changed:
+            return changed
+        quiet_since = time.time()
+        while time.time() - quiet_since < self.debounce:
+            more = self.watcher.wait(
+                self.debounce - (time.time() - quiet_since)
+            )
+            if more:
+                changed |= more
+                quiet_since = time.time()
+        return changed
+
+    def run(self, initial: bool = True) -> None:
+        """Watches until interrupted (Ctrl-C), cancelling what is running."""
+        self._refresh(self.jobs)
+        if initial:
+            self._schedule(self.jobs)
+        print_blue(
+            f'Watching {sum(len(w.sources) for w in self.jobs.values())} '
+            f'file(s) of {len(self.jobs)} job(s); Ctrl-C to stop'
+        )
+        try:
+            while True:
+                self._start_pending()
+                changed = self._changes()
+                self._collect_finished()
+                if not changed:
+                    continue
+
+                affected = [
+                    job_id
+                    for job_id, watched in self.jobs.items()
+                    if any(watched.depends_on(p) for p in changed)
+                ]
+                if not affected:
+                    continue
+                names = sorted(os.path.basename(p) for p in changed)
+                print_blue(
+                    f"Changed: {', '.join(names[:5])}"
+                    + (f' (+{len(names) - 5})' if len(names) > 5 else '')
+                )
+                self._refresh(affected)
+                self._schedule(affected)
+        except KeyboardInterrupt:
+            print_yellow('Stopping')
+        finally:
+            for job_id in list(self.running):
+                self._cancel(job_id)
+            self.watcher.close()
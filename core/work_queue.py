@@ -0,0 +1,508 @@
+"""Durable work queue stored on a (possibly shared) filesystem.
+
+Layout of a queue directory::
+
+    pending/<id>.json   job specification, present until the job finishes
+    leases/<id>.lease   claim of a worker; its mtime is the heartbeat
+    attempts/<id>       number of attempts already made
+    done/<id>.json      result record of a finished job
+    failed/<id>.json    result record of a job that ran out of attempts
+    work/<id>/<n>/      work directory of attempt ``n`` of the job
+
+Claims are taken by creating the lease with ``O_CREAT | O_EXCL``, which is
+atomic on local filesystems and on NFSv3+. A worker keeps its lease alive by
+touching it; leases that stop beating for longer than the lease timeout are
+broken by any other worker and the job becomes claimable again. Since job
+ids are content hashes, resubmitting a batch skips everything already in
+``done/``.
+
+Each attempt runs in its own work directory, so a worker whose lease was
+broken while it kept running never shares files with the new owner. A
+job whose last allowed attempt never reported back (its worker was
+killed, e.g. out of memory) is moved to ``failed/`` when it is claimed
+again instead of being retried forever.
+"""
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from core.job import Job, run_job
+from core.log import (
+    job_output,
+    log_context,
+    print_blue,
+    print_green,
+    print_red,
+    print_yellow,
+)
+from core.metrics import FlowMetrics
+from core.telemetry import Telemetry, collect_probe, reset_probe
+
+DEFAULT_LEASE_TIMEOUT = 120.0
+DEFAULT_HEARTBEAT_INTERVAL = 15.0
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_MAX_ATTEMPTS = 2
+
+_SUBDIRS = ('pending', 'leases', 'attempts', 'done', 'failed', 'work')
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class FileQueue:
+    """Job queue backed by a directory tree."""
+
+    def __init__(self, root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        for subdir in _SUBDIRS:
+            os.makedirs(os.path.join(self.root, subdir), exist_ok=True)
+
+    def _path(self, subdir: str, name: str) -> str:
+        return os.path.join(self.root, subdir, name)
+
+    def fs_now(self) -> float:
+        """Current time as seen by the filesystem holding the queue.
+
+        Heartbeats are file mtimes stamped by the file server, so staleness
+        is measured against the same clock to tolerate skew between hosts.
+        """
+        probe = self._path('leases', f'.clock.{uuid.uuid4().hex}')
+        with open(probe, 'w', encoding='utf-8'):
+            pass
+        try:
+            return os.stat(probe).st_mtime
+        finally:
+            os.unlink(probe)
+
+    # -------------------------
+    # Submission and inspection
+    # -------------------------
+    def submit(self, job: Job, force: bool = False) -> bool:
+        """Adds a job to the queue.
+
+        Returns:
+            bool: False when the job is already queued or already done
+            (unless ``force`` is set, which discards the old result).
+        """
+        job_id = job.job_id
+        done_path = self._path('done', f'{job_id}.json')
+        pending_path = self._path('pending', f'{job_id}.json')
+
+        if force:
+            for path in (done_path, self._path('failed', f'{job_id}.json')):
+                if os.path.exists(path):
+                    os.unlink(path)
+            if os.path.exists(self._path('attempts', job_id)):
+                os.unlink(self._path('attempts', job_id))
+        elif os.path.exists(done_path) or os.path.exists(pending_path):
+            return False
+
+        _write_json_atomic(pending_path, job.to_dict())
+        return True
+
+    def pending_ids(self) -> List[str]:
+        return sorted(
+            name[: -len('.json')]
+            for name in os.listdir(os.path.join(self.root, 'pending'))
+            if name.endswith('.json')
+        )
+
+    def status(self) -> Dict[str, int]:
+        def _count(subdir: str, suffix: str) -> int:
+            return sum(
+                1
+                for name in os.listdir(os.path.join(self.root, subdir))
+                if name.endswith(suffix)
+            )
+
+        return {
+            'pending': _count('pending', '.json'),
+            'running': _count('leases', '.lease'),
+            'done': _count('done', '.json'),
+            'failed': _count('failed', '.json'),
+        }
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        for subdir in ('done', 'failed'):
+            directory = os.path.join(self.root, subdir)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith('.json'):
+                    record = _read_json(os.path.join(directory, name))
+                    if record is not None:
+                        yield record
+
+    # -------------------------
+    # Leases
+    # -------------------------
+    def try_claim(self, job_id: str, owner: str) -> bool:
+        lease_path = self._path('leases', f'{job_id}.lease')
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'owner': owner, 'claimed_at': time.time()}, f)
+
+        # The job may have finished between listing and claiming
+        if not os.path.exists(self._path('pending', f'{job_id}.json')):
+            self.release(job_id, owner)
+            return False
+        return True
+
+    def lease_owner(self, job_id: str) -> Optional[str]:
+        lease = _read_json(self._path('leases', f'{job_id}.lease'))
+        return lease.get('owner') if lease else None
+
+    def heartbeat(self, job_id: str, owner: str) -> bool:
+        """Refreshes a lease. Returns False if the lease was lost."""
+        if self.lease_owner(job_id) != owner:
+            return False
+        try:
+            os.utime(self._path('leases', f'{job_id}.lease'))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, job_id: str, owner: str) -> None:
+        if self.lease_owner(job_id) == owner:
+            try:
+                os.unlink(self._path('leases', f'{job_id}.lease'))
+            except FileNotFoundError:
+                pass
+
+    def reap_stale_leases(self, lease_timeout: float) -> List[str]:
+        """Breaks leases whose heartbeat is older than ``lease_timeout``.
+
+        The stale lease is first renamed to a unique name so that only one
+        of several concurrent reapers wins, then removed.
+        """
+        reaped: List[str] = []
+        leases_dir = os.path.join(self.root, 'leases')
+        now = self.fs_now()
+
+        for name in os.listdir(leases_dir):
+            if not name.endswith('.lease'):
+                continue
+            lease_path = os.path.join(leases_dir, name)
+            try:
+                age = now - os.stat(lease_path).st_mtime
+            except FileNotFoundError:
+                continue
+            if age <= lease_timeout:
+                continue
+
+            graveyard = f'{lease_path}.stale.{uuid.uuid4().hex}'
+            try:
+                os.rename(lease_path, graveyard)
+            except FileNotFoundError:
+                continue
+            os.unlink(graveyard)
+            reaped.append(name[: -len('.lease')])
+
+        return reaped
+
+    # -------------------------
+    # Completion
+    # -------------------------
+    def load_job(self, job_id: str) -> Optional[Job]:
+        data = _read_json(self._path('pending', f'{job_id}.json'))
+        return Job.from_dict(data) if data is not None else None
+
+    def work_dir(self, job_id: str, attempt: int) -> str:
+        return os.path.join(self._path('work', job_id), str(attempt))
+
+    def attempts(self, job_id: str) -> int:
+        """Number of attempts already started for a job."""
+        try:
+            with open(
+                self._path('attempts', job_id), 'r', encoding='utf-8'
+            ) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def next_attempt(self, job_id: str) -> int:
+        attempt = self.attempts(job_id) + 1
+        with open(
+            self._path('attempts', job_id), 'w', encoding='utf-8'
+        ) as f:
+            f.write(str(attempt))
+        return attempt
+
+    def complete(
+        self, job_id: str, owner: str, record: Dict[str, Any], failed: bool
+    ) -> None:
+        subdir = 'failed' if failed else 'done'
+        _write_json_atomic(self._path(subdir, f'{job_id}.json'), record)
+        try:
+            os.unlink(self._path('pending', f'{job_id}.json'))
+        except FileNotFoundError:
+            pass
+        self.release(job_id, owner)
+
+
+# -------------------------
+# Worker
+# -------------------------
+class _Heartbeat(threading.Thread):
+    def __init__(
+        self, queue: FileQueue, job_id: str, owner: str, interval: float
+    ) -> None:
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self.interval = interval
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            if not self.queue.heartbeat(self.job_id, self.owner):
+                self.lost = True
+                return
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class Worker:
+    """Pulls jobs from a :class:`FileQueue` and runs them until it drains.
+
+    With ``metrics_dir``, the worker keeps its telemetry (see
+    :mod:`core.telemetry`) in ``<metrics_dir>/<owner>.prom``, one file per
+    worker as the node_exporter textfile collector expects. With
+    ``job_logs``, the output of each job goes to ``job.log`` in its work
+    directory (see :func:`core.log.job_output`).
+    """
+
+    def __init__(
+        self,
+        queue: FileQueue,
+        runner: Callable[[Job, str], Optional[FlowMetrics]] = run_job,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        wait: bool = False,
+        metrics_dir: Optional[str] = None,
+        job_logs: bool = True,
+    ) -> None:
+        self.queue = queue
+        self.runner = runner
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = min(heartbeat_interval, lease_timeout / 3)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.wait = wait
+        self.job_logs = job_logs
+        self.owner = (
+            f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        )
+        self.telemetry: Optional[Telemetry] = None
+        if metrics_dir:
+            self.telemetry = Telemetry(
+                slots=1,
+                metrics_file=os.path.join(
+                    metrics_dir, f"{self.owner.replace(':', '_')}.prom"
+                ),
+                progress_interval=0,
+                labels={'worker': self.owner},
+            )
+
+    def _update_telemetry(self) -> None:
+        if self.telemetry is None:
+            return
+        counts = self.queue.status()
+        self.telemetry.set_total(
+            counts['pending'] + counts['done'] + counts['failed']
+        )
+        queued: Dict[str, int] = {}
+        for job_id in self.queue.pending_ids():
+            if self.queue.lease_owner(job_id) is not None:
+                continue
+            job = self.queue.load_job(job_id)
+            if job is not None:
+                queued[job.toolchain] = queued.get(job.toolchain, 0) + 1
+        self.telemetry.set_queued(queued)
+        self.telemetry.update()
+
+    def claim_next(self) -> Optional[str]:
+        for job_id in self.queue.pending_ids():
+            if self.queue.try_claim(job_id, self.owner):
+                return job_id
+        return None
+
+    def run_one(self, job_id: str) -> None:
+        job = self.queue.load_job(job_id)
+        if job is None:
+            self.queue.release(job_id, self.owner)
+            return
+
+        previous = self.queue.attempts(job_id)
+        if previous >= self.max_attempts:
+            # A última tentativa não terminou: o worker morreu com o job
+            self._give_up(job_id, job, previous)
+            return
+
+        attempt = self.queue.next_attempt(job_id)
+        workdir = self.queue.work_dir(job_id, attempt)
+        # Never resume on top of the leftovers of a crashed attempt
+        shutil.rmtree(workdir, ignore_errors=True)
+
+        print_blue(f'[{self.owner}] Running {job.name} ({job_id})')
+        heartbeat = _Heartbeat(
+            self.queue, job_id, self.owner, self.heartbeat_interval
+        )
+        heartbeat.start()
+        if self.telemetry is not None:
+            self.telemetry.job_started(job.toolchain)
+            self._update_telemetry()
+
+        reset_probe()
+        started = time.time()
+        error: Optional[str] = None
+        metrics: Optional[FlowMetrics] = None
+        output = (
+            job_output(workdir, job=job.name, job_id=job_id)
+            if self.job_logs
+            else log_context(job=job.name, job_id=job_id)
+        )
+        try:
+            with output:
+                metrics = self.runner(job, workdir)
+        except Exception:  # pylint: disable=broad-except
+            error = traceback.format_exc()
+        finally:
+            heartbeat.stop()
+
+        if heartbeat.lost:
+            if self.telemetry is not None:
+                self.telemetry.job_finished(job.toolchain, {'status': 'lost'})
+            print_yellow(
+                f'[{self.owner}] Lease for {job_id} was lost, '
+                'leaving the job to its new owner'
+            )
+            shutil.rmtree(workdir, ignore_errors=True)
+            return
+
+        record: Dict[str, Any] = {
+            'job_id': job_id,
+            'job': job.to_dict(),
+            'worker': self.owner,
+            'attempt': attempt,
+            'started': started,
+            'duration': time.time() - started,
+            'workdir': workdir,
+            'status': 'failed' if error else 'done',
+            'error': error,
+            'metrics': metrics.to_dict() if metrics is not None else None,
+            **collect_probe(),
+        }
+        if self.telemetry is not None:
+            self.telemetry.job_finished(
+                job.toolchain,
+                dict(record, status='retried')
+                if error and attempt < self.max_attempts
+                else record,
+            )
+
+        if error and attempt < self.max_attempts:
+            print_yellow(
+                f'[{self.owner}] {job.name} failed '
+                f'(attempt {attempt}/{self.max_attempts}), requeueing'
+            )
+            self.queue.release(job_id, self.owner)
+            return
+
+        self.queue.complete(job_id, self.owner, record, failed=bool(error))
+        if error:
+            print_red(f'[{self.owner}] {job.name} failed:\n{error}')
+        else:
+            print_green(f'[{self.owner}] {job.name} done')
+
+    def _give_up(self, job_id: str, job: Job, attempts: int) -> None:
+        """Fails a job whose attempts all ended with their worker."""
+        error = (
+            f'worker lost during attempt {attempts}/{self.max_attempts} '
+            '(killed or crashed)'
+        )
+        record: Dict[str, Any] = {
+            'job_id': job_id,
+            'job': job.to_dict(),
+            'worker': self.owner,
+            'attempt': attempts,
+            'started': time.time(),
+            'duration': 0.0,
+            'workdir': self.queue.work_dir(job_id, attempts),
+            'status': 'failed',
+            'error': error,
+            'metrics': None,
+        }
+        self.queue.complete(job_id, self.owner, record, failed=True)
+        print_red(f'[{self.owner}] {job.name} failed: {error}')
+
+    def run(self) -> int:
+        """Processes jobs until the queue is empty. Returns jobs executed."""
+        executed = 0
+        while True:
+            self.queue.reap_stale_leases(self.lease_timeout)
+            self._update_telemetry()
+            job_id = self.claim_next()
+
+            if job_id is not None:
+                self.run_one(job_id)
+                executed += 1
+                continue
+
+            if not self.wait and not self.queue.pending_ids():
+                if self.telemetry is not None:
+                    self.telemetry.close()
+                return executed
+            # Jobs are pending but leased by other workers: keep polling so
+            # that a crashed worker's jobs get picked up after its lease
+            # expires.
+            time.sleep(self.poll_interval)
+
+
+def run_workers(queue_root: str, workers: int = 1, **kwargs: Any) -> None:
+    """Runs ``workers`` local worker processes against a queue."""
+    if workers <= 1:
+        Worker(FileQueue(queue_root), **kwargs).run()
+        return
+
+    # Local import: multiprocessing is only needed for local fan-out
+    import multiprocessing
+
+    processes = [
+        multiprocessing.Process(
+            target=run_workers, args=(queue_root, 1), kwargs=kwargs
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
@@ -3,20 +3,110 @@ import argparse
 import json
 import os
 import sys
+from typing import Any, Callable, Dict, List
 
-from core.asic import run_asic_flow
-from core.fpga import run_fpga_flow
-from core.log import print_blue, print_green, print_red, print_yellow
-from core.processor_ci_internals import CONTROLLER_FILES, PROCESSOR_INTERNAL_FILES
+from core.artifacts import (
+    ArtifactManager,
+    default_policies,
+    format_size,
+    parse_size,
+    runs_from_queue,
+    runs_from_results_db,
+)
+from core.daemon import DEFAULT_SOCKET_PATH, FlowDaemon, send_request
+from core.executor import Executor
+from core.critical_paths import limiting_modules, run_paths
+from core.fake_eda import FakeToolLoad
+from core.frontend import FAILED_TTL_ENV, FRONTEND_DIR_ENV
+from core.hierarchy import PRIMARY_METRIC, diff_modules, resolve_runs
+from core.job import FLOW_PROFILES, Job, build_job, run_job
+from core.loadtest import DEFAULT_TARGETS, MODES, run_load_test
+from core.manifest import expand_targets, load_manifest
+from core.parser_bench import (
+    CASES,
+    DEFAULT_MAX_MEMORY_GROWTH,
+    DEFAULT_MAX_SLOWDOWN,
+    DEFAULT_SIZES,
+    SIZES,
+    compare_to_baseline,
+    run_benchmarks,
+)
+from core.regression import (
+    FAIL,
+    PASS,
+    WARN,
+    BaselineStore,
+    RegressionPolicy,
+    check_regressions,
+    update_baselines,
+)
+from core.qor_model import (
+    DEFAULT_MIN_CONFIDENCE,
+    DEFAULT_TOLERANCE,
+    MIN_TRAINING_RUNS,
+    PredictingRunner,
+    QoRModel,
+)
+from core.results import ResultsDB
+from core.simulation import (
+    DEFAULT_BOARD,
+    HarnessOptions,
+    core_ids,
+    load_benchmarks,
+    resolve_core,
+    run_suite,
+    stored_fmax,
+    summarize,
+)
+from core.staging import (
+    STAGE_DIR_ENV,
+    SourceStore,
+    StagedRunner,
+    stage_graph,
+)
+from core.telemetry import DEFAULT_PROGRESS_INTERVAL, Telemetry
+from core.watch import DEFAULT_DEBOUNCE, JobWatcher
+from core.log import (
+    JOB_LOG,
+    LOG_FORMATS,
+    LOG_LEVELS,
+    configure,
+    print_blue,
+    print_green,
+    print_red,
+    print_yellow,
+)
+from core.work_queue import (
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_LEASE_TIMEOUT,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_POLL_INTERVAL,
+    FileQueue,
+    run_workers,
+)
 
 INSTALL_DIR: str = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_PROJECT_PATH = '/eda/processor_ci_perf'
 DEFAULT_CONFIG_PATH = '/eda/processor_ci/config'
 PROCESSOR_CI_PATH = os.getenv('PROCESSOR_CI_PATH', '/eda/processor_ci')
+DEFAULT_QUEUE_PATH = os.getenv(
+    'PROCESSOR_CI_QUEUE', os.path.join(DEFAULT_PROJECT_PATH, 'queue')
+)
+DEFAULT_RESULTS_DB = os.getenv(
+    'PROCESSOR_CI_RESULTS_DB', os.path.join(DEFAULT_PROJECT_PATH, 'results.db')
+)
+DEFAULT_RUNS_PATH = os.path.join(DEFAULT_PROJECT_PATH, 'runs')
+DEFAULT_SIM_CACHE_PATH = os.path.join(DEFAULT_PROJECT_PATH, 'sim_models')
+DEFAULT_PARSER_BASELINE = os.path.join(
+    INSTALL_DIR, 'benchmarks', 'parsers.json'
+)
+DEFAULT_BASELINES_PATH = os.getenv(
+    'PROCESSOR_CI_BASELINES',
+    os.path.join(DEFAULT_PROJECT_PATH, 'baselines.json'),
+)
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description='Run FPGA or ASIC flow')
+def add_flow_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         '-F',
         '--flow',
@@ -95,9 +185,53 @@ def main() -> None:
         default=[],
         help='List of directories to include in the flow',
     )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        help='Placement seed, for toolchains that support it (nextpnr)',
+    )
+    parser.add_argument(
+        '--auto-size',
+        action='store_true',
+        help='ASIC: size the die from the synthesized area instead of '
+        'using a fixed low utilization',
+    )
+    parser.add_argument(
+        '--multi-corner',
+        action='store_true',
+        help='ASIC: time the final design at every corner of the PDK and '
+        'report the worst-case Fmax',
+    )
+    parser.add_argument(
+        '--profile',
+        choices=FLOW_PROFILES,
+        default='full',
+        help="'metrics' skips bitstream/GDS generation and every report "
+        "the metrics are not parsed from; 'synth' stops after synthesis",
+    )
+    parser.add_argument(
+        '--activity',
+        help='SAIF or VCD of a simulated workload (see simulate '
+        '--activity) for activity-based instead of vectorless power '
+        '(Vivado and ASIC)',
+    )
+    parser.add_argument(
+        '--activity-scope',
+        help='Instance of the top module in the activity file '
+        '(default: TOP/<top>, as written by the Verilator models)',
+    )
+    parser.add_argument(
+        '--elaborate',
+        action='store_true',
+        help='Elaborate the core once per define set into a cached '
+        f'Verilog netlist read by every backend (env {FRONTEND_DIR_ENV} '
+        f'sets the cache, {FAILED_TTL_ENV} how many seconds a failed '
+        'elaboration is cached)',
+    )
 
-    args = parser.parse_args()
 
+def job_request_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    """Keyword arguments of :func:`core.job.build_job` for the given flags."""
     if not args.technology:
         print_red('Error: Technology/PDK name is required.')
         sys.exit(1)
@@ -107,62 +241,1434 @@ def main() -> None:
             'Warning: Both project files and use-config flag are provided. Ignoring provided files and using config files.'
         )
 
-    files = args.files if args.files else []
-    top_module = args.top if args.top else 'processorci_top'
-    include_dirs = args.include_dirs if args.include_dirs else []
+    return {
+        'flow': args.flow,
+        'technology': args.technology,
+        'files': args.files if args.files else [],
+        'include_dirs': args.include_dirs if args.include_dirs else [],
+        'top_module': args.top if args.top else 'processorci_top',
+        'constraint': args.constraint,
+        'config_path': os.path.abspath(args.config),
+        'use_config': args.use_config,
+        'use_pci_wrapper': args.use_pci_wrapper,
+        'processor_ci_path': args.processor_ci_path,
+        'core_id': args.core_id,
+        'get_reports': args.reports,
+        'clean': args.clean,
+        'report_path': args.report_path,
+        'seed': args.seed,
+        'auto_size': args.auto_size,
+        'multi_corner': args.multi_corner,
+        'profile': args.profile,
+        'activity': args.activity,
+        'activity_scope': args.activity_scope,
+        'elaborate': args.elaborate,
+    }
+
+
+def job_from_args(args: argparse.Namespace) -> Job:
+    try:
+        return build_job(**job_request_from_args(args))
+    except ValueError as e:
+        print_red(f'Error: {e}')
+        sys.exit(1)
+
+
+def add_queue_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '-q',
+        '--queue',
+        default=DEFAULT_QUEUE_PATH,
+        help='Path to the shared queue directory',
+    )
+
+
+# -------------------------
+# Subcommands
+# -------------------------
+def run_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Run FPGA or ASIC flow')
+    add_flow_arguments(parser)
+    args = parser.parse_args(argv)
+
+    run_job(job_from_args(args))
+
+
+def submit_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py submit',
+        description='Add a flow job to a shared work queue',
+    )
+    add_flow_arguments(parser)
+    add_queue_argument(parser)
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Run the job again even if it is already done',
+    )
+    args = parser.parse_args(argv)
 
-    if args.use_config:
-        config_data = {}
-        with open(args.config, 'r', encoding='utf-8') as file:
-            config_data = json.load(file)
+    job = job_from_args(args).absolutize()
+    queue = FileQueue(args.queue)
 
-            files = config_data.get('files', [])
-            include_dirs = config_data.get('include_dirs', [])
-            top_module = config_data.get('top_module', top_module)
+    if queue.submit(job, force=args.force):
+        print_green(f'Submitted {job.name} as {job.job_id}')
+    else:
+        print_yellow(f'{job.name} ({job.job_id}) already queued or done')
 
-    if args.use_pci_wrapper:
-        top_module = 'fpga_top'
 
-        controller_path = args.processor_ci_path.replace(
-            'processor_ci', 'processor-ci-controller/'
+def worker_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py worker',
+        description='Run jobs from a shared work queue',
+    )
+    add_queue_argument(parser)
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of local worker processes',
+    )
+    parser.add_argument(
+        '--lease-timeout',
+        type=float,
+        default=DEFAULT_LEASE_TIMEOUT,
+        help='Seconds without heartbeat before a job is reclaimed',
+    )
+    parser.add_argument(
+        '--heartbeat',
+        type=float,
+        default=DEFAULT_HEARTBEAT_INTERVAL,
+        help='Seconds between lease heartbeats',
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help='Seconds between polls while jobs are held by other workers',
+    )
+    parser.add_argument(
+        '--max-attempts',
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help='Attempts before a failing job is moved to failed/',
+    )
+    parser.add_argument(
+        '--wait',
+        action='store_true',
+        help='Keep polling for new jobs instead of exiting when drained',
+    )
+    parser.add_argument(
+        '--stage-dir',
+        default=os.getenv(STAGE_DIR_ENV),
+        help='Local store the sources of each job are staged into '
+        f'before it runs (env {STAGE_DIR_ENV})',
+    )
+    parser.add_argument(
+        '--metrics-dir',
+        help='Keep the OpenMetrics telemetry of each worker in '
+        'DIR/<worker>.prom (node_exporter textfile collector layout)',
+    )
+    add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+
+    if args.stage_dir:
+        kwargs: Dict[str, Any] = {'runner': StagedRunner(args.stage_dir)}
+    else:
+        kwargs = {}
+    run_workers(
+        args.queue,
+        workers=args.workers,
+        lease_timeout=args.lease_timeout,
+        heartbeat_interval=args.heartbeat,
+        poll_interval=args.poll_interval,
+        max_attempts=args.max_attempts,
+        wait=args.wait,
+        metrics_dir=args.metrics_dir,
+        job_logs=not args.verbose,
+        **kwargs,
+    )
+
+
+def add_verbose_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '-v',
+        '--verbose',
+        action='store_true',
+        help='Show the output of each job on the terminal instead of '
+        f'writing it to {JOB_LOG} in its work directory',
+    )
+
+
+def add_telemetry_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--metrics-file',
+        help='Keep live OpenMetrics telemetry (queue depth, running jobs, '
+        'slot use, stage times, cache hits) in this file',
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='Serve the telemetry on http://127.0.0.1:PORT/metrics',
+    )
+    parser.add_argument(
+        '--progress',
+        type=float,
+        default=DEFAULT_PROGRESS_INTERVAL,
+        metavar='SECONDS',
+        help='Seconds between progress lines (0 disables them)',
+    )
+
+
+def status_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py status', description='Show the state of a work queue'
+    )
+    add_queue_argument(parser)
+    parser.add_argument(
+        '-v', '--verbose', action='store_true', help='List finished jobs'
+    )
+    args = parser.parse_args(argv)
+
+    queue = FileQueue(args.queue)
+    counts = queue.status()
+    print_blue(
+        ', '.join(f'{state}: {count}' for state, count in counts.items())
+    )
+
+    if args.verbose:
+        for record in queue.results():
+            job = Job.from_dict(record['job'])
+            line = (
+                f"  {record['status']:<7} {job.name:<40} "
+                f"{record['duration']:8.1f}s  {record['worker']}"
+            )
+            if record['status'] == 'done':
+                print_green(line)
+            else:
+                print_red(line)
+
+
+def add_socket_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '-s',
+        '--socket',
+        default=DEFAULT_SOCKET_PATH,
+        help='Path to the daemon Unix socket',
+    )
+
+
+def daemon_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py daemon',
+        description='Serve flow jobs from warm processes over a Unix socket',
+    )
+    add_socket_argument(parser)
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Number of jobs run concurrently',
+    )
+    parser.add_argument(
+        '--workdir-root',
+        default=DEFAULT_RUNS_PATH,
+        help='Directory holding the work directory of each job',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database where finished runs are recorded',
+    )
+    args = parser.parse_args(argv)
+
+    FlowDaemon(
+        args.socket,
+        workdir_root=args.workdir_root,
+        results_db=args.results_db,
+        jobs=args.jobs,
+    ).serve_forever()
+
+
+def client_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py client', description='Talk to a running daemon'
+    )
+    add_socket_argument(parser)
+    subparsers = parser.add_subparsers(dest='op', required=True)
+
+    submit_parser = subparsers.add_parser('submit', help='Submit a job')
+    add_flow_arguments(submit_parser)
+    submit_parser.add_argument(
+        '-w',
+        '--wait',
+        action='store_true',
+        help='Block until the job finishes',
+    )
+    submit_parser.add_argument(
+        '--workdir',
+        help='Run the job here instead of the daemon work directory root',
+    )
+    subparsers.add_parser('status', help='Show running and recent jobs')
+    subparsers.add_parser('ping', help='Check that the daemon is alive')
+    subparsers.add_parser('shutdown', help='Stop the daemon')
+    args = parser.parse_args(argv)
+
+    request: Dict[str, Any] = {'op': args.op}
+    if args.op == 'submit':
+        request.update(
+            {
+                'request': job_request_from_args(args),
+                'cwd': os.getcwd(),
+                'wait': args.wait,
+                'workdir': os.path.abspath(args.workdir)
+                if args.workdir
+                else None,
+            }
         )
 
-        for i in CONTROLLER_FILES:
-            files.append(os.path.join(controller_path, i))
+    try:
+        response = send_request(args.socket, request)
+    except OSError as e:
+        print_red(f'Error: could not reach daemon at {args.socket}: {e}')
+        sys.exit(1)
 
-        for i in PROCESSOR_INTERNAL_FILES:
-            files.append(os.path.join(args.processor_ci_path, i))
+    if not response.get('ok'):
+        print_red(f"Error: {response.get('error')}")
+        sys.exit(1)
 
-        if not args.core_id:
-            print_red(
-                'Error: Core ID is required when using Processor CI wrapper.'
+    if args.op == 'submit' and args.wait:
+        record = response['record']
+        if record['status'] != 'done':
+            print_red(f"{record['name']} failed:\n{record['error']}")
+            sys.exit(1)
+        print_green(
+            f"{record['name']} done in {record['duration']:.1f}s "
+            f"({record['workdir']})"
+        )
+    elif args.op == 'submit':
+        print_green(f"Accepted {response['job_id']} ({response['workdir']})")
+    elif args.op == 'status':
+        print_blue(
+            f"Daemon {response['pid']}: {len(response['running'])} running, "
+            f"{response['completed']} completed, {response['jobs']} slot(s)"
+        )
+        for run in response['recent']:
+            print(
+                f"  {run['status']:<7} {run['name']:<40} "
+                f"{run['duration']:8.1f}s"
+            )
+    else:
+        print_green(json.dumps(response))
+
+
+def batch_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py batch',
+        description='Expand a YAML manifest into jobs and run them',
+    )
+    parser.add_argument('manifest', help='Path to the YAML manifest')
+    parser.add_argument(
+        '-j', '--jobs', type=int, help='Override the number of parallel jobs'
+    )
+    parser.add_argument(
+        '-c',
+        '--config',
+        default=DEFAULT_CONFIG_PATH,
+        help='Config directory used when the manifest does not set one',
+    )
+    parser.add_argument(
+        '-P',
+        '--processor-ci-path',
+        default=PROCESSOR_CI_PATH,
+        help='Path to the Processor CI directory',
+    )
+    parser.add_argument(
+        '--runs-dir',
+        default=DEFAULT_RUNS_PATH,
+        help='Directory holding the work directory of each job',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database of runs, used to skip jobs already done',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Rerun jobs already done, and retry failed elaborations',
+    )
+    parser.add_argument(
+        '-n',
+        '--dry-run',
+        action='store_true',
+        help='Only list the jobs the manifest expands to',
+    )
+    parser.add_argument(
+        '-q',
+        '--queue',
+        help='Submit the jobs to this shared queue instead of running them',
+    )
+    parser.add_argument(
+        '--stage-dir',
+        default=os.getenv(STAGE_DIR_ENV),
+        help='Snapshot the sources of every job into this store before '
+        'running, so changes to the tree during the batch do not affect '
+        f'it (env {STAGE_DIR_ENV}); must be shared with --queue workers',
+    )
+    parser.add_argument(
+        '--predict',
+        metavar='MODEL',
+        help='QoR model (see qor-model train): synthesize each job and run '
+        'place and route only when the prediction is not reliable',
+    )
+    parser.add_argument(
+        '--min-confidence',
+        type=float,
+        default=DEFAULT_MIN_CONFIDENCE,
+        help='Confidence every prediction needs to skip place and route',
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help='Relative error the confidence refers to',
+    )
+    parser.add_argument(
+        '--threshold',
+        action='append',
+        default=[],
+        metavar='TARGET=VALUE',
+        help="Run place and route when a prediction is near this value, "
+        "e.g. 'fmax_mhz=100' or 'resource:FFs=5000' (repeatable; Fmax "
+        'defaults to the clock constraint)',
+    )
+    add_telemetry_arguments(parser)
+    add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+
+    thresholds: Dict[str, float] = {}
+    for item in args.threshold:
+        target, _, value = item.rpartition('=')
+        try:
+            thresholds[target] = float(value)
+        except ValueError:
+            parser.error(f"invalid threshold '{item}'")
+    if args.predict and args.queue:
+        parser.error('--predict only applies to local runs, not --queue')
+
+    try:
+        manifest = load_manifest(
+            args.manifest, args.config, args.processor_ci_path, args.jobs
+        )
+    except (OSError, ValueError) as e:
+        print_red(f'Error: {e}')
+        sys.exit(1)
+
+    print_blue(f'Manifest expands to {len(manifest.graph)} unique job(s)')
+
+    if args.stage_dir and not args.dry_run:
+        try:
+            manifest.graph = stage_graph(
+                manifest.graph, SourceStore(args.stage_dir)
             )
+        except OSError as e:
+            print_red(f'Error staging sources: {e}')
             sys.exit(1)
+        print_blue(f'Sources staged into {args.stage_dir}')
+
+    if args.dry_run:
+        for job_id, job in manifest.graph.jobs.items():
+            print(f'  {job_id}  {job.toolchain:<9} {job.name}')
+        return
+
+    if args.queue:
+        queue = FileQueue(args.queue)
+        submitted = sum(
+            queue.submit(job, force=args.force) for job in manifest.graph
+        )
+        print_green(f'Submitted {submitted} job(s) to {args.queue}')
+        return
+
+    if args.force:
+        # Herdado pelos jobs: refaz também as elaborações que falharam
+        os.environ[FAILED_TTL_ENV] = '0'
+
+    results_db = ResultsDB(args.results_db)
+    try:
+        records = Executor(
+            args.runs_dir,
+            jobs=manifest.jobs,
+            limits=manifest.limits,
+            results_db=results_db,
+            force=args.force,
+            telemetry=Telemetry(
+                manifest.jobs,
+                metrics_file=args.metrics_file,
+                port=args.metrics_port,
+                progress_interval=args.progress,
+            ),
+            runner=PredictingRunner(
+                os.path.abspath(args.predict),
+                min_confidence=args.min_confidence,
+                tolerance=args.tolerance,
+                thresholds=thresholds,
+            )
+            if args.predict
+            else None,
+            job_logs=not args.verbose,
+        ).run(manifest.graph)
+    finally:
+        results_db.close()
+
+    counts: Dict[str, int] = {}
+    for record in records.values():
+        counts[record['status']] = counts.get(record['status'], 0) + 1
+    print_blue(
+        ', '.join(f'{status}: {count}' for status, count in counts.items())
+    )
+    if counts.get('failed') or counts.get('skipped'):
+        sys.exit(1)
+
+
+def regress_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py regress',
+        description='Compare new results against QoR baselines',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database of runs',
+    )
+    parser.add_argument(
+        '-b',
+        '--baselines',
+        default=DEFAULT_BASELINES_PATH,
+        help='JSON file holding the baselines',
+    )
+    parser.add_argument(
+        '-t',
+        '--target',
+        action='append',
+        help='Restrict to a core@target name (repeatable)',
+    )
+    subparsers = parser.add_subparsers(dest='op', required=True)
+
+    baseline = subparsers.add_parser(
+        'baseline', help='Learn baselines from the latest runs'
+    )
+    baseline.add_argument(
+        '-w',
+        '--window',
+        type=int,
+        default=5,
+        help='Number of runs per target used to learn the noise',
+    )
+
+    check = subparsers.add_parser(
+        'check', help='Check the newest runs against the baselines'
+    )
+    check.add_argument(
+        '--warn-sigmas',
+        type=float,
+        default=2.0,
+        help='Degradation, in standard deviations, that triggers a warning',
+    )
+    check.add_argument(
+        '--fail-sigmas',
+        type=float,
+        default=4.0,
+        help='Degradation, in standard deviations, that fails the check',
+    )
+    check.add_argument(
+        '-o', '--output', help='Write the JSON verdict to this file'
+    )
+    check.add_argument(
+        '--strict', action='store_true', help='Exit with error on warnings'
+    )
+    check.add_argument(
+        '--require-all',
+        action='store_true',
+        help='Fail on baselined targets without a new result',
+    )
+    args = parser.parse_args(argv)
+
+    results_db = ResultsDB(args.results_db)
+    store = BaselineStore(args.baselines)
+    try:
+        if args.op == 'baseline':
+            updated = update_baselines(
+                results_db, store, args.target, args.window
+            )
+            store.save()
+            print_green(
+                f'Updated {len(updated)} baseline(s) in {args.baselines}'
+            )
+            return
+
+        verdict = check_regressions(
+            results_db,
+            store,
+            RegressionPolicy(args.warn_sigmas, args.fail_sigmas),
+            args.target,
+            args.require_all,
+        )
+    finally:
+        results_db.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(verdict, f, indent=2)
+
+    printers = {PASS: print_green, WARN: print_yellow, FAIL: print_red}
+    for target in verdict['missing']:
+        printers[verdict['targets'][target]](
+            f"  {verdict['targets'][target]:<4} {target:<40} "
+            'no new result'
+        )
+    for comparison in verdict['comparisons']:
+        if comparison['verdict'] != PASS:
+            current = (
+                'missing'
+                if comparison['current'] is None
+                else f"{comparison['current']:.4g}"
+            )
+            printers[comparison['verdict']](
+                f"  {comparison['verdict']:<4} {comparison['target']:<40} "
+                f"{comparison['metric']}: {comparison['baseline']:.4g} -> "
+                f'{current}'
+            )
+    printers[verdict['verdict']](
+        ', '.join(f'{k}: {v}' for k, v in verdict['summary'].items())
+    )
+
+    if verdict['verdict'] == FAIL or (
+        args.strict and verdict['verdict'] == WARN
+    ):
+        sys.exit(1)
+
+
+def diff_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py diff',
+        description='Rank the modules that grew between two runs',
+    )
+    parser.add_argument(
+        'runs',
+        nargs='+',
+        help='Two run ids or core@target names (latest run), or a single '
+        'core@target to compare its two latest runs',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database of runs',
+    )
+    parser.add_argument(
+        '-m',
+        '--metric',
+        help="Metric to rank by, e.g. 'FFs' (default: LUTs, cells or area)",
+    )
+    parser.add_argument(
+        '-n', '--top', type=int, default=20, help='Modules to show'
+    )
+    args = parser.parse_args(argv)
+
+    if len(args.runs) > 2:
+        parser.error('at most two runs can be compared')
+
+    results_db = ResultsDB(args.results_db)
+    try:
+        old, new = resolve_runs(results_db, args.runs)
+    except ValueError as e:
+        print_red(f'Error: {e}')
+        sys.exit(1)
+    finally:
+        results_db.close()
+
+    old_metrics = old['metrics'] or {}
+    new_metrics = new['metrics'] or {}
+    metric = args.metric or PRIMARY_METRIC.get(new_metrics.get('backend'))
+    if metric is None:
+        print_red('Error: no per-module metrics for this backend')
+        sys.exit(1)
+
+    deltas = diff_modules(
+        old_metrics.get('modules', {}), new_metrics.get('modules', {}), metric
+    )
+    print_blue(
+        f"{metric}: run {old['id']} ({old['name']}) -> "
+        f"run {new['id']} ({new['name']})"
+    )
+    if not deltas:
+        print_green('No module changed')
+        return
+    for delta in deltas[: args.top]:
+        relative = (
+            f'{delta.relative * 100:+7.1f}%'
+            if delta.relative is not None
+            else '     new'
+        )
+        line = (
+            f'  {delta.delta:+12.6g} {relative}  '
+            f'{delta.old:12.6g} -> {delta.new:<12.6g} {delta.module}'
+        )
+        (print_yellow if delta.delta > 0 else print_green)(line)
+
+
+def qor_model_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py qor-model',
+        description='Train the post-route QoR predictor on stored runs',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database of runs',
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        default='qor_model.json',
+        help='Where the trained model is written',
+    )
+    parser.add_argument(
+        '--min-runs',
+        type=int,
+        default=MIN_TRAINING_RUNS,
+        help='Runs needed to train a model for a target',
+    )
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=100_000,
+        help='Newest successful runs used for training',
+    )
+    args = parser.parse_args(argv)
+
+    results_db = ResultsDB(args.results_db)
+    try:
+        records = results_db.history(limit=args.limit)
+    finally:
+        results_db.close()
 
-        files.append(
-            os.path.join(args.processor_ci_path, f'rtl/{args.core_id}.sv')
+    model = QoRModel.train(records, min_runs=args.min_runs)
+    if not model.models:
+        print_red(
+            f'Error: no target has {args.min_runs} runs to train on '
+            f'({len(records)} run(s) found)'
         )
+        sys.exit(1)
+
+    for backend, targets in sorted(model.models.items()):
+        print_blue(f'{backend}:')
+        for target, ridge in sorted(targets.items()):
+            print(
+                f'  {target:<28} {ridge.samples:6d} runs  '
+                f'LOO RMSE {ridge.loo_rmse:10.4g}  alpha {ridge.alpha:g}'
+            )
+    model.save(args.output)
+    print_green(f'Model saved to: {args.output}')
+
 
-    if args.flow == 'fpga':
-        run_fpga_flow(
-            args.technology,
-            files,
-            top_module=top_module,
-            get_reports=args.reports,
-            clean=args.clean,
-            report_path=args.report_path,
-            include_dirs=include_dirs,
+def paths_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py paths',
+        description='Rank the modules on the critical paths of past runs',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database of runs',
+    )
+    parser.add_argument(
+        '-t',
+        '--target',
+        action='append',
+        help='Restrict to a core@target name (repeatable)',
+    )
+    parser.add_argument(
+        '--runs',
+        type=int,
+        default=20,
+        help='Newest runs considered per core@target',
+    )
+    parser.add_argument(
+        '-n', '--top', type=int, default=20, help='Modules to show'
+    )
+    parser.add_argument(
+        '--run', type=int, help='Only list the critical paths of this run'
+    )
+    args = parser.parse_args(argv)
+
+    results_db = ResultsDB(args.results_db)
+    try:
+        if args.run is not None:
+            record = results_db.run(args.run)
+            if record is None:
+                print_red(f'Error: Run {args.run} not found')
+                sys.exit(1)
+            records = [record]
+        else:
+            records = [
+                record
+                for name in (args.target or results_db.names())
+                for record in results_db.history(name=name, limit=args.runs)
+            ]
+    finally:
+        results_db.close()
+
+    if args.run is not None:
+        print_blue(f"Critical paths of run {args.run} ({records[0]['name']})")
+        for path in run_paths(records[0]):
+            slack = (
+                f'{path.slack_ns:8.3f}'
+                if path.slack_ns is not None
+                else f'{"n/a":>8}'
+            )
+            delays = (
+                f'cell {path.cell_delay_ns:.3f} / net {path.net_delay_ns:.3f}'
+                if path.cell_delay_ns is not None
+                else ''
+            )
+            print(
+                f'  {slack} ns  [{path.group}] {path.startpoint} -> '
+                f'{path.endpoint}  levels {path.logic_levels} {delays}'
+            )
+        return
+
+    modules = limiting_modules(records)
+    if not modules:
+        print_yellow('No critical paths recorded')
+        return
+    print_blue(
+        f'{"Runs":>5} {"Worst":>5} {"Targets":>7} {"WNS(ns)":>9}  Module'
+    )
+    for module in modules[: args.top]:
+        slack = (
+            f'{module.worst_slack_ns:9.3f}'
+            if module.worst_slack_ns is not None
+            else f'{"n/a":>9}'
+        )
+        print(
+            f'{module.runs:5d} {module.worst:5d} {len(module.names):7d} '
+            f'{slack}  {module.module}'
         )
+
+
+def simulate_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py simulate',
+        description='Run benchmark programs on Verilator models of the '
+        'cores and combine their cycle counts with the stored Fmax',
+    )
+    parser.add_argument(
+        'cores',
+        nargs='*',
+        help='Core ids (default: every core in the config directory)',
+    )
+    parser.add_argument(
+        '-b',
+        '--benchmarks',
+        required=True,
+        help='YAML benchmark set (see core/simulation.py)',
+    )
+    parser.add_argument(
+        '-c',
+        '--config',
+        default=DEFAULT_CONFIG_PATH,
+        help='Path to the config directory',
+    )
+    parser.add_argument(
+        '-P',
+        '--processor-ci-path',
+        default=PROCESSOR_CI_PATH,
+        help='Path to the Processor CI directory',
+    )
+    parser.add_argument(
+        '-U',
+        '--use-pci-wrapper',
+        action='store_true',
+        help='Simulate the core inside the Processor CI wrapper RTL',
+    )
+    parser.add_argument(
+        '--board',
+        default=DEFAULT_BOARD,
+        help='Board whose defines (processor_ci_defines.vh) are used',
+    )
+    parser.add_argument('--clock-port', help='Clock input of the top')
+    parser.add_argument('--reset-port', help='Reset input of the top')
+    parser.add_argument(
+        '--reset-active',
+        choices=['low', 'high'],
+        help='Reset polarity (default: low if the name ends in n)',
+    )
+    parser.add_argument(
+        '--done-port',
+        help='Output of the top that ends the benchmark when high '
+        '(besides $finish)',
+    )
+    parser.add_argument(
+        '--verilator-arg',
+        action='append',
+        default=[],
+        help='Extra Verilator argument (repeatable)',
+    )
+    parser.add_argument(
+        '--activity',
+        metavar='DIR',
+        help='Trace the runs and write each one\'s switching activity to '
+        'DIR/<core>_<benchmark>.saif (for --activity of the flows)',
+    )
+    parser.add_argument(
+        '--clock-mhz',
+        type=float,
+        help='Simulated clock, which sets the toggle rates of the activity '
+        '(default: CLOCK_FREQ of the board)',
+    )
+    parser.add_argument(
+        '-t',
+        '--target',
+        action='append',
+        help='Target whose stored Fmax is used (repeatable; default: every '
+        'target with a run of the core)',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database holding the Fmax of the cores',
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=DEFAULT_SIM_CACHE_PATH,
+        help='Directory of the compiled models',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Models built and benchmarks run in parallel',
+    )
+    parser.add_argument('-o', '--output', help='Write the results as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        benchmarks = load_benchmarks(args.benchmarks)
+        cores = [
+            resolve_core(
+                core_id,
+                args.config,
+                args.processor_ci_path,
+                args.use_pci_wrapper,
+            )
+            for core_id in core_ids(args.config, args.cores)
+        ]
+    except (OSError, ValueError) as e:
+        print_red(f'Error: {e}')
+        sys.exit(1)
+
+    options = HarnessOptions(
+        board=args.board,
+        clock_port=args.clock_port,
+        reset_port=args.reset_port,
+        reset_active_low=(
+            args.reset_active == 'low' if args.reset_active else None
+        ),
+        done_port=args.done_port,
+        verilator_args=args.verilator_arg,
+        clock_mhz=args.clock_mhz,
+    )
+    print_blue(
+        f'{len(benchmarks)} benchmark(s) on {len(cores)} core(s), '
+        f'{args.jobs} at a time'
+    )
+    results = run_suite(
+        cores,
+        benchmarks,
+        args.cache_dir,
+        options,
+        workers=args.jobs,
+        activity_dir=args.activity,
+    )
+
+    fmax: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(args.results_db):
+        results_db = ResultsDB(args.results_db)
+        try:
+            for core in cores:
+                fmax[core.core_id] = stored_fmax(
+                    results_db, core.core_id, args.target
+                )
+        finally:
+            results_db.close()
+    rows = summarize(results, fmax)
+
+    print_blue(
+        f'{"Core":<20} {"Benchmark":<12} {"Cycles":>12} {"Perf/MHz":>9}'
+    )
+    for row in rows:
+        if row['error']:
+            print_red(
+                f"{row['core_id']:<20} {row['benchmark']:<12} "
+                f"{row['error']}"
+            )
+            continue
+        print(
+            f"{row['core_id']:<20} {row['benchmark']:<12} "
+            f"{row['cycles']:>12} {row['perf_per_mhz']:>9.3f}"
+        )
+        if row['activity']:
+            print(f"  activity: {row['activity']}")
+        for target, values in row['targets'].items():
+            print(
+                f"  {target:<31} {values['fmax_mhz']:8.2f} MHz "
+                f"{values['execution_time_s'] * 1e3:10.3f} ms  "
+                f"score {values['score']:.2f}"
+            )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+    if any(row['error'] for row in rows):
+        sys.exit(1)
+
+
+def watch_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py watch',
+        description='Rerun jobs whenever their sources change; the job is '
+        'given by the flow arguments (see main.py --help) or --manifest',
+    )
+    parser.add_argument(
+        '-m', '--manifest', help='Watch every job of this YAML manifest'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1, help='Jobs run in parallel'
+    )
+    parser.add_argument(
+        '-c',
+        '--config',
+        default=DEFAULT_CONFIG_PATH,
+        help='Config directory used when the manifest does not set one',
+    )
+    parser.add_argument(
+        '-P',
+        '--processor-ci-path',
+        default=PROCESSOR_CI_PATH,
+        help='Path to the Processor CI directory',
+    )
+    parser.add_argument(
+        '--runs-dir',
+        default=DEFAULT_RUNS_PATH,
+        help='Directory holding the work directory of each job',
+    )
+    parser.add_argument(
+        '--results-db',
+        help='Also record every finished run in this database',
+    )
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help='Seconds without changes that end a burst of edits',
+    )
+    parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='Poll modification times instead of using inotify',
+    )
+    parser.add_argument(
+        '--no-initial',
+        action='store_true',
+        help='Wait for a change before the first run',
+    )
+    args, rest = parser.parse_known_args(argv)
+
+    if args.manifest:
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        try:
+            manifest = load_manifest(
+                args.manifest, args.config, args.processor_ci_path, args.jobs
+            )
+        except (OSError, ValueError) as e:
+            print_red(f'Error: {e}')
+            sys.exit(1)
+        jobs = list(manifest.graph)
     else:
-        run_asic_flow(
-            args.technology,
-            files,
-            top_module=top_module,
-            get_reports=args.reports,
-            clean=args.clean,
-            report_path=args.report_path,
-            include_dirs=include_dirs,
+        flow_parser = argparse.ArgumentParser(prog='main.py watch')
+        add_flow_arguments(flow_parser)
+        jobs = [job_from_args(flow_parser.parse_args(rest))]
+
+    results_db = ResultsDB(args.results_db) if args.results_db else None
+    try:
+        JobWatcher(
+            jobs,
+            args.runs_dir,
+            parallel=args.jobs,
+            debounce=args.debounce,
+            poll=args.poll,
+            results_db=results_db,
+        ).run(initial=not args.no_initial)
+    finally:
+        if results_db is not None:
+            results_db.close()
+
+
+def bench_parsers_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py bench-parsers',
+        description='Benchmark the report parsers on synthetic reports',
+    )
+    parser.add_argument(
+        '--cases',
+        nargs='+',
+        choices=sorted(CASES),
+        help='Parsers to benchmark (default: all)',
+    )
+    parser.add_argument(
+        '--sizes',
+        nargs='+',
+        choices=list(SIZES),
+        default=DEFAULT_SIZES,
+        help='Report sizes to generate',
+    )
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        default=3,
+        help='Timed parses per report; the fastest is kept',
+    )
+    parser.add_argument(
+        '--workdir', help='Keep the generated reports in this directory'
+    )
+    parser.add_argument(
+        '-b',
+        '--baseline',
+        default=DEFAULT_PARSER_BASELINE,
+        help='Baseline JSON to compare against',
+    )
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help='Write the results as the new baseline instead of comparing',
+    )
+    parser.add_argument(
+        '--max-slowdown',
+        type=float,
+        default=DEFAULT_MAX_SLOWDOWN,
+        help='Allowed time ratio over the baseline',
+    )
+    parser.add_argument(
+        '--max-memory-growth',
+        type=float,
+        default=DEFAULT_MAX_MEMORY_GROWTH,
+        help='Allowed peak memory ratio over the baseline',
+    )
+    parser.add_argument('-o', '--output', help='Write the results as JSON')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.cases, args.sizes, args.repeat, args.workdir
+    )
+
+    print_blue(
+        f"{'Parser':<20} {'Size':<7} {'Bytes':>11} {'ms':>10} "
+        f"{'MB/s':>9} {'Peak KiB':>10}  Result"
+    )
+    for r in results['results']:
+        line = (
+            f"{r['case']:<20} {r['size']:<7} {r['bytes']:>11} "
+            f"{r['seconds'] * 1e3:>10.2f} {r['mb_per_s']:>9.1f} "
+            f"{r['peak_kib']:>10.0f}  "
         )
+        if r['correct']:
+            print_green(line + 'ok')
+        else:
+            print_red(line + f"WRONG: {r['error']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        if not all(r['correct'] for r in results['results']):
+            print_red('Refusing to save a baseline with wrong results')
+            sys.exit(1)
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print_green(f'Baseline saved to: {args.baseline}')
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    else:
+        print_yellow(f'No baseline at {args.baseline}; checking results only')
+        baseline = {'calibration_s': results['calibration_s'], 'results': []}
+
+    problems = compare_to_baseline(
+        results, baseline, args.max_slowdown, args.max_memory_growth
+    )
+    for problem in problems:
+        print_red(f'  {problem}')
+    if problems:
+        sys.exit(1)
+    print_green('All parsers correct and within the baseline')
+
+
+def loadtest_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py loadtest',
+        description='Measure the harness overhead with simulated EDA tools',
+    )
+    parser.add_argument(
+        '-n', '--count', type=int, default=10_000, help='Number of jobs'
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Jobs run concurrently',
+    )
+    parser.add_argument(
+        '-m',
+        '--mode',
+        choices=MODES,
+        default='executor',
+        help='Scheduler under test',
+    )
+    parser.add_argument(
+        '-t',
+        '--targets',
+        nargs='+',
+        default=DEFAULT_TARGETS,
+        help='Boards, PDKs or manifest aliases the jobs cycle through',
+    )
+    parser.add_argument(
+        '--sleep',
+        type=float,
+        default=0.0,
+        help='Seconds each fake tool call sleeps',
+    )
+    parser.add_argument(
+        '--cpu',
+        type=float,
+        default=0.0,
+        help='Seconds of CPU each fake tool call burns',
+    )
+    parser.add_argument(
+        '--memory',
+        type=int,
+        default=0,
+        help='MB each fake tool call allocates',
+    )
+    parser.add_argument(
+        '--jitter',
+        type=float,
+        default=0.0,
+        help='Relative random spread of sleep and CPU time',
+    )
+    parser.add_argument(
+        '--units',
+        type=int,
+        default=1,
+        help='Size of the fake reports (timing paths, rows, ...)',
+    )
+    parser.add_argument(
+        '--fail-rate',
+        type=float,
+        default=0.0,
+        help='Probability of a fake tool call failing',
+    )
+    parser.add_argument(
+        '--no-reports',
+        action='store_true',
+        help='Do not parse reports after each job',
+    )
+    parser.add_argument(
+        '--workdir', help='Keep tools, runs and the job log here'
+    )
+    parser.add_argument('-o', '--output', help='Write the summary as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        targets = expand_targets(args.targets)
+    except ValueError as e:
+        print_red(f'Error: {e}')
+        sys.exit(1)
+
+    print_blue(
+        f'Running {args.count} job(s) on {args.jobs} worker(s) '
+        f'({args.mode})...'
+    )
+    summary = run_load_test(
+        args.count,
+        args.jobs,
+        mode=args.mode,
+        targets=targets,
+        load=FakeToolLoad(
+            sleep_s=args.sleep,
+            cpu_s=args.cpu,
+            memory_mb=args.memory,
+            jitter=args.jitter,
+            units=args.units,
+            fail_rate=args.fail_rate,
+        ),
+        workdir=args.workdir,
+        get_reports=not args.no_reports,
+    )
+
+    print_blue(
+        f"{summary['jobs']} job(s) in {summary['wall_s']:.1f}s: "
+        f"{summary['throughput_jobs_per_s']:.2f} jobs/s, "
+        f"{summary['tool_utilization']:.0%} of worker time in tools, "
+        f"{summary['failed']} failed"
+    )
+    print(
+        f"{'(seconds)':<22} {'mean':>9} {'p50':>9} {'p95':>9} "
+        f"{'p99':>9} {'max':>9}"
+    )
+    for key, label in (
+        ('job_s', 'Job'),
+        ('tool_s', 'In tools'),
+        ('overhead_s', 'Harness overhead'),
+        ('scheduler_latency_s', 'Scheduler latency'),
+    ):
+        stats = summary[key]
+        if stats:
+            print(
+                f'{label:<22} '
+                + ' '.join(
+                    f'{stats[p]:>9.4f}'
+                    for p in ('mean', 'p50', 'p95', 'p99', 'max')
+                )
+            )
+    if args.workdir:
+        print_blue(f"Job output logged to: {summary['log']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+
+def artifacts_command(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='main.py artifacts',
+        description='Apply retention policies to job work directories',
+    )
+    parser.add_argument(
+        'op',
+        choices=['usage', 'prune'],
+        help='Show disk usage per artifact class, or prune',
+    )
+    parser.add_argument(
+        '--results-db',
+        default=DEFAULT_RESULTS_DB,
+        help='SQLite database listing the runs',
+    )
+    parser.add_argument(
+        '-q', '--queue', help='Also manage the runs of this work queue'
+    )
+    parser.add_argument(
+        '--keep-checkpoints',
+        type=int,
+        default=3,
+        help='Runs per core@target whose checkpoints are kept',
+    )
+    parser.add_argument(
+        '--quota',
+        help='Evict least recently used artifacts above this size '
+        '(e.g. 500G)',
+    )
+    parser.add_argument(
+        '-n',
+        '--dry-run',
+        action='store_true',
+        help='Only list what would be done',
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        quota = parse_size(args.quota) if args.quota else None
+    except ValueError as e:
+        print_red(f'Error: {e}')
+        sys.exit(1)
+
+    runs = []
+    if os.path.exists(args.results_db):
+        results_db = ResultsDB(args.results_db)
+        try:
+            runs.extend(runs_from_results_db(results_db))
+        finally:
+            results_db.close()
+    if args.queue:
+        runs.extend(runs_from_queue(FileQueue(args.queue)))
+
+    manager = ArtifactManager(
+        default_policies(args.keep_checkpoints), quota, args.dry_run
+    )
+
+    if args.op == 'usage':
+        usage = manager.usage(runs)
+        print_blue(f'{len(runs)} run(s)')
+        for name, size in sorted(usage.items(), key=lambda kv: -kv[1]):
+            print(f'  {name:<15} {format_size(size):>12}')
+        print(f"  {'total':<15} {format_size(sum(usage.values())):>12}")
+        return
+
+    summary = manager.prune(runs)
+    for action in summary.actions:
+        print_yellow(f'  {action}')
+    prefix = 'Would free' if args.dry_run else 'Freed'
+    print_green(
+        f'{prefix} {format_size(summary.deleted_bytes)} deleted, '
+        f'{format_size(summary.compressed_bytes)} compressed, '
+        f'{format_size(summary.evicted_bytes)} evicted; '
+        f'{format_size(summary.usage_bytes)} in use'
+    )
+
+
+COMMANDS: Dict[str, Callable[[List[str]], None]] = {
+    'submit': submit_command,
+    'worker': worker_command,
+    'status': status_command,
+    'daemon': daemon_command,
+    'client': client_command,
+    'batch': batch_command,
+    'regress': regress_command,
+    'diff': diff_command,
+    'paths': paths_command,
+    'qor-model': qor_model_command,
+    'simulate': simulate_command,
+    'watch': watch_command,
+    'bench-parsers': bench_parsers_command,
+    'loadtest': loadtest_command,
+    'artifacts': artifacts_command,
+}
+
+
+def main() -> None:
+    # Opções de log valem para todos os comandos, em qualquer posição
+    log_parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    log_parser.add_argument('--log-level', choices=list(LOG_LEVELS))
+    log_parser.add_argument('--log-format', choices=LOG_FORMATS)
+    log_args, argv = log_parser.parse_known_args(sys.argv[1:])
+    configure(log_args.log_level, log_args.log_format)
+
+    # Subcommands are opt-in; plain flags keep running a single flow
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+    else:
+        run_command(argv)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,5 @@
+"""Makes the repository importable when pytest runs from anywhere."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
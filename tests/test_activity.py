@@ -0,0 +1,84 @@
+"""VCD to SAIF conversion of :func:`core.activity.vcd_to_saif`."""
+import io
+import re
+from typing import Dict, Tuple
+
+from core.activity import vcd_to_saif
+
+VCD = """\
+$date today $end
+$timescale 1 ns $end
+$scope module tb $end
+$scope module dut $end
+$var wire 1 ! clk $end
+$var reg 2 " state [1:0] $end
+$var wire 1 ! clk_alias $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+$dumpvars
+0!
+b0x "
+$end
+#10
+1!
+b10 "
+#20
+0!
+b11 "
+#40
+"""
+
+
+def _convert(vcd: str) -> Tuple[int, int, str]:
+    saif = io.StringIO()
+    nets, duration = vcd_to_saif(io.StringIO(vcd), saif, design='tb')
+    return nets, duration, saif.getvalue()
+
+
+def _nets(saif: str) -> Dict[str, Dict[str, int]]:
+    """T0, T1, TX and TC of every net of a SAIF."""
+    return {
+        name: {
+            key: int(value)
+            for key, value in re.findall(r'\((T0|T1|TX|TC) (\d+)\)', body)
+        }
+        for name, body in re.findall(
+            r'\((\S+)\n\s+(\(T0 .*?\(IG 0\))', saif, re.S
+        )
+    }
+
+
+def test_header_and_duration():
+    nets, duration, saif = _convert(VCD)
+    assert (nets, duration) == (4, 40)
+    assert '(DESIGN "tb")' in saif
+    assert '(TIMESCALE 1 ns)' in saif
+    assert '(DURATION 40)' in saif
+    assert re.search(r'\(INSTANCE tb\n\s+\(INSTANCE dut\n', saif)
+
+
+def test_toggle_counts_and_times():
+    nets = _nets(_convert(VCD)[2])
+    # clk: 0 em [0,10) e [20,40), 1 em [10,20); duas transições 0/1
+    assert nets['clk'] == {'T0': 30, 'T1': 10, 'TX': 0, 'TC': 2}
+    # Alias do mesmo identificador: mesma atividade
+    assert nets['clk_alias'] == nets['clk']
+    # state[1]: 0 -> 1 em 10; state[0]: x até 10, depois 0 e 1 em 20
+    assert nets['state\\[1\\]'] == {'T0': 10, 'T1': 30, 'TX': 0, 'TC': 1}
+    assert nets['state\\[0\\]'] == {'T0': 10, 'T1': 20, 'TX': 10, 'TC': 1}
+
+
+def test_short_vector_values_are_extended():
+    vcd = VCD.replace('b10 "', 'b1 "')
+    nets = _nets(_convert(vcd)[2])
+    # 'b1' num vetor de 2 bits é 01
+    assert nets['state\\[1\\]']['T0'] == 20
+    assert nets['state\\[0\\]']['T1'] == 30
+
+
+def test_empty_dump():
+    nets, duration, saif = _convert(VCD.split('#0')[0])
+    assert (nets, duration) == (4, 0)
+    assert '(DURATION 0)' in saif
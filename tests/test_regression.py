@@ -0,0 +1,106 @@
+"""Verdicts of :func:`core.regression.check_regressions`."""
+import itertools
+from typing import Dict, Optional
+
+import pytest
+
+from core.job import Job
+from core.metrics import ClockMetrics, FlowMetrics, ResourceMetrics
+from core.regression import (
+    FAIL,
+    PASS,
+    WARN,
+    BaselineStore,
+    RegressionPolicy,
+    check_regressions,
+    update_baselines,
+)
+from core.results import ResultsDB
+
+TARGET = 'a@xilinx_vc709'
+# A execução mais nova é a de maior 'started'
+_CLOCK = itertools.count()
+
+
+def _metrics(fmax: float, luts: int = 1000) -> Dict:
+    return FlowMetrics(
+        backend='vivado',
+        technology='xilinx_vc709',
+        top_module='top',
+        clocks={'clk': ClockMetrics(fmax)},
+        resources={'LUT': ResourceMetrics(luts)},
+    ).to_dict()
+
+
+def _record(
+    db: ResultsDB,
+    metrics: Optional[Dict],
+    core_id: str = 'a',
+    profile: str = 'full',
+) -> None:
+    job = Job(
+        'fpga', 'xilinx_vc709', ['a.sv'], core_id=core_id, profile=profile
+    )
+    db.record_run(job, 'done', float(next(_CLOCK)), 1.0, metrics=metrics)
+
+
+@pytest.fixture
+def db(tmp_path):
+    results = ResultsDB(str(tmp_path / 'results.db'))
+    yield results
+    results.close()
+
+
+@pytest.fixture
+def store(tmp_path, db):
+    # Linha de base de cinco seeds com um pouco de ruído no Fmax
+    for fmax in (100.0, 101.0, 99.0, 100.5, 99.5):
+        _record(db, _metrics(fmax))
+    baselines = BaselineStore(str(tmp_path / 'baselines.json'))
+    assert update_baselines(db, baselines) == [TARGET]
+    return baselines
+
+
+@pytest.mark.parametrize(
+    'fmax, verdict', [(100.2, PASS), (97.0, WARN), (90.0, FAIL)]
+)
+def test_fmax_degradation_bands(db, store, fmax, verdict):
+    _record(db, _metrics(fmax))
+    report = check_regressions(db, store, RegressionPolicy())
+    assert report['verdict'] == verdict
+    assert report['targets'] == {TARGET: verdict}
+    assert report['missing'] == []
+
+
+def test_improvement_passes(db, store):
+    _record(db, _metrics(120.0, luts=900))
+    report = check_regressions(db, store, RegressionPolicy())
+    assert report['verdict'] == PASS
+
+
+def test_missing_metric_fails(db, store):
+    metrics = _metrics(100.0)
+    metrics['resources'] = {}
+    _record(db, metrics)
+    report = check_regressions(db, store, RegressionPolicy())
+    assert report['verdict'] == FAIL
+    (missing,) = [c for c in report['comparisons'] if c['current'] is None]
+    assert missing['metric'] == 'resource:LUT'
+
+
+def test_target_without_new_run_is_missing(db, store):
+    report = check_regressions(db, store, RegressionPolicy())
+    assert report['verdict'] == WARN
+    assert report['missing'] == [TARGET]
+
+    report = check_regressions(
+        db, store, RegressionPolicy(), require_all=True
+    )
+    assert report['verdict'] == FAIL
+    assert report['summary'][FAIL] == 1
+
+
+def test_synth_only_runs_do_not_count(db, store):
+    _record(db, _metrics(50.0), profile='synth')
+    report = check_regressions(db, store, RegressionPolicy())
+    assert report['missing'] == [TARGET]
@@ -0,0 +1,157 @@
+"""Reuse, invalidation and failures of :class:`core.stages.StageGraph`."""
+from typing import Dict, List
+
+import pytest
+
+from core.stages import STATE_FILE, Stage, StageError, StageGraph
+
+
+def _write(path: str, calls: List[str], name: str) -> None:
+    calls.append(name)
+    with open(path, 'w') as f:
+        f.write(name)
+
+
+def _graph(calls: List[str]) -> StageGraph:
+    return StageGraph(
+        [
+            Stage(
+                'synth',
+                lambda: _write('synth.out', calls, 'synth'),
+                inputs=['top.v'],
+                outputs=['synth.out'],
+            ),
+            Stage(
+                'route',
+                lambda: _write('route.out', calls, 'route'),
+                deps=['synth'],
+                outputs=['route.out'],
+            ),
+            Stage(
+                'report',
+                lambda: calls.append('report'),
+                deps=['route'],
+                cache=False,
+                tool=False,
+            ),
+        ]
+    )
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'top.v').write_text('module top; endmodule\n')
+    return tmp_path
+
+
+def test_second_run_reuses_stages(workdir):
+    calls: List[str] = []
+    assert _graph(calls).run() == {
+        'synth': 'done',
+        'route': 'done',
+        'report': 'done',
+    }
+    assert (workdir / STATE_FILE).exists()
+
+    calls.clear()
+    status = _graph(calls).run()
+    assert status['synth'] == status['route'] == 'cached'
+    assert calls == ['report']
+
+
+def test_input_edit_invalidates_dependents(workdir):
+    _graph([]).run()
+    (workdir / 'top.v').write_text('module top(input a); endmodule\n')
+
+    calls: List[str] = []
+    _graph(calls).run()
+    assert calls == ['synth', 'route', 'report']
+
+
+def test_missing_output_runs_only_that_stage(workdir):
+    _graph([]).run()
+    (workdir / 'route.out').unlink()
+
+    calls: List[str] = []
+    status = _graph(calls).run()
+    assert status['synth'] == 'cached'
+    assert calls == ['route', 'report']
+
+
+def test_stage_without_outputs_fails(workdir):
+    calls: List[str] = []
+    graph = StageGraph(
+        [
+            Stage('synth', lambda: calls.append('synth'), outputs=['x']),
+            Stage('route', lambda: calls.append('route'), deps=['synth']),
+        ]
+    )
+    with pytest.raises(StageError):
+        graph.run()
+    assert calls == ['synth']
+    assert not (workdir / STATE_FILE).exists()
+
+
+def test_failed_stage_is_not_reused(workdir):
+    def fail() -> None:
+        with open('synth.out', 'w') as f:
+            f.write('partial')
+        raise RuntimeError('tool failed')
+
+    graph = StageGraph([Stage('synth', fail, outputs=['synth.out'])])
+    with pytest.raises(RuntimeError):
+        graph.run()
+
+    calls: List[str] = []
+    _graph(calls).run()
+    assert calls[0] == 'synth'
+
+
+def test_batch_runs_uncached_chain_at_once(workdir):
+    batches: List[List[str]] = []
+
+    def batch(names: List[str]) -> None:
+        batches.append(list(names))
+        for name in names:
+            _write(f'{name}.out', [], name)
+
+    def graph() -> StageGraph:
+        deps: Dict[str, List[str]] = {
+            'synth': [],
+            'place': ['synth'],
+            'route': ['place'],
+        }
+        return StageGraph(
+            [
+                Stage(
+                    name,
+                    lambda name=name: batch([name]),
+                    deps=deps[name],
+                    outputs=[f'{name}.out'],
+                    batch=batch,
+                )
+                for name in deps
+            ]
+        )
+
+    graph().run()
+    assert batches == [['synth', 'place', 'route']]
+
+    batches.clear()
+    (workdir / 'place.out').unlink()
+    (workdir / 'route.out').unlink()
+    graph().run()
+    assert batches == [['place', 'route']]
+
+
+def test_unknown_dependency_and_cycle_are_rejected():
+    with pytest.raises(ValueError):
+        StageGraph([Stage('a', lambda: None, deps=['b'])])
+    with pytest.raises(ValueError):
+        StageGraph(
+            [
+                Stage('a', lambda: None, deps=['b']),
+                Stage('b', lambda: None, deps=['a']),
+            ]
+        )
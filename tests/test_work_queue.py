@@ -0,0 +1,112 @@
+"""Leases, reaping and attempts of :class:`core.work_queue.FileQueue`."""
+import os
+import time
+
+from core.job import Job
+from core.work_queue import FileQueue, Worker
+
+
+def _job(core_id: str = 'a') -> Job:
+    return Job('fpga', 'xilinx_vc709', ['a.sv'], core_id=core_id)
+
+
+def test_claim_is_exclusive(tmp_path):
+    queue = FileQueue(str(tmp_path))
+    job = _job()
+    assert queue.submit(job)
+    assert not queue.submit(job)
+
+    assert queue.try_claim(job.job_id, 'w1')
+    assert not queue.try_claim(job.job_id, 'w2')
+    assert queue.lease_owner(job.job_id) == 'w1'
+    assert queue.status()['running'] == 1
+
+
+def test_heartbeat_fails_once_lease_is_lost(tmp_path):
+    queue = FileQueue(str(tmp_path))
+    job = _job()
+    queue.submit(job)
+    queue.try_claim(job.job_id, 'w1')
+
+    assert queue.heartbeat(job.job_id, 'w1')
+    assert not queue.heartbeat(job.job_id, 'w2')
+    queue.release(job.job_id, 'w1')
+    assert not queue.heartbeat(job.job_id, 'w1')
+    assert queue.try_claim(job.job_id, 'w2')
+
+
+def test_reap_breaks_only_stale_leases(tmp_path):
+    queue = FileQueue(str(tmp_path))
+    stale, fresh = _job('stale'), _job('fresh')
+    for job in (stale, fresh):
+        queue.submit(job)
+        queue.try_claim(job.job_id, 'w1')
+    # Heartbeat parado há uma hora
+    old = time.time() - 3600
+    os.utime(
+        os.path.join(str(tmp_path), 'leases', f'{stale.job_id}.lease'),
+        (old, old),
+    )
+
+    assert queue.reap_stale_leases(lease_timeout=60) == [stale.job_id]
+    assert queue.lease_owner(stale.job_id) is None
+    assert queue.lease_owner(fresh.job_id) == 'w1'
+    assert queue.try_claim(stale.job_id, 'w2')
+
+
+def test_claim_after_finish_is_refused(tmp_path):
+    queue = FileQueue(str(tmp_path))
+    job = _job()
+    queue.submit(job)
+    queue.try_claim(job.job_id, 'w1')
+    queue.complete(job.job_id, 'w1', {'job_id': job.job_id}, failed=False)
+
+    assert not queue.try_claim(job.job_id, 'w2')
+    assert queue.status() == {
+        'pending': 0,
+        'running': 0,
+        'done': 1,
+        'failed': 0,
+    }
+    assert not queue.submit(job)
+
+
+def test_worker_retries_then_fails(tmp_path):
+    queue = FileQueue(str(tmp_path))
+    job = _job()
+    queue.submit(job)
+    workdirs = []
+
+    def runner(job, workdir):
+        workdirs.append(workdir)
+        raise RuntimeError('tool failed')
+
+    worker = Worker(queue, runner=runner, max_attempts=2, job_logs=False)
+    assert worker.run() == 2
+    assert workdirs == [
+        queue.work_dir(job.job_id, 1),
+        queue.work_dir(job.job_id, 2),
+    ]
+    (record,) = queue.results()
+    assert record['status'] == 'failed'
+    assert record['attempt'] == 2
+    assert 'tool failed' in record['error']
+
+
+def test_worker_gives_up_after_lost_attempts(tmp_path):
+    queue = FileQueue(str(tmp_path))
+    job = _job()
+    queue.submit(job)
+    # Tentativas que começaram e nunca voltaram (worker morto)
+    queue.next_attempt(job.job_id)
+    queue.next_attempt(job.job_id)
+
+    def runner(job, workdir):
+        raise AssertionError('must not run again')
+
+    worker = Worker(queue, runner=runner, max_attempts=2, job_logs=False)
+    worker.run()
+    (record,) = queue.results()
+    assert record['status'] == 'failed'
+    assert 'worker lost' in record['error']
+    assert queue.status()['pending'] == 0